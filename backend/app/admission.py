@@ -0,0 +1,429 @@
+"""
+Admission Control - Opradox Excel Studio
+Memory-aware admission for uploads and queue jobs.
+
+Before a file is read into pandas its parsed footprint is estimated from
+cheap metadata: the <dimension> tag of the XLSX sheet (or the sheet XML
+size), a CSV sample, or the file size for XLS. Cells × a learned
+bytes-per-cell ratio × a per-format parse overhead gives the peak. The
+estimate is checked against a global memory budget:
+
+- run    : fits next to the current reservations → reserve and go
+- queue  : fits the budget, but not right now → wait (queue jobs) or 503
+- reject : larger than the whole budget / upload or row limits
+
+Reservations are tracked per running upload/job together with the actual
+memory measured afterwards, which also feeds the bytes-per-cell ratio.
+"""
+from __future__ import annotations
+import html
+import os
+import re
+import time
+import zipfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple, BinaryIO
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "50"))
+MAX_ROWS = int(os.getenv("MAX_ROWS", "1000000"))
+
+# Share of container/host memory that parsed data may use
+MEMORY_BUDGET_FRACTION = float(os.getenv("MEMORY_BUDGET_FRACTION", "0.6"))
+
+# Peak memory while parsing relative to the final DataFrame
+PARSE_OVERHEAD = {".xlsx": 3.0, ".xls": 2.5, ".csv": 1.5, ".parquet": 2.0, ".feather": 1.5, ".arrow": 1.2}
+
+# Starting bytes-per-cell (DataFrame size / cells); refined from real uploads
+DEFAULT_BYTES_PER_CELL = {".xlsx": 90.0, ".xls": 90.0, ".csv": 70.0, ".parquet": 24.0, ".feather": 24.0, ".arrow": 24.0}
+BYTES_PER_CELL_LEARN_RATE = 0.2
+
+# Fallbacks when no dimension metadata is available
+XLSX_XML_BYTES_PER_CELL = 40.0
+XLS_FILE_BYTES_PER_CELL = 12.0
+
+# Seconds a client is told to wait when the budget is momentarily full
+RETRY_AFTER_S = 10
+
+
+def _detect_memory_bytes() -> int:
+    """Container memory limit (cgroup v2/v1) or physical memory."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            raw = Path(path).read_text().strip()
+            if raw and raw != "max" and int(raw) < 1 << 60:
+                return int(raw)
+        except (OSError, ValueError):
+            continue
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return 4 * 1024 ** 3
+
+
+MEMORY_BUDGET_BYTES = int(os.getenv("MEMORY_BUDGET_MB", "0")) * 1024 ** 2 or int(
+    _detect_memory_bytes() * MEMORY_BUDGET_FRACTION
+)
+
+
+# ============================================================
+# FOOTPRINT ESTIMATION
+# ============================================================
+
+@dataclass
+class FootprintEstimate:
+    """Estimated memory need of parsing one table."""
+    ext: str
+    file_bytes: int
+    rows: int
+    cols: int
+    cells: int
+    bytes_per_cell: float
+    parsed_bytes: int
+    peak_bytes: int
+    source: str  # dimension | xml_size | sample | file_size | limits
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension ref="([A-Z]+)?(\d+)?(?::([A-Z]+)(\d+))?"')
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _xml_attr(tag: str, name: str) -> Optional[str]:
+    match = re.search(r'\s' + re.escape(name) + r'="([^"]*)"', tag)
+    return match.group(1) if match else None
+
+
+def xlsx_sheets(zf: zipfile.ZipFile) -> List[Tuple[str, Optional[str]]]:
+    """(name, relationship id) of every worksheet, from xl/workbook.xml only."""
+    try:
+        workbook = zf.read("xl/workbook.xml").decode("utf-8", "ignore")
+    except KeyError:
+        return []
+    # Attribute order differs between writers (openpyxl puts Id after Target)
+    return [
+        (html.unescape(_xml_attr(tag, "name") or ""), _xml_attr(tag, "r:id"))
+        for tag in re.findall(r'<(?:\w+:)?sheet\b[^>]*>', workbook)
+    ]
+
+
+def _xlsx_sheet_path(zf: zipfile.ZipFile, sheet_name: Optional[str]) -> Optional[str]:
+    """Zip path of the requested (or first) worksheet."""
+    try:
+        rels = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8", "ignore")
+    except KeyError:
+        return None
+    sheets = xlsx_sheets(zf)
+    if not sheets:
+        return None
+    rid = sheets[0][1]
+    if sheet_name is not None:
+        rid = next((r for name, r in sheets if name == sheet_name), rid)
+    for tag in re.findall(r'<Relationship\b[^>]*>', rels):
+        target = _xml_attr(tag, "Target")
+        if _xml_attr(tag, "Id") == rid and target:
+            target = target.lstrip("/")
+            return target if target.startswith("xl/") else f"xl/{target}"
+    return None
+
+
+def inspect_xlsx(fileobj: BinaryIO, sheet_name: Optional[str] = None) -> Tuple[int, int, str]:
+    """(rows, cols, source) from the sheet's <dimension> tag without parsing cells."""
+    with zipfile.ZipFile(fileobj) as zf:
+        path = _xlsx_sheet_path(zf, sheet_name)
+        if path is None or path not in zf.namelist():
+            xml_bytes = sum(i.file_size for i in zf.infolist() if i.filename.startswith("xl/worksheets/"))
+            return int(xml_bytes / XLSX_XML_BYTES_PER_CELL), 1, "xml_size"
+        with zf.open(path) as sheet:
+            head = sheet.read(64 * 1024)
+        match = _DIMENSION_RE.search(head)
+        if match and match.group(2):
+            c1, r1, c2, r2 = (g.decode() if g else None for g in match.groups())
+            if c2 and r2:
+                rows = int(r2) - int(r1) + 1
+                cols = _col_index(c2) - _col_index(c1 or "A") + 1
+            else:
+                rows, cols = 1, 1
+            # Writers that skip the tag often leave "A1" on a full sheet
+            xml_bytes = zf.getinfo(path).file_size
+            if rows * cols * XLSX_XML_BYTES_PER_CELL * 4 >= xml_bytes:
+                return rows, cols, "dimension"
+        xml_bytes = zf.getinfo(path).file_size
+        return int(xml_bytes / XLSX_XML_BYTES_PER_CELL), 1, "xml_size"
+
+
+def inspect_csv(fileobj: BinaryIO, file_bytes: int) -> Tuple[int, int, str]:
+    """(rows, cols, source) extrapolated from the first 64 KB."""
+    sample = fileobj.read(64 * 1024)
+    lines = sample.count(b"\n") or 1
+    header = sample.split(b"\n", 1)[0]
+    delimiter = b";" if header.count(b";") > header.count(b",") else b","
+    cols = header.count(delimiter) + 1
+    rows = int(file_bytes / max(len(sample), 1) * lines)
+    return rows, cols, "sample"
+
+
+class BytesPerCellModel:
+    """Exponential moving average of DataFrame bytes per cell, per format."""
+
+    def __init__(self):
+        self._ratio = dict(DEFAULT_BYTES_PER_CELL)
+        self._samples: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ext: str) -> float:
+        with self._lock:
+            return self._ratio.get(ext, 90.0)
+
+    def learn(self, ext: str, cells: int, actual_bytes: int) -> None:
+        if cells <= 0 or actual_bytes <= 0:
+            return
+        observed = actual_bytes / cells
+        with self._lock:
+            current = self._ratio.get(ext, observed)
+            self._ratio[ext] = current + BYTES_PER_CELL_LEARN_RATE * (observed - current)
+            self._samples[ext] = self._samples.get(ext, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {ext: {"bytes_per_cell": round(r, 1), "samples": self._samples.get(ext, 0)}
+                    for ext, r in self._ratio.items()}
+
+
+bytes_per_cell_model = BytesPerCellModel()
+
+
+def _estimate(ext: str, file_bytes: int, rows: int, cols: int, source: str) -> FootprintEstimate:
+    ratio = bytes_per_cell_model.get(ext)
+    cells = max(rows, 0) * max(cols, 1)
+    parsed = int(cells * ratio)
+    peak = int(parsed * PARSE_OVERHEAD.get(ext, 2.0))
+    if ext == ".xls":
+        # Uploads are memory-mapped (ingest.py); only xlrd copies the raw bytes
+        peak += file_bytes
+    return FootprintEstimate(ext, file_bytes, rows, cols, cells, round(ratio, 1), parsed, peak, source)
+
+
+def estimate_footprint(
+    fileobj: BinaryIO,
+    filename: str,
+    file_bytes: Optional[int] = None,
+    sheet_name: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> FootprintEstimate:
+    """
+    Estimate parse memory of an upload; the file position is restored.
+    columns: projection of a columnar upload (only those columns are read).
+    """
+    ext = Path(filename or "").suffix.lower()
+    start = fileobj.tell()
+    if file_bytes is None:
+        fileobj.seek(0, os.SEEK_END)
+        file_bytes = fileobj.tell()
+    try:
+        fileobj.seek(0)
+        if ext == ".xlsx":
+            rows, cols, source = inspect_xlsx(fileobj, sheet_name)
+        elif ext == ".csv":
+            rows, cols, source = inspect_csv(fileobj, file_bytes)
+        elif ext in (".parquet", ".feather", ".arrow"):
+            # Local import: columnar_io -> dtype_optimizer imports this module
+            from .columnar_io import inspect_columnar
+            rows, names = inspect_columnar(fileobj, ext)
+            wanted = set(columns or ())
+            cols = len(wanted) if wanted and wanted.issubset(names) else len(names)
+            source = "metadata"
+        else:
+            rows, cols, source = int(file_bytes / XLS_FILE_BYTES_PER_CELL), 1, "file_size"
+    except (zipfile.BadZipFile, OSError, KeyError, ValueError):
+        rows, cols, source = int(file_bytes / XLS_FILE_BYTES_PER_CELL), 1, "file_size"
+    finally:
+        fileobj.seek(start)
+    return _estimate(ext, file_bytes, rows, cols, source)
+
+
+def estimate_from_limits(limits: Dict[str, Any], default_ext: str = ".xlsx") -> Optional[FootprintEstimate]:
+    """
+    Estimate for a queue job from its declared limits
+    ({"input_bytes", "rows", "cols", "ext"}); None if nothing is declared.
+    """
+    file_bytes = int(limits.get("input_bytes") or 0)
+    rows = int(limits.get("rows") or 0)
+    if not file_bytes and not rows:
+        return None
+    ext = limits.get("ext") or default_ext
+    cols = int(limits.get("cols") or 1)
+    if not rows:
+        rows = int(file_bytes / (XLS_FILE_BYTES_PER_CELL * cols))
+    return _estimate(ext, file_bytes, rows, cols, "limits")
+
+
+def frame_memory_bytes(df: pd.DataFrame, sample: int = 1000) -> int:
+    """
+    DataFrame memory with object columns sized from a sample (deep=True on
+    every string of a million-row frame would cost more than the parse).
+    """
+    total = int(df.index.memory_usage())
+    n = len(df)
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object and n > sample:
+            picked = series.iloc[np.linspace(0, n - 1, sample).astype(int)]
+            total += int(picked.memory_usage(deep=True, index=False) / sample * n)
+        else:
+            total += int(series.memory_usage(deep=True, index=False))
+    return total
+
+
+# ============================================================
+# MEMORY BUDGET
+# ============================================================
+
+class MemoryBudget:
+    """Global budget with per-upload / per-job reservations."""
+
+    def __init__(self, budget_bytes: int = MEMORY_BUDGET_BYTES):
+        self.budget_bytes = int(budget_bytes)
+        self._reservations: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._reclaimers: List[Callable[[int], None]] = []
+        self.decisions = {"run": 0, "queue": 0, "reject": 0}
+
+    def reserved_bytes(self) -> int:
+        with self._lock:
+            return sum(r["reserved"] for r in self._reservations.values())
+
+    def decide(self, estimate: FootprintEstimate) -> Tuple[str, str]:
+        """("run" | "queue" | "reject", reason)."""
+        mb = 1024 ** 2
+        if estimate.file_bytes > MAX_UPLOAD_MB * mb:
+            action, reason = "reject", (
+                f"Dosya çok büyük: {estimate.file_bytes / mb:.1f} MB (limit {MAX_UPLOAD_MB} MB)"
+            )
+        elif estimate.source not in ("xml_size", "file_size") and estimate.rows > MAX_ROWS:
+            action, reason = "reject", (
+                f"Satır sayısı limiti aşıldı: ~{estimate.rows:,} satır (limit {MAX_ROWS:,})"
+            )
+        elif estimate.peak_bytes > self.budget_bytes:
+            action, reason = "reject", (
+                f"Tahmini bellek ihtiyacı {estimate.peak_bytes / mb:.0f} MB, "
+                f"sunucu bütçesi {self.budget_bytes / mb:.0f} MB"
+            )
+        elif not self.fits(estimate.peak_bytes) and not self.reclaim(estimate.peak_bytes):
+            action, reason = "queue", (
+                f"Sunucu belleği şu an dolu (ayrılmış {self.reserved_bytes() / mb:.0f} MB / "
+                f"{self.budget_bytes / mb:.0f} MB); işlem bekletiliyor"
+            )
+        else:
+            action, reason = "run", "ok"
+        with self._lock:
+            self.decisions[action] += 1
+        return action, reason
+
+    def fits(self, peak_bytes: int) -> bool:
+        return self.reserved_bytes() + peak_bytes <= self.budget_bytes
+
+    def add_reclaimer(self, reclaim: Callable[[int], None]) -> None:
+        """Register a cache that can give memory back: reclaim(bytes_needed)."""
+        self._reclaimers.append(reclaim)
+
+    def reclaim(self, peak_bytes: int) -> bool:
+        """Ask the registered caches to free space; True once peak_bytes fits."""
+        for reclaim in self._reclaimers:
+            if self.fits(peak_bytes):
+                break
+            reclaim(self.reserved_bytes() + peak_bytes - self.budget_bytes)
+        return self.fits(peak_bytes)
+
+    def reserve(self, key: str, peak_bytes: int, label: str = "") -> None:
+        with self._lock:
+            self._reservations[key] = {
+                "label": label,
+                "reserved": int(peak_bytes),
+                "actual": None,
+                "started_at": time.time(),
+            }
+
+    def record_actual(self, key: str, actual_bytes: int) -> None:
+        with self._lock:
+            if key in self._reservations:
+                self._reservations[key]["actual"] = int(actual_bytes)
+
+    def release(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._reservations.pop(key, None)
+
+    @contextmanager
+    def reservation(self, key: str, peak_bytes: int, label: str = ""):
+        self.reserve(key, peak_bytes, label)
+        try:
+            yield key
+        finally:
+            self.release(key)
+
+    def stats(self) -> Dict[str, Any]:
+        mb = 1024 ** 2
+        with self._lock:
+            running = [
+                {
+                    "key": key,
+                    "label": r["label"],
+                    "reserved_mb": round(r["reserved"] / mb, 1),
+                    "actual_mb": round(r["actual"] / mb, 1) if r["actual"] is not None else None,
+                    "age_s": round(time.time() - r["started_at"], 1),
+                }
+                for key, r in self._reservations.items()
+            ]
+            reserved = sum(r["reserved"] for r in self._reservations.values())
+            decisions = dict(self.decisions)
+        return {
+            "budget_mb": round(self.budget_bytes / mb, 1),
+            "reserved_mb": round(reserved / mb, 1),
+            "available_mb": round((self.budget_bytes - reserved) / mb, 1),
+            "max_upload_mb": MAX_UPLOAD_MB,
+            "max_rows": MAX_ROWS,
+            "decisions": decisions,
+            "bytes_per_cell": bytes_per_cell_model.to_dict(),
+            "running": running,
+        }
+
+
+memory_budget = MemoryBudget()
+
+
+def admit_upload(
+    fileobj: BinaryIO,
+    filename: str,
+    sheet_name: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> FootprintEstimate:
+    """
+    Estimate an upload and decide. Raises HTTPException 413 (reject) or
+    503 with Retry-After (budget momentarily full); returns the estimate
+    when the upload may be parsed now.
+    """
+    estimate = estimate_footprint(fileobj, filename, sheet_name=sheet_name, columns=columns)
+    action, reason = memory_budget.decide(estimate)
+    if action == "reject":
+        raise HTTPException(status_code=413, detail=reason)
+    if action == "queue":
+        raise HTTPException(status_code=503, detail=reason, headers={"Retry-After": str(RETRY_AFTER_S)})
+    return estimate
@@ -0,0 +1,354 @@
+"""
+Chunked Execution - Opradox Excel Studio
+Out-of-core execution of aggregation scenarios over large CSV/XLSX uploads.
+
+Scenarios whose result is a running aggregate (SUMIF, COUNTIF, frequency,
+pivot ...) expose partial_aggregator(params, sample) next to run(). Instead
+of materializing the whole file, CSVs are read with read_csv(chunksize=...)
+and XLSX sheets with the read-only streaming reader (xlsx_stream.py): every
+chunk is folded into its own partial, the partials are merged and only
+finalize() builds the (small) result, in the same shape run() returns.
+
+Row outputs (e.g. the matched rows of SUMIF) are kept as a bounded sample
+(RowSample) so a 5 GB export never comes back into memory through df_out.
+Column dtypes are inferred per chunk by pandas, as in the regular path.
+"""
+from __future__ import annotations
+import os
+import copy
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, BinaryIO, Sequence
+
+import pandas as pd
+from fastapi import UploadFile, HTTPException
+
+from .admission import (
+    MAX_UPLOAD_MB, MAX_ROWS, PARSE_OVERHEAD,
+    memory_budget, bytes_per_cell_model, estimate_footprint, inspect_xlsx,
+)
+from .ingest import ingest_file
+from .job_control import checkpoint
+from .xlsx_stream import iter_xlsx_chunks
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Upper bound of rows per chunk
+CHUNK_MAX_ROWS = int(os.getenv("CHUNKED_EXEC_ROWS", "200000"))
+CHUNK_MIN_ROWS = 1000
+
+# Target parsed size of one chunk; rows per chunk are derived from the column count
+CHUNK_MEMORY_MB = int(os.getenv("CHUNKED_EXEC_CHUNK_MB", "64"))
+
+# Uploads larger than MAX_UPLOAD_MB are still accepted in chunked mode, up to this size
+CHUNKED_MAX_UPLOAD_MB = int(os.getenv("CHUNKED_MAX_UPLOAD_MB", "10240"))
+
+# Auto mode switches to chunks when the estimated parse peak exceeds this share of the budget
+CHUNKED_AUTO_FRACTION = float(os.getenv("CHUNKED_AUTO_FRACTION", "0.25"))
+
+# Rows kept for df_out / Excel output of filter-style scenarios
+CHUNKED_SAMPLE_ROWS = int(os.getenv("CHUNKED_SAMPLE_ROWS", "10000"))
+
+# params["execution"]: auto | chunked | memory
+EXECUTION_MODES = ("auto", "chunked", "memory")
+
+# Formats that can be read chunk by chunk
+CHUNKED_EXTENSIONS = (".csv", ".xlsx")
+
+
+class NotChunkable(Exception):
+    """The scenario cannot run chunked with these params; the caller falls back to run()."""
+
+
+class RowSample:
+    """First `limit` rows of a streamed selection plus the total row count."""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = CHUNKED_SAMPLE_ROWS if limit is None else limit
+        self.frames: List[pd.DataFrame] = []
+        self.kept = 0
+        self.total = 0
+
+    def add(self, frame: pd.DataFrame) -> None:
+        self.total += len(frame)
+        room = self.limit - self.kept
+        if room > 0 and len(frame):
+            part = frame.iloc[:room]
+            self.frames.append(part)
+            self.kept += len(part)
+
+    def merge(self, other: "RowSample") -> "RowSample":
+        total = self.total + other.total
+        for frame in other.frames:
+            self.add(frame)
+        self.total = total
+        return self
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > self.kept
+
+    def frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if not self.frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(self.frames, ignore_index=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"rows_total": self.total, "rows_kept": self.kept, "truncated": self.truncated}
+
+
+class PartialAggregator:
+    """
+    Mergeable partial result of one scenario.
+
+    Subclasses resolve their parameters in __init__ (validated against the
+    first chunk), keep their running state in reset(), and implement
+    update(chunk), merge(other) and finalize(). spawn() returns an empty
+    partial with the same resolved parameters.
+    """
+
+    # Bounded output rows, if the scenario returns rows (see RowSample)
+    sample: Optional[RowSample] = None
+
+    # Criteria columns compared as text; read as str in every chunk so a
+    # blank cell in one chunk does not turn its 5 into "5.0"
+    text_columns: Sequence[str] = ()
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def merge(self, other: "PartialAggregator") -> "PartialAggregator":
+        raise NotImplementedError
+
+    def finalize(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def spawn(self) -> "PartialAggregator":
+        clone = copy.copy(self)
+        clone.reset()
+        return clone
+
+
+PartialFactory = Callable[[Dict[str, Any], pd.DataFrame], PartialAggregator]
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def chunk_rows_for(cols: int, ext: str = ".csv") -> int:
+    """Rows per chunk so one parsed chunk stays around CHUNK_MEMORY_MB."""
+    per_row = max(cols, 1) * bytes_per_cell_model.get(ext) * PARSE_OVERHEAD.get(ext, 2.0)
+    rows = int(CHUNK_MEMORY_MB * 1024 ** 2 / per_row)
+    return max(CHUNK_MIN_ROWS, min(CHUNK_MAX_ROWS, rows))
+
+
+def _probe_columns(source: BinaryIO, ext: str, header_row: int, sheet_name: Optional[str] = None) -> int:
+    start = source.tell()
+    try:
+        if ext == ".xlsx":
+            return inspect_xlsx(source, sheet_name)[1]
+        return len(pd.read_csv(source, header=header_row, nrows=1).columns)
+    except Exception:
+        return 1
+    finally:
+        source.seek(start)
+
+
+def iter_chunks(
+    source: BinaryIO,
+    ext: str,
+    chunk_rows: int,
+    header_row: int = 0,
+    sheet_name: Optional[str] = None,
+    header_rows: int = 1,
+    text_columns: Sequence[str] = (),
+) -> Iterator[pd.DataFrame]:
+    """
+    DataFrame chunks of a CSV or XLSX upload (index continues across chunks).
+    Other columns get their dtypes inferred per chunk.
+    """
+    if ext == ".xlsx":
+        return iter_xlsx_chunks(
+            source, sheet_name, header_row=header_row, header_rows=header_rows,
+            chunk_rows=chunk_rows, text_columns=text_columns,
+        )
+    dtype = {name: str for name in text_columns} or None
+    return iter(pd.read_csv(source, header=header_row, chunksize=chunk_rows, dtype=dtype))
+
+
+def _text_columns(factory: PartialFactory, params: Dict[str, Any], source: BinaryIO, ext: str, **options) -> List[str]:
+    """Text columns of the scenario, resolved on the first CHUNK_MIN_ROWS rows."""
+    start = source.tell()
+    reader = iter_chunks(source, ext, CHUNK_MIN_ROWS, **options)
+    try:
+        sample = next(reader, None)
+    finally:
+        if hasattr(reader, "close"):
+            reader.close()
+        source.seek(start)
+    if sample is None:
+        return []
+    return list(factory(params, sample).text_columns)
+
+
+def run_chunked(
+    factory: PartialFactory,
+    source: BinaryIO,
+    params: Dict[str, Any],
+    header_row: int = 0,
+    chunk_rows: Optional[int] = None,
+    size_bytes: Optional[int] = None,
+    ext: str = ".csv",
+    sheet_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Stream a CSV/XLSX through a scenario's partial aggregator and return the
+    finalized result (run()-shaped, plus technical_details.execution).
+    params["header_rows"] > 1 joins multi-row (merged) XLSX headers.
+    """
+    if chunk_rows is None:
+        chunk_rows = chunk_rows_for(_probe_columns(source, ext, header_row, sheet_name), ext)
+
+    started = time.perf_counter()
+    total: Optional[PartialAggregator] = None
+    prototype: Optional[PartialAggregator] = None
+    columns: List[str] = []
+    rows = chunks = 0
+
+    try:
+        options = dict(header_row=header_row, sheet_name=sheet_name, header_rows=int(params.get("header_rows") or 1))
+        reader = iter_chunks(
+            source, ext, chunk_rows, text_columns=_text_columns(factory, params, source, ext, **options), **options,
+        )
+        for chunk in reader:
+            if prototype is None:
+                columns = list(chunk.columns)
+                prototype = factory(params, chunk)
+            part = prototype.spawn()
+            part.update(chunk)
+            total = part if total is None else total.merge(part)
+            rows += len(chunk)
+            chunks += 1
+            del chunk, part
+            progress = min(source.tell() / size_bytes, 1.0) if size_bytes else None
+            checkpoint(progress, f"{rows:,} satır işlendi")
+    except (HTTPException, NotChunkable):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Dosya okunurken hata oluştu: {str(e)}")
+
+    if total is None:
+        raise HTTPException(status_code=400, detail="Dosyada hiç satır bulunamadı.")
+
+    result = total.finalize()
+    technical_details = result.setdefault("technical_details", {})
+    technical_details["input_rows"] = rows
+    technical_details["input_columns"] = columns
+    technical_details["execution"] = {
+        "mode": "chunked",
+        "format": ext.lstrip("."),
+        "chunks": chunks,
+        "chunk_rows": chunk_rows,
+        "rows": rows,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    if total.sample is not None:
+        technical_details["execution"]["output_sample"] = total.sample.to_dict()
+    return result
+
+
+# ============================================================
+# UPLOAD ROUTING
+# ============================================================
+
+def _upload_size(upload: UploadFile) -> int:
+    if upload.size is not None:
+        return int(upload.size)
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+def wants_chunked(mode: str, estimate) -> bool:
+    """Auto mode: chunk when the upload could not (or should not) be parsed whole."""
+    if mode == "chunked":
+        return True
+    if mode == "memory":
+        return False
+    return (
+        estimate.file_bytes > MAX_UPLOAD_MB * 1024 ** 2
+        or estimate.rows > MAX_ROWS
+        or estimate.peak_bytes > memory_budget.budget_bytes * CHUNKED_AUTO_FRACTION
+    )
+
+
+def run_upload_chunked(
+    factory: Optional[PartialFactory],
+    upload: UploadFile,
+    params_json: str,
+    header_row: int = 0,
+    sheet_name: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run a scenario on a CSV/XLSX upload chunk by chunk when it supports it and
+    the upload calls for it. Returns None when the regular (in-memory) path
+    should be used instead.
+    """
+    ext = Path(upload.filename or "").suffix.lower()
+    if factory is None or ext not in CHUNKED_EXTENSIONS:
+        return None
+    try:
+        params = json.loads(params_json)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(params, dict):
+        return None
+
+    mode = str(params.get("execution") or "auto").lower()
+    if mode not in EXECUTION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Geçersiz execution değeri: '{mode}'. Desteklenenler: {', '.join(EXECUTION_MODES)}",
+        )
+    if mode == "memory":
+        return None
+
+    size = _upload_size(upload)
+    if mode == "auto":
+        estimate = estimate_footprint(upload.file, upload.filename, file_bytes=size, sheet_name=sheet_name)
+        if not wants_chunked(mode, estimate):
+            return None
+
+    with ingest_file(upload.file, upload.filename, max_bytes=CHUNKED_MAX_UPLOAD_MB * 1024 ** 2) as ingested:
+        with ingested.open() as probe:
+            chunk_rows = chunk_rows_for(_probe_columns(probe, ext, header_row, sheet_name), ext)
+        chunk_peak = CHUNK_MEMORY_MB * 1024 ** 2
+        key = f"chunked:{uuid.uuid4().hex[:12]}"
+        try:
+            with memory_budget.reservation(key, chunk_peak, label=upload.filename):
+                with ingested.open() as buffer:
+                    result = run_chunked(
+                        factory, buffer, params, header_row=header_row,
+                        chunk_rows=chunk_rows, size_bytes=ingested.size,
+                        ext=ext, sheet_name=sheet_name,
+                    )
+        except NotChunkable as e:
+            print(f"[CHUNKED] {upload.filename}: parça modu kullanılamıyor ({e}); normal okuma")
+            upload.file.seek(0)
+            return None
+        result["technical_details"]["execution"]["content_sha256"] = ingested.sha256
+
+    print(
+        f"[CHUNKED] {upload.filename}: {result['technical_details']['input_rows']:,} satır, "
+        f"{result['technical_details']['execution']['chunks']} parça"
+    )
+    return result
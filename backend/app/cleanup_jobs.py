@@ -81,6 +81,22 @@ def run_all_cleanup() -> dict:
     
     shares_deleted, shares_errors = cleanup_expired_shares()
     
+    try:
+        from .dataset_store import cleanup_expired_datasets
+        datasets_deleted = cleanup_expired_datasets()
+    except Exception as e:
+        print(f"[CLEANUP] Dataset cleanup error: {e}")
+        datasets_deleted = 0
+    
+    try:
+        from .sql_engine import evict_idle_engines
+        from .sql_cache import cleanup_sql_cache
+        engines_disposed = evict_idle_engines()
+        cache_dropped = cleanup_sql_cache()
+    except Exception as e:
+        print(f"[CLEANUP] SQL cleanup error: {e}")
+        engines_disposed = cache_dropped = 0
+    
     elapsed_ms = int((time.time() - start) * 1000)
     
     return {
@@ -88,5 +104,14 @@ def run_all_cleanup() -> dict:
         "shares": {
             "deleted": shares_deleted,
             "errors": shares_errors
+        },
+        "datasets": {
+            "deleted": datasets_deleted
+        },
+        "sql_engines": {
+            "disposed": engines_disposed
+        },
+        "sql_cache": {
+            "dropped": cache_dropped
         }
     }
@@ -0,0 +1,217 @@
+"""
+Columnar IO - Opradox Excel Studio
+Parquet, Feather and Arrow IPC uploads and downloads (pyarrow, optional).
+
+Reading:
+- the row and column counts come from the file metadata (Parquet footer,
+  IPC schema and batch headers), so admission never decodes data;
+- only the requested columns are read (projection): Parquet skips the
+  other column chunks, IPC files do not read (or decompress) their buffers;
+- uncompressed IPC files are read straight from the upload's memory map
+  or bytearray (ingest.py) without copying; numeric columns without
+  nulls stay zero-copy through to_pandas(split_blocks=True) and text
+  columns become Arrow-backed strings instead of Python objects.
+
+Writing: .parquet (snappy), .feather (lz4 IPC file) and .arrow
+(uncompressed IPC file, readable zero-copy by the next tool).
+"""
+from __future__ import annotations
+import io
+import os
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from .dtype_optimizer import ARROW_STRING_DTYPE
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+COLUMNAR_EXTENSIONS = (".parquet", ".feather", ".arrow")
+
+# Download formats (same names as the extensions)
+COLUMNAR_FORMATS = tuple(ext.lstrip(".") for ext in COLUMNAR_EXTENSIONS)
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "snappy")
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def columnar_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet/Feather/Arrow dosyaları için sunucuda pyarrow kurulu olmalı.")
+    return pa
+
+
+# ============================================================
+# READING
+# ============================================================
+
+def _source(buffer: BinaryIO):
+    """Zero-copy Arrow reader over an in-memory or memory-mapped upload, else the file object."""
+    pa = _pyarrow()
+    raw = getattr(buffer, "raw", buffer)
+    start = buffer.tell()
+    if isinstance(raw, io.BytesIO):
+        # getvalue() shares the bytes object; an export of the BytesIO itself would block close()
+        data = pa.py_buffer(raw.getvalue())
+    elif hasattr(raw, "getbuffer"):
+        data = pa.py_buffer(raw.getbuffer())
+    else:
+        return buffer
+    return pa.BufferReader(data.slice(start) if start else data)
+
+
+def _ipc_reader(source):
+    """IPC file reader; falls back to the stream format (.arrow files may be either)."""
+    pa = _pyarrow()
+    import pyarrow.ipc as ipc
+    try:
+        return ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return ipc.open_stream(source)
+
+
+def inspect_columnar(buffer: BinaryIO, ext: str) -> Tuple[int, List[str]]:
+    """(rows, column names) from metadata only."""
+    source = _source(buffer)
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+        meta = pq.ParquetFile(source)
+        return meta.metadata.num_rows, list(meta.schema_arrow.names)
+    reader = _ipc_reader(source)
+    if hasattr(reader, "count_rows"):
+        # Reads the batch headers only, compressed bodies are not decoded
+        return reader.count_rows(), list(reader.schema.names)
+    # Stream format has no footer: batch headers are still read without decoding columns
+    table = reader.read_all()
+    return table.num_rows, list(table.schema.names)
+
+
+def _project(names: Sequence[str], columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Requested columns in file order; None = all. A name missing from the
+    file disables the projection, so the scenario's own error lists every
+    available column.
+    """
+    if not columns:
+        return None
+    wanted = set(columns)
+    if not wanted.issubset(names):
+        return None
+    return [name for name in names if name in wanted]
+
+
+def arrow_to_frame(table) -> pd.DataFrame:
+    """Arrow table as a DataFrame (zero-copy where possible, Arrow-backed text)."""
+    pa = _pyarrow()
+    mapper = None
+    if ARROW_STRING_DTYPE is not None:
+        strings = {pa.string(): ARROW_STRING_DTYPE, pa.large_string(): ARROW_STRING_DTYPE}
+        mapper = strings.get
+    return table.to_pandas(split_blocks=True, types_mapper=mapper)
+
+
+def read_columnar(
+    buffer: BinaryIO,
+    ext: str,
+    columns: Optional[Sequence[str]] = None,
+    nrows: Optional[int] = None,
+) -> pd.DataFrame:
+    """Parquet / Feather / Arrow IPC file as a DataFrame, optionally projected and limited."""
+    source = _source(buffer)
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        projection = _project(parquet.schema_arrow.names, columns)
+        if nrows is not None:
+            batch = next(parquet.iter_batches(batch_size=max(nrows, 1), columns=projection), None)
+            pa = _pyarrow()
+            table = pa.Table.from_batches([batch]) if batch is not None else parquet.schema_arrow.empty_table()
+        else:
+            table = parquet.read(columns=projection, use_threads=True)
+    else:
+        pa = _pyarrow()
+        reader = _ipc_reader(source)
+        projection = _project(reader.schema.names, columns)
+        file_format = hasattr(reader, "num_record_batches")
+        if nrows is not None:
+            # Previews: only the leading batches are read
+            batches, count = [], 0
+            batch_iter = (reader.get_batch(i) for i in range(reader.num_record_batches)) if file_format else reader
+            for batch in batch_iter:
+                batches.append(batch)
+                count += batch.num_rows
+                if count >= nrows:
+                    break
+            table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, nrows)
+        elif file_format and projection is not None:
+            # Only the projected columns' buffers are read (and decompressed)
+            import pyarrow.feather as feather
+            source.seek(0)
+            table = feather.read_table(source, columns=projection)
+        else:
+            table = reader.read_all()
+        if projection is not None:
+            table = table.select(projection)
+    return arrow_to_frame(table)
+
+
+# ============================================================
+# WRITING
+# ============================================================
+
+def _as_text(value):
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """Arrow table of a result frame; mixed-type object columns are written as text."""
+    pa = _pyarrow()
+    frame = df.copy(deep=False)
+    frame.columns = [str(c) for c in frame.columns]
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+    for position in range(frame.shape[1]):
+        column = frame.iloc[:, position]
+        if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) not in ("string", "empty"):
+            frame.isetitem(position, column.map(_as_text))
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def write_columnar(df: pd.DataFrame, path: str, fmt: str) -> None:
+    """Write df to path as parquet | feather | arrow."""
+    table = to_arrow_table(df)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression=PARQUET_COMPRESSION)
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+    elif fmt == "arrow":
+        import pyarrow.ipc as ipc
+        with ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
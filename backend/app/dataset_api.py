@@ -0,0 +1,169 @@
+"""
+Dataset API - Opradox Excel Studio
+Cursor-based paging over registered datasets and stored scenario results.
+
+GET    /data/{dataset_id}/page - one page (cursor, limit, sort, filters, columns)
+GET    /data/{dataset_id}      - dataset metadata
+DELETE /data/{dataset_id}      - drop a dataset
+POST   /data/register          - upload a file and register it as a dataset
+
+Ids are unguessable (see dataset_store.py): holding an id is what grants
+access, so there is deliberately no listing endpoint. Each /run result
+gets its own id, so concurrent runs of a scenario do not share pages.
+"""
+from __future__ import annotations
+import json
+import uuid
+from typing import Optional, List, Dict, Any
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+
+from .dataset_store import (
+    DEFAULT_PAGE_SIZE,
+    StaleCursorError,
+    register_dataset,
+    get_dataset,
+    get_page,
+    cursor_at,
+    delete_dataset,
+)
+
+router = APIRouter(prefix="/data", tags=["datasets"])
+
+
+def result_dataset_id(scenario_id: str) -> str:
+    """New dataset id for one /run result of a scenario."""
+    return f"result_{scenario_id}_{uuid.uuid4().hex}"
+
+
+def _parse_sort(sort: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Accepts either a JSON list ([{"column": "A", "direction": "desc"}])
+    or the compact form "A:desc,B".
+    """
+    if not sort:
+        return []
+    sort = sort.strip()
+    if sort.startswith("["):
+        try:
+            items = json.loads(sort)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="sort parametresi geçersiz JSON")
+        return [{"column": s["column"], "direction": s.get("direction", "asc")} for s in items]
+
+    result = []
+    for part in sort.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        col, direction = part, "asc"
+        if ":" in part and part.rsplit(":", 1)[1].lower() in ("asc", "desc"):
+            col, direction = part.rsplit(":", 1)
+        result.append({"column": col, "direction": direction.lower()})
+    return result
+
+
+def _parse_filters(filters: Optional[str]) -> List[Dict[str, Any]]:
+    if not filters:
+        return []
+    try:
+        items = json.loads(filters)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="filters parametresi geçersiz JSON")
+    if isinstance(items, dict):
+        items = [items]
+    return [
+        {"column": f.get("column"), "operator": f.get("operator", "eq"), "value": f.get("value", "")}
+        for f in items
+    ]
+
+
+def _parse_columns(columns: Optional[str]) -> Optional[List[str]]:
+    if not columns:
+        return None
+    columns = columns.strip()
+    if columns.startswith("["):
+        try:
+            return [str(c) for c in json.loads(columns)]
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="columns parametresi geçersiz JSON")
+    return [c.strip() for c in columns.split(",") if c.strip()]
+
+
+def _page_response(dataset_id: str, cursor, limit, sort, filters, columns, offset) -> Dict[str, Any]:
+    sort_list = _parse_sort(sort)
+    filter_list = _parse_filters(filters)
+
+    if get_dataset(dataset_id) is None:
+        raise HTTPException(status_code=404, detail="Veri seti bulunamadı veya süresi doldu.")
+
+    if cursor is None and offset:
+        cursor = cursor_at(dataset_id, offset, sort_list, filter_list)
+
+    try:
+        return get_page(
+            dataset_id,
+            cursor=cursor,
+            limit=limit,
+            sort=sort_list,
+            filters=filter_list,
+            columns=_parse_columns(columns),
+        )
+    except StaleCursorError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Veri seti bulunamadı veya süresi doldu.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ============================================================
+# ENDPOINTS
+# ============================================================
+
+@router.get("/{dataset_id}/page")
+async def get_dataset_page(
+    dataset_id: str,
+    cursor: Optional[str] = Query(None, description="Önceki yanıttaki next_cursor / prev_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, description="Sayfa başına satır"),
+    sort: Optional[str] = Query(None, description='"Sütun:desc,Sütun2" veya JSON liste'),
+    filters: Optional[str] = Query(None, description='JSON: [{"column","operator","value"}]'),
+    columns: Optional[str] = Query(None, description="Döndürülecek sütunlar (virgüllü veya JSON)"),
+    offset: int = Query(0, description="Cursor yokken doğrudan atlanacak satır (kaydırma çubuğu için)"),
+):
+    """Kayıtlı bir veri setinin tek bir sayfasını döner."""
+    return _page_response(dataset_id, cursor, limit, sort, filters, columns, offset)
+
+
+@router.post("/register")
+async def register_upload(
+    file: UploadFile = File(...),
+    sheet_name: str = Form(None),
+    header_row: int = Form(0),
+):
+    """Yüklenen dosyayı sunucu tarafında veri seti olarak kaydeder."""
+    from .excel_utils import read_table_from_upload
+
+    df = read_table_from_upload(file, sheet_name=sheet_name, header_row=header_row)
+    dataset_id = register_dataset(df, source="upload", meta={"filename": file.filename, "sheet_name": sheet_name})
+    return {
+        "dataset_id": dataset_id,
+        "columns": [str(c) for c in df.columns],
+        "row_count": len(df),
+        "page_url": f"/data/{dataset_id}/page",
+    }
+
+
+@router.get("/{dataset_id}")
+async def get_dataset_info(dataset_id: str):
+    """Veri seti meta bilgisi."""
+    entry = get_dataset(dataset_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Veri seti bulunamadı veya süresi doldu.")
+    return entry.to_dict()
+
+
+@router.delete("/{dataset_id}")
+async def remove_dataset(dataset_id: str):
+    """Veri setini siler."""
+    return {"success": delete_dataset(dataset_id)}
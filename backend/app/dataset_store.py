@@ -0,0 +1,409 @@
+"""
+Dataset Store - Opradox Excel Studio
+Registry of server-side DataFrames (uploads, scenario results, joins) that
+can be browsed page by page with stable cursors.
+
+Frames live in memory; when the in-memory budget is exceeded the least
+recently used frames are spilled to Parquet (if pyarrow is available) and
+reloaded transparently on the next access.
+
+Dataset ids are the only access check: generated ids are random and ids of
+shared cache entries (SQL results, Google Sheets) are keyed with a
+per-process secret, so an id cannot be guessed from a query or sheet id.
+There is no endpoint that lists datasets.
+"""
+from __future__ import annotations
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .storage import SHARED_FILES_DIR, safe_delete_file
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+DATASETS_DIR = SHARED_FILES_DIR / "datasets"
+
+# Registered datasets expire after this many seconds without access
+DATASET_TTL_SECONDS = 2 * 60 * 60  # 2 saat
+
+# In-memory budget; beyond this, LRU frames are spilled to Parquet
+MAX_IN_MEMORY_BYTES = 512 * 1024 * 1024
+MAX_DATASETS = 200
+
+# Per-dataset cache of sorted/filtered row orders ("views")
+MAX_VIEWS_PER_DATASET = 8
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 5000
+
+# Keys ids of shared cache entries (see keyed_dataset_id)
+_ID_SECRET = secrets.token_bytes(32)
+
+
+# ============================================================
+# DATA MODEL
+# ============================================================
+
+@dataclass
+class DatasetEntry:
+    """A registered dataset (in memory or spilled to Parquet)."""
+    dataset_id: str
+    source: str
+    columns: List[str]
+    row_count: int
+    nbytes: int
+    version: int = 1
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+    frame: Optional[pd.DataFrame] = None
+    parquet_path: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    views: "OrderedDict[str, np.ndarray]" = field(default_factory=OrderedDict)
+
+    def is_expired(self) -> bool:
+        return time.time() - self.last_access > DATASET_TTL_SECONDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dataset_id": self.dataset_id,
+            "source": self.source,
+            "columns": self.columns,
+            "row_count": self.row_count,
+            "nbytes": self.nbytes,
+            "version": self.version,
+            "created_at": self.created_at,
+            "last_access": self.last_access,
+            "in_memory": self.frame is not None,
+            "spilled": self.parquet_path is not None,
+        }
+
+
+class StaleCursorError(ValueError):
+    """Raised when a cursor refers to an older dataset version or another view."""
+
+
+_datasets: "OrderedDict[str, DatasetEntry]" = OrderedDict()
+_lock = threading.RLock()
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    try:
+        return int(df.memory_usage(index=True, deep=False).sum())
+    except Exception:
+        return 0
+
+
+def register_dataset(
+    df: pd.DataFrame,
+    source: str = "upload",
+    dataset_id: Optional[str] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Register a DataFrame and return its dataset_id.
+
+    Re-registering an existing dataset_id replaces the frame and bumps its
+    version, which invalidates cursors issued for the previous contents.
+    """
+    dataset_id = dataset_id or f"ds_{uuid.uuid4().hex}"
+    with _lock:
+        previous = _datasets.pop(dataset_id, None)
+        if previous is not None and previous.parquet_path:
+            safe_delete_file(Path(previous.parquet_path))
+
+        entry = DatasetEntry(
+            dataset_id=dataset_id,
+            source=source,
+            columns=[str(c) for c in df.columns],
+            row_count=len(df),
+            nbytes=_frame_nbytes(df),
+            version=(previous.version + 1) if previous else 1,
+            frame=df,
+            meta=dict(meta or {}),
+        )
+        _datasets[dataset_id] = entry
+        # The new frame is never the one spilled/dropped (its page_url must work)
+        _enforce_budget(keep=dataset_id)
+    return dataset_id
+
+
+def keyed_dataset_id(prefix: str, key: str) -> str:
+    """Stable id for a shared cache entry that cannot be derived from its key."""
+    return f"{prefix}_{hmac.new(_ID_SECRET, key.encode('utf-8'), hashlib.sha256).hexdigest()[:32]}"
+
+
+def get_dataset(dataset_id: str) -> Optional[DatasetEntry]:
+    """Get dataset metadata (does not load a spilled frame)."""
+    with _lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None:
+            return None
+        if entry.is_expired():
+            _drop(dataset_id)
+            return None
+        return entry
+
+
+def get_dataset_frame(dataset_id: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Return the DataFrame for a dataset, reloading it from Parquet if spilled."""
+    with _lock:
+        entry = get_dataset(dataset_id)
+        if entry is None:
+            return None
+        entry.last_access = time.time()
+        _datasets.move_to_end(dataset_id)
+
+        if entry.frame is None and entry.parquet_path:
+            entry.frame = pd.read_parquet(entry.parquet_path)
+            _enforce_budget(keep=dataset_id)
+
+        df = entry.frame
+    if df is not None and columns:
+        return df[[c for c in df.columns if str(c) in columns]]
+    return df
+
+
+def update_dataset_meta(dataset_id: str, **meta) -> bool:
+    """Merge keys into a dataset's meta dict."""
+    with _lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None:
+            return False
+        entry.meta.update(meta)
+        return True
+
+
+def delete_dataset(dataset_id: str) -> bool:
+    """Remove a dataset and its Parquet spill file."""
+    with _lock:
+        return _drop(dataset_id)
+
+
+def cleanup_expired_datasets() -> int:
+    """Drop datasets that have not been accessed within the TTL."""
+    with _lock:
+        expired = [k for k, e in _datasets.items() if e.is_expired()]
+        for k in expired:
+            _drop(k)
+    return len(expired)
+
+
+def _drop(dataset_id: str) -> bool:
+    entry = _datasets.pop(dataset_id, None)
+    if entry is None:
+        return False
+    if entry.parquet_path:
+        safe_delete_file(Path(entry.parquet_path))
+    return True
+
+
+def _spill(entry: DatasetEntry) -> bool:
+    """Write an in-memory frame to Parquet and release it. Returns False if unsupported."""
+    if entry.frame is None:
+        return True
+    if entry.parquet_path is None:
+        try:
+            DATASETS_DIR.mkdir(parents=True, exist_ok=True)
+            path = DATASETS_DIR / f"{entry.dataset_id}_v{entry.version}.parquet"
+            frame = entry.frame.copy(deep=False)
+            frame.columns = [str(c) for c in frame.columns]
+            frame.to_parquet(path, index=False)
+            entry.parquet_path = str(path)
+        except Exception as e:
+            # pyarrow yoksa veya tip desteklenmiyorsa bellekte kalır / düşürülür
+            print(f"[DATASET] Parquet spill skipped for {entry.dataset_id}: {e}")
+            return False
+    entry.frame = None
+    return True
+
+
+def _enforce_budget(keep: Optional[str] = None) -> None:
+    """Spill or evict least recently used datasets until the budget is respected."""
+    for dataset_id in [k for k, e in _datasets.items() if e.is_expired() and k != keep]:
+        _drop(dataset_id)
+
+    while len(_datasets) > MAX_DATASETS:
+        oldest = next(iter(_datasets))
+        if oldest == keep:
+            break
+        _drop(oldest)
+
+    in_memory = sum(e.nbytes for e in _datasets.values() if e.frame is not None)
+    if in_memory <= MAX_IN_MEMORY_BYTES:
+        return
+
+    for dataset_id, entry in list(_datasets.items()):
+        if in_memory <= MAX_IN_MEMORY_BYTES:
+            break
+        if dataset_id == keep or entry.frame is None:
+            continue
+        if not _spill(entry):
+            _drop(dataset_id)
+        in_memory -= entry.nbytes
+
+
+# ============================================================
+# VIEWS (SORT + FILTER) AND CURSORS
+# ============================================================
+
+def _view_key(sort: List[Dict[str, Any]], filters: List[Dict[str, Any]]) -> str:
+    raw = json.dumps({"s": sort, "f": filters}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(dataset_id: str, version: int, view_key: str, offset: int) -> str:
+    payload = json.dumps({"d": dataset_id, "v": version, "k": view_key, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return {"d": str(data["d"]), "v": int(data["v"]), "k": str(data["k"]), "o": int(data["o"])}
+    except Exception:
+        raise ValueError("Geçersiz cursor")
+
+
+def _sort_as_text(column: pd.Series) -> pd.Series:
+    if column.dtype != object:
+        return column
+    return column.where(column.isna(), column.astype(str))
+
+
+def _build_view(df: pd.DataFrame, sort: List[Dict[str, Any]], filters: List[Dict[str, Any]]) -> np.ndarray:
+    """Compute the positional row order for a sort/filter combination."""
+    from .excel_utils import build_condition_mask
+
+    positions = np.arange(len(df))
+
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for f in filters:
+            cond = build_condition_mask(df, f.get("column"), f.get("operator", "eq"), f.get("value", ""))
+            mask &= cond.fillna(False).to_numpy(dtype=bool)
+        positions = positions[mask]
+
+    if sort:
+        by = [s["column"] for s in sort]
+        ascending = [str(s.get("direction", "asc")).lower() != "desc" for s in sort]
+        sub = df[by].iloc[positions].reset_index(drop=True)
+        try:
+            order = sub.sort_values(by=by, ascending=ascending, kind="mergesort", na_position="last").index.to_numpy()
+        except TypeError:
+            # Mixed-type object column (e.g. numbers and text): compare as text
+            order = sub.sort_values(by=by, ascending=ascending, kind="mergesort", na_position="last",
+                                    key=_sort_as_text).index.to_numpy()
+        positions = positions[order]
+
+    return positions
+
+
+def _get_view(entry: DatasetEntry, df: pd.DataFrame, key: str,
+              sort: List[Dict[str, Any]], filters: List[Dict[str, Any]]) -> np.ndarray:
+    with _lock:
+        view = entry.views.get(key)
+        if view is not None:
+            entry.views.move_to_end(key)
+            return view
+
+    view = _build_view(df, sort, filters)
+
+    with _lock:
+        entry.views[key] = view
+        while len(entry.views) > MAX_VIEWS_PER_DATASET:
+            entry.views.popitem(last=False)
+    return view
+
+
+def get_page(
+    dataset_id: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    sort: Optional[List[Dict[str, Any]]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,
+    columns: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Return one page of a dataset.
+
+    The sorted/filtered row order is computed once per (sort, filters) view
+    and cached, so every subsequent page is an O(limit) positional take.
+    Cursors embed the dataset version and view key; a cursor issued before
+    the dataset was replaced raises StaleCursorError instead of silently
+    returning shifted rows.
+    """
+    sort = sort or []
+    filters = filters or []
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+    entry = get_dataset(dataset_id)
+    if entry is None:
+        raise KeyError(dataset_id)
+
+    df = get_dataset_frame(dataset_id)
+    key = _view_key(sort, filters)
+
+    offset = 0
+    if cursor:
+        c = decode_cursor(cursor)
+        if c["d"] != dataset_id or c["v"] != entry.version or c["k"] != key:
+            raise StaleCursorError("Cursor artık geçerli değil; veri seti veya görünüm değişti")
+        offset = max(0, c["o"])
+
+    missing = [s.get("column") for s in sort if s.get("column") not in df.columns]
+    if missing:
+        raise ValueError(f"Sıralama sütunu bulunamadı: {missing}")
+
+    view = _get_view(entry, df, key, sort, filters)
+    total = int(len(view))
+
+    page_positions = view[offset:offset + limit]
+    page_df = df.iloc[page_positions]
+    if columns:
+        selected = [c for c in page_df.columns if str(c) in columns]
+        page_df = page_df[selected]
+
+    rows = page_df.astype(object).where(pd.notna(page_df), None).to_dict(orient="records")
+
+    next_offset = offset + limit
+    return {
+        "dataset_id": dataset_id,
+        "version": entry.version,
+        "columns": [str(c) for c in page_df.columns],
+        "rows": rows,
+        "offset": offset,
+        "limit": limit,
+        "total_rows": total,
+        "unfiltered_rows": entry.row_count,
+        "next_cursor": encode_cursor(dataset_id, entry.version, key, next_offset) if next_offset < total else None,
+        "prev_cursor": encode_cursor(dataset_id, entry.version, key, max(0, offset - limit)) if offset > 0 else None,
+    }
+
+
+def cursor_at(dataset_id: str, offset: int,
+              sort: Optional[List[Dict[str, Any]]] = None,
+              filters: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+    """Build a cursor that jumps directly to an offset (for scrollbar seeks)."""
+    entry = get_dataset(dataset_id)
+    if entry is None:
+        return None
+    return encode_cursor(dataset_id, entry.version, _view_key(sort or [], filters or []), max(0, int(offset)))
@@ -0,0 +1,216 @@
+"""
+Dtype Optimizer - Opradox Excel Studio
+Ingest-time pass that shrinks parsed tables before scenarios see them.
+
+Parsers keep default dtypes: every text column is an object column of
+Python strings (~60 bytes per cell for a city or university name) and
+integers are int64. After the parse each column is narrowed once:
+
+- integers are downcast, but never below DTYPE_MIN_INT_BITS and only while
+  the square of the largest value still fits (pandas does not widen on
+  multiply, so int8 * int8 would silently overflow); integral float64
+  columns without gaps get the same treatment. Other floats stay float64
+  so sums do not change.
+- text columns become Arrow-backed strings with NaN semantics (the
+  "str" dtype of pandas 3): comparisons still return plain bools,
+  select_dtypes(include="object") still finds them and groupby shows no
+  unobserved values. DTYPE_TEXT_MODE=category switches low-cardinality
+  columns to category instead (useful without pyarrow).
+- text columns that are dates in one fixed format (01.02.2024,
+  2024-02-01 ...) are parsed once to datetime64, so scenarios do not
+  re-parse them on every filter.
+
+The before/after size is reported per column and for the whole frame.
+"""
+from __future__ import annotations
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .admission import frame_memory_bytes
+from .type_inference import DATE_LIKE, detect_date_format
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+DTYPE_OPTIMIZE = os.getenv("DTYPE_OPTIMIZE", "1").lower() not in ("0", "false", "no", "off")
+
+# Smallest integer width produced by the downcast (8, 16, 32 or 64)
+DTYPE_MIN_INT_BITS = int(os.getenv("DTYPE_MIN_INT_BITS", "32"))
+
+# Text columns: arrow (Arrow-backed strings) | category | off
+DTYPE_TEXT_MODE = os.getenv("DTYPE_TEXT_MODE", "arrow").lower()
+
+# Category mode: at most this share of distinct values
+DTYPE_CATEGORY_MAX_RATIO = float(os.getenv("DTYPE_CATEGORY_MAX_RATIO", "0.5"))
+
+# Parse date-like text columns to datetime64. Off by default: most scenarios
+# compare cells as text (astype(str)), so "01.02.2024" must stay as typed;
+# date-based scenarios opt in with PARSE_DATES = True (see scenario_registry.py)
+DTYPE_PARSE_DATES = os.getenv("DTYPE_PARSE_DATES", "0").lower() not in ("0", "false", "no", "off")
+
+# Share of non-empty values that must parse; below it the column stays text
+DTYPE_DATE_MIN_RATIO = float(os.getenv("DTYPE_DATE_MIN_RATIO", "1.0"))
+
+# Values tried against the candidate formats before a full parse
+DTYPE_DATE_SAMPLE = 200
+
+_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _arrow_string_dtype():
+    """Arrow-backed string dtype with NaN missing values, or None without pyarrow."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        # pandas < 2.3
+        return pd.StringDtype("pyarrow_numpy")
+
+
+ARROW_STRING_DTYPE = _arrow_string_dtype()
+
+
+def _text_mode() -> str:
+    if DTYPE_TEXT_MODE == "arrow" and ARROW_STRING_DTYPE is None:
+        return "category"
+    return DTYPE_TEXT_MODE
+
+
+# ============================================================
+# COLUMN RULES
+# ============================================================
+
+def _int_dtype_for(values: pd.Series) -> Optional[np.dtype]:
+    """Narrowest integer type >= DTYPE_MIN_INT_BITS whose range holds max|v|**2."""
+    if values.empty:
+        return None
+    peak = max(abs(int(values.min())), abs(int(values.max())))
+    for candidate in _INT_TYPES:
+        info = np.iinfo(candidate)
+        if info.bits < DTYPE_MIN_INT_BITS:
+            continue
+        if peak * peak <= info.max:
+            return np.dtype(candidate)
+    return None
+
+
+def _downcast_numeric(series: pd.Series) -> Optional[pd.Series]:
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or not isinstance(dtype, np.dtype):
+        return None
+    if pd.api.types.is_integer_dtype(dtype):
+        target = _int_dtype_for(series)
+        if target is not None and target.itemsize < dtype.itemsize:
+            return series.astype(target)
+        return None
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy()
+        if len(values) == 0 or not np.isfinite(values).all() or not (values == np.round(values)).all():
+            return None
+        target = _int_dtype_for(series)
+        if target is not None:
+            return series.astype(target)
+    return None
+
+
+def _parse_dates(series: pd.Series, non_null: pd.Series) -> Optional[pd.Series]:
+    """datetime64 column if every sampled value matches one of the explicit date formats."""
+    sample = non_null.iloc[:DTYPE_DATE_SAMPLE].astype(str).str.strip()
+    if sample.empty or not sample.str.match(DATE_LIKE).all():
+        return None
+    fmt = detect_date_format(sample, min_ratio=1.0)
+    if fmt is None:
+        return None
+    parsed = pd.to_datetime(series.astype(str).str.strip().where(series.notna()), format=fmt, errors="coerce")
+    if parsed.notna().sum() >= DTYPE_DATE_MIN_RATIO * len(non_null):
+        return parsed
+    return None
+
+
+def _convert_text(series: pd.Series, parse_dates: bool) -> Optional[pd.Series]:
+    non_null = series.dropna()
+    if non_null.empty:
+        return None
+    # Mixed columns (numbers and text from Excel) keep their Python objects
+    if pd.api.types.infer_dtype(non_null, skipna=True) != "string":
+        return None
+
+    if parse_dates:
+        parsed = _parse_dates(series, non_null)
+        if parsed is not None:
+            return parsed
+
+    mode = _text_mode()
+    if mode == "arrow":
+        return series.astype(ARROW_STRING_DTYPE)
+    if mode == "category" and non_null.nunique() <= DTYPE_CATEGORY_MAX_RATIO * len(non_null):
+        return series.astype("category")
+    return None
+
+
+def _column_bytes(series: pd.Series) -> int:
+    return frame_memory_bytes(series.to_frame()) - int(series.index.memory_usage())
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def optimize_dtypes(df: pd.DataFrame, parse_dates: Optional[bool] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Narrow the dtypes of a freshly parsed frame in place.
+
+    Returns (df, report) where report holds before_bytes, after_bytes,
+    reduction_pct, duration_ms and the changed columns
+    ({column: {"from", "to", "before_bytes", "after_bytes"}}).
+    """
+    if parse_dates is None:
+        parse_dates = DTYPE_PARSE_DATES
+    started = time.perf_counter()
+    before = frame_memory_bytes(df)
+    columns: Dict[str, Dict[str, Any]] = {}
+
+    for position, col in enumerate(df.columns):
+        series = df.iloc[:, position]
+        if series.dtype == object:
+            converted = _convert_text(series, parse_dates)
+        else:
+            converted = _downcast_numeric(series)
+        if converted is None:
+            continue
+        col_before = _column_bytes(series)
+        df.isetitem(position, converted)
+        columns[str(col)] = {
+            "from": str(series.dtype),
+            "to": str(converted.dtype),
+            "before_bytes": col_before,
+            "after_bytes": _column_bytes(converted),
+        }
+
+    after = frame_memory_bytes(df) if columns else before
+    report = {
+        "before_bytes": before,
+        "after_bytes": after,
+        "reduction_pct": round((1 - after / before) * 100, 1) if before else 0.0,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "columns": columns,
+    }
+    return df, report
+
+
+def summarize_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form carried in df.attrs (pandas copies attrs on every operation)."""
+    return {
+        "before_bytes": report["before_bytes"],
+        "after_bytes": report["after_bytes"],
+        "reduction_pct": report["reduction_pct"],
+        "converted": {col: f"{c['from']} -> {c['to']}" for col, c in report["columns"].items()},
+    }
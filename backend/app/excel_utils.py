@@ -1,56 +1,435 @@
+import importlib.util
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from io import BytesIO
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 from fastapi import UploadFile, HTTPException
 
+from .admission import admit_upload, memory_budget, bytes_per_cell_model, frame_memory_bytes
+from .columnar_io import COLUMNAR_EXTENSIONS, read_columnar
+from .dtype_optimizer import DTYPE_OPTIMIZE, optimize_dtypes, summarize_report
+from .ingest import IngestedFile, ingest_file
+from .type_inference import infer_column, coerce_column
 
-ALLOWED_EXTENSIONS = {".xlsx", ".xls", ".csv"}
+
+ALLOWED_EXTENSIONS = {".xlsx", ".xls", ".csv", *COLUMNAR_EXTENSIONS}
+
+
+def _check_extension(filename: str) -> str:
+    ext = Path(filename or "").suffix.lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        allowed_str = ", ".join(sorted(ALLOWED_EXTENSIONS))
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "Geçersiz dosya türü. Desteklenen uzantılar: "
+                f"{allowed_str}. Gönderilen: {ext or 'yok'}"
+            ),
+        )
+    return ext
 
 
 def read_table_from_upload(upload_file: UploadFile, sheet_name: str = None, header_row: int = 0) -> pd.DataFrame:
     """
     Yüklenen UploadFile nesnesini pandas DataFrame'e çevirir.
-    Sadece .xlsx, .xls ve .csv dosyalarını kabul eder.
+    .xlsx, .xls, .csv ve (pyarrow kuruluysa) .parquet, .feather, .arrow
+    dosyalarını kabul eder.
     
     Args:
         upload_file: FastAPI UploadFile nesnesi
         sheet_name: Excel sayfası adı (None ise ilk sayfa okunur)
         header_row: Başlık satırı numarası (0-indexed, varsayılan 0)
     """
-    ext = Path(upload_file.filename).suffix.lower()
+    _check_extension(upload_file.filename)
 
-    if ext not in ALLOWED_EXTENSIONS:
-        allowed_str = ", ".join(sorted(ALLOWED_EXTENSIONS))
-        raise HTTPException(
-            status_code=400,
-            detail=(
-                "Geçersiz dosya türü. Desteklenen uzantılar: "
-                f"{allowed_str}. Gönderilen: {ext or 'yok'}"
-            ),
+    # Dosya parça parça geçici dosyaya akıtılır (boyut sınırı + SHA-256 aynı anda)
+    with ingest_file(upload_file.file, upload_file.filename) as ingested:
+        return read_table_from_ingested(ingested, sheet_name=sheet_name, header_row=header_row)
+
+
+def read_table_from_ingested(
+    ingested: IngestedFile,
+    sheet_name: str = None,
+    header_row: int = 0,
+    parse_dates: bool = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Akıtılmış (ingest edilmiş) bir yüklemeden tabloyu okur: bellek kontrolü,
+    ayrıştırma ve tip daraltma. Aynı yüklemeden birden fazla sayfa okumak
+    için workbook_session bunu kullanır. columns verilirse sütunlu
+    formatlarda (Parquet/Feather/Arrow) yalnızca bu sütunlar okunur.
+    """
+    ext = _check_extension(ingested.filename)
+
+    # Bellek kontrolü: dosya okunmadan önce tahmini ayak izi bütçeyle karşılaştırılır
+    with ingested.open() as probe:
+        estimate = admit_upload(probe, ingested.filename, sheet_name=sheet_name, columns=columns)
+    reservation_key = f"upload:{uuid.uuid4().hex[:12]}"
+
+    with memory_budget.reservation(reservation_key, estimate.peak_bytes, label=ingested.filename):
+        with ingested.open() as buffer:
+            df = _parse_upload(buffer, ext, sheet_name, header_row, columns)
+        actual = frame_memory_bytes(df)
+        # Model, ayrıştırıcının ürettiği (optimizasyon öncesi) boyutu öğrenir: tepe bellek odur
+        bytes_per_cell_model.learn(ext, df.shape[0] * max(df.shape[1], 1), actual)
+
+        # Tip daraltma: sayılar küçültülür, metinler Arrow string, tarihler datetime olur
+        if DTYPE_OPTIMIZE:
+            df, dtype_report = optimize_dtypes(df, parse_dates=parse_dates)
+            actual = dtype_report["after_bytes"]
+            df.attrs["dtype_report"] = summarize_report(dtype_report)
+            if dtype_report["columns"]:
+                print(
+                    f"[DTYPE] {ingested.filename}: {dtype_report['before_bytes'] / 1024 ** 2:.1f} MB -> "
+                    f"{dtype_report['after_bytes'] / 1024 ** 2:.1f} MB "
+                    f"({len(dtype_report['columns'])} sütun, {dtype_report['duration_ms']} ms)"
+                )
+        memory_budget.record_actual(reservation_key, actual)
+
+    # Önbellek / tekilleştirme için içerik özeti DataFrame ile taşınır
+    df.attrs["content_sha256"] = ingested.sha256
+    return df
+
+
+# ============================================================
+# READER BACKENDS
+# ============================================================
+# Aynı dosyayı okuyabilen birden fazla ayrıştırıcı. Her uzantının bir
+# varsayılanı vardır (pandas'ın kendi motoru, sonuçlar buna göre doğrulanır);
+# diğerleri daha hızlı ama opsiyonel bağımlılıklara dayanır. Seçim:
+#   READER_BACKEND=auto          -> küçük dosyada varsayılan, büyükte en hızlı
+#   READER_BACKEND=pyarrow_csv   -> uygun uzantılarda hep bu
+#   READER_BACKEND=csv=pyarrow_csv,xlsx=calamine -> uzantı başına
+# "En hızlı" sırası tools/bench_readers.py ölçümünden gelir (yalnızca
+# varsayılanla aynı sonucu veren backend'ler sıralanır); ölçüm yoksa
+# READER_BACKENDS'teki sıra kullanılır.
+
+READER_BACKEND = os.getenv("READER_BACKEND", "auto")
+
+# Bu boyutun altındaki dosyalar varsayılan backend ile okunur
+READER_AUTO_MIN_BYTES = int(float(os.getenv("READER_AUTO_MIN_MB", "1")) * 1024 ** 2)
+
+READER_BENCHMARK_PATH = Path(os.getenv(
+    "READER_BENCHMARK_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "reader_benchmark.json"),
+))
+
+
+@dataclass(frozen=True)
+class ReaderBackend:
+    """Bir ayrıştırıcı: read(buffer, sheet_name, header_row) -> DataFrame."""
+    name: str
+    extensions: Tuple[str, ...]
+    read: Callable[..., pd.DataFrame]
+    requires: Optional[str] = None   # opsiyonel modül
+    default: bool = False            # uzantının referans backend'i
+    projection: bool = False         # read(..., columns=[...]) destekler
+
+    def available(self) -> bool:
+        return self.requires is None or importlib.util.find_spec(self.requires) is not None
+
+
+def _pandas_excel(engine: str) -> Callable[[BinaryIO, Optional[str], int], pd.DataFrame]:
+    def read(buffer: BinaryIO, sheet_name: Optional[str], header_row: int) -> pd.DataFrame:
+        # sheet_name None ise tüm sayfalar yerine sadece ilk sayfa okunur
+        return pd.read_excel(buffer, sheet_name=sheet_name if sheet_name is not None else 0, header=header_row, engine=engine)
+    return read
+
+
+def _read_openpyxl_values(buffer: BinaryIO, sheet_name: Optional[str], header_row: int) -> pd.DataFrame:
+    """
+    openpyxl read-only, values_only: hücre nesnesi oluşturulmaz. Satırlar
+    pandas'ın openpyxl okuyucusuyla aynı şekilde dönüştürülüp kırpılır ve
+    aynı TextParser'a verilir, böylece sonuç pd.read_excel ile aynıdır.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+    from pandas.io.parsers import TextParser
+
+    errors = frozenset(ERROR_CODES)
+
+    def convert(value):
+        # boş -> "", tam sayı değerli float -> int, hata kodu (#N/A ...) -> NaN
+        if value is None:
+            return ""
+        kind = type(value)
+        if kind is float and value.is_integer():
+            return int(value)
+        if kind is str and value in errors:
+            return np.nan
+        return value
+
+    workbook = load_workbook(buffer, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0] if sheet_name is None else workbook[sheet_name]
+        sheet.reset_dimensions()
+        data: List[list] = []
+        last_with_data = -1
+        for index, row in enumerate(sheet.iter_rows(values_only=True)):
+            values = [convert(v) for v in row]
+            while values and values[-1] == "":
+                values.pop()
+            if values:
+                last_with_data = index
+            data.append(values)
+    finally:
+        workbook.close()
+
+    data = data[: last_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) if len(row) < width else row for row in data]
+    return TextParser(data, header=header_row, skip_blank_lines=False).read()
+
+
+def _read_pandas_csv(buffer: BinaryIO, sheet_name: Optional[str], header_row: int) -> pd.DataFrame:
+    return pd.read_csv(buffer, header=header_row)
+
+
+def _columnar(ext: str) -> Callable[..., pd.DataFrame]:
+    def read(buffer: BinaryIO, sheet_name: Optional[str], header_row: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        # Sütunlu dosyalarda sayfa ve başlık satırı yoktur
+        return read_columnar(buffer, ext, columns)
+    return read
+
+
+def _read_pyarrow_csv(buffer: BinaryIO, sheet_name: Optional[str], header_row: int) -> pd.DataFrame:
+    """
+    Çok iş parçacıklı pyarrow CSV okuyucusu. pandas ile aynı sonuç için
+    tarih sütunları metin bırakılır, boş metinler NaN olur, tamamen boş
+    sütunlar float64 okunur ve başlıklar
+    pandas gibi adlandırılır (boş ad, tekrarlanan ad).
+    """
+    if header_row:
+        # pandas header=N boş satırları saymaz, pyarrow skip_rows sayar
+        return _read_pandas_csv(buffer, sheet_name, header_row)
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    start = buffer.tell()
+
+    def read(column_types: Dict[str, object]):
+        buffer.seek(start)
+        return pacsv.read_csv(
+            buffer,
+            convert_options=pacsv.ConvertOptions(strings_can_be_null=True, column_types=column_types),
         )
 
-    contents = upload_file.file.read()
-    if not contents:
-        raise HTTPException(status_code=400, detail="Boş dosya gönderildi.")
+    # Başlık adları pandas'tan (boş ad "Unnamed: i", tekrarlanan ad a.1, ...)
+    names = list(pd.read_csv(buffer, nrows=0).columns)
+    table = read({})
+    # Tarihler metin kalır; tamamen boş sütunlar pandas gibi float64 (NaN) olur
+    retyped = {
+        field.name: pa.string() if pa.types.is_temporal(field.type) else pa.float64()
+        for field in table.schema
+        if pa.types.is_temporal(field.type) or pa.types.is_null(field.type)
+    }
+    if retyped:
+        table = read(retyped)
+    df = table.to_pandas()
+    df.columns = names
+    for position, field in enumerate(table.schema):
+        if pa.types.is_string(field.type) and table.column(position).null_count:
+            column = df.iloc[:, position]
+            df.isetitem(position, column.where(column.notna(), np.nan))
+    return df
+
+
+# Uzantı başına tercih sırası (ölçüm yoksa): hızlıdan yavaşa
+READER_BACKENDS: Dict[str, ReaderBackend] = {
+    backend.name: backend
+    for backend in (
+        ReaderBackend("calamine", (".xlsx", ".xls"), _pandas_excel("calamine"), requires="python_calamine"),
+        ReaderBackend("openpyxl_values", (".xlsx",), _read_openpyxl_values, requires="openpyxl"),
+        ReaderBackend("openpyxl", (".xlsx",), _pandas_excel("openpyxl"), requires="openpyxl", default=True),
+        ReaderBackend("xlrd", (".xls",), _pandas_excel("xlrd"), requires="xlrd", default=True),
+        ReaderBackend("pyarrow_csv", (".csv",), _read_pyarrow_csv, requires="pyarrow"),
+        ReaderBackend("pandas_c", (".csv",), _read_pandas_csv, default=True),
+        ReaderBackend("pyarrow_parquet", (".parquet",), _columnar(".parquet"), requires="pyarrow", default=True, projection=True),
+        ReaderBackend("pyarrow_feather", (".feather",), _columnar(".feather"), requires="pyarrow", default=True, projection=True),
+        ReaderBackend("pyarrow_ipc", (".arrow",), _columnar(".arrow"), requires="pyarrow", default=True, projection=True),
+    )
+}
+
+
+def backends_for(ext: str) -> List[ReaderBackend]:
+    """Uzantıyı okuyabilen ve kurulu backend'ler (tercih sırasıyla)."""
+    return [b for b in READER_BACKENDS.values() if ext in b.extensions and b.available()]
+
+
+def default_backend(ext: str) -> ReaderBackend:
+    return next(b for b in READER_BACKENDS.values() if ext in b.extensions and b.default)
+
+
+def _forced_backend(ext: str) -> Optional[str]:
+    setting = READER_BACKEND.strip()
+    if not setting or setting == "auto":
+        return None
+    if "=" not in setting:
+        return setting
+    for part in setting.split(","):
+        key, _, name = part.partition("=")
+        if "." + key.strip().lstrip(".").lower() == ext:
+            return name.strip()
+    return None
 
-    buffer = BytesIO(contents)
 
+_ranking_cache: Dict[str, object] = {"mtime": None, "ranking": {}}
+
+
+def benchmark_ranking() -> Dict[str, List[str]]:
+    """{uzantı: [backend, ...]} en hızlıdan; ölçüm dosyası yoksa boş."""
     try:
-        if ext == ".csv":
-            df = pd.read_csv(buffer, header=header_row)
-        else:
-            # Excel için sheet_name ve header parametrelerini kullan
-            df = pd.read_excel(buffer, sheet_name=sheet_name, header=header_row)
-            
-            # CRITICAL FIX: pd.read_excel sheet_name=None ile çağrılırsa dict döner
-            # Bu durumda ilk sheet'i seç
-            if isinstance(df, dict):
-                if len(df) > 0:
-                    first_sheet_name = list(df.keys())[0]
-                    df = df[first_sheet_name]
-                else:
-                    raise HTTPException(status_code=400, detail="Excel dosyasında sayfa bulunamadı.")
+        mtime = READER_BENCHMARK_PATH.stat().st_mtime
+    except OSError:
+        return {}
+    if _ranking_cache["mtime"] != mtime:
+        try:
+            _ranking_cache["ranking"] = json.loads(READER_BENCHMARK_PATH.read_text(encoding="utf-8")).get("ranking", {})
+        except (OSError, ValueError):
+            _ranking_cache["ranking"] = {}
+        _ranking_cache["mtime"] = mtime
+    return _ranking_cache["ranking"]
+
+
+def select_backend(ext: str, size_bytes: int = 0) -> ReaderBackend:
+    """Uzantı ve boyuta göre backend: zorlanmış > küçük dosya varsayılanı > ölçülen en hızlı > tercih sırası."""
+    candidates = {b.name: b for b in backends_for(ext)}
+    forced = _forced_backend(ext)
+    if forced:
+        if forced in candidates:
+            return candidates[forced]
+        print(f"[READER] '{forced}' {ext} için kullanılamıyor, otomatik seçim yapılıyor")
+    if size_bytes < READER_AUTO_MIN_BYTES or not candidates:
+        return default_backend(ext)
+    for name in benchmark_ranking().get(ext, []):
+        if name in candidates:
+            return candidates[name]
+    return next(iter(candidates.values()))
+
+
+def read_with_backend(
+    buffer: BinaryIO,
+    ext: str,
+    sheet_name: Optional[str] = None,
+    header_row: int = 0,
+    backend: Optional[ReaderBackend] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Seçilen backend ile okur; varsayılan dışı bir backend hata verirse
+    (örn. pyarrow'un tip çıkarımına uymayan karışık bir sütun) dosya
+    varsayılan backend ile yeniden okunur. columns yalnızca projeksiyon
+    destekleyen backend'lere iletilir.
+    """
+    start = buffer.tell()
+    if backend is None:
+        size = buffer.seek(0, os.SEEK_END) - start
+        buffer.seek(start)
+        backend = select_backend(ext, size)
+
+    def read(backend: ReaderBackend) -> pd.DataFrame:
+        if backend.projection and columns:
+            return backend.read(buffer, sheet_name, header_row, columns=columns)
+        return backend.read(buffer, sheet_name, header_row)
+
+    try:
+        df = read(backend)
+    except Exception as e:
+        fallback = default_backend(ext)
+        if backend is fallback:
+            raise
+        print(f"[READER] {backend.name} okuyamadı ({e}), {fallback.name} ile okunuyor")
+        buffer.seek(start)
+        backend = fallback
+        df = read(backend)
+    if isinstance(df, pd.DataFrame):
+        df.attrs["reader_backend"] = backend.name
+    return df
+
+
+def benchmark_backends(paths: Sequence[Path], repeat: int = 3, sheet_name: Optional[str] = None, header_row: int = 0) -> Dict[str, object]:
+    """
+    Her dosyayı uygun her backend ile repeat kez okur (en iyi süre) ve sonucu
+    varsayılan backend'in çıktısıyla karşılaştırır. ranking: uzantı başına,
+    tüm dosyalarda aynı sonucu veren backend'ler, toplam süreye göre.
+    """
+    results = []
+    totals: Dict[str, Dict[str, float]] = {}
+    mismatched: Dict[str, set] = {}
+    for path in paths:
+        path = Path(path)
+        ext = path.suffix.lower()
+        data = path.read_bytes()
+        reference = None
+        for backend in sorted(backends_for(ext), key=lambda b: not b.default):
+            best, df, error = None, None, None
+            for _ in range(max(repeat, 1)):
+                started = time.perf_counter()
+                try:
+                    with open(path, "rb") as buffer:
+                        df = backend.read(buffer, sheet_name, header_row)
+                except Exception as e:
+                    error = str(e)
+                    break
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+
+            matches = False
+            if error is None:
+                if backend.default:
+                    reference, matches = df, True
+                elif reference is not None:
+                    try:
+                        pd.testing.assert_frame_equal(reference, df)
+                        matches = True
+                    except AssertionError as e:
+                        error = "sonuç farklı: " + str(e).splitlines()[0]
+            if not matches:
+                mismatched.setdefault(ext, set()).add(backend.name)
+            else:
+                totals.setdefault(ext, {}).setdefault(backend.name, 0.0)
+                totals[ext][backend.name] += best
+
+            results.append({
+                "file": path.name,
+                "backend": backend.name,
+                "default": backend.default,
+                "seconds": round(best, 4) if best is not None else None,
+                "mb_per_s": round(len(data) / 1024 ** 2 / best, 2) if best else None,
+                "rows": int(len(df)) if df is not None and error is None else None,
+                "matches_default": matches,
+                "error": error,
+            })
+
+    ranking = {
+        ext: [name for name, _ in sorted(times.items(), key=lambda item: item[1]) if name not in mismatched.get(ext, set())]
+        for ext, times in totals.items()
+    }
+    return {"results": results, "ranking": ranking}
+
+
+def _parse_upload(buffer: BinaryIO, ext: str, sheet_name: str, header_row: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Dosya içeriğini okuyup DataFrame'e çevirir (uzantı zaten doğrulanmış)."""
+    try:
+        df = read_with_backend(buffer, ext, sheet_name, header_row, columns=columns)
+
+        # CRITICAL FIX: pd.read_excel sheet_name=None ile çağrılırsa dict döner
+        # Bu durumda ilk sheet'i seç
+        if isinstance(df, dict):
+            if len(df) > 0:
+                first_sheet_name = list(df.keys())[0]
+                df = df[first_sheet_name]
+            else:
+                raise HTTPException(status_code=400, detail="Excel dosyasında sayfa bulunamadı.")
     except HTTPException:
         raise  # HTTPException'ları tekrar fırlat
     except Exception as e:
@@ -69,18 +448,22 @@ def read_table_from_upload(upload_file: UploadFile, sheet_name: str = None, head
     return df
 
 
-def smart_type_coercion(df: pd.DataFrame, threshold: float = 0.8) -> tuple:
+def smart_type_coercion(df: pd.DataFrame, threshold: float = 0.8, column_types: dict = None) -> tuple:
     """
     Her sütun için akıllı tip dönüştürme uygular.
     
     Eğer bir sütundaki değerlerin %80'i (threshold) veya daha fazlası sayısalsa:
-    - Sütunu sayısal tipe dönüştürür
+    - Sütunu sayısal tipe dönüştürür (1.234,56 gibi Türkçe yazımlar dahil)
     - Dönüştürülemeyen değerleri NaN yapar
     - Hangi değerlerin dönüştürülemediğini raporlar
+
+    Karar type_inference motorundan gelir; column_types verilirse (önbellekten)
+    sütunlar yeniden incelenmez.
     
     Args:
         df: pandas DataFrame
         threshold: Sayısal kabul eşiği (0-1 arası, varsayılan 0.8)
+        column_types: infer_column_types() sonucu (opsiyonel)
     
     Returns:
         tuple: (dönüştürülmüş_df, conversion_report)
@@ -91,11 +474,14 @@ def smart_type_coercion(df: pd.DataFrame, threshold: float = 0.8) -> tuple:
                 'converted_count': int,
                 'failed_count': int,
                 'failed_values': list (ilk 10 unique değer),
-                'failed_rows': list (ilk 20 satır indeksi)
+                'failed_rows': list (ilk 20 satır indeksi),
+                'numeric_ratio': float,
+                'number_format': 'plain' | 'tr'
             }
         }
     """
     report = {}
+    column_types = column_types or {}
     
     for col in df.columns:
         original_type = str(df[col].dtype)
@@ -104,42 +490,33 @@ def smart_type_coercion(df: pd.DataFrame, threshold: float = 0.8) -> tuple:
         if pd.api.types.is_numeric_dtype(df[col]):
             continue
         
-        # Sayısal dönüşüm dene
-        numeric_result = pd.to_numeric(df[col], errors='coerce')
-        
-        # Boş olmayan değerler üzerinden hesapla
-        non_null_original = df[col].notna()
-        non_null_count = non_null_original.sum()
-        
-        if non_null_count == 0:
+        verdict = column_types.get(str(col)) or infer_column(df[col], threshold)
+        if verdict.kind != "numeric" or verdict.source != "content":
             continue
         
-        valid_numeric_count = (non_null_original & numeric_result.notna()).sum()
-        numeric_ratio = valid_numeric_count / non_null_count
+        # Eşik değerini geçti: benzersiz değerler üzerinden dönüştür
+        numeric_result = coerce_column(df[col], verdict)
+        non_null_original = df[col].notna()
+        failed_mask = non_null_original & numeric_result.isna()
+        failed_count = failed_mask.sum()
         
-        # Eşik değerini geçtiyse dönüştür
-        if numeric_ratio >= threshold:
-            # Dönüştürülemeyen değerleri tespit et
-            failed_mask = non_null_original & numeric_result.isna()
-            failed_count = failed_mask.sum()
+        if failed_count > 0:
+            # Sorunlu değerleri raporla
+            failed_rows = df.index[failed_mask].tolist()
             
-            if failed_count > 0:
-                # Sorunlu değerleri raporla
-                failed_values = df.loc[failed_mask, col].unique().tolist()
-                failed_rows = df[failed_mask].index.tolist()
-                
-                report[col] = {
-                    'original_type': original_type,
-                    'new_type': 'float64',
-                    'converted_count': int(valid_numeric_count),
-                    'failed_count': int(failed_count),
-                    'failed_values': [str(v) for v in failed_values[:10]],  # İlk 10 unique
-                    'failed_rows': [int(r) for r in failed_rows[:20]],  # İlk 20 satır
-                    'numeric_ratio': round(numeric_ratio * 100, 1)
-                }
-            
-            # Sütunu dönüştür
-            df[col] = numeric_result
+            report[col] = {
+                'original_type': original_type,
+                'new_type': 'float64',
+                'converted_count': int(non_null_original.sum() - failed_count),
+                'failed_count': int(failed_count),
+                'failed_values': verdict.invalid_values[:10],  # İlk 10 unique
+                'failed_rows': [int(r) for r in failed_rows[:20]],  # İlk 20 satır
+                'numeric_ratio': round(verdict.valid_ratio * 100, 1),
+                'number_format': verdict.number_format,
+            }
+        
+        # Sütunu dönüştür
+        df[col] = numeric_result
     
     return df, report
 
@@ -172,6 +549,16 @@ def build_condition_mask(df: pd.DataFrame, column: str, operator: str, value: st
     op = operator.strip().lower()
     val_str = str(value)
 
+    # Tarih sütunu (ör. yüklemede ayrıştırılmış CSV tarihleri): "01.02.2024" de eşleşmeli
+    if op in ("eq", "=", "==", "ne", "!=", "<>") and pd.api.types.is_datetime64_any_dtype(s):
+        try:
+            v_dt = pd.to_datetime(val_str, dayfirst=True, errors="raise")
+        except Exception:
+            v_dt = None
+        if v_dt is not None:
+            same_day = s == v_dt
+            return same_day if op in ("eq", "=", "==") else ~same_day
+
     # Eşitlik / eşitsizlik
     if op in ("eq", "=", "=="):
         return s.astype(str) == val_str
@@ -5,14 +5,15 @@ OAuth ile Google Sheets verisi çekme
 from __future__ import annotations
 from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import json
 
-router = APIRouter(prefix="/viz/google", tags=["google-sheets"])
+# Google Sheets kimlik bilgileri (GOOGLE_CREDENTIALS_FILE ortam değişkeni)
+from .google_sheets_connector import GOOGLE_CREDENTIALS_FILE, get_client, import_sheet, sheets_cache_stats
+from .type_inference import infer_column_types
 
-# Google Sheets kimlik bilgileri (ortam değişkenlerinden alınacak)
-# NOT: Production'da bu bilgiler .env dosyasından okunmalı
-GOOGLE_CREDENTIALS_FILE = "credentials.json"
+router = APIRouter(prefix="/viz/google", tags=["google-sheets"])
 
 
 class GoogleSheetRequest(BaseModel):
@@ -20,6 +21,8 @@ class GoogleSheetRequest(BaseModel):
     spreadsheet_id: str
     sheet_name: Optional[str] = None
     range: Optional[str] = None
+    # Yalnızca bu sütunlar indirilir (başlık satırındaki adlar)
+    columns: Optional[List[str]] = None
 
 
 class GoogleAuthResponse(BaseModel):
@@ -122,87 +125,45 @@ async def import_google_sheet(request: GoogleSheetRequest):
         spreadsheet_id: Google Sheets ID (URL'deki uzun kod)
         sheet_name: Sayfa adı (opsiyonel, ilk sayfa varsayılan)
         range: Hücre aralığı (opsiyonel, örn: A1:Z100)
+        columns: İndirilecek sütunlar (opsiyonel, varsayılan: tümü)
+    
+    Dosyanın revizyonu değişmediyse veri yeniden indirilmez (önbellek).
     """
     try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
-        # Service account kimlik bilgileri
-        # NOT: Production'da gspread.oauth() kullanılabilir
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets.readonly',
-            'https://www.googleapis.com/auth/drive.readonly'
-        ]
-        
-        creds = Credentials.from_service_account_file(
-            GOOGLE_CREDENTIALS_FILE,
-            scopes=scopes
+        df, info = await run_in_threadpool(
+            import_sheet, request.spreadsheet_id, request.sheet_name, request.columns, request.range
         )
-        
-        client = gspread.authorize(creds)
-        
-        # Spreadsheet'i aç
-        spreadsheet = client.open_by_key(request.spreadsheet_id)
-        
-        # Sayfa seç
-        if request.sheet_name:
-            worksheet = spreadsheet.worksheet(request.sheet_name)
-        else:
-            worksheet = spreadsheet.sheet1
-        
-        # Veriyi al
-        if request.range:
-            data = worksheet.get(request.range)
-        else:
-            data = worksheet.get_all_values()
-        
-        if not data:
-            return {"columns": [], "data": [], "row_count": 0}
-        
-        # İlk satır başlık
-        columns = data[0]
-        rows = data[1:]
-        
-        # Dict formatına çevir
-        records = []
-        for row in rows:
-            record = {}
-            for i, col in enumerate(columns):
-                record[col] = row[i] if i < len(row) else ""
-            records.append(record)
-        
-        # Sütun tiplerini belirle
-        columns_info = []
-        for col in columns:
-            # Basit tip tahmini
-            sample_vals = [r.get(col, "") for r in records[:100]]
-            is_numeric = all(
-                v == "" or v.replace(".", "").replace("-", "").replace(",", "").isdigit() 
-                for v in sample_vals if v
-            )
-            columns_info.append({
-                "name": col,
-                "type": "numeric" if is_numeric else "text"
-            })
-        
-        return {
-            "source": "google_sheets",
-            "spreadsheet_id": request.spreadsheet_id,
-            "sheet_name": worksheet.title,
-            "columns": columns,
-            "columns_info": columns_info,
-            "data": records[:5000],  # Max 5000 satır
-            "row_count": len(records)
-        }
-        
-    except gspread.SpreadsheetNotFound:
-        raise HTTPException(status_code=404, detail="Spreadsheet bulunamadı veya erişim izniniz yok")
-    except gspread.WorksheetNotFound:
-        raise HTTPException(status_code=404, detail=f"'{request.sheet_name}' sayfası bulunamadı")
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Google credentials dosyası bulunamadı")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    if len(df.columns) == 0:
+        return {"columns": [], "data": [], "row_count": 0}
+    
+    # Sütun tipleri ortak tip çıkarımıyla (aynı revizyon için önbellekten)
+    cache_key = ("google_sheets", info["dataset_id"], info["revision"]) if info["revision"] else None
+    column_types = infer_column_types(df, cache_key=cache_key)
+    columns_info = [
+        {"name": name, "type": verdict.kind if verdict.kind in ("numeric", "date") else "text"}
+        for name, verdict in column_types.items()
+    ]
+    
+    head = df.head(5000)  # Max 5000 satır
+    records = head.astype(object).where(head.notna(), None).to_dict(orient="records")
+    
+    return {
+        "source": "google_sheets",
+        "spreadsheet_id": request.spreadsheet_id,
+        "sheet_name": info["sheet_name"],
+        "columns": [str(c) for c in df.columns],
+        "columns_info": columns_info,
+        "data": records,
+        "row_count": len(df),
+        "dataset_id": info["dataset_id"],
+        "page_url": f"/data/{info['dataset_id']}/page",
+        "cache": {"status": info["status"], "revision": info["revision"]}
+    }
 
 
 @router.get("/list-spreadsheets")
@@ -211,23 +172,11 @@ async def list_user_spreadsheets():
     Kullanıcının erişebildiği spreadsheet'leri listeler.
     """
     try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets.readonly',
-            'https://www.googleapis.com/auth/drive.readonly'
-        ]
-        
-        creds = Credentials.from_service_account_file(
-            GOOGLE_CREDENTIALS_FILE,
-            scopes=scopes
-        )
-        
-        client = gspread.authorize(creds)
+        # Önbellekteki yetkili istemci
+        client = get_client()
         
         # Tüm spreadsheet'leri listele
-        spreadsheets = client.openall()
+        spreadsheets = await run_in_threadpool(client.openall)
         
         return {
             "spreadsheets": [
@@ -240,5 +189,13 @@ async def list_user_spreadsheets():
             ]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cache")
+async def get_sheets_cache():
+    """İçe aktarılan sayfaların önbelleği: revizyonlar, isabetler, batchGet çağrıları."""
+    return sheets_cache_stats()
@@ -0,0 +1,421 @@
+"""
+Google Sheets Connector - Opradox Visual Studio
+Batched, revision-aware reads of Google Sheets into DataFrames.
+
+- The authorized gspread client is created once per credentials file and
+  reused (tokens are refreshed by google-auth), not per request.
+- The spreadsheet revision (Drive version / modifiedTime) is checked first;
+  an unchanged sheet is served from the cache without any Sheets API call.
+- Sheet sizes and the header row are read once per revision. Only the
+  requested columns are fetched, as column ranges (majorDimension=COLUMNS)
+  split into blocks of GOOGLE_SHEETS_ROWS_PER_RANGE rows and sent
+  GOOGLE_SHEETS_RANGES_PER_REQUEST at a time through values.batchGet.
+- Cells arrive typed (UNFORMATTED_VALUE: numbers as numbers, dates as
+  formatted strings); each column vector becomes a Series directly and
+  the frame is narrowed by dtype_optimizer like any upload.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from .dataset_store import get_dataset, get_dataset_frame, keyed_dataset_id, register_dataset
+from .dtype_optimizer import DTYPE_OPTIMIZE, optimize_dtypes, summarize_report
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+GOOGLE_CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")
+
+GOOGLE_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.readonly",
+]
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+
+# Ranges per values.batchGet call and rows per range
+GOOGLE_SHEETS_RANGES_PER_REQUEST = int(os.getenv("GOOGLE_SHEETS_RANGES_PER_REQUEST", "40"))
+GOOGLE_SHEETS_ROWS_PER_RANGE = int(os.getenv("GOOGLE_SHEETS_ROWS_PER_RANGE", "20000"))
+
+# UNFORMATTED_VALUE returns numbers as numbers; FORMATTED_VALUE as displayed text
+GOOGLE_SHEETS_VALUE_RENDER = os.getenv("GOOGLE_SHEETS_VALUE_RENDER", "UNFORMATTED_VALUE")
+
+# Imported sheets kept per (spreadsheet, sheet, columns, range)
+GOOGLE_SHEETS_CACHE_ENTRIES = int(os.getenv("GOOGLE_SHEETS_CACHE_ENTRIES", "32"))
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+
+_client: Optional[Tuple[Tuple[str, float], Any]] = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Authorized gspread client, reused until the credentials file changes."""
+    global _client
+    try:
+        mtime = os.path.getmtime(GOOGLE_CREDENTIALS_FILE)
+    except OSError:
+        raise HTTPException(status_code=500, detail="Google credentials dosyası bulunamadı")
+    key = (GOOGLE_CREDENTIALS_FILE, mtime)
+    with _client_lock:
+        if _client is None or _client[0] != key:
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            creds = Credentials.from_service_account_file(GOOGLE_CREDENTIALS_FILE, scopes=GOOGLE_SCOPES)
+            _client = (key, gspread.authorize(creds))
+            print("[GSHEETS] Client authorized")
+        return _client[1]
+
+
+def _http():
+    """Low-level Sheets/Drive REST client (gspread HTTPClient)."""
+    return get_client().http_client
+
+
+# ============================================================
+# CACHE
+# ============================================================
+
+@dataclass
+class SpreadsheetInfo:
+    """Sheet sizes and header rows of one spreadsheet revision."""
+    revision: Optional[str]
+    title: str
+    sheets: List[Dict[str, Any]]
+    headers: Dict[str, List[str]] = field(default_factory=dict)
+
+
+@dataclass
+class SheetEntry:
+    """An imported sheet (or range) and the revision it was read at."""
+    revision: Optional[str]
+    sheet_title: str
+    frame: pd.DataFrame
+    dataset_id: str
+    fetched_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+_spreadsheets: Dict[str, SpreadsheetInfo] = {}
+_entries: "OrderedDict[Tuple, SheetEntry]" = OrderedDict()
+_lock = threading.Lock()
+
+_stats = {"hits": 0, "misses": 0, "batch_get_calls": 0, "ranges": 0}
+
+
+# ============================================================
+# A1 NOTATION
+# ============================================================
+
+def column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA."""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _quote_sheet(title: str) -> str:
+    return "'" + title.replace("'", "''") + "'"
+
+
+def _column_runs(indices: Sequence[int]) -> List[Tuple[int, int]]:
+    """Sorted column indices grouped into contiguous (first, last) runs."""
+    runs: List[Tuple[int, int]] = []
+    for index in sorted(set(indices)):
+        if runs and index == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], index)
+        else:
+            runs.append((index, index))
+    return runs
+
+
+# ============================================================
+# SHEETS API CALLS
+# ============================================================
+
+def _api_error(error: Exception) -> HTTPException:
+    code = getattr(error, "code", None)
+    if code in (403, 404):
+        return HTTPException(status_code=404, detail="Spreadsheet bulunamadı veya erişim izniniz yok")
+    return HTTPException(status_code=400, detail=f"Google Sheets hatası: {error}")
+
+
+def _revision(http, spreadsheet_id: str) -> Optional[str]:
+    """Drive revision of the file; None when Drive metadata is not readable."""
+    try:
+        response = http.request(
+            "get", f"{DRIVE_FILES_URL}/{spreadsheet_id}",
+            params={"fields": "version,modifiedTime", "supportsAllDrives": True},
+        )
+        meta = response.json()
+    except Exception as e:
+        print(f"[GSHEETS] Revision unavailable for {spreadsheet_id}: {e}")
+        return None
+    return str(meta.get("version") or meta.get("modifiedTime") or "") or None
+
+
+def _spreadsheet(http, spreadsheet_id: str, revision: Optional[str]) -> SpreadsheetInfo:
+    """Sheet titles and grid sizes (cached for the revision)."""
+    with _lock:
+        info = _spreadsheets.get(spreadsheet_id)
+    if info is not None and revision is not None and info.revision == revision:
+        return info
+    meta = http.fetch_sheet_metadata(spreadsheet_id, params={
+        "fields": "properties.title,sheets.properties(title,index,gridProperties(rowCount,columnCount))",
+    })
+    sheets = []
+    for sheet in sorted(meta.get("sheets", []), key=lambda s: s["properties"].get("index", 0)):
+        props = sheet["properties"]
+        grid = props.get("gridProperties", {})
+        sheets.append({"title": props["title"], "rows": grid.get("rowCount", 0), "cols": grid.get("columnCount", 0)})
+    info = SpreadsheetInfo(revision, meta.get("properties", {}).get("title", ""), sheets)
+    with _lock:
+        _spreadsheets[spreadsheet_id] = info
+    return info
+
+
+def _batch_get(http, spreadsheet_id: str, ranges: List[str], dimension: str) -> List[List[List[Any]]]:
+    """values.batchGet in groups; one value matrix per range, in order."""
+    params = {
+        "majorDimension": dimension,
+        "valueRenderOption": GOOGLE_SHEETS_VALUE_RENDER,
+        "dateTimeRenderOption": "FORMATTED_STRING",
+    }
+    matrices: List[List[List[Any]]] = []
+    for start in range(0, len(ranges), GOOGLE_SHEETS_RANGES_PER_REQUEST):
+        group = ranges[start:start + GOOGLE_SHEETS_RANGES_PER_REQUEST]
+        response = http.values_batch_get(spreadsheet_id, group, params=dict(params))
+        # Empty ranges come back without "values"
+        matrices.extend(value_range.get("values", []) for value_range in response.get("valueRanges", []))
+        with _lock:
+            _stats["batch_get_calls"] += 1
+            _stats["ranges"] += len(group)
+    return matrices
+
+
+# ============================================================
+# FRAME CONSTRUCTION
+# ============================================================
+
+def _header_names(row: Sequence[Any], width: int) -> List[str]:
+    """Header cells as column names: blanks become 'Unnamed: i', duplicates get .1, .2 (as pandas)."""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i in range(width):
+        value = row[i] if i < len(row) else ""
+        name = str(value).strip() if value not in (None, "") else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _series(values: List[Any], length: int) -> pd.Series:
+    """Column vector as a Series: blank cells are missing, short vectors padded."""
+    cells = [None if v == "" else v for v in values]
+    cells.extend([None] * (length - len(cells)))
+    return pd.Series(cells)
+
+
+def _frame_from_columns(names: List[str], vectors: List[List[Any]]) -> pd.DataFrame:
+    length = max((len(v) for v in vectors), default=0)
+    return pd.DataFrame({name: _series(vector, length) for name, vector in zip(names, vectors)})
+
+
+def _frame_from_rows(rows: List[List[Any]]) -> pd.DataFrame:
+    """A1 range read row-wise: first row is the header."""
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(r) for r in rows)
+    names = _header_names(rows[0], width)
+    columns: List[List[Any]] = [[] for _ in range(width)]
+    for row in rows[1:]:
+        for i in range(width):
+            columns[i].append(row[i] if i < len(row) else "")
+    return _frame_from_columns(names, columns)
+
+
+def _read_columns(http, spreadsheet_id: str, info: SpreadsheetInfo, sheet: Dict[str, Any],
+                  columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    quoted = _quote_sheet(sheet["title"])
+    header = info.headers.get(sheet["title"])
+    if header is None:
+        rows = _batch_get(http, spreadsheet_id, [f"{quoted}!1:1"], "ROWS")[0]
+        header = _header_names(rows[0] if rows else [], len(rows[0]) if rows else 0)
+        info.headers[sheet["title"]] = header
+    if not header:
+        return pd.DataFrame()
+
+    if columns:
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Sütun bulunamadı: {missing}. Mevcut sütunlar: {header}")
+        indices = sorted(header.index(c) for c in columns)
+    else:
+        indices = list(range(len(header)))
+
+    # Column runs x row blocks; every block is a full block except the last
+    last_row = max(sheet["rows"], 2)
+    block = GOOGLE_SHEETS_ROWS_PER_RANGE
+    starts = list(range(2, last_row + 1, block))
+    runs = _column_runs(indices)
+    ranges = [
+        f"{quoted}!{column_letter(first)}{start}:{column_letter(last)}{min(start + block - 1, last_row)}"
+        for first, last in runs for start in starts
+    ]
+    matrices = iter(_batch_get(http, spreadsheet_id, ranges, "COLUMNS"))
+
+    blocks: Dict[int, List[List[Any]]] = {}
+    for first, last in runs:
+        for b in range(len(starts)):
+            matrix = next(matrices)
+            for offset, index in enumerate(range(first, last + 1)):
+                blocks.setdefault(index, [[] for _ in starts])[b] = matrix[offset] if offset < len(matrix) else []
+
+    # Blocks before the last non-empty one are padded to full size (trailing blank rows are omitted by the API)
+    filled = [b for b in range(len(starts)) if any(blocks[i][b] for i in indices)]
+    last_block = filled[-1] if filled else -1
+    vectors = []
+    for index in indices:
+        vector: List[Any] = []
+        for b in range(last_block + 1):
+            vector.extend(blocks[index][b])
+            if b < last_block:
+                vector.extend([""] * (block - len(blocks[index][b])))
+        vectors.append(vector)
+    return _frame_from_columns([header[i] for i in indices], vectors)
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def read_sheet(
+    spreadsheet_id: str,
+    sheet_name: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    cell_range: Optional[str] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    A sheet (or an A1 range of it) as a DataFrame, optionally limited to
+    some columns. Returns (frame, info); info["status"] is hit | miss.
+    """
+    import gspread
+
+    http = _http()
+    key = (spreadsheet_id, sheet_name, tuple(columns) if columns else None, cell_range)
+    revision = _revision(http, spreadsheet_id)
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and revision is not None and entry.revision == revision:
+            entry.hits += 1
+            _stats["hits"] += 1
+            _entries.move_to_end(key)
+            return entry.frame, {"status": "hit", "revision": revision, "sheet_name": entry.sheet_title,
+                                 "dataset_id": entry.dataset_id}
+
+    started = time.perf_counter()
+    try:
+        info = _spreadsheet(http, spreadsheet_id, revision)
+        if sheet_name:
+            sheet = next((s for s in info.sheets if s["title"] == sheet_name), None)
+            if sheet is None:
+                raise HTTPException(status_code=404, detail=f"'{sheet_name}' sayfası bulunamadı")
+        elif info.sheets:
+            sheet = info.sheets[0]
+        else:
+            raise HTTPException(status_code=404, detail="Spreadsheet'te sayfa yok")
+
+        if cell_range:
+            rows = _batch_get(http, spreadsheet_id, [f"{_quote_sheet(sheet['title'])}!{cell_range}"], "ROWS")[0]
+            df = _frame_from_rows(rows)
+            if columns:
+                df = df[[c for c in df.columns if c in columns]]
+        else:
+            df = _read_columns(http, spreadsheet_id, info, sheet, columns)
+    except gspread.exceptions.APIError as e:
+        raise _api_error(e)
+
+    memory_report = None
+    if DTYPE_OPTIMIZE and len(df.columns):
+        df, dtype_report = optimize_dtypes(df)
+        memory_report = summarize_report(dtype_report)
+
+    entry = SheetEntry(revision=revision, sheet_title=sheet["title"], frame=df, dataset_id=keyed_dataset_id("gs", repr(key)))
+    with _lock:
+        _stats["misses"] += 1
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > GOOGLE_SHEETS_CACHE_ENTRIES:
+            _entries.popitem(last=False)
+    print(f"[GSHEETS] {spreadsheet_id}/{sheet['title']}: {len(df)} rows, {len(df.columns)} columns "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms, revision {revision})")
+    return df, {"status": "miss", "revision": revision, "sheet_name": sheet["title"],
+                "dataset_id": entry.dataset_id, "memory": memory_report}
+
+
+def import_sheet(
+    spreadsheet_id: str,
+    sheet_name: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    cell_range: Optional[str] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """read_sheet() + dataset registration (skipped while the revision is unchanged)."""
+    df, info = read_sheet(spreadsheet_id, sheet_name, columns, cell_range)
+    dataset_id = info["dataset_id"]
+    dataset = get_dataset(dataset_id)
+    if dataset is None or dataset.meta.get("revision") != info["revision"] or info["revision"] is None:
+        register_dataset(df, source="google_sheets", dataset_id=dataset_id, meta={
+            "spreadsheet_id": spreadsheet_id,
+            "sheet_name": info["sheet_name"],
+            "range": cell_range,
+            "revision": info["revision"],
+        })
+    else:
+        df = get_dataset_frame(dataset_id)
+    return df, info
+
+
+def clear_sheets_cache() -> None:
+    with _lock:
+        _entries.clear()
+        _spreadsheets.clear()
+
+
+def sheets_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            **_stats,
+            "entries": [
+                {
+                    "spreadsheet_id": key[0],
+                    "sheet_name": entry.sheet_title,
+                    "columns": list(key[2]) if key[2] else None,
+                    "range": key[3],
+                    "revision": entry.revision,
+                    "rows": len(entry.frame),
+                    "hits": entry.hits,
+                    "fetched_at": entry.fetched_at,
+                }
+                for key, entry in _entries.items()
+            ],
+        }
@@ -168,21 +168,23 @@ async def health_check() -> Dict[str, Any]:
     # FAZ-ES-6: Get queue status
     queue_status = None
     try:
-        from .queue_storage import count_by_status
+        from .queue_storage import count_by_status, progress_batcher
         from .queue_engine import is_server_busy
         queue_status = {
             "ok": True,
             "queued": count_by_status("queued"),
             "running": count_by_status("running"),
-            "global_busy": is_server_busy()
+            "global_busy": is_server_busy(),
+            "progress_writes": progress_batcher.stats()
         }
     except Exception as e:
         queue_status = {"ok": False, "error": str(e)[:50]}
     
-    # FAZ-ES-7: Resource limits for monitoring visibility
+    # FAZ-ES-7: Resource limits for monitoring visibility (enforced by admission.py)
+    from .admission import MAX_UPLOAD_MB, MAX_ROWS, memory_budget
     limits = {
-        "max_upload_mb": 50,
-        "max_rows": 1000000,
+        "max_upload_mb": MAX_UPLOAD_MB,
+        "max_rows": MAX_ROWS,
         "max_pages": 100,
         "policy_tr": "Kaynakları verimli kullanmak için bu işlemde belirli limitler uygulanır. Bu limitler ileride artırılabilir.",
         "policy_en": "To use resources efficiently, certain limits apply to this operation. These limits may be increased as the infrastructure scales."
@@ -201,6 +203,7 @@ async def health_check() -> Dict[str, Any]:
         "queue": queue_status,
         "selftest_quick_last": selftest_quick_last,
         "limits": limits,
+        "memory": memory_budget.stats(),
         "notes": notes if notes else None,
         "request_id": request_id
     }
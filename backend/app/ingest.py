@@ -0,0 +1,193 @@
+"""
+Upload Ingestion - Opradox Excel Studio
+Streams uploads to a spooled temp file while hashing and size-checking.
+
+The upload body is copied in INGEST_CHUNK_BYTES chunks: small files stay in
+memory, larger ones go to an anonymous temp file. SHA-256 and the size
+limit are computed on the fly, so an oversized upload is rejected before
+it is fully read. Parsers then read through open(), which memory-maps the
+temp file, so the raw bytes never sit in the Python heap next to the
+parsed DataFrame (and several parses of one upload share the same pages).
+"""
+from __future__ import annotations
+import io
+import os
+import mmap
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, BinaryIO
+
+from fastapi import UploadFile, HTTPException
+
+from .admission import MAX_UPLOAD_MB
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+INGEST_CHUNK_BYTES = 1024 * 1024
+
+# Uploads up to this size are kept in memory instead of a temp file
+SPOOL_MAX_MEMORY_BYTES = int(os.getenv("INGEST_SPOOL_MEMORY_KB", "1024")) * 1024
+
+# Where spooled uploads are written (None = system temp dir)
+INGEST_TMP_DIR = os.getenv("INGEST_TMP_DIR") or None
+
+
+class _MappedReader(io.RawIOBase):
+    """Seekable read-only file object over an mmap (zero-copy slices)."""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mm = mapped
+        self._view = memoryview(mapped)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = max(0, min(len(buffer), len(self._mm) - self._pos))
+        buffer[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._mm) if size is None or size < 0 else min(len(self._mm), self._pos + size)
+        data = self._mm[self._pos:end]
+        self._pos = max(self._pos, end)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._mm)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def getbuffer(self) -> memoryview:
+        """The whole mapping without copying (e.g. for Arrow IPC readers)."""
+        return self._view[:]
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # zero-copy arrays still use the mapping; it is unmapped when they are freed
+        super().close()
+
+
+class IngestedFile:
+    """A spooled upload with its size and content hash."""
+
+    def __init__(self, filename: str, max_bytes: Optional[int] = None):
+        self.filename = filename or ""
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self.sha256: Optional[str] = None
+        self._memory: Optional[bytearray] = bytearray()
+        self._file: Optional[BinaryIO] = None
+
+    @property
+    def ext(self) -> str:
+        return Path(self.filename).suffix.lower()
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    # ---------------- writing ----------------
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.close()
+            raise HTTPException(
+                status_code=413,
+                detail=f"Dosya çok büyük: {self.max_bytes / 1024 ** 2:.0f} MB sınırı aşıldı",
+            )
+        self._hash.update(chunk)
+        if self._file is None and self.size > SPOOL_MAX_MEMORY_BYTES:
+            self._file = tempfile.TemporaryFile(prefix="upload_", dir=INGEST_TMP_DIR)
+            self._file.write(self._memory)
+            self._memory = None
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._memory.extend(chunk)
+
+    def finish(self) -> "IngestedFile":
+        self.sha256 = self._hash.hexdigest()
+        if self._file is not None:
+            self._file.flush()
+        if self.size == 0:
+            self.close()
+            raise HTTPException(status_code=400, detail="Boş dosya gönderildi.")
+        return self
+
+    # ---------------- reading ----------------
+
+    def open(self) -> BinaryIO:
+        """New independent reader positioned at 0 (memory-mapped when spooled to disk)."""
+        if self._file is not None:
+            return io.BufferedReader(
+                _MappedReader(mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ))
+            )
+        if self._memory is None:
+            raise ValueError("Yükleme kapatıldı")
+        return io.BytesIO(self._memory)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = None
+
+    def __enter__(self) -> "IngestedFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        where = "disk" if self.on_disk else "memory"
+        return f"IngestedFile({self.filename!r}, {self.size} bytes, {where}, sha256={self.sha256})"
+
+
+def _default_limit(max_bytes: Optional[int]) -> int:
+    return MAX_UPLOAD_MB * 1024 ** 2 if max_bytes is None else max_bytes
+
+
+def ingest_file(fileobj: BinaryIO, filename: str, max_bytes: Optional[int] = None) -> IngestedFile:
+    """Spool a readable binary file object (e.g. UploadFile.file) from its start."""
+    ingested = IngestedFile(filename, _default_limit(max_bytes))
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(INGEST_CHUNK_BYTES)
+        if not chunk:
+            break
+        ingested.write(chunk)
+    return ingested.finish()
+
+
+async def ingest_upload(upload: UploadFile, max_bytes: Optional[int] = None) -> IngestedFile:
+    """Spool an UploadFile without blocking the event loop on large reads."""
+    ingested = IngestedFile(upload.filename, _default_limit(max_bytes))
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(INGEST_CHUNK_BYTES)
+        if not chunk:
+            break
+        ingested.write(chunk)
+    return ingested.finish()
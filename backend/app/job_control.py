@@ -0,0 +1,284 @@
+"""
+Job Control - Opradox Excel Studio
+Cooperative cancellation, time limits and hard kill for running jobs.
+
+Every running queue job gets a CancellationToken. Long computations call
+checkpoint() between report-builder actions and at chunk boundaries; when
+the job was canceled or ran past its wall-clock limit the call raises
+JobCanceled, which (like asyncio.CancelledError) derives from
+BaseException so the many broad `except Exception` blocks in scenario
+code do not swallow it. The token travels in a ContextVar, so code run
+via asyncio tasks or asyncio.to_thread sees it without new parameters.
+
+Work that cannot check a token (a single long sklearn/numpy call) can be
+run in a worker process with run_in_worker(): it is terminated/killed on
+cancel or when the job passes its wall-clock limit.
+"""
+from __future__ import annotations
+import time
+import asyncio
+import threading
+import contextvars
+import multiprocessing
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, List
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# How often waiting code re-checks for cancellation (seconds)
+POLL_INTERVAL_S = 0.05
+
+# Seconds between SIGTERM and SIGKILL for worker processes
+KILL_GRACE_S = 2.0
+
+
+class JobCanceled(BaseException):
+    """Raised at a checkpoint of a canceled or timed-out job."""
+
+    def __init__(self, reason: str = "canceled", progress: float = 0.0):
+        super().__init__(reason)
+        self.reason = reason  # canceled | timeout
+        self.progress = progress
+
+
+# ============================================================
+# TOKEN
+# ============================================================
+
+class CancellationToken:
+    """Cancel flag + wall-clock deadline + last reported progress of one job."""
+
+    def __init__(
+        self,
+        job_id: Optional[str] = None,
+        wall_limit_s: Optional[float] = None,
+        on_progress: Optional[Callable[[float, Optional[str]], None]] = None,
+    ):
+        self.job_id = job_id
+        self.wall_limit_s = wall_limit_s
+        self.deadline = time.monotonic() + wall_limit_s if wall_limit_s else None
+        self.reason: Optional[str] = None
+        self.progress = 0.0
+        self.message: Optional[str] = None
+        self._on_progress = on_progress
+        self._event = threading.Event()
+        self._hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def canceled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("timeout")
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "canceled") -> bool:
+        """Request cancellation; False if it was already requested."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"[JOB] Cancel hook failed for {self.job_id}: {e}")
+        return True
+
+    def add_cancel_hook(self, hook: Callable[[], None]) -> None:
+        """Run hook on cancel (immediately if already canceled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._hooks.append(hook)
+                return
+        hook()
+
+    def remove_cancel_hook(self, hook: Callable[[], None]) -> None:
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        self.progress = max(0.0, min(1.0, float(progress)))
+        self.message = message
+        if self._on_progress:
+            self._on_progress(self.progress, message)
+
+    def check(self) -> None:
+        if self.canceled:
+            raise JobCanceled(self.reason or "canceled", self.progress)
+
+    def remaining_s(self) -> Optional[float]:
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "opradox_job_token", default=None
+)
+
+
+@contextmanager
+def use_token(token: Optional[CancellationToken]):
+    """Make token current for code (and tasks/threads) started inside the block."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+
+def checkpoint(progress: Optional[float] = None, message: Optional[str] = None) -> None:
+    """
+    Report progress and stop here if the current job was canceled.
+    No-op outside a queue job (plain HTTP requests, tests).
+    """
+    token = _current_token.get()
+    if token is None:
+        return
+    if progress is not None:
+        token.report(progress, message)
+    token.check()
+
+
+# ============================================================
+# REGISTRY (running jobs of this worker)
+# ============================================================
+
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def register_token(token: CancellationToken) -> None:
+    with _tokens_lock:
+        _tokens[token.job_id] = token
+
+
+def unregister_token(job_id: str) -> None:
+    with _tokens_lock:
+        _tokens.pop(job_id, None)
+
+
+def get_token(job_id: str) -> Optional[CancellationToken]:
+    with _tokens_lock:
+        return _tokens.get(job_id)
+
+
+def cancel_job(job_id: str, reason: str = "canceled") -> bool:
+    """Cancel a job running on this worker; False if it is not here."""
+    token = get_token(job_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+def running_tokens() -> List[Dict[str, Any]]:
+    with _tokens_lock:
+        tokens = list(_tokens.values())
+    return [
+        {
+            "job_id": t.job_id,
+            "progress": round(t.progress, 3),
+            "canceled": t.canceled,
+            "reason": t.reason,
+            "remaining_s": round(t.remaining_s(), 1) if t.remaining_s() is not None else None,
+        }
+        for t in tokens
+    ]
+
+
+# ============================================================
+# SUPERVISION
+# ============================================================
+
+def _consume_result(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def supervise(task: asyncio.Future, token: CancellationToken) -> Any:
+    """
+    Await task unless the token is canceled or times out first; then the
+    task is cancelled (a thread it started keeps running until its next
+    checkpoint) and JobCanceled is raised right away so the slot frees.
+    """
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=POLL_INTERVAL_S)
+        if done:
+            return task.result()
+        if token.canceled:
+            task.cancel()
+            task.add_done_callback(_consume_result)
+            raise JobCanceled(token.reason or "canceled", token.progress)
+
+
+# ============================================================
+# WORKER PROCESSES (HARD KILL)
+# ============================================================
+
+def _worker_main(conn, func: Callable, args: tuple, kwargs: dict) -> None:
+    try:
+        conn.send(("ok", func(*args, **kwargs)))
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+async def run_in_worker(func: Callable, *args, token: Optional[CancellationToken] = None, **kwargs) -> Any:
+    """
+    Run a picklable function in a separate process. On cancel/timeout the
+    process is terminated (then killed after KILL_GRACE_S).
+    """
+    token = token or _current_token.get()
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_worker_main, args=(child, func, args, kwargs), daemon=True)
+    proc.start()
+    child.close()
+
+    def kill():
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(KILL_GRACE_S)
+            if proc.is_alive():
+                proc.kill()
+
+    if token:
+        token.add_cancel_hook(kill)
+    try:
+        while True:
+            if parent.poll():
+                try:
+                    status, payload = parent.recv()
+                except EOFError:
+                    status, payload = "died", None
+                break
+            if not proc.is_alive() and not parent.poll():
+                status, payload = "died", None
+                break
+            if token and token.canceled:
+                break
+            await asyncio.sleep(POLL_INTERVAL_S)
+
+        if token and token.canceled:
+            raise JobCanceled(token.reason or "canceled", token.progress)
+        if status == "died":
+            proc.join(KILL_GRACE_S)
+            raise RuntimeError(f"Worker process exited with code {proc.exitcode}")
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+    finally:
+        if token:
+            token.remove_cancel_hook(kill)
+        kill()
+        proc.join(0.1)
+        parent.close()
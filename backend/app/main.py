@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import uvicorn
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 from io import BytesIO
@@ -15,7 +16,9 @@ from .ui_api import router as ui_router
 from .feedback_api import router as feedback_router
 from .feedback_store import init_feedback_db
 from .scenario_registry import LAST_EXCEL_STORE
-from .excel_utils import read_table_from_upload 
+from .chunked_exec import run_upload_chunked
+from .workbook_session import open_workbook
+from .columnar_io import COLUMNAR_FORMATS, MEDIA_TYPES, columnar_available, write_columnar
 from .auth import router as auth_router
 from .stats_service import router as viz_router
 
@@ -37,6 +40,10 @@ from .vba_api import router as vba_router
 # FAZ-A: Unified Scenario Runner API
 from .scenario_api import router as scenario_router
 
+# Dataset paging API (cursor-based browsing of results/datasets)
+from .dataset_api import router as dataset_router, result_dataset_id
+from .dataset_store import register_dataset
+
 # -------------------------------------------------------
 # Opradox 2.0 – Main Application
 # -------------------------------------------------------
@@ -89,6 +96,7 @@ app.include_router(vba_router)            # /vba/* (VBA Analysis)
 
 # FAZ-A: Unified Scenario Runner API
 app.include_router(scenario_router)       # /api/scenario/* (Unified Runner)
+app.include_router(dataset_router)        # /data/* (Cursor paging)
 
 # -------------------------------------------------------
 # STARTUP INIT (FAZ-ES-5: Storage + Cleanup)
@@ -135,6 +143,13 @@ async def startup_init():
     except Exception as e:
         print(f"[STARTUP] Queue init warning: {e}")
     
+    # Pub/sub backbone (cross-worker queue events + collaboration rooms)
+    try:
+        from .pubsub import get_pubsub
+        await get_pubsub().start()
+    except Exception as e:
+        print(f"[STARTUP] Pub/sub start warning: {e}")
+    
     # FAZ-ES-1: shared_files eski dosya temizliği
     try:
         base_dir = Path(__file__).resolve().parents[2]
@@ -175,7 +190,8 @@ async def get_sheet_columns(
     Visual Builder'da farklı sayfa seçildiğinde sütunları dinamik güncellemek için kullanılır.
     """
     try:
-        df = read_table_from_upload(file, sheet_name=sheet_name, header_row=0)
+        # Aynı dosya için sayfa değiştirildiğinde workbook oturumu yeniden açılmaz
+        df = open_workbook(file).sheet(sheet_name, header_row=0, copy=False)
         columns = list(df.columns)
         return {
             "sheet_name": sheet_name,
@@ -189,6 +205,33 @@ async def get_sheet_columns(
 # -------------------------------------------------------
 # SCENARIO RUNNER
 # -------------------------------------------------------
+def _crosssheet_name(params) -> str | None:
+    """Rapor config'inde use_crosssheet işaretli ilk aksiyonun sayfa adı (params: JSON ya da dict)."""
+    try:
+        params_dict = json.loads(params) if isinstance(params, str) else params
+        raw_config = params_dict.get("config", "")
+        parsed = json.loads(raw_config) if isinstance(raw_config, str) and raw_config else (raw_config if isinstance(raw_config, list) else [])
+        actions_list = parsed if isinstance(parsed, list) else parsed.get("actions", [])
+        for action in actions_list:
+            if action.get("use_crosssheet") and action.get("crosssheet_name"):
+                return action.get("crosssheet_name")
+    except:
+        pass
+    return None
+
+
+def _input_columns(scenario: dict, params) -> list | None:
+    """Senaryonun okuduğu sütunlar (input_columns kancası); bilinmiyorsa None = tüm sütunlar."""
+    hook = scenario.get("input_columns")
+    if hook is None:
+        return None
+    try:
+        params_dict = json.loads(params) if isinstance(params, str) else params
+        return hook(params_dict) if isinstance(params_dict, dict) else None
+    except Exception:
+        return None
+
+
 @app.post("/run/{scenario_id}")
 async def run_scenario(
     scenario_id: str,
@@ -234,12 +277,51 @@ async def run_scenario(
     except Exception as e:
         print(f"Log yazma hatası: {e}")
 
+    # --- 0) Büyük CSV/XLSX: toplama senaryoları dosyayı parça parça okuyarak çalışır (chunked_exec) ---
+    # Dakikalar sürebilen okuma event loop'u bloklamasın diye thread pool'da çalışır
+    chunked_result = None
+    if not file2:
+        chunked_result = await run_in_threadpool(
+            run_upload_chunked, get_scenario(scenario_id).get("partial"), file, params,
+            header_row=header_row_int, sheet_name=sheet_name,
+        )
+
     # --- 1) Excel okuma (sheet_name + header_row desteği eklendi) ---
-    try:
-        df = read_table_from_upload(file, sheet_name=sheet_name, header_row=header_row_int)
-    except Exception as e:
-        with open("server_debug.log", "a") as f: f.write(f"Excel Read Error: {e}\n")
-        raise HTTPException(status_code=500, detail=f"Dosya okuma hatası: {str(e)}")
+    session2 = None
+    # Tarih metinleri yalnızca isteyen senaryolarda datetime64'e çevrilir (bkz. dtype_optimizer.py)
+    parse_dates = True if get_scenario(scenario_id).get("parse_dates") else None
+    if chunked_result is not None:
+        # Tablo belleğe alınmadı; yanıt için yalnızca başlık satırı tutulur
+        df = pd.DataFrame(columns=chunked_result["technical_details"]["input_columns"])
+    else:
+        try:
+            # Dosya bir kez açılır; crosssheet ya da aynı dosyadan gelen file2 sayfaları
+            # ana sayfayla birlikte paralel ayrıştırılıp oturumda önbelleklenir
+            session = open_workbook(file)
+            specs = [(sheet_name, header_row_int)]
+            crosssheet_name = _crosssheet_name(params) if not file2 else None
+            if crosssheet_name:
+                specs.append((crosssheet_name, 0))
+            if file2:
+                try:
+                    session2 = open_workbook(file2)
+                except Exception:
+                    session2 = None  # hata aşağıda ikinci dosya okunurken raporlanır
+                # Frontend crosssheet için aynı dosyayı file2 olarak gönderir: tek oturum
+                if session2 is session:
+                    specs.append((sheet_name2, header_row2_int))
+            session.prefetch(specs, parse_dates=parse_dates)
+            # Parquet/Feather/Arrow: yalnızca senaryonun kullandığı sütunlar okunur
+            columns = _input_columns(get_scenario(scenario_id), params)
+            # Tek sayfa okunuyorsa tablo önbelleğe alınmaz (önbellek + kopya belleği iki kez tutardı)
+            df = session.sheet(
+                sheet_name, header_row=header_row_int, parse_dates=parse_dates, columns=columns, cache=len(specs) > 1,
+            )
+        except HTTPException:
+            raise  # 413 / 503 (Retry-After) yükleme kabulü yanıtları olduğu gibi döner
+        except Exception as e:
+            with open("server_debug.log", "a") as f: f.write(f"Excel Read Error: {e}\n")
+            raise HTTPException(status_code=500, detail=f"Dosya okuma hatası: {str(e)}")
     
     # --- 2) Parametreleri JSON'dan Python dict'e dönüştür ---
     try:
@@ -263,30 +345,19 @@ async def run_scenario(
         # İkinci dosya varsa params'a ekle (sheet_name2 + header_row2 desteği eklendi)
         if file2:
             try:
-                df2 = read_table_from_upload(file2, sheet_name=sheet_name2, header_row=header_row2_int)
+                df2 = (session2 or open_workbook(file2)).sheet(sheet_name2, header_row=header_row2_int, parse_dates=parse_dates)
                 params_dict["df2"] = df2
             except Exception as e:
                 with open("server_debug.log", "a") as f: f.write(f"Second File Error: {e}\n")
                 raise HTTPException(status_code=400, detail=f"İkinci dosya okunamadı: {str(e)}")
         
         # YENİ: Crosssheet durumunda df2 yoksa ana dosyayı farklı sheet olarak oku
-        if "df2" not in params_dict:
-            raw_config = params_dict.get("config", "")
-            crosssheet_name = None
-            try:
-                parsed = json.loads(raw_config) if isinstance(raw_config, str) and raw_config else (raw_config if isinstance(raw_config, list) else [])
-                actions_list = parsed if isinstance(parsed, list) else parsed.get("actions", [])
-                for action in actions_list:
-                    if action.get("use_crosssheet") and action.get("crosssheet_name"):
-                        crosssheet_name = action.get("crosssheet_name")
-                        break
-            except:
-                pass
-            
+        if "df2" not in params_dict and chunked_result is None:
+            crosssheet_name = _crosssheet_name(params_dict)
             if crosssheet_name:
                 try:
-                    file.file.seek(0)
-                    df2 = read_table_from_upload(file, sheet_name=crosssheet_name)
+                    # Ön-yüklemede ayrıştırıldıysa önbellekten gelir
+                    df2 = session.sheet(crosssheet_name, parse_dates=parse_dates)
                     params_dict["df2"] = df2
                     with open("server_debug.log", "a") as f:
                         f.write(f"CROSSSHEET: '{crosssheet_name}' sayfası okundu, {len(df2)} satır\n")
@@ -295,9 +366,11 @@ async def run_scenario(
         
         # RUNNER ÇAĞRISI
         with open("server_debug.log", "a") as f: f.write(f"Calling runner for {scenario_id}...\n")
-        result = runner(df, params_dict)
+        result = chunked_result if chunked_result is not None else runner(df, params_dict)
         with open("server_debug.log", "a") as f: f.write(f"Runner finished successfully.\n")
 
+    except HTTPException:
+        raise
     except ValueError as e:
         with open("server_debug.log", "a") as f: f.write(f"Runner ValueError: {e}\n")
         raise HTTPException(status_code=400, detail=str(e))
@@ -322,6 +395,7 @@ async def run_scenario(
     # DataFrame'i hafızada tutuyoruz ki kullanıcı istediği formatta (xls, csv, json) indirebilsin via /download
     
     has_output = False
+    result_dataset = None
     
     if isinstance(result, dict):
         store_data = {}
@@ -341,6 +415,10 @@ async def run_scenario(
             LAST_EXCEL_STORE[scenario_id] = store_data
         
             LAST_EXCEL_STORE[scenario_id] = store_data
+
+        # Sonuç DataFrame'ini sayfalı gezinme için kaydet (/data/{dataset_id}/page); her çalıştırma kendi id'sini alır
+        if "dataframe" in store_data:
+            result_dataset = register_dataset(store_data["dataframe"], source="result", dataset_id=result_dataset_id(scenario_id))
         
         # DEBUG TRACE
         # print(f"DEBUG: Storing result for {scenario_id}. Has output: {has_output}")
@@ -363,6 +441,8 @@ async def run_scenario(
     technical_details["input_rows"] = technical_details.get("input_rows", len(df))
     technical_details["input_columns"] = technical_details.get("input_columns", list(df.columns))
     technical_details["input_cols"] = len(df.columns) # Convenience aliases
+    if "dtype_report" in df.attrs:
+        technical_details["input_memory"] = df.attrs["dtype_report"]
     
     # 2. Output Stats (Garanti)
     if "df_out" in result and result["df_out"] is not None:
@@ -421,10 +501,12 @@ async def run_scenario(
                 "rows": preview_df.replace({np.nan: None}).to_dict(orient='records'),
                 "truncated": total_rows > 100,
                 "row_limit": 100,
-                "total_rows": total_rows
+                "total_rows": total_rows,
+                "dataset_id": result_dataset,
+                "page_url": f"/data/{result_dataset}/page" if result_dataset else None
             },
             "summary": {
-                "Girdi Satır Sayısı": len(df),
+                "Girdi Satır Sayısı": technical_details["input_rows"],
                 "Sonuç Satır Sayısı": total_rows,
                 "Önizleme": "Sadece ilk 100 satır gösteriliyor."
             },
@@ -446,6 +528,12 @@ async def run_scenario(
         response_data["download_url"] = f"/download/{scenario_id}?format=xlsx"
         response_data["csv_url"] = f"/download/{scenario_id}?format=csv"
         response_data["json_url"] = f"/download/{scenario_id}?format=json"
+        if columnar_available() and "df_out" in result and result["df_out"] is not None:
+            for fmt in COLUMNAR_FORMATS:
+                response_data[f"{fmt}_url"] = f"/download/{scenario_id}?format={fmt}"
+        if result_dataset:
+            response_data["dataset_id"] = result_dataset
+            response_data["page_url"] = f"/data/{result_dataset}/page"
 
     return response_data
 
@@ -457,6 +545,7 @@ async def run_scenario(
 async def download_result(scenario_id: str, format: str = "xlsx"):
     """
     Senaryo sonucunu istenen formatta indirir (Temp dosyası ve xlsxwriter ile).
+    format: xlsx | csv | json | parquet | feather | arrow (son üçü pyarrow ister)
     """
     import traceback
     import tempfile
@@ -511,6 +600,9 @@ async def download_result(scenario_id: str, format: str = "xlsx"):
                     df.to_csv(path, index=False, sep=";", encoding="utf-8-sig")
                 elif format == "json":
                     df.to_json(path, orient="records", force_ascii=False, indent=2)
+                elif format in COLUMNAR_FORMATS:
+                    # Sayısal sütunlar Arrow'a kopyasız aktarılır
+                    write_columnar(df, path, format)
                 else:
                     # XLSX Fallback
                     df.to_excel(path, index=False, engine="xlsxwriter")
@@ -530,7 +622,7 @@ async def download_result(scenario_id: str, format: str = "xlsx"):
             try: os.remove(path)
             except: pass
 
-        response = FileResponse(path, filename=filename)
+        response = FileResponse(path, filename=filename, media_type=MEDIA_TYPES.get(format))
         response.background = BackgroundTasks()
         response.background.add_task(cleanup)
         return response
@@ -0,0 +1,302 @@
+"""
+ML Engine - Opradox Visual Studio
+Scalable K-Means and PCA used by /viz/kmeans and /viz/pca.
+
+Small inputs keep the exact algorithms (full-batch KMeans, exact PCA) so
+results stay identical to earlier releases. Past LARGE_DATA_ROW_THRESHOLD
+rows the engine switches to MiniBatchKMeans and randomized / incremental PCA
+and only returns summaries plus plot-ready points (sampled or binned), so
+memory stays bounded and response size does not grow with the input.
+"""
+from __future__ import annotations
+from typing import Optional, List, Dict, Any
+
+import numpy as np
+
+from .job_control import checkpoint
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Row count above which "auto" mode switches to the large-data algorithms
+LARGE_DATA_ROW_THRESHOLD = 50_000
+
+# Above this, PCA is fitted incrementally over chunks instead of in one SVD
+INCREMENTAL_PCA_ROW_THRESHOLD = 500_000
+CHUNK_ROWS = 65_536
+
+MINIBATCH_SIZE = 4096
+RANDOM_STATE = 42
+
+# k-sweep (elbow / silhouette) is evaluated on a sample of this size
+SWEEP_SAMPLE_SIZE = 5000
+SILHOUETTE_SAMPLE_SIZE = 2000
+
+# Plot payload limits
+MAX_PLOT_POINTS = 2000
+PLOT_GRID_BINS = 50
+
+VALID_MODES = ("auto", "exact", "large")
+
+
+def resolve_mode(n_rows: int, mode: str = "auto") -> str:
+    """Return "exact" or "large" for the requested mode and input size."""
+    mode = (mode or "auto").lower()
+    if mode not in VALID_MODES:
+        raise ValueError(f"Geçersiz mod: {mode}. Geçerli: {', '.join(VALID_MODES)}")
+    if mode == "auto":
+        return "large" if n_rows > LARGE_DATA_ROW_THRESHOLD else "exact"
+    return mode
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def _rng(seed: int = RANDOM_STATE) -> np.random.Generator:
+    return np.random.default_rng(seed)
+
+
+def sample_indices(n: int, size: int, seed: int = RANDOM_STATE) -> np.ndarray:
+    """Sorted uniform sample of row positions (all rows when n <= size)."""
+    if n <= size:
+        return np.arange(n)
+    return np.sort(_rng(seed).choice(n, size=size, replace=False))
+
+
+def standardize(X: np.ndarray, dtype=np.float64) -> np.ndarray:
+    """
+    Column-wise z-score, equivalent to StandardScaler().fit_transform(X)
+    but computed in place on a single copy of the requested dtype.
+    """
+    X = np.array(X, dtype=dtype, copy=True)
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    X -= mean
+    X /= std
+    return X
+
+
+def plot_points(
+    coords: np.ndarray,
+    labels: Optional[np.ndarray] = None,
+    max_points: int = MAX_PLOT_POINTS,
+    bins: int = PLOT_GRID_BINS,
+) -> Dict[str, Any]:
+    """
+    Plot-ready representation of 2-D coordinates.
+
+    Up to max_points rows are returned as-is. Larger inputs get a sample
+    (stratified by label so small clusters stay visible) plus a density
+    grid over the first two dimensions.
+    """
+    n = len(coords)
+    coords2d = coords[:, :2] if coords.ndim == 2 else coords.reshape(-1, 1)
+
+    if n <= max_points:
+        idx = np.arange(n)
+    elif labels is None:
+        idx = sample_indices(n, max_points)
+    else:
+        uniq, counts = np.unique(labels, return_counts=True)
+        quota = np.maximum(1, np.round(counts / n * max_points)).astype(int)
+        rng = _rng()
+        picks = []
+        for lab, q in zip(uniq, quota):
+            members = np.flatnonzero(labels == lab)
+            picks.append(members if len(members) <= q else rng.choice(members, size=q, replace=False))
+        idx = np.sort(np.concatenate(picks))
+
+    result: Dict[str, Any] = {
+        "x": np.round(coords2d[idx, 0], 4).tolist(),
+        "y": np.round(coords2d[idx, 1], 4).tolist() if coords2d.shape[1] > 1 else [],
+        "sampled": bool(n > max_points),
+        "total_points": int(n),
+    }
+    if labels is not None:
+        result["labels"] = labels[idx].astype(int).tolist()
+
+    if n > max_points and coords2d.shape[1] > 1:
+        counts, x_edges, y_edges = np.histogram2d(coords2d[:, 0], coords2d[:, 1], bins=bins)
+        result["grid"] = {
+            "x_edges": np.round(x_edges, 4).tolist(),
+            "y_edges": np.round(y_edges, 4).tolist(),
+            "counts": counts.astype(int).tolist(),
+        }
+    return result
+
+
+# ============================================================
+# K-MEANS
+# ============================================================
+
+def kmeans_sweep(
+    X: np.ndarray,
+    k_values: List[int],
+    sample_size: int = SWEEP_SAMPLE_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Elbow / silhouette sweep over k_values on a uniform sample of X.
+    Always uses MiniBatchKMeans so the sweep cost does not depend on len(X).
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    Xs = X[sample_indices(len(X), sample_size)]
+    results = []
+    for k in k_values:
+        if k < 2 or k >= len(Xs):
+            continue
+        checkpoint()
+        model = MiniBatchKMeans(
+            n_clusters=k, batch_size=MINIBATCH_SIZE, n_init=3, random_state=RANDOM_STATE
+        ).fit(Xs)
+        try:
+            sil = float(silhouette_score(
+                Xs, model.labels_,
+                sample_size=min(SILHOUETTE_SAMPLE_SIZE, len(Xs)),
+                random_state=RANDOM_STATE,
+            ))
+        except ValueError:
+            sil = None
+        results.append({
+            "k": int(k),
+            "inertia": round(float(model.inertia_), 4),
+            "silhouette": round(sil, 4) if sil is not None else None,
+        })
+    return results
+
+
+def best_k(sweep: List[Dict[str, Any]]) -> Optional[int]:
+    """k with the highest silhouette in a sweep (None if unavailable)."""
+    scored = [s for s in sweep if s.get("silhouette") is not None]
+    if not scored:
+        return None
+    return max(scored, key=lambda s: s["silhouette"])["k"]
+
+
+def fit_kmeans(
+    X: np.ndarray,
+    n_clusters: int,
+    mode: str = "auto",
+    k_values: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Cluster the raw (unscaled) matrix X.
+
+    Returns labels, centers (in standardized space), inertia, cluster sizes,
+    plot points and, when k_values is given, a k-sweep.
+    """
+    resolved = resolve_mode(len(X), mode)
+
+    if resolved == "exact":
+        from sklearn.cluster import KMeans
+        Xz = standardize(X, np.float64)
+        model = KMeans(n_clusters=n_clusters, random_state=RANDOM_STATE)
+    else:
+        from sklearn.cluster import MiniBatchKMeans
+        Xz = standardize(X, np.float32)
+        model = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=MINIBATCH_SIZE,
+            n_init=3,
+            random_state=RANDOM_STATE,
+        )
+
+    labels = model.fit_predict(Xz)
+    sizes = np.bincount(labels, minlength=n_clusters)
+
+    result = {
+        "mode": resolved,
+        "labels": labels,
+        "centers": np.asarray(model.cluster_centers_, dtype=np.float64).tolist(),
+        "inertia": float(model.inertia_),
+        "cluster_sizes": sizes.astype(int).tolist(),
+        "points": plot_points(Xz, labels),
+    }
+    if k_values:
+        result["sweep"] = kmeans_sweep(Xz, k_values)
+        result["suggested_k"] = best_k(result["sweep"])
+    return result
+
+
+# ============================================================
+# PCA
+# ============================================================
+
+def _incremental_pca(X: np.ndarray, n_components: int, chunk_rows: int):
+    """
+    IncrementalPCA over row chunks. Standardization is applied per chunk
+    from global column statistics, so no full standardized copy is made.
+    """
+    from sklearn.decomposition import IncrementalPCA
+
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    chunk_rows = max(chunk_rows, n_components)
+
+    model = IncrementalPCA(n_components=n_components)
+    n = len(X)
+    for start in range(0, n, chunk_rows):
+        chunk = X[start:start + chunk_rows]
+        if len(chunk) < n_components:
+            break  # last tiny tail; partial_fit needs >= n_components rows
+        checkpoint()
+        model.partial_fit(((chunk - mean) / std).astype(np.float32))
+
+    idx = sample_indices(n, MAX_PLOT_POINTS)
+    projected = model.transform(((X[idx] - mean) / std).astype(np.float32))
+    return model, projected, idx
+
+
+def fit_pca(
+    X: np.ndarray,
+    n_components: int,
+    mode: str = "auto",
+    chunk_rows: int = CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """
+    PCA on the raw matrix X (standardized internally).
+
+    exact: full SVD, all projected rows returned.
+    large: randomized SVD, or IncrementalPCA over chunks for very large X;
+           only a sample of projected rows is materialized.
+    """
+    from sklearn.decomposition import PCA
+
+    n = len(X)
+    resolved = resolve_mode(n, mode)
+    solver = "full"
+
+    if resolved == "exact":
+        model = PCA(n_components=n_components)
+        projected = model.fit_transform(standardize(X, np.float64))
+        idx = np.arange(n)
+    elif n > INCREMENTAL_PCA_ROW_THRESHOLD:
+        solver = "incremental"
+        model, projected, idx = _incremental_pca(X, n_components, chunk_rows)
+    else:
+        solver = "randomized"
+        Xz = standardize(X, np.float32)
+        model = PCA(n_components=n_components, svd_solver="randomized", random_state=RANDOM_STATE)
+        model.fit(Xz)
+        idx = sample_indices(n, MAX_PLOT_POINTS)
+        projected = model.transform(Xz[idx])
+
+    points = plot_points(projected)
+    if len(idx) < n:
+        points["sampled"] = True
+        points["total_points"] = int(n)
+
+    return {
+        "mode": resolved,
+        "solver": solver,
+        "explained_variance": np.asarray(model.explained_variance_ratio_, dtype=np.float64).tolist(),
+        "loadings": np.asarray(model.components_, dtype=np.float64).tolist(),
+        "projected": projected,
+        "projected_index": idx,
+        "points": points,
+    }
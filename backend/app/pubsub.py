@@ -0,0 +1,270 @@
+"""
+Pub/Sub Backbone - Opradox Excel Studio
+Cross-worker message bus for queue events and collaboration rooms.
+
+Publishers address a channel ("queue:<user_key>", "room:<room_id>");
+subscribers register a channel prefix and an async handler. Two backends:
+
+- memory : in-process dispatch (default, single worker)
+- sqlite : messages are appended to a shared WAL database that every
+           worker polls, so uvicorn workers on one host see each other's
+           events. The backend interface (publish / subscribe / start /
+           stop) maps 1:1 to Redis PUBLISH / PSUBSCRIBE for multi-host.
+
+Select with PUBSUB_BACKEND=memory|sqlite.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import uuid
+import asyncio
+import traceback
+from pathlib import Path
+from typing import Dict, Any, Callable, Awaitable, List, Tuple, Optional
+
+from .storage import DATA_DIR, get_pool
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "memory").lower()
+PUBSUB_DB_PATH = Path(os.getenv("PUBSUB_DB_PATH", str(DATA_DIR / "pubsub.db")))
+# How often the sqlite backend looks for messages from other workers
+PUBSUB_POLL_INTERVAL_MS = int(os.getenv("PUBSUB_POLL_INTERVAL_MS", "100"))
+# Messages older than this are pruned (late workers skip them anyway)
+PUBSUB_RETENTION_S = int(os.getenv("PUBSUB_RETENTION_S", "60"))
+# Max messages read per poll
+PUBSUB_POLL_BATCH = 500
+
+# Unique per process; used to skip our own messages when polling
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+Handler = Callable[[str, Dict[str, Any], bool], Awaitable[None]]
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class InProcessPubSub:
+    """Single-process backend: publish dispatches straight to local handlers."""
+
+    name = "memory"
+
+    def __init__(self, worker_id: str = WORKER_ID):
+        self.worker_id = worker_id
+        self._handlers: List[Tuple[str, Handler]] = []
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, prefix: str, handler: Handler) -> None:
+        """
+        Register handler(channel, message, remote) for channels starting
+        with prefix. remote is True when the message came from another worker.
+        """
+        if (prefix, handler) not in self._handlers:
+            self._handlers.append((prefix, handler))
+
+    def unsubscribe(self, prefix: str, handler: Handler) -> None:
+        if (prefix, handler) in self._handlers:
+            self._handlers.remove((prefix, handler))
+
+    async def publish(self, channel: str, message: Dict[str, Any], local: bool = True) -> None:
+        """
+        Publish to every worker. With local=False the message is only sent to
+        other workers (the caller already delivered it to its own clients).
+        """
+        self.published += 1
+        if local:
+            await self._dispatch(channel, message, remote=False)
+
+    async def _dispatch(self, channel: str, message: Dict[str, Any], remote: bool) -> None:
+        for prefix, handler in list(self._handlers):
+            if channel.startswith(prefix):
+                try:
+                    await handler(channel, message, remote)
+                    self.delivered += 1
+                except Exception as e:
+                    print(f"[PUBSUB] Handler error on {channel}: {e}")
+                    traceback.print_exc()
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "worker_id": self.worker_id,
+            "subscriptions": len(self._handlers),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+class SQLitePubSub(InProcessPubSub):
+    """
+    Multi-worker backend on a shared SQLite file.
+
+    publish() delivers locally right away and appends the message to
+    pubsub_messages; a poller task in every worker reads rows newer than
+    its cursor that were written by other workers.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        db_path: Path = PUBSUB_DB_PATH,
+        poll_interval_ms: int = PUBSUB_POLL_INTERVAL_MS,
+        worker_id: str = WORKER_ID,
+    ):
+        super().__init__(worker_id)
+        self.db_path = Path(db_path)
+        self.poll_interval = poll_interval_ms / 1000.0
+        self._pool = get_pool(self.db_path)
+        self._task: Optional[asyncio.Task] = None
+        self._last_id = 0
+        self._last_prune = 0.0
+        self.received = 0
+        self._init_table()
+
+    def _init_table(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pubsub_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    origin TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM pubsub_messages").fetchone()
+            conn.commit()
+        # New workers only see messages published after they started
+        self._last_id = int(row[0])
+
+    def _append(self, channel: str, payload: str) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO pubsub_messages (channel, origin, payload, created_at) VALUES (?, ?, ?, ?)",
+                (channel, self.worker_id, payload, time.time())
+            )
+            conn.commit()
+
+    async def publish(self, channel: str, message: Dict[str, Any], local: bool = True) -> None:
+        payload = json.dumps(message, ensure_ascii=False, default=str)
+        # The write (and a busy WAL lock) waits in a thread, not on the event loop
+        await asyncio.to_thread(self._append, channel, payload)
+        self._ensure_started()
+        await super().publish(channel, message, local)
+
+    def subscribe(self, prefix: str, handler: Handler) -> None:
+        super().subscribe(prefix, handler)
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # started later from start() / first publish
+            self._task = loop.create_task(self._poll_loop())
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _fetch(self, after_id: int) -> list:
+        with self._pool.connection() as conn:
+            return conn.execute(
+                "SELECT id, channel, origin, payload FROM pubsub_messages WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, PUBSUB_POLL_BATCH)
+            ).fetchall()
+
+    def _delete_before(self, cutoff: float) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM pubsub_messages WHERE created_at < ?", (cutoff,))
+            conn.commit()
+
+    async def poll_once(self) -> int:
+        """Deliver messages from other workers; returns how many were handled."""
+        # Queries run in a thread; only the dispatch happens on the event loop
+        rows = await asyncio.to_thread(self._fetch, self._last_id)
+        handled = 0
+        for row in rows:
+            self._last_id = row["id"]
+            if row["origin"] == self.worker_id:
+                continue
+            await self._dispatch(row["channel"], json.loads(row["payload"]), remote=True)
+            handled += 1
+        self.received += handled
+        await self._prune()
+        return handled
+
+    async def _prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < PUBSUB_RETENTION_S:
+            return
+        self._last_prune = now
+        await asyncio.to_thread(self._delete_before, now - PUBSUB_RETENTION_S)
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                if self._handlers:
+                    await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[PUBSUB] Poll error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"db_path": str(self.db_path), "received": self.received, "last_id": self._last_id})
+        return stats
+
+
+# ============================================================
+# GLOBAL BACKBONE
+# ============================================================
+
+_BACKENDS = {
+    "memory": InProcessPubSub,
+    "sqlite": SQLitePubSub,
+}
+
+_pubsub: Optional[InProcessPubSub] = None
+
+
+def get_pubsub() -> InProcessPubSub:
+    """Process-wide backbone, created from PUBSUB_BACKEND on first use."""
+    global _pubsub
+    if _pubsub is None:
+        backend = _BACKENDS.get(PUBSUB_BACKEND)
+        if backend is None:
+            print(f"[PUBSUB] Unknown backend '{PUBSUB_BACKEND}', using memory")
+            backend = InProcessPubSub
+        _pubsub = backend()
+        print(f"[PUBSUB] Backend: {_pubsub.name} (worker {_pubsub.worker_id})")
+    return _pubsub
+
+
+def set_pubsub(backend: InProcessPubSub) -> InProcessPubSub:
+    """Replace the backbone (keeps existing subscriptions). Returns the old one."""
+    global _pubsub
+    old = get_pubsub()
+    for prefix, handler in old._handlers:
+        backend.subscribe(prefix, handler)
+    _pubsub = backend
+    return old
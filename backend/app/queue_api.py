@@ -11,6 +11,8 @@ import time
 
 from .queue_config import (
     JobStatus,
+    DEFAULT_PRIORITY_CLASS,
+    priority_for_class,
     get_avg_duration_ms,
     get_text,
     QUEUE_TEXTS
@@ -23,14 +25,28 @@ from .queue_storage import (
     count_by_status,
     get_position_in_queue,
     get_queued_jobs,
-    get_running_jobs
+    get_running_jobs,
+    reassign_job_owner
 )
+from .queue_dedup import (
+    job_fingerprint,
+    find_duplicate,
+    get_followers,
+    remove_follower,
+    dedup_stats
+)
+from .queue_scheduler import scheduler
 from .queue_engine import (
     can_start_job,
     is_server_busy,
     is_service_busy,
-    start_job
+    start_job,
+    reserve_job_memory,
+    cancel_running_job
 )
+from .admission import estimate_from_limits, memory_budget
+from .job_control import running_tokens
+from .queue_retention import get_metrics
 
 router = APIRouter(prefix="/queue", tags=["queue"])
 
@@ -46,6 +62,10 @@ class SubmitRequest(BaseModel):
     params: Dict[str, Any] = {}
     limits: Dict[str, Any] = {}
     user_key: str
+    input_hash: Optional[str] = None  # SHA-256 of the uploaded input, part of the fingerprint
+    dedup: bool = True                # False = always create a new job (also without input_hash)
+    priority_class: str = DEFAULT_PRIORITY_CLASS  # "interactive" | "batch" | "scheduled"
+    deadline_s: Optional[float] = None  # finish within N seconds if possible
 
 
 class SubmitResponse(BaseModel):
@@ -57,6 +77,8 @@ class SubmitResponse(BaseModel):
     eta_ms: int
     server_busy: bool
     service_busy: bool
+    deduplicated: Optional[str] = None  # "inflight" | "result" when an existing job was reused
+    result_ref: Optional[Dict[str, Any]] = None
 
 
 class JobStatusResponse(BaseModel):
@@ -95,7 +117,36 @@ async def submit_job(request: SubmitRequest):
         status="running", modal_required=false, position=0, eta_ms=0
     - If job is queued:
         status="queued", modal_required=true, position>=1, eta_ms>0
+    - If an identical job is queued/running, the response points at it
+      (deduplicated="inflight"); if one finished within the TTL, its
+      result is returned directly (deduplicated="result", status="done")
     """
+    try:
+        priority = priority_for_class(request.priority_class)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    fingerprint = job_fingerprint(
+        request.service, request.action, request.params, request.input_hash, request.user_key
+    )
+    # Without an input hash, equal params may still mean different files
+    dedup = request.dedup and bool(request.input_hash)
+    if dedup:
+        duplicate = find_duplicate(fingerprint, request.user_key)
+        if duplicate:
+            return _dedup_response(duplicate["kind"], duplicate["job"])
+    
+    # Memory admission from declared input size (limits.input_bytes/rows/cols/ext)
+    limits = dict(request.limits)
+    memory_wait = False
+    estimate = estimate_from_limits(limits)
+    if estimate:
+        decision, reason = memory_budget.decide(estimate)
+        if decision == "reject":
+            raise HTTPException(status_code=413, detail=reason)
+        memory_wait = decision == "queue"
+        limits["estimated_peak_bytes"] = estimate.peak_bytes
+    
     # Create job
     job_id = QueueJob.generate_id()
     
@@ -106,14 +157,20 @@ async def submit_job(request: SubmitRequest):
         action=request.action,
         status=JobStatus.QUEUED,
         params_json=json.dumps(request.params, ensure_ascii=False),
-        limits_json=json.dumps(request.limits, ensure_ascii=False),
-        created_at=time.time()
+        limits_json=json.dumps(limits, ensure_ascii=False),
+        priority=priority,
+        created_at=time.time(),
+        fingerprint=fingerprint if dedup else None
     )
+    if request.deadline_s:
+        job.deadline_at = job.created_at + request.deadline_s
     
     # Check if can start immediately
     server_busy = is_server_busy()
     service_busy = is_service_busy(request.service)
-    can_start_now = not server_busy and not service_busy
+    # Free capacity is not enough if equal/higher-class jobs are already waiting
+    can_start_now = (not server_busy and not service_busy and not memory_wait
+                     and scheduler.outranks_queue(request.service, priority))
     
     if can_start_now:
         # Start immediately - NO MODAL
@@ -121,6 +178,7 @@ async def submit_job(request: SubmitRequest):
         job.started_at = time.time()
         job.eta_ms = 0
         insert_job(job)
+        reserve_job_memory(job)
         
         # Trigger execution
         import asyncio
@@ -139,6 +197,7 @@ async def submit_job(request: SubmitRequest):
     else:
         # Queue the job - MODAL REQUIRED
         insert_job(job)
+        scheduler.add(job)
         
         # Calculate position and ETA
         position = get_position_in_queue(job_id)
@@ -159,6 +218,28 @@ async def submit_job(request: SubmitRequest):
         )
 
 
+def _dedup_response(kind: str, job: QueueJob) -> SubmitResponse:
+    """Submit response for a submission served by an existing job."""
+    result_ref = None
+    if job.result_ref_json:
+        try:
+            result_ref = json.loads(job.result_ref_json)
+        except:
+            pass
+    position = get_position_in_queue(job.job_id) if job.status == JobStatus.QUEUED else 0
+    return SubmitResponse(
+        job_id=job.job_id,
+        status=job.status,
+        modal_required=job.status == JobStatus.QUEUED,
+        position=position,
+        eta_ms=job.eta_ms if job.status == JobStatus.QUEUED else 0,
+        server_busy=is_server_busy(),
+        service_busy=is_service_busy(job.service),
+        deduplicated=kind,
+        result_ref=result_ref
+    )
+
+
 @router.get("/job/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
     """Get job status and details."""
@@ -192,25 +273,52 @@ async def get_job_status(job_id: str):
 @router.post("/cancel/{job_id}")
 async def cancel_job(job_id: str, user_key: str):
     """
-    Cancel a queued job.
-    Only the owner (user_key) can cancel.
+    Cancel a queued or running job.
+    Only the owner (user_key) can cancel. Running jobs stop at their next
+    checkpoint (worker processes are killed); the slot is freed right away.
     """
     job = get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    followers = get_followers(job_id)
+    
+    # A user attached to a shared job just detaches
+    if job.user_key != user_key and user_key in followers:
+        remove_follower(job_id, user_key)
+        return {"success": True, "message": "Detached from shared job"}
+    
     # Verify ownership
     if job.user_key != user_key:
         raise HTTPException(status_code=403, detail="Not authorized to cancel this job")
     
-    # Can only cancel queued jobs
-    if job.status != JobStatus.QUEUED:
+    # Finished jobs cannot be canceled
+    if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
         raise HTTPException(
             status_code=400, 
             detail=f"Cannot cancel job with status '{job.status}'"
         )
     
+    # Others are still waiting for this result: hand the job over instead
+    if followers:
+        reassign_job_owner(job_id, followers[0])
+        remove_follower(job_id, followers[0])
+        # Re-index under the new owner for round-robin fairness
+        if job.status == JobStatus.QUEUED:
+            scheduler.remove(job_id)
+            scheduler.add(get_job(job_id))
+        return {"success": True, "message": "Detached from shared job"}
+    
+    if job.status == JobStatus.RUNNING:
+        handled_here = await cancel_running_job(job_id)
+        return {
+            "success": True,
+            "message": "Cancellation requested",
+            "forwarded": not handled_here
+        }
+    
     # Cancel
+    scheduler.remove(job_id)
     update_job_status(
         job_id, 
         JobStatus.CANCELED,
@@ -241,6 +349,44 @@ async def get_queue_status(service: Optional[str] = None):
     )
 
 
+@router.get("/dedup/stats")
+async def get_dedup_stats():
+    """Single-flight / result reuse counters."""
+    return dedup_stats.to_dict()
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats():
+    """Queued jobs per service / priority class and dispatch counters."""
+    return scheduler.stats()
+
+
+@router.get("/metrics")
+async def get_queue_metrics(
+    hours: int = 24,
+    service: Optional[str] = None,
+    action: Optional[str] = None,
+    granularity: str = "hour"
+):
+    """Job counts, failure rate and p50/p95 wait/run times per service/action."""
+    try:
+        return get_metrics(hours=hours, service=service, action=action, granularity=granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/running")
+async def get_running_controls():
+    """Running jobs of this worker with progress, cancel state and time left."""
+    return {"jobs": running_tokens()}
+
+
+@router.get("/memory")
+async def get_memory_stats():
+    """Memory budget, reservations of running uploads/jobs and admission counters."""
+    return memory_budget.stats()
+
+
 @router.get("/texts/{lang}")
 async def get_queue_texts(lang: str = "tr"):
     """Get localized queue texts for frontend."""
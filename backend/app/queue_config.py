@@ -33,13 +33,98 @@ SERVICE_AVG_DURATION_MS: Dict[str, int] = {
 # How often the engine checks for jobs to dispatch (ms)
 ENGINE_POLL_INTERVAL_MS = 500
 
+# Minimum interval between progress events pushed to the queue WebSocket
+# for one job (ms); the DB still receives every update via the batcher
+PROGRESS_EVENT_INTERVAL_MS = 500
+
 # What to do with "running" jobs found on startup
 # "requeue" = move back to queued (safe retry)
 # "fail" = mark as failed
 RESTART_RECOVERY_MODE = "requeue"
 
-# Anti-hog: max consecutive jobs from same user
-MAX_CONSECUTIVE_SAME_USER = 2
+# Per-service wall-clock limits for running jobs (seconds); the slot is
+# freed when exceeded
+SERVICE_TIME_LIMITS: Dict[str, Dict[str, int]] = {
+    "excel": {"wall_s": 600},
+    "pdf": {"wall_s": 300},
+    "ocr": {"wall_s": 600},
+}
+DEFAULT_TIME_LIMITS: Dict[str, int] = {"wall_s": 600}
+
+# ============================================================
+# SCHEDULING
+# ============================================================
+
+# Priority classes -> value stored in queue_jobs.priority (higher runs first).
+# Unclassified jobs have priority 0 and fall into "batch".
+PRIORITY_CLASSES: Dict[str, int] = {
+    "interactive": 10,   # previews, on-screen results
+    "batch": 0,          # exports, large runs
+    "scheduled": -10,    # scheduled reports
+}
+DEFAULT_PRIORITY_CLASS = "batch"
+
+# Deficit round-robin quantum per user (jobs per round); unlisted users get 1
+USER_WEIGHTS: Dict[str, float] = {}
+
+# A job waiting longer than this (seconds) is "starving" and may take an
+# urgent slot even if a higher class has work
+STARVATION_AGE_S: Dict[str, int] = {
+    "interactive": 30,
+    "batch": 300,
+    "scheduled": 900,
+}
+
+# At most one of this many dispatches may go to an urgent (deadline /
+# starving) job while higher classes are waiting
+URGENT_SLOT_EVERY = 4
+
+# Reconcile the in-memory scheduler with the DB this often (seconds)
+SCHEDULER_RESYNC_S = 30
+
+
+def priority_for_class(priority_class: str) -> int:
+    """Stored priority value for a class name (ValueError if unknown)."""
+    if priority_class not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority_class}")
+    return PRIORITY_CLASSES[priority_class]
+
+
+def class_for_priority(priority: int) -> str:
+    """Class of a stored priority: the highest class whose value <= priority."""
+    eligible = [(v, k) for k, v in PRIORITY_CLASSES.items() if v <= (priority or 0)]
+    if not eligible:
+        return min(PRIORITY_CLASSES, key=PRIORITY_CLASSES.get)
+    return max(eligible)[1]
+
+# ============================================================
+# DEDUPLICATION (SINGLE-FLIGHT)
+# ============================================================
+
+# Identical submissions (service, action, params, input hash) attach to the
+# queued/running job instead of creating a new one. Submissions without an
+# input hash are never merged: the params alone do not identify the data.
+DEDUP_ENABLED = True
+
+# Finished jobs with the same fingerprint are reused for this long (seconds)
+DEDUP_RESULT_TTL_S = 300
+
+# "user" = only the same user_key, "global" = share across users
+DEDUP_SCOPE = "user"
+
+# ============================================================
+# RETENTION / ROLLUPS
+# ============================================================
+
+# Finished jobs older than this are removed from queue_jobs; their hourly
+# rollups stay in queue_rollups_hourly
+RETENTION_DAYS = 7
+
+# How often the engine rolls up completed hours and purges old rows (seconds)
+RETENTION_INTERVAL_S = 3600
+
+# Rows deleted per transaction when purging
+RETENTION_DELETE_BATCH = 5000
 
 # ============================================================
 # JOB STATUS CONSTANTS
@@ -74,6 +159,8 @@ QUEUE_TEXTS: Dict[str, Dict[str, str]] = {
         "modal.btn_close": "Kapat",
         "modal.safe_to_leave": "Bu pencereden çıkabilirsiniz, işlem sırada kalır.",
         "placeholder.not_enabled": "Bu modül henüz aktif değil. Yakında eklenecek.",
+        "job.canceled": "İşlem iptal edildi (%{percent} tamamlanmıştı).",
+        "job.timeout": "İşlem süre sınırını aştı ({limit} sn) ve durduruldu (%{percent} tamamlanmıştı).",
     },
     "en": {
         "modal.title_wait": "Job Queued",
@@ -92,6 +179,8 @@ QUEUE_TEXTS: Dict[str, Dict[str, str]] = {
         "modal.btn_close": "Close",
         "modal.safe_to_leave": "You can leave this page, your job will remain in the queue.",
         "placeholder.not_enabled": "This module is not enabled yet. Coming soon.",
+        "job.canceled": "Canceled ({percent}% completed).",
+        "job.timeout": "Stopped after exceeding the time limit ({limit} s, {percent}% completed).",
     }
 }
 
@@ -116,3 +205,8 @@ def get_service_capacity(service: str) -> int:
 def get_avg_duration_ms(service: str) -> int:
     """Get average duration for ETA calculation."""
     return SERVICE_AVG_DURATION_MS.get(service, 5000)
+
+
+def get_time_limits(service: str) -> Dict[str, int]:
+    """Wall-clock / CPU limits for a service."""
+    return SERVICE_TIME_LIMITS.get(service, DEFAULT_TIME_LIMITS)
@@ -0,0 +1,169 @@
+"""
+Queue Dedup - Opradox Excel Studio
+Single-flight deduplication and result reuse for identical queue jobs.
+
+A job's fingerprint is a hash of (service, action, canonical params,
+input hash). On submit:
+- a queued/running job with the same fingerprint → attach to it
+- a done job with the same fingerprint finished within the TTL → reuse
+  its result_ref immediately
+- otherwise a new job is created (miss)
+
+Users attached to someone else's job are tracked as followers so queue
+events reach them too.
+"""
+from __future__ import annotations
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, Optional, Set, List
+
+from .queue_config import (
+    JobStatus,
+    DEDUP_ENABLED,
+    DEDUP_RESULT_TTL_S,
+    DEDUP_SCOPE,
+    get_avg_duration_ms,
+)
+from .queue_storage import QueueJob, find_job_by_fingerprint, count_by_status
+
+# ============================================================
+# FINGERPRINT
+# ============================================================
+
+def job_fingerprint(
+    service: str,
+    action: str,
+    params: Dict[str, Any],
+    input_hash: Optional[str] = None,
+    user_key: Optional[str] = None,
+) -> str:
+    """
+    Stable hash of a submission. Param order does not matter; user_key is
+    only part of the fingerprint when DEDUP_SCOPE is "user".
+    """
+    payload = {
+        "service": service,
+        "action": action,
+        "params": params,
+        "input_hash": input_hash,
+    }
+    if DEDUP_SCOPE == "user":
+        payload["user_key"] = user_key
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# COUNTERS
+# ============================================================
+
+class DedupStats:
+    """Hit/miss counters plus an estimate of queue wait avoided."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.inflight_hits = 0
+        self.result_hits = 0
+        self.misses = 0
+        self.saved_wait_ms = 0
+
+    def record(self, kind: str, saved_ms: int = 0) -> None:
+        with self._lock:
+            if kind == "inflight":
+                self.inflight_hits += 1
+            elif kind == "result":
+                self.result_hits += 1
+            else:
+                self.misses += 1
+            self.saved_wait_ms += saved_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.inflight_hits + self.result_hits
+            total = hits + self.misses
+            return {
+                "enabled": DEDUP_ENABLED,
+                "scope": DEDUP_SCOPE,
+                "result_ttl_s": DEDUP_RESULT_TTL_S,
+                "inflight_hits": self.inflight_hits,
+                "result_hits": self.result_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "saved_wait_ms": self.saved_wait_ms,
+            }
+
+
+dedup_stats = DedupStats()
+
+
+# ============================================================
+# FOLLOWERS (users attached to another user's job)
+# ============================================================
+
+_followers: Dict[str, Set[str]] = {}
+_followers_lock = threading.Lock()
+
+
+def add_follower(job_id: str, user_key: str) -> None:
+    with _followers_lock:
+        _followers.setdefault(job_id, set()).add(user_key)
+
+
+def remove_follower(job_id: str, user_key: str) -> None:
+    with _followers_lock:
+        users = _followers.get(job_id)
+        if users:
+            users.discard(user_key)
+            if not users:
+                del _followers[job_id]
+
+
+def get_followers(job_id: str) -> List[str]:
+    with _followers_lock:
+        return sorted(_followers.get(job_id, ()))
+
+
+def clear_followers(job_id: str) -> None:
+    with _followers_lock:
+        _followers.pop(job_id, None)
+
+
+# ============================================================
+# LOOKUP
+# ============================================================
+
+def find_duplicate(fingerprint: str, user_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Existing job that can serve this submission, or None (counted as miss).
+
+    Returns {"kind": "inflight"|"result", "job": QueueJob}.
+    """
+    if not DEDUP_ENABLED:
+        return None
+
+    job = find_job_by_fingerprint(fingerprint, [JobStatus.QUEUED, JobStatus.RUNNING])
+    kind = "inflight"
+    if job is None:
+        job = find_job_by_fingerprint(
+            fingerprint, [JobStatus.DONE], finished_after=time.time() - DEDUP_RESULT_TTL_S
+        )
+        kind = "result"
+    if job is None:
+        dedup_stats.record("miss")
+        return None
+
+    # What a fresh job would have waited for: the queue ahead of it plus
+    # its own run (result hits), or just the queue (attached in-flight)
+    avg = get_avg_duration_ms(job.service)
+    queued_ahead = count_by_status(JobStatus.QUEUED, job.service)
+    saved = (queued_ahead + 1) * avg if kind == "result" else queued_ahead * avg
+    dedup_stats.record(kind, saved)
+
+    if kind == "inflight" and job.user_key != user_key:
+        add_follower(job.job_id, user_key)
+    return {"kind": kind, "job": job}
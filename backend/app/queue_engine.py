@@ -14,12 +14,30 @@ from .queue_config import (
     GLOBAL_MAX_CONCURRENT, 
     SERVICE_CAPACITY,
     ENGINE_POLL_INTERVAL_MS,
+    PROGRESS_EVENT_INTERVAL_MS,
     RESTART_RECOVERY_MODE,
-    MAX_CONSECUTIVE_SAME_USER,
+    SCHEDULER_RESYNC_S,
+    RETENTION_INTERVAL_S,
     JobStatus,
     get_avg_duration_ms,
+    get_time_limits,
     get_text
 )
+from .admission import memory_budget
+from .job_control import (
+    CancellationToken,
+    JobCanceled,
+    use_token,
+    supervise,
+    register_token,
+    unregister_token,
+    cancel_job as cancel_local_job,
+    checkpoint
+)
+from .pubsub import get_pubsub
+from .queue_dedup import get_followers, clear_followers
+from .queue_scheduler import scheduler
+from .queue_retention import run_retention
 from .queue_storage import (
     QueueJob,
     get_queued_jobs,
@@ -27,9 +45,10 @@ from .queue_storage import (
     count_by_status,
     update_job_status,
     get_job,
-    get_user_recent_running_count,
     recover_stale_running_jobs,
-    get_position_in_queue
+    get_position_in_queue,
+    queue_progress_update,
+    flush_progress_updates
 )
 
 # ============================================================
@@ -49,32 +68,44 @@ def register_executor(service: str, action: str, func: Callable):
 
 
 # ============================================================
-# WEBSOCKET BROADCAST (will be set by queue_ws.py)
+# WEBSOCKET BROADCAST (via pub/sub backbone, delivered by queue_ws.py)
 # ============================================================
 
+QUEUE_CHANNEL_PREFIX = "queue:"
+JOB_CANCEL_CHANNEL_PREFIX = "job-cancel:"
+
+# Optional override; by default events go to the backbone so that every
+# worker holding a socket for the user can deliver them
 _ws_broadcast_func: Optional[Callable] = None
 
-def set_ws_broadcast(func: Callable):
-    """Set the WebSocket broadcast function."""
+def set_ws_broadcast(func: Optional[Callable]):
+    """Override the WebSocket broadcast function (None = pub/sub backbone)."""
     global _ws_broadcast_func
     _ws_broadcast_func = func
 
 
 async def broadcast_job_update(job: QueueJob, modal_required: bool = False):
-    """Broadcast job update to connected clients."""
-    if _ws_broadcast_func:
-        position = get_position_in_queue(job.job_id) if job.status == JobStatus.QUEUED else 0
-        event = {
-            "type": "queue_update",
-            "job_id": job.job_id,
-            "status": job.status,
-            "progress": job.progress,
-            "message": job.message,
-            "position": position,
-            "eta_ms": job.eta_ms,
-            "modal_required": modal_required and job.status == JobStatus.QUEUED,
-        }
-        await _ws_broadcast_func(job.user_key, event)
+    """Broadcast job update to connected clients on any worker."""
+    position = get_position_in_queue(job.job_id) if job.status == JobStatus.QUEUED else 0
+    event = {
+        "type": "queue_update",
+        "job_id": job.job_id,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "position": position,
+        "eta_ms": job.eta_ms,
+        "modal_required": modal_required and job.status == JobStatus.QUEUED,
+    }
+    # Owner plus users attached to this job by deduplication
+    recipients = [job.user_key] + [u for u in get_followers(job.job_id) if u != job.user_key]
+    for user_key in recipients:
+        if _ws_broadcast_func:
+            await _ws_broadcast_func(user_key, event)
+        else:
+            await get_pubsub().publish(f"{QUEUE_CHANNEL_PREFIX}{user_key}", event)
+    if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        clear_followers(job.job_id)
 
 
 # ============================================================
@@ -113,50 +144,61 @@ def is_service_busy(service: str) -> bool:
 # JOB DISPATCH (FAIR QUEUE)
 # ============================================================
 
+_last_resync = 0.0
+_last_retention = 0.0
+
+
 async def dispatch_next_job() -> Optional[str]:
     """Try to dispatch the next job from queue. Returns job_id if dispatched."""
-    # Get all running jobs to check capacity
     if not can_start_job_globally():
         return None
     
-    # Get queued jobs (ordered by priority desc, created_at asc)
-    queued_jobs = get_queued_jobs()
-    if not queued_jobs:
-        return None
-    
-    # Find first job that can start (respect service capacity + anti-hog)
-    recent_users: Set[str] = set()
-    
-    for job in queued_jobs:
-        # Service capacity check
-        if not can_start_job_for_service(job.service):
-            continue
-        
-        # Anti-hog: skip if user ran too many recently
-        user_recent = get_user_recent_running_count(job.user_key)
-        if user_recent >= MAX_CONSECUTIVE_SAME_USER:
-            recent_users.add(job.user_key)
-            continue
-        
-        # Start this job
-        await start_job(job)
-        return job.job_id
-    
-    # If all eligible jobs are from hogged users, just start the first one anyway
-    if queued_jobs and recent_users:
-        first_eligible = next(
-            (j for j in queued_jobs if can_start_job_for_service(j.service)), 
-            None
-        )
-        if first_eligible:
-            await start_job(first_eligible)
-            return first_eligible.job_id
+    # Services with free capacity (few of them; everything else is in memory)
+    services = [svc for svc in scheduler.services() if can_start_job_for_service(svc)]
     
-    return None
+    # A popped job may have been canceled/started via another path since the
+    # last reconcile; skip those and try the next one
+    while True:
+        job_id = scheduler.next_job(services)
+        if job_id is None:
+            return None
+        job = get_job(job_id)
+        if job and job.status == JobStatus.QUEUED:
+            # Not enough memory next to running jobs: put it back and wait
+            if not memory_budget.fits(job_peak_bytes(job)):
+                scheduler.add(job)
+                return None
+            await start_job(job)
+            return job.job_id
+
+
+def resync_scheduler() -> Dict[str, int]:
+    """Reconcile the in-memory scheduler with queued jobs in the DB."""
+    global _last_resync
+    _last_resync = time.monotonic()
+    return scheduler.reconcile(get_queued_jobs())
+
+
+def job_peak_bytes(job: QueueJob) -> int:
+    """Estimated peak memory stored with the job at submit (0 if unknown)."""
+    try:
+        limits = json.loads(job.limits_json) if job.limits_json else {}
+        return int(limits.get("estimated_peak_bytes") or 0)
+    except (ValueError, TypeError):
+        return 0
+
+
+def reserve_job_memory(job: QueueJob) -> None:
+    """Reserve the job's estimated memory until execute_job finishes."""
+    peak = job_peak_bytes(job)
+    if peak:
+        memory_budget.reserve(f"job:{job.job_id}", peak, label=f"{job.service}/{job.action}")
 
 
 async def start_job(job: QueueJob):
     """Start executing a job."""
+    reserve_job_memory(job)
+    
     # Update status to running
     update_job_status(
         job.job_id, 
@@ -177,8 +219,15 @@ async def start_job(job: QueueJob):
 
 
 async def execute_job(job: QueueJob):
-    """Execute job using registered executor."""
+    """Execute job using registered executor, under its cancellation token."""
     executor = EXECUTOR_REGISTRY.get((job.service, job.action))
+    limits = get_time_limits(job.service)
+    token = CancellationToken(
+        job.job_id,
+        wall_limit_s=limits.get("wall_s"),
+        on_progress=ProgressNotifier(job.job_id, asyncio.get_running_loop()),
+    )
+    register_token(token)
     
     try:
         if not executor:
@@ -187,8 +236,12 @@ async def execute_job(job: QueueJob):
                 get_text("placeholder.not_enabled", "en")
             )
         
-        # Run executor
-        result = await executor(job)
+        # Run executor; the task inherits the token through its context
+        with use_token(token):
+            task = asyncio.ensure_future(executor(job))
+        result = await supervise(task, token)
+        if result.get("memory_bytes"):
+            memory_budget.record_actual(f"job:{job.job_id}", result["memory_bytes"])
         
         if result.get("success"):
             # Success
@@ -210,6 +263,10 @@ async def execute_job(job: QueueJob):
                 error_short=result.get("error", "Unknown error")[:200]
             )
     
+    except JobCanceled as e:
+        # Slot is freed now; partial progress stays on the job
+        _finish_canceled_job(job, e, limits)
+    
     except Exception as e:
         print(f"[QUEUE] Job {job.job_id} failed: {e}")
         traceback.print_exc()
@@ -219,6 +276,9 @@ async def execute_job(job: QueueJob):
             finished_at=time.time(),
             error_short=str(e)[:200]
         )
+    finally:
+        unregister_token(job.job_id)
+        memory_budget.release(f"job:{job.job_id}")
     
     # Broadcast final status
     final_job = get_job(job.job_id)
@@ -229,20 +289,88 @@ async def execute_job(job: QueueJob):
     await update_queued_etas(job.service)
 
 
+class ProgressNotifier:
+    """
+    Progress callback of a running job. Every update goes to the batched
+    DB writer; WebSocket events are throttled to one per
+    PROGRESS_EVENT_INTERVAL_MS. May be called from executor threads.
+    """
+
+    def __init__(self, job_id: str, loop: asyncio.AbstractEventLoop,
+                 interval_ms: int = PROGRESS_EVENT_INTERVAL_MS):
+        self.job_id = job_id
+        self.loop = loop
+        self.interval = interval_ms / 1000.0
+        self._last_event = 0.0
+        self.events_sent = 0
+
+    def __call__(self, progress: float, message: Optional[str] = None):
+        queue_progress_update(self.job_id, progress=progress, message=message or "Processing...")
+        now = time.monotonic()
+        if now - self._last_event < self.interval:
+            return
+        self._last_event = now
+        self.events_sent += 1
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(_broadcast_progress(self.job_id))
+        )
+
+
+async def _broadcast_progress(job_id: str):
+    job = get_job(job_id)
+    if job and job.status == JobStatus.RUNNING:
+        await broadcast_job_update(job, modal_required=False)
+
+
+def _finish_canceled_job(job: QueueJob, exc: JobCanceled, limits: Dict[str, int]):
+    """Record a canceled / timed-out job with the progress it had reached."""
+    percent = int(round(exc.progress * 100))
+    if exc.reason == "canceled":
+        status, text = JobStatus.CANCELED, get_text("job.canceled", "en", percent=percent)
+    else:
+        status, text = JobStatus.FAIL, get_text("job.timeout", "en", limit=limits.get("wall_s"), percent=percent)
+    print(f"[QUEUE] Job {job.job_id} stopped ({exc.reason}) at {percent}%")
+    update_job_status(
+        job.job_id,
+        status,
+        finished_at=time.time(),
+        progress=exc.progress,
+        message=text,
+        error_short=None if status == JobStatus.CANCELED else text[:200]
+    )
+
+
+async def cancel_running_job(job_id: str) -> bool:
+    """
+    Cancel a running job. Handled here if this worker runs it, otherwise
+    the request goes over the backbone to the worker that does.
+    """
+    if cancel_local_job(job_id, "canceled"):
+        return True
+    await get_pubsub().publish(f"{JOB_CANCEL_CHANNEL_PREFIX}{job_id}", {"job_id": job_id}, local=False)
+    return False
+
+
+async def _on_cancel_request(channel: str, message: Dict[str, Any], remote: bool):
+    cancel_local_job(message.get("job_id", ""), "canceled")
+
+
 async def update_queued_etas(service: str):
     """Update ETA for all queued jobs in a service after a job completes."""
     queued = get_queued_jobs(service)
     avg_duration = get_avg_duration_ms(service)
     
+    # One transaction for all ETAs instead of one commit per queued job
     for i, job in enumerate(queued):
-        position = i + 1
-        eta_ms = position * avg_duration
-        update_job_status(job.job_id, job.status, eta_ms=eta_ms)
-        
-        # Broadcast updated position/eta
-        updated_job = get_job(job.job_id)
-        if updated_job:
-            await broadcast_job_update(updated_job, modal_required=True)
+        job.eta_ms = (i + 1) * avg_duration
+        queue_progress_update(job.job_id, eta_ms=job.eta_ms)
+    flush_progress_updates()
+    
+    # Broadcast updated position/eta
+    for job in queued:
+        await broadcast_job_update(job, modal_required=True)
 
 
 # ============================================================
@@ -264,6 +392,11 @@ async def engine_loop():
     
     while _engine_running:
         try:
+            flush_progress_updates()
+            if time.monotonic() - _last_resync >= SCHEDULER_RESYNC_S:
+                resync_scheduler()
+            if time.monotonic() - _last_retention >= RETENTION_INTERVAL_S:
+                await asyncio.to_thread(_run_retention)
             dispatched = await dispatch_next_job()
             if dispatched:
                 print(f"[QUEUE] Dispatched job: {dispatched}")
@@ -276,12 +409,27 @@ async def engine_loop():
     print("[QUEUE] Engine stopped")
 
 
+def _run_retention() -> Dict[str, Any]:
+    """Roll up finished hours and purge old history (keeps queue_jobs small)."""
+    global _last_retention
+    _last_retention = time.monotonic()
+    try:
+        return run_retention()
+    except Exception as e:
+        print(f"[QUEUE] Retention error: {e}")
+        return {"error": str(e)[:200]}
+
+
 def start_engine():
     """Start the queue engine (call from startup)."""
     global _engine_task
     
+    # Trim history first so recovery and resync only see a small table
+    _run_retention()
+    
     # Recovery on startup
     recover_stale_running_jobs(RESTART_RECOVERY_MODE)
+    resync_scheduler()
     
     # Start engine loop
     loop = asyncio.get_event_loop()
@@ -296,6 +444,7 @@ def stop_engine():
     _engine_running = False
     if _engine_task:
         _engine_task.cancel()
+    flush_progress_updates()
 
 
 # ============================================================
@@ -316,11 +465,12 @@ async def excel_run_scenario_executor(job: QueueJob) -> Dict[str, Any]:
     # For now, return success with reference to run_results
     # In full implementation, this would call the actual scenario runner
     
-    # Update progress
-    update_job_status(job.job_id, JobStatus.RUNNING, progress=0.5, message="Processing...")
-    
-    # Simulate work (replace with actual scenario execution)
-    await asyncio.sleep(2)
+    # Simulate work (replace with actual scenario execution); checkpoints
+    # report progress and stop here if the job is canceled
+    for step in range(4):
+        checkpoint(step / 4, "Processing...")
+        await asyncio.sleep(0.5)
+    checkpoint(1.0, "Finalizing...")
     
     # Mark complete
     return {
@@ -340,6 +490,9 @@ async def placeholder_executor(job: QueueJob) -> Dict[str, Any]:
     }
 
 
+# Cancel requests for jobs running on this worker
+get_pubsub().subscribe(JOB_CANCEL_CHANNEL_PREFIX, _on_cancel_request)
+
 # Register default executors
 register_executor("excel", "run_scenario", excel_run_scenario_executor)
 register_executor("pdf", "extract", placeholder_executor)
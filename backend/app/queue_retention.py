@@ -0,0 +1,257 @@
+"""
+Queue Retention - Opradox Excel Studio
+Hourly rollups of finished jobs and purging of old queue history.
+
+queue_jobs only needs active jobs plus recent history (dedup reuse, job
+status pages). Two steps keep it small:
+
+1. rollup: every completed hour (by finished_at) is summarized per
+   service/action into queue_rollups_hourly — job count, done/fail/cancel
+   counts, p50/p95/avg wait and run times. A watermark records the last
+   rolled hour, so each hour is summarized exactly once.
+2. purge: finished jobs older than RETENTION_DAYS (and already rolled up)
+   are deleted in batches.
+
+/queue/metrics reads the rollups and adds the not-yet-rolled hours live
+from the hot table.
+"""
+from __future__ import annotations
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+import numpy as np
+
+from .queue_config import RETENTION_DAYS, RETENTION_DELETE_BATCH, JobStatus
+from .storage import get_cursor
+
+HOUR_S = 3600
+DAY_S = 86400
+FINISHED_STATUSES = (JobStatus.DONE, JobStatus.FAIL, JobStatus.CANCELED)
+_STATUS_SQL = ", ".join(f"'{s}'" for s in FINISHED_STATUSES)
+
+ROLLUP_COLUMNS = (
+    "hour_start", "service", "action", "jobs", "done", "failed", "canceled",
+    "wait_p50_ms", "wait_p95_ms", "wait_avg_ms",
+    "run_p50_ms", "run_p95_ms", "run_avg_ms", "run_max_ms",
+)
+
+
+def _hour_floor(ts: float) -> float:
+    return float(int(ts // HOUR_S) * HOUR_S)
+
+
+# ============================================================
+# STATE (watermark)
+# ============================================================
+
+def _get_state(cursor, key: str) -> Optional[float]:
+    cursor.execute("SELECT value FROM queue_retention_state WHERE key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _set_state(cursor, key: str, value: float) -> None:
+    cursor.execute(
+        "INSERT OR REPLACE INTO queue_retention_state (key, value) VALUES (?, ?)", (key, value)
+    )
+
+
+def rolled_until() -> Optional[float]:
+    """Start of the first hour that is not rolled up yet (None = never ran)."""
+    with get_cursor() as cursor:
+        return _get_state(cursor, "rolled_until")
+
+
+# ============================================================
+# STATISTICS
+# ============================================================
+
+def _pct(values: List[float], q: float) -> Optional[int]:
+    return int(round(float(np.percentile(values, q)))) if values else None
+
+
+def _summarize(rows: Iterable[Tuple]) -> Dict[Tuple[float, str, str], Dict[str, Any]]:
+    """(hour_start, service, action) -> rollup row, from (service, action, status, created, started, finished)."""
+    groups: Dict[Tuple[float, str, str], Dict[str, list]] = defaultdict(
+        lambda: {"statuses": [], "wait": [], "run": []}
+    )
+    for service, action, status, created_at, started_at, finished_at in rows:
+        g = groups[(_hour_floor(finished_at), service, action)]
+        g["statuses"].append(status)
+        if started_at:
+            g["wait"].append(max(started_at - created_at, 0) * 1000)
+            g["run"].append(max(finished_at - started_at, 0) * 1000)
+
+    out = {}
+    for key, g in groups.items():
+        wait, run = g["wait"], g["run"]
+        out[key] = {
+            "hour_start": key[0],
+            "service": key[1],
+            "action": key[2],
+            "jobs": len(g["statuses"]),
+            "done": g["statuses"].count(JobStatus.DONE),
+            "failed": g["statuses"].count(JobStatus.FAIL),
+            "canceled": g["statuses"].count(JobStatus.CANCELED),
+            "wait_p50_ms": _pct(wait, 50),
+            "wait_p95_ms": _pct(wait, 95),
+            "wait_avg_ms": int(sum(wait) / len(wait)) if wait else None,
+            "run_p50_ms": _pct(run, 50),
+            "run_p95_ms": _pct(run, 95),
+            "run_avg_ms": int(sum(run) / len(run)) if run else None,
+            "run_max_ms": int(max(run)) if run else None,
+        }
+    return out
+
+
+def _finished_rows(cursor, start: float, end: float) -> List[Tuple]:
+    cursor.execute(f"""
+        SELECT service, action, status, created_at, started_at, finished_at
+        FROM queue_jobs
+        WHERE finished_at >= ? AND finished_at < ? AND status IN ({_STATUS_SQL})
+    """, (start, end))
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+# ============================================================
+# ROLLUP + PURGE
+# ============================================================
+
+def rollup_completed_hours(now: Optional[float] = None) -> int:
+    """Summarize every completed hour since the watermark; returns rollup rows written."""
+    end = _hour_floor(time.time() if now is None else now)
+    with get_cursor() as cursor:
+        start = _get_state(cursor, "rolled_until") or 0.0
+        if start >= end:
+            return 0
+        rollups = _summarize(_finished_rows(cursor, start, end))
+        placeholders = ", ".join("?" for _ in ROLLUP_COLUMNS)
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO queue_rollups_hourly ({', '.join(ROLLUP_COLUMNS)}) VALUES ({placeholders})",
+            [tuple(r[c] for c in ROLLUP_COLUMNS) for r in rollups.values()],
+        )
+        _set_state(cursor, "rolled_until", end)
+    return len(rollups)
+
+
+def purge_old_jobs(retention_days: float = RETENTION_DAYS, now: Optional[float] = None) -> int:
+    """Delete finished jobs older than retention_days that are already rolled up."""
+    now = time.time() if now is None else now
+    cutoff = min(now - retention_days * DAY_S, rolled_until() or 0.0)
+    deleted = 0
+    while True:
+        with get_cursor() as cursor:
+            cursor.execute(f"""
+                DELETE FROM queue_jobs WHERE rowid IN (
+                    SELECT rowid FROM queue_jobs
+                    WHERE finished_at < ? AND status IN ({_STATUS_SQL})
+                    LIMIT ?
+                )
+            """, (cutoff, RETENTION_DELETE_BATCH))
+            batch = cursor.rowcount
+        deleted += batch
+        if batch < RETENTION_DELETE_BATCH:
+            return deleted
+
+
+def run_retention(retention_days: float = RETENTION_DAYS, now: Optional[float] = None) -> Dict[str, Any]:
+    """Roll up completed hours, then purge old history."""
+    started = time.time()
+    rolled = rollup_completed_hours(now)
+    purged = purge_old_jobs(retention_days, now)
+    if rolled or purged:
+        print(f"[QUEUE] Retention: {rolled} rollup rows, {purged} old jobs purged")
+    return {
+        "rollup_rows": rolled,
+        "purged": purged,
+        "elapsed_ms": int((time.time() - started) * 1000),
+    }
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def _merge(rows: List[Dict[str, Any]], bucket_start: float) -> Dict[str, Any]:
+    """
+    Combine rollup rows. Counts/averages/max are exact; merged percentiles
+    are job-weighted means of the hourly percentiles (approximate).
+    """
+    jobs = sum(r["jobs"] for r in rows)
+    merged = {
+        "bucket_start": bucket_start,
+        "jobs": jobs,
+        "done": sum(r["done"] for r in rows),
+        "failed": sum(r["failed"] for r in rows),
+        "canceled": sum(r["canceled"] for r in rows),
+    }
+    for col in ("wait_p50_ms", "wait_p95_ms", "wait_avg_ms", "run_p50_ms", "run_p95_ms", "run_avg_ms"):
+        weighted = [(r[col], r["jobs"]) for r in rows if r[col] is not None]
+        weight = sum(w for _, w in weighted)
+        merged[col] = int(sum(v * w for v, w in weighted) / weight) if weight else None
+    maxima = [r["run_max_ms"] for r in rows if r["run_max_ms"] is not None]
+    merged["run_max_ms"] = max(maxima) if maxima else None
+    merged["failure_rate"] = round(merged["failed"] / jobs, 4) if jobs else 0.0
+    return merged
+
+
+def get_metrics(
+    hours: int = 24,
+    service: Optional[str] = None,
+    action: Optional[str] = None,
+    granularity: str = "hour",
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Per service/action series over the last `hours` (hour or day buckets) plus totals."""
+    if granularity not in ("hour", "day"):
+        raise ValueError(f"Unknown granularity: {granularity}")
+    now = time.time() if now is None else now
+    start = _hour_floor(now - hours * HOUR_S)
+
+    filters, values = "", []
+    if service:
+        filters += " AND service = ?"
+        values.append(service)
+    if action:
+        filters += " AND action = ?"
+        values.append(action)
+
+    with get_cursor() as cursor:
+        watermark = _get_state(cursor, "rolled_until") or 0.0
+        cursor.execute(
+            f"SELECT * FROM queue_rollups_hourly WHERE hour_start >= ?{filters} ORDER BY hour_start",
+            [start, *values],
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+        # Hours after the watermark are summarized live from the hot table
+        live = _summarize(
+            r for r in _finished_rows(cursor, max(start, watermark), now + 1)
+            if (not service or r[0] == service) and (not action or r[1] == action)
+        )
+        rows.extend(live.values())
+        cursor.execute("SELECT COUNT(*) FROM queue_jobs")
+        hot_rows = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM queue_jobs WHERE status IN ('queued', 'running')")
+        active = cursor.fetchone()[0]
+
+    bucket_s = HOUR_S if granularity == "hour" else DAY_S
+    series: Dict[str, Dict[float, list]] = defaultdict(lambda: defaultdict(list))
+    for r in rows:
+        series[f"{r['service']}/{r['action']}"][r["hour_start"] // bucket_s * bucket_s].append(r)
+
+    out_series, totals = {}, {}
+    for key, buckets in sorted(series.items()):
+        out_series[key] = [_merge(buckets[b], b) for b in sorted(buckets)]
+        totals[key] = _merge([r for b in buckets.values() for r in b], start)
+        totals[key].pop("bucket_start")
+
+    return {
+        "from": start,
+        "to": now,
+        "granularity": granularity,
+        "rolled_until": watermark or None,
+        "totals": totals,
+        "series": out_series,
+        "hot_table": {"rows": hot_rows, "active": active, "retention_days": RETENTION_DAYS},
+    }
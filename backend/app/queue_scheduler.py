@@ -0,0 +1,284 @@
+"""
+Queue Scheduler - Opradox Excel Studio
+In-memory dispatch order for queued jobs.
+
+Per service, jobs are grouped by priority class (interactive > batch >
+scheduled). Within a class, users are served by deficit round-robin so one
+tenant's 200 exports interleave with everyone else's, and each user's own
+jobs are ordered by (deadline, created_at) in a heap. Each class also
+keeps two urgency heaps: "due" (deadline minus expected run time) and
+"starving" (created_at + STARVATION_AGE_S). A due job of the top class goes
+first; due or starving jobs of lower classes may take one of every
+URGENT_SLOT_EVERY dispatches even while higher classes wait.
+
+All operations are heap pushes/pops (O(log n)); removals are lazy. The DB
+stays the source of truth: the engine reconciles this index with
+get_queued_jobs() on start and every SCHEDULER_RESYNC_S seconds.
+"""
+from __future__ import annotations
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable, Deque, Tuple
+
+from .queue_config import (
+    USER_WEIGHTS,
+    STARVATION_AGE_S,
+    URGENT_SLOT_EVERY,
+    class_for_priority,
+    get_avg_duration_ms,
+)
+from .queue_storage import QueueJob
+
+INF = float("inf")
+
+
+@dataclass
+class ScheduledEntry:
+    """What the scheduler needs to know about one queued job."""
+    job_id: str
+    service: str
+    user_key: str
+    priority: int
+    created_at: float
+    deadline_at: Optional[float]
+    due_at: float
+    starving_at: float
+
+
+class _ClassQueue:
+    """One priority class of one service: per-user heaps + DRR ring."""
+
+    def __init__(self):
+        self.users: Dict[str, List[Tuple[float, float, int, str]]] = {}
+        self.ring: Deque[str] = deque()
+        self.deficit: Dict[str, float] = {}
+        # (time it becomes urgent, seq, job_id)
+        self.due: List[Tuple[float, int, str]] = []
+        self.starving: List[Tuple[float, int, str]] = []
+        self.size = 0
+
+
+class _ServiceQueue:
+    def __init__(self):
+        # priority value -> class queue
+        self.classes: Dict[int, _ClassQueue] = {}
+        self.size = 0
+
+
+class FairScheduler:
+    """Priority classes + deficit round-robin + deadlines + anti-starvation."""
+
+    def __init__(self):
+        self._entries: Dict[str, ScheduledEntry] = {}
+        self._services: Dict[str, _ServiceQueue] = {}
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self._since_urgent = 0
+        self._last_service_pick: Dict[str, int] = {}
+        self.dispatched = 0
+        self.urgent_dispatched = 0
+
+    # ---------------- membership ----------------
+
+    def add(self, job: QueueJob) -> None:
+        """Index a queued job (no-op if already present)."""
+        with self._lock:
+            if job.job_id in self._entries:
+                return
+            cls = class_for_priority(job.priority)
+            due_at = INF
+            if job.deadline_at:
+                due_at = job.deadline_at - get_avg_duration_ms(job.service) / 1000.0
+            entry = ScheduledEntry(
+                job_id=job.job_id,
+                service=job.service,
+                user_key=job.user_key,
+                priority=job.priority or 0,
+                created_at=job.created_at,
+                deadline_at=job.deadline_at,
+                due_at=due_at,
+                starving_at=job.created_at + STARVATION_AGE_S.get(cls, 300),
+            )
+            self._entries[job.job_id] = entry
+
+            sq = self._services.setdefault(job.service, _ServiceQueue())
+            cq = sq.classes.setdefault(entry.priority, _ClassQueue())
+            seq = next(self._seq)
+            if entry.user_key not in cq.users:
+                cq.users[entry.user_key] = []
+                cq.ring.append(entry.user_key)
+                cq.deficit[entry.user_key] = 0.0
+            heapq.heappush(cq.users[entry.user_key], (entry.deadline_at or INF, entry.created_at, seq, job.job_id))
+            if due_at < INF:
+                heapq.heappush(cq.due, (due_at, seq, job.job_id))
+            heapq.heappush(cq.starving, (entry.starving_at, seq, job.job_id))
+            cq.size += 1
+            sq.size += 1
+
+    def remove(self, job_id: str) -> bool:
+        """Forget a job (canceled, started elsewhere). Heap entries are dropped lazily."""
+        with self._lock:
+            entry = self._entries.pop(job_id, None)
+            if entry is None:
+                return False
+            sq = self._services[entry.service]
+            sq.classes[entry.priority].size -= 1
+            sq.size -= 1
+            return True
+
+    def reconcile(self, queued_jobs: Iterable[QueueJob]) -> Dict[str, int]:
+        """Make the index match the DB's queued jobs (keeps DRR state)."""
+        with self._lock:
+            jobs = {job.job_id: job for job in queued_jobs}
+            stale = [job_id for job_id in self._entries if job_id not in jobs]
+            for job_id in stale:
+                self.remove(job_id)
+            added = 0
+            for job in sorted(jobs.values(), key=lambda j: j.created_at):
+                if job.job_id not in self._entries:
+                    self.add(job)
+                    added += 1
+            return {"added": added, "removed": len(stale)}
+
+    def services(self) -> List[str]:
+        """Services that currently have queued jobs."""
+        with self._lock:
+            return [svc for svc, sq in self._services.items() if sq.size > 0]
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._entries
+
+    def pending(self, service: Optional[str] = None) -> int:
+        with self._lock:
+            if service is None:
+                return len(self._entries)
+            sq = self._services.get(service)
+            return sq.size if sq else 0
+
+    def outranks_queue(self, service: str, priority: int) -> bool:
+        """True if a new job with this priority would be next for the service."""
+        with self._lock:
+            sq = self._services.get(service)
+            if not sq or sq.size == 0:
+                return True
+            return all(p < priority for p, cq in sq.classes.items() if cq.size > 0)
+
+    # ---------------- dispatch ----------------
+
+    def next_job(self, services: Iterable[str], now: Optional[float] = None) -> Optional[str]:
+        """
+        Pop the job to run next among services that have free capacity.
+
+        The service whose best candidate is urgent (when an urgent slot is
+        available) or has the highest class wins; ties go to the service
+        served least recently.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            best = None
+            for service in services:
+                sq = self._services.get(service)
+                if not sq or sq.size == 0:
+                    continue
+                top = self._top_priority(sq)
+                urgent = self._urgent_candidate(sq, now, top)
+                rank = (1 if urgent else 0, top, -self._last_service_pick.get(service, -1))
+                if best is None or rank > best[0]:
+                    best = (rank, service, urgent)
+            if best is None:
+                return None
+
+            _, service, urgent = best
+            sq = self._services[service]
+            if urgent:
+                job_id = heapq.heappop(urgent)[2]
+                self._since_urgent = 0
+                self.urgent_dispatched += 1
+            else:
+                job_id = self._drr_pick(sq.classes[self._top_priority(sq)])
+                self._since_urgent += 1
+
+            self.remove(job_id)
+            self.dispatched += 1
+            self._last_service_pick[service] = self.dispatched
+            return job_id
+
+    def _top_priority(self, sq: _ServiceQueue) -> int:
+        return max(p for p, cq in sq.classes.items() if cq.size > 0)
+
+    def _urgent_candidate(self, sq: _ServiceQueue, now: float, top: int) -> Optional[list]:
+        """Heap whose head is an urgent job allowed to run now, if any."""
+        top_due = sq.classes[top].due
+        if self._live_head(top_due, now):
+            return top_due
+        if self._since_urgent < URGENT_SLOT_EVERY - 1:
+            return None
+        best = None
+        for priority, cq in sq.classes.items():
+            if priority >= top or cq.size == 0:
+                continue
+            for heap in (cq.due, cq.starving):
+                head = self._live_head(heap, now)
+                if head and (best is None or head[0] < best[0][0]):
+                    best = (head, heap)
+        return best[1] if best else None
+
+    def _live_head(self, heap: list, now: float) -> Optional[Tuple[float, int, str]]:
+        """Head of an urgency heap if it is still queued and already urgent."""
+        while heap and heap[0][2] not in self._entries:
+            heapq.heappop(heap)
+        if heap and heap[0][0] <= now:
+            return heap[0]
+        return None
+
+    def _drr_pick(self, cq: _ClassQueue) -> str:
+        """Deficit round-robin over users of one class (cost = 1 job)."""
+        while True:
+            user = cq.ring[0]
+            heap = cq.users[user]
+            while heap and heap[0][3] not in self._entries:
+                heapq.heappop(heap)
+            if not heap:
+                cq.ring.popleft()
+                del cq.users[user]
+                del cq.deficit[user]
+                continue
+            if cq.deficit[user] >= 1:
+                job_id = heapq.heappop(heap)[3]
+                cq.deficit[user] -= 1
+                if cq.deficit[user] < 1:
+                    cq.ring.rotate(-1)
+                return job_id
+            cq.deficit[user] += USER_WEIGHTS.get(user, 1.0)
+            if cq.deficit[user] < 1:
+                # Not enough credit for a job yet (weight < 1): wait for the next round
+                cq.ring.rotate(-1)
+
+    # ---------------- introspection ----------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            services = {}
+            for service, sq in self._services.items():
+                services[service] = {
+                    "queued": sq.size,
+                    "by_class": {
+                        class_for_priority(p): cq.size
+                        for p, cq in sorted(sq.classes.items(), reverse=True) if cq.size
+                    },
+                    "users": len({u for cq in sq.classes.values() for u in cq.users}),
+                }
+            return {
+                "queued": len(self._entries),
+                "dispatched": self.dispatched,
+                "urgent_dispatched": self.urgent_dispatched,
+                "services": services,
+            }
+
+
+# Global scheduler (used by queue_engine / queue_api)
+scheduler = FairScheduler()
@@ -4,9 +4,12 @@ FAZ-ES-6: SQLite CRUD for queue_jobs table.
 Uses existing excelstudio.db from FAZ-ES-5.
 """
 from __future__ import annotations
+import os
 import time
 import json
 import uuid
+import sqlite3
+import threading
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any
 
@@ -35,6 +38,8 @@ class QueueJob:
     eta_ms: int = 0
     result_ref_json: Optional[str] = None
     error_short: Optional[str] = None
+    fingerprint: Optional[str] = None
+    deadline_at: Optional[float] = None
     
     @staticmethod
     def generate_id() -> str:
@@ -58,6 +63,8 @@ class QueueJob:
             "eta_ms": self.eta_ms,
             "result_ref": json.loads(self.result_ref_json) if self.result_ref_json else None,
             "error_short": self.error_short,
+            "fingerprint": self.fingerprint,
+            "deadline_at": self.deadline_at,
         }
 
 
@@ -87,10 +94,19 @@ def init_queue_table():
                 limits_json TEXT,
                 eta_ms INTEGER DEFAULT 0,
                 result_ref_json TEXT,
-                error_short TEXT
+                error_short TEXT,
+                fingerprint TEXT,
+                deadline_at REAL
             )
         """)
         
+        # Migration: columns added after the first release
+        for column, col_type in (("fingerprint", "TEXT"), ("deadline_at", "REAL")):
+            try:
+                cursor.execute(f"ALTER TABLE queue_jobs ADD COLUMN {column} {col_type}")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+        
         # Indexes
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_queue_status_service 
@@ -100,6 +116,52 @@ def init_queue_table():
             CREATE INDEX IF NOT EXISTS idx_queue_user_status 
             ON queue_jobs(user_key, status)
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_queue_fingerprint 
+            ON queue_jobs(fingerprint, status, finished_at)
+        """)
+        # Partial indexes over active jobs only: dispatcher / recovery queries
+        # stay O(active jobs) however much history the table holds
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_queue_queued
+            ON queue_jobs(service, priority DESC, created_at) WHERE status = 'queued'
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_queue_running
+            ON queue_jobs(service, started_at) WHERE status = 'running'
+        """)
+        # Retention sweeps walk finished jobs by time
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_queue_finished
+            ON queue_jobs(finished_at) WHERE finished_at IS NOT NULL
+        """)
+        
+        # Hourly rollups of archived history (see queue_retention.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS queue_rollups_hourly (
+                hour_start REAL NOT NULL,
+                service TEXT NOT NULL,
+                action TEXT NOT NULL,
+                jobs INTEGER NOT NULL,
+                done INTEGER NOT NULL,
+                failed INTEGER NOT NULL,
+                canceled INTEGER NOT NULL,
+                wait_p50_ms INTEGER,
+                wait_p95_ms INTEGER,
+                wait_avg_ms INTEGER,
+                run_p50_ms INTEGER,
+                run_p95_ms INTEGER,
+                run_avg_ms INTEGER,
+                run_max_ms INTEGER,
+                PRIMARY KEY (hour_start, service, action)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS queue_retention_state (
+                key TEXT PRIMARY KEY,
+                value REAL
+            )
+        """)
     
     print("[QUEUE] Queue table initialized")
 
@@ -115,35 +177,49 @@ def insert_job(job: QueueJob) -> str:
             INSERT INTO queue_jobs 
             (job_id, user_key, service, action, status, priority, 
              created_at, started_at, finished_at, progress, message,
-             params_json, limits_json, eta_ms, result_ref_json, error_short)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             params_json, limits_json, eta_ms, result_ref_json, error_short, fingerprint,
+             deadline_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             job.job_id, job.user_key, job.service, job.action, job.status,
             job.priority, job.created_at, job.started_at, job.finished_at,
             job.progress, job.message, job.params_json, job.limits_json,
-            job.eta_ms, job.result_ref_json, job.error_short
+            job.eta_ms, job.result_ref_json, job.error_short, job.fingerprint,
+            job.deadline_at
         ))
     return job.job_id
 
 
 def get_job(job_id: str) -> Optional[QueueJob]:
-    """Get job by ID."""
+    """Get job by ID (progress updates not yet flushed are applied on top)."""
     with get_cursor() as cursor:
         cursor.execute("SELECT * FROM queue_jobs WHERE job_id = ?", (job_id,))
         row = cursor.fetchone()
         if row:
-            return _row_to_job(row)
+            job = _row_to_job(row)
+            for key, val in progress_batcher.peek(job_id).items():
+                setattr(job, key, val)
+            return job
     return None
 
 
 def update_job_status(job_id: str, status: str, **fields) -> bool:
-    """Update job status and optional fields."""
+    """
+    Update job status and optional fields.
+
+    Progress/ETA updates still pending in the batcher for this job are
+    folded into the same statement (explicit fields win), so a late flush
+    can never overwrite a status transition.
+    """
+    pending = progress_batcher.pop(job_id)
+    if pending:
+        fields = {**pending, **fields}
+
     set_parts = ["status = ?"]
     values = [status]
     
     for key, val in fields.items():
-        if key in ("started_at", "finished_at", "progress", "message", 
-                   "eta_ms", "result_ref_json", "error_short"):
+        if key in _UPDATABLE_FIELDS:
             set_parts.append(f"{key} = ?")
             values.append(val)
     
@@ -157,8 +233,119 @@ def update_job_status(job_id: str, status: str, **fields) -> bool:
         return cursor.rowcount > 0
 
 
+# ============================================================
+# BATCHED PROGRESS WRITES
+# ============================================================
+
+_UPDATABLE_FIELDS = ("started_at", "finished_at", "progress", "message",
+                     "eta_ms", "result_ref_json", "error_short")
+# Fields that may be coalesced (everything else is a state change)
+_BATCHABLE_FIELDS = ("progress", "message", "eta_ms")
+
+# Pending updates are written at most this often / when this many jobs are dirty
+PROGRESS_FLUSH_INTERVAL_MS = int(os.getenv("QUEUE_PROGRESS_FLUSH_INTERVAL_MS", "500"))
+PROGRESS_FLUSH_MAX_PENDING = int(os.getenv("QUEUE_PROGRESS_FLUSH_MAX_PENDING", "64"))
+
+
+class ProgressBatcher:
+    """
+    Coalesces high-frequency progress / message / ETA updates.
+
+    Only the latest value per job and field is kept; flush() writes all
+    dirty jobs in one transaction with one executemany per field set
+    instead of one commit per update.
+    """
+
+    def __init__(self, flush_interval_ms: int = PROGRESS_FLUSH_INTERVAL_MS,
+                 max_pending: int = PROGRESS_FLUSH_MAX_PENDING):
+        self.flush_interval_s = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.updates_total = 0
+        self.flushes_total = 0
+        self.rows_written_total = 0
+
+    def add(self, job_id: str, **fields) -> None:
+        """Record an update; flushes when the interval elapsed or too many jobs are dirty."""
+        unknown = set(fields) - set(_BATCHABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Toplu yazılamayan alanlar: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._pending.setdefault(job_id, {}).update(fields)
+            self.updates_total += 1
+            due = (len(self._pending) >= self.max_pending
+                   or time.monotonic() - self._last_flush >= self.flush_interval_s)
+        if due:
+            self.flush()
+
+    def pop(self, job_id: str) -> Dict[str, Any]:
+        """Remove and return the pending fields of one job."""
+        with self._lock:
+            return self._pending.pop(job_id, {})
+
+    def peek(self, job_id: str) -> Dict[str, Any]:
+        """Pending fields of one job without removing them."""
+        with self._lock:
+            return dict(self._pending.get(job_id, {}))
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all pending updates in a single transaction. Returns rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        groups: Dict[tuple, List[tuple]] = {}
+        for job_id, fields in pending.items():
+            keys = tuple(sorted(fields))
+            groups.setdefault(keys, []).append(tuple(fields[k] for k in keys) + (job_id,))
+
+        with get_cursor() as cursor:
+            for keys, rows in groups.items():
+                assignments = ", ".join(f"{k} = ?" for k in keys)
+                cursor.executemany(
+                    f"UPDATE queue_jobs SET {assignments} WHERE job_id = ?",
+                    rows
+                )
+
+        with self._lock:
+            self.flushes_total += 1
+            self.rows_written_total += len(pending)
+        return len(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "updates_total": self.updates_total,
+                "flushes_total": self.flushes_total,
+                "rows_written_total": self.rows_written_total,
+            }
+
+
+progress_batcher = ProgressBatcher()
+
+
+def queue_progress_update(job_id: str, **fields) -> None:
+    """Batched update of progress / message / eta_ms (status is left untouched)."""
+    progress_batcher.add(job_id, **fields)
+
+
+def flush_progress_updates() -> int:
+    """Write pending progress updates now."""
+    return progress_batcher.flush()
+
+
 def delete_job(job_id: str) -> bool:
     """Delete a job."""
+    progress_batcher.pop(job_id)
     with get_cursor() as cursor:
         cursor.execute("DELETE FROM queue_jobs WHERE job_id = ?", (job_id,))
         return cursor.rowcount > 0
@@ -224,6 +411,32 @@ def get_position_in_queue(job_id: str) -> int:
         return cursor.fetchone()[0] + 1
 
 
+def find_job_by_fingerprint(
+    fingerprint: str,
+    statuses: List[str],
+    finished_after: Optional[float] = None
+) -> Optional[QueueJob]:
+    """Most recent job with this fingerprint in one of the given statuses."""
+    placeholders = ", ".join("?" for _ in statuses)
+    sql = f"SELECT * FROM queue_jobs WHERE fingerprint = ? AND status IN ({placeholders})"
+    values: List[Any] = [fingerprint, *statuses]
+    if finished_after is not None:
+        sql += " AND finished_at >= ?"
+        values.append(finished_after)
+    sql += " ORDER BY created_at DESC LIMIT 1"
+    with get_cursor() as cursor:
+        cursor.execute(sql, values)
+        row = cursor.fetchone()
+        return _row_to_job(row) if row else None
+
+
+def reassign_job_owner(job_id: str, user_key: str) -> bool:
+    """Hand a job over to another user (keeps shared jobs alive on cancel)."""
+    with get_cursor() as cursor:
+        cursor.execute("UPDATE queue_jobs SET user_key = ? WHERE job_id = ?", (user_key, job_id))
+        return cursor.rowcount > 0
+
+
 def get_user_recent_running_count(user_key: str) -> int:
     """Get count of jobs user ran in last minute (for anti-hog)."""
     one_min_ago = time.time() - 60
@@ -280,4 +493,6 @@ def _row_to_job(row) -> QueueJob:
         eta_ms=row["eta_ms"] or 0,
         result_ref_json=row["result_ref_json"],
         error_short=row["error_short"],
+        fingerprint=row["fingerprint"] if "fingerprint" in row.keys() else None,
+        deadline_at=row["deadline_at"] if "deadline_at" in row.keys() else None,
     )
@@ -8,6 +8,10 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import json
 import asyncio
 
+from .ws_fanout import FanoutHub
+from .pubsub import get_pubsub
+from .queue_engine import QUEUE_CHANNEL_PREFIX
+
 router = APIRouter(tags=["queue-ws"])
 
 # ============================================================
@@ -21,6 +25,8 @@ class QueueConnectionManager:
         # user_key -> set of WebSocket connections
         self.connections: Dict[str, Set[WebSocket]] = {}
         self._lock = asyncio.Lock()
+        # Per-connection send queues; progress of one job is latest-wins
+        self.hub = FanoutHub("queue")
     
     async def connect(self, user_key: str, websocket: WebSocket):
         """Accept and register a connection."""
@@ -29,41 +35,38 @@ class QueueConnectionManager:
             if user_key not in self.connections:
                 self.connections[user_key] = set()
             self.connections[user_key].add(websocket)
+            self.hub.register(user_key, websocket, on_drop=self._forget)
         print(f"[QUEUE-WS] Connected: {user_key}")
     
     async def disconnect(self, user_key: str, websocket: WebSocket):
         """Remove a connection."""
         async with self._lock:
-            if user_key in self.connections:
-                self.connections[user_key].discard(websocket)
-                if not self.connections[user_key]:
-                    del self.connections[user_key]
+            self.hub.unregister(websocket)
+            self._forget(websocket, user_key)
         print(f"[QUEUE-WS] Disconnected: {user_key}")
     
+    def _forget(self, websocket: WebSocket, user_key: str = None):
+        """Drop bookkeeping for a connection (also called for slow consumers)."""
+        keys = [user_key] if user_key else list(self.connections)
+        for key in keys:
+            if key in self.connections:
+                self.connections[key].discard(websocket)
+                if not self.connections[key]:
+                    del self.connections[key]
+    
     async def broadcast_to_user(self, user_key: str, event: Dict[str, Any]):
-        """Send event to all connections for a user."""
-        async with self._lock:
-            connections = self.connections.get(user_key, set()).copy()
-        
-        if not connections:
-            return
-        
-        message = json.dumps(event, ensure_ascii=False)
-        
-        # Send to all connections, remove dead ones
-        dead_connections = []
-        for ws in connections:
-            try:
-                await ws.send_text(message)
-            except Exception:
-                dead_connections.append(ws)
-        
-        # Cleanup dead connections
-        if dead_connections:
-            async with self._lock:
-                for ws in dead_connections:
-                    if user_key in self.connections:
-                        self.connections[user_key].discard(ws)
+        """
+        Send event to all connections for a user.
+
+        Never waits on a socket: the frame is serialized once and queued
+        per connection. Updates of the same job replace each other.
+        """
+        job_id = event.get("job_id")
+        self.hub.publish(user_key, event, coalesce_key=f"job:{job_id}" if job_id else None)
+    
+    def send(self, websocket: WebSocket, event: Dict[str, Any]) -> bool:
+        """Queue a direct frame (ping/pong) behind pending broadcasts."""
+        return self.hub.send_to(websocket, event)
     
     def get_connection_count(self) -> int:
         """Get total connection count."""
@@ -75,12 +78,20 @@ manager = QueueConnectionManager()
 
 
 # ============================================================
-# BROADCAST FUNCTION (used by queue_engine)
+# BROADCAST FUNCTION (pub/sub backbone -> local sockets)
 # ============================================================
 
 async def broadcast_job_update(user_key: str, event: Dict[str, Any]):
-    """Broadcast job update to user's connections."""
-    await manager.broadcast_to_user(user_key, event)
+    """Broadcast job update to user's connections on every worker."""
+    await get_pubsub().publish(f"{QUEUE_CHANNEL_PREFIX}{user_key}", event)
+
+
+async def _deliver_queue_event(channel: str, event: Dict[str, Any], remote: bool):
+    """Backbone handler: push an event to this worker's sockets for the user."""
+    await manager.broadcast_to_user(channel[len(QUEUE_CHANNEL_PREFIX):], event)
+
+
+get_pubsub().subscribe(QUEUE_CHANNEL_PREFIX, _deliver_queue_event)
 
 
 # ============================================================
@@ -108,10 +119,6 @@ async def queue_websocket(websocket: WebSocket, user_key: str = "anonymous"):
     """
     await manager.connect(user_key, websocket)
     
-    # Register broadcast function with engine
-    from .queue_engine import set_ws_broadcast
-    set_ws_broadcast(broadcast_job_update)
-    
     try:
         # Keep connection alive and handle client messages
         while True:
@@ -126,15 +133,13 @@ async def queue_websocket(websocket: WebSocket, user_key: str = "anonymous"):
                 try:
                     msg = json.loads(data)
                     if msg.get("type") == "ping":
-                        await websocket.send_text(json.dumps({"type": "pong"}))
+                        manager.send(websocket, {"type": "pong"})
                 except:
                     pass
                     
             except asyncio.TimeoutError:
-                # Send keep-alive ping
-                try:
-                    await websocket.send_text(json.dumps({"type": "ping"}))
-                except:
+                # Send keep-alive ping (fails if the writer dropped the client)
+                if not manager.send(websocket, {"type": "ping"}):
                     break
                     
     except WebSocketDisconnect:
@@ -154,5 +159,7 @@ async def get_ws_stats():
     """Get WebSocket connection statistics."""
     return {
         "total_connections": manager.get_connection_count(),
-        "user_count": len(manager.connections)
+        "user_count": len(manager.connections),
+        "fanout": manager.hub.stats(),
+        "pubsub": get_pubsub().stats()
     }
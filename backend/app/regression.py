@@ -0,0 +1,513 @@
+"""
+Regression Engine - Opradox Visual Studio
+Least-squares fits with full inference statistics for /viz/regression.
+
+The design matrix is built once and factorized once (thin QR). Coefficients,
+standard errors, t/p-values, R² / adjusted R², F-test, VIF, leverage and the
+residual diagnostics are all derived from that single factorization.
+
+Also provides:
+  - weighted least squares (rows scaled by sqrt(w) before factorizing),
+  - chunked X'X / X'y accumulation solved by Cholesky, for inputs whose
+    design matrix should not be materialized at once,
+  - an LRU cache of design matrices (and their QR) so refitting the same
+    predictors against a different target skips the factorization,
+  - logistic regression by IRLS (Newton steps, each one a weighted QR).
+"""
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import combinations_with_replacement
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.linalg import solve_triangular, cho_factor, cho_solve
+
+from .job_control import checkpoint
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Above this many design-matrix cells, fits switch to chunked X'X accumulation
+MAX_DESIGN_CELLS = 20_000_000
+CHUNK_ROWS = 100_000
+
+# Design matrix cache (only when the target changes, predictors stay)
+DESIGN_CACHE_SIZE = 8
+DESIGN_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Relative tolerance on |diag(R)| for rank deficiency
+RANK_TOL = 1e-10
+
+LOGIT_MAX_ITER = 25
+LOGIT_TOL = 1e-8
+
+
+# ============================================================
+# DESIGN MATRIX
+# ============================================================
+
+@dataclass
+class DesignMatrix:
+    """Numeric design matrix with its (lazily computed) thin QR factorization."""
+    X: np.ndarray
+    names: List[str]
+    row_mask: np.ndarray           # rows of the source frame that made it into X
+    intercept: bool = True
+    _qr: Optional[Tuple[np.ndarray, np.ndarray]] = field(default=None, repr=False)
+
+    @property
+    def n(self) -> int:
+        return self.X.shape[0]
+
+    @property
+    def p(self) -> int:
+        return self.X.shape[1]
+
+    def qr(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._qr is None:
+            self._qr = np.linalg.qr(self.X, mode="reduced")
+        return self._qr
+
+
+def expand_features(
+    X: np.ndarray,
+    names: List[str],
+    degree: int = 1,
+    interactions: bool = True,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Polynomial expansion up to the given degree.
+    interactions=False adds only pure powers (x², x³ ...) instead of every
+    cross product, which keeps the column count linear in the predictors.
+    """
+    if degree <= 1:
+        return X, list(names)
+    cols, out_names = [X], list(names)
+    for d in range(2, degree + 1):
+        if interactions:
+            for combo in combinations_with_replacement(range(X.shape[1]), d):
+                cols.append(np.prod(X[:, combo], axis=1)[:, None])
+                out_names.append("*".join(names[i] for i in combo) if len(set(combo)) > 1
+                                 else f"{names[combo[0]]}^{d}")
+        else:
+            cols.append(X ** d)
+            out_names.extend(f"{n}^{d}" for n in names)
+    return np.hstack(cols), out_names
+
+
+def build_design(
+    df: pd.DataFrame,
+    predictors: List[str],
+    intercept: bool = True,
+    degree: int = 1,
+    interactions: bool = True,
+) -> DesignMatrix:
+    """Numeric design matrix; rows with any non-numeric / missing predictor are dropped."""
+    raw = df[predictors].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    mask = ~np.isnan(raw).any(axis=1)
+    X, names = expand_features(raw[mask], [str(p) for p in predictors], degree, interactions)
+    if intercept:
+        X = np.hstack([np.ones((X.shape[0], 1)), X])
+        names = ["intercept"] + names
+    return DesignMatrix(X=np.ascontiguousarray(X), names=names, row_mask=mask, intercept=intercept)
+
+
+def design_cells(n_rows: int, n_predictors: int, degree: int = 1, interactions: bool = True) -> int:
+    """Cell count of the design matrix build_design() would produce."""
+    p = n_predictors
+    if degree >= 2:
+        if interactions:
+            from math import comb
+            p = sum(comb(n_predictors + d - 1, d) for d in range(1, degree + 1))
+        else:
+            p = n_predictors * degree
+    return n_rows * (p + 1)
+
+
+# ------------------------------------------------------------
+# Cache: (source fingerprint, predictors, options) -> DesignMatrix
+# ------------------------------------------------------------
+
+_design_cache: "OrderedDict[str, DesignMatrix]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def design_cache_key(source_fingerprint: str, predictors: List[str], **options) -> str:
+    raw = repr((source_fingerprint, tuple(predictors), sorted(options.items())))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached_design(key: str) -> Optional[DesignMatrix]:
+    with _cache_lock:
+        design = _design_cache.get(key)
+        if design is not None:
+            _design_cache.move_to_end(key)
+        return design
+
+
+def put_cached_design(key: str, design: DesignMatrix) -> None:
+    if design.X.nbytes > DESIGN_CACHE_MAX_BYTES:
+        return
+    with _cache_lock:
+        _design_cache[key] = design
+        _design_cache.move_to_end(key)
+        while len(_design_cache) > DESIGN_CACHE_SIZE:
+            _design_cache.popitem(last=False)
+
+
+def clear_design_cache() -> None:
+    with _cache_lock:
+        _design_cache.clear()
+
+
+# ============================================================
+# OLS / WLS VIA QR
+# ============================================================
+
+def _check_rank(R: np.ndarray, names: List[str]) -> None:
+    diag = np.abs(np.diag(R))
+    if diag.size == 0:
+        raise ValueError("Tasarım matrisi boş")
+    tol = RANK_TOL * diag.max()
+    bad = [names[i] for i in np.flatnonzero(diag <= tol)]
+    if bad:
+        raise ValueError(f"Tasarım matrisi tekil (çoklu doğrusal bağlantı): {', '.join(bad)}")
+
+
+def _coef_table(names, beta, se, df_resid, dist="t") -> List[Dict[str, Any]]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stat = beta / se
+    if dist == "t":
+        p = 2 * stats.t.sf(np.abs(stat), df_resid)
+        crit = stats.t.ppf(0.975, df_resid)
+    else:
+        p = 2 * stats.norm.sf(np.abs(stat))
+        crit = stats.norm.ppf(0.975)
+    key = "t" if dist == "t" else "z"
+    rows = []
+    for i, name in enumerate(names):
+        rows.append({
+            "name": name,
+            "coef": _r(beta[i]),
+            "std_error": _r(se[i]),
+            key: _r(stat[i]),
+            "p_value": _r(p[i]),
+            "ci_low": _r(beta[i] - crit * se[i]),
+            "ci_high": _r(beta[i] + crit * se[i]),
+        })
+    return rows
+
+
+def _r(value, digits: int = 4):
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def _vif_from_inverse(xtx_inv_diag: np.ndarray, X: np.ndarray, names: List[str], w: Optional[np.ndarray]) -> Dict[str, Optional[float]]:
+    """
+    VIF_j = [(X'X)^-1]_jj * Σ (x_j - x̄_j)²  (valid when the model has an intercept),
+    so VIFs come straight from the factorization without auxiliary regressions.
+    """
+    result = {}
+    for j, name in enumerate(names):
+        if name == "intercept":
+            continue
+        col = X[:, j]
+        if w is None:
+            centered_ss = float(((col - col.mean()) ** 2).sum())
+        else:
+            mean = float((w * col).sum() / w.sum())
+            centered_ss = float((w * (col - mean) ** 2).sum())
+        result[name] = _r(xtx_inv_diag[j] * centered_ss, 3)
+    return result
+
+
+def _residual_diagnostics(resid: np.ndarray, std_resid: np.ndarray, leverage: np.ndarray,
+                          Q: np.ndarray, p: int) -> Dict[str, Any]:
+    n = len(resid)
+    dw = float(np.sum(np.diff(resid) ** 2) / np.sum(resid ** 2)) if np.sum(resid ** 2) > 0 else None
+    jb_stat, jb_p = stats.jarque_bera(resid) if n > 2 else (np.nan, np.nan)
+
+    # Breusch-Pagan: auxiliary regression of e² on X reuses the same Q
+    e2 = resid ** 2
+    fitted_aux = Q @ (Q.T @ e2)
+    ss_tot = float(((e2 - e2.mean()) ** 2).sum())
+    r2_aux = 1 - float(((e2 - fitted_aux) ** 2).sum()) / ss_tot if ss_tot > 0 else 0.0
+    bp_stat = n * r2_aux
+    bp_p = float(stats.chi2.sf(bp_stat, max(p - 1, 1)))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # std_resid is already studentized (divided by sqrt(1 - h))
+        cooks = std_resid ** 2 / p * leverage / (1 - leverage)
+    cooks = np.where(np.isfinite(cooks), cooks, 0.0)
+
+    return {
+        "durbin_watson": _r(dw) if dw is not None else None,
+        "jarque_bera": {"statistic": _r(jb_stat), "p_value": _r(jb_p)},
+        "breusch_pagan": {"statistic": _r(bp_stat), "p_value": _r(bp_p)},
+        "residual_skew": _r(stats.skew(resid)) if n > 2 else None,
+        "residual_kurtosis": _r(stats.kurtosis(resid)) if n > 3 else None,
+        "outliers": int(np.count_nonzero(np.abs(std_resid) > 3)),
+        "high_leverage": int(np.count_nonzero(leverage > 2 * p / n)),
+        "max_cooks_distance": _r(cooks.max()) if n else None,
+        "influential": int(np.count_nonzero(cooks > 4 / n)) if n else 0,
+    }
+
+
+def fit_ols(
+    design: DesignMatrix,
+    y: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    diagnostics: bool = True,
+) -> Dict[str, Any]:
+    """
+    Ordinary / weighted least squares on a prepared design matrix.
+    y (and weights) must be aligned with design.X rows.
+    """
+    X = design.X
+    y = np.asarray(y, dtype=np.float64)
+    n, p = X.shape
+    if n <= p:
+        raise ValueError(f"Gözlem sayısı ({n}) parametre sayısından ({p}) fazla olmalı")
+
+    if weights is None:
+        Q, R = design.qr()
+        yw, w = y, None
+    else:
+        w = np.asarray(weights, dtype=np.float64)
+        if np.any(w < 0):
+            raise ValueError("Ağırlıklar negatif olamaz")
+        sw = np.sqrt(w)
+        Q, R = np.linalg.qr(X * sw[:, None], mode="reduced")
+        yw = y * sw
+
+    _check_rank(R, design.names)
+    qty = Q.T @ yw
+    beta = solve_triangular(R, qty)
+
+    fitted = X @ beta
+    resid = y - fitted
+    resid_w = yw - Q @ qty            # weighted residuals
+    sse = float(resid_w @ resid_w)
+    df_resid = n - p
+    sigma2 = sse / df_resid
+
+    R_inv = solve_triangular(R, np.eye(p))
+    xtx_inv_diag = np.einsum("ij,ij->i", R_inv, R_inv)
+    se = np.sqrt(sigma2 * xtx_inv_diag)
+
+    if w is None:
+        y_center = y.mean() if design.intercept else 0.0
+        sst = float(((y - y_center) ** 2).sum())
+    else:
+        y_center = float((w * y).sum() / w.sum()) if design.intercept else 0.0
+        sst = float((w * (y - y_center) ** 2).sum())
+
+    r2 = 1 - sse / sst if sst > 0 else 0.0
+    k = p - 1 if design.intercept else p
+    adj_r2 = 1 - (1 - r2) * (n - (1 if design.intercept else 0)) / df_resid
+    f_stat = (r2 / k) / ((1 - r2) / df_resid) if k > 0 and r2 < 1 else None
+    f_p = float(stats.f.sf(f_stat, k, df_resid)) if f_stat is not None else None
+
+    result = {
+        "n": n,
+        "p": p,
+        "names": design.names,
+        "beta": beta,
+        "coefficient_table": _coef_table(design.names, beta, se, df_resid),
+        "r_squared": r2,
+        "adj_r_squared": adj_r2,
+        "rmse": float(np.sqrt(np.mean(resid ** 2))),
+        "sigma": float(np.sqrt(sigma2)),
+        "f_statistic": f_stat,
+        "f_p_value": f_p,
+        "df_resid": df_resid,
+        "weighted": w is not None,
+        "solver": "qr",
+    }
+    if design.intercept and p > 2:
+        result["vif"] = _vif_from_inverse(xtx_inv_diag, X, design.names, w)
+    if diagnostics:
+        leverage = np.einsum("ij,ij->i", Q, Q)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std_resid = resid_w / (np.sqrt(sigma2) * np.sqrt(np.clip(1 - leverage, 1e-12, None)))
+        result["diagnostics"] = _residual_diagnostics(resid_w, std_resid, leverage, Q, p)
+    return result
+
+
+# ============================================================
+# CHUNKED NORMAL EQUATIONS (CHOLESKY)
+# ============================================================
+
+def fit_ols_chunked(
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]],
+    names: List[str],
+    intercept: bool = True,
+) -> Dict[str, Any]:
+    """
+    OLS/WLS from streamed (X_chunk, y_chunk, w_chunk) blocks.
+
+    Only p×p and p-sized accumulators are kept: X'WX, X'Wy, y'Wy, Σw, Σwy.
+    Solved by Cholesky; residual-level diagnostics need a second pass and
+    are therefore not reported here.
+    """
+    xtx = xty = None
+    yty = sw = swy = 0.0
+    n = 0
+    col_sum = col_sq = None
+    for Xc, yc, wc in chunks:
+        checkpoint()
+        Xc = np.asarray(Xc, dtype=np.float64)
+        yc = np.asarray(yc, dtype=np.float64)
+        wc = np.ones(len(yc)) if wc is None else np.asarray(wc, dtype=np.float64)
+        Xw = Xc * wc[:, None]
+        if xtx is None:
+            p = Xc.shape[1]
+            xtx, xty = np.zeros((p, p)), np.zeros(p)
+            col_sum, col_sq = np.zeros(p), np.zeros(p)
+        xtx += Xc.T @ Xw
+        xty += Xw.T @ yc
+        yty += float((wc * yc) @ yc)
+        sw += float(wc.sum())
+        swy += float(wc @ yc)
+        col_sum += wc @ Xc
+        col_sq += wc @ (Xc * Xc)
+        n += len(yc)
+
+    if xtx is None:
+        raise ValueError("Veri yok")
+    p = xtx.shape[0]
+    if n <= p:
+        raise ValueError(f"Gözlem sayısı ({n}) parametre sayısından ({p}) fazla olmalı")
+
+    try:
+        factor = cho_factor(xtx)
+    except np.linalg.LinAlgError:
+        raise ValueError("Tasarım matrisi tekil (çoklu doğrusal bağlantı)")
+    beta = cho_solve(factor, xty)
+    xtx_inv = cho_solve(factor, np.eye(p))
+
+    sse = max(yty - 2 * beta @ xty + beta @ xtx @ beta, 0.0)
+    df_resid = n - p
+    sigma2 = sse / df_resid
+    se = np.sqrt(sigma2 * np.diag(xtx_inv))
+
+    sst = yty - (swy ** 2 / sw if intercept else 0.0)
+    r2 = 1 - sse / sst if sst > 0 else 0.0
+    k = p - 1 if intercept else p
+    adj_r2 = 1 - (1 - r2) * (n - (1 if intercept else 0)) / df_resid
+    f_stat = (r2 / k) / ((1 - r2) / df_resid) if k > 0 and r2 < 1 else None
+
+    result = {
+        "n": n,
+        "p": p,
+        "names": names,
+        "beta": beta,
+        "coefficient_table": _coef_table(names, beta, se, df_resid),
+        "r_squared": r2,
+        "adj_r_squared": adj_r2,
+        "rmse": float(np.sqrt(sse / sw)),
+        "sigma": float(np.sqrt(sigma2)),
+        "f_statistic": f_stat,
+        "f_p_value": float(stats.f.sf(f_stat, k, df_resid)) if f_stat is not None else None,
+        "df_resid": df_resid,
+        "solver": "chunked_cholesky",
+    }
+    if intercept and p > 2:
+        centered_ss = col_sq - col_sum ** 2 / sw
+        result["vif"] = {
+            name: _r(xtx_inv[j, j] * centered_ss[j], 3)
+            for j, name in enumerate(names) if name != "intercept"
+        }
+    return result
+
+
+def iter_design_chunks(
+    df: pd.DataFrame,
+    predictors: List[str],
+    target: str,
+    weight_column: Optional[str] = None,
+    intercept: bool = True,
+    degree: int = 1,
+    interactions: bool = True,
+    chunk_rows: int = CHUNK_ROWS,
+):
+    """Yield (X, y, w) design blocks of a frame without materializing the full matrix."""
+    for start in range(0, len(df), chunk_rows):
+        part = df.iloc[start:start + chunk_rows]
+        design = build_design(part, predictors, intercept, degree, interactions)
+        y = pd.to_numeric(part[target], errors="coerce").to_numpy(dtype=np.float64)[design.row_mask]
+        w = None
+        if weight_column:
+            w = pd.to_numeric(part[weight_column], errors="coerce").to_numpy(dtype=np.float64)[design.row_mask]
+        keep = ~np.isnan(y) if w is None else ~(np.isnan(y) | np.isnan(w))
+        if keep.any():
+            yield design.X[keep], y[keep], (w[keep] if w is not None else None)
+
+
+# ============================================================
+# LOGISTIC REGRESSION (IRLS)
+# ============================================================
+
+def fit_logistic(design: DesignMatrix, y: np.ndarray, weights: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Binary logistic regression by iteratively reweighted least squares.
+    Each Newton step is a weighted QR solve; the last one gives the
+    covariance (R'R)^-1 for Wald z-tests.
+    """
+    X = design.X
+    y = np.asarray(y, dtype=np.float64)
+    n, p = X.shape
+    prior = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    beta = np.zeros(p)
+    converged = False
+    iterations = 0
+    for iterations in range(1, LOGIT_MAX_ITER + 1):
+        eta = X @ beta
+        mu = 1.0 / (1.0 + np.exp(-np.clip(eta, -30, 30)))
+        var = np.clip(mu * (1 - mu), 1e-10, None)
+        w = prior * var
+        z = eta + (y - mu) / var
+        sw = np.sqrt(w)
+        Q, R = np.linalg.qr(X * sw[:, None], mode="reduced")
+        _check_rank(R, design.names)
+        new_beta = solve_triangular(R, Q.T @ (z * sw))
+        step = np.max(np.abs(new_beta - beta))
+        beta = new_beta
+        if step < LOGIT_TOL * (1 + np.max(np.abs(beta))):
+            converged = True
+            break
+
+    R_inv = solve_triangular(R, np.eye(p))
+    se = np.sqrt(np.einsum("ij,ij->i", R_inv, R_inv))
+
+    eta = X @ beta
+    mu = 1.0 / (1.0 + np.exp(-np.clip(eta, -30, 30)))
+    eps = 1e-12
+    loglik = float((prior * (y * np.log(mu + eps) + (1 - y) * np.log(1 - mu + eps))).sum())
+    p0 = float((prior * y).sum() / prior.sum())
+    loglik_null = float((prior * (y * np.log(p0 + eps) + (1 - y) * np.log(1 - p0 + eps))).sum())
+    lr_stat = 2 * (loglik - loglik_null)
+
+    return {
+        "n": n,
+        "names": design.names,
+        "beta": beta,
+        "coefficient_table": _coef_table(design.names, beta, se, None, dist="z"),
+        "accuracy": float(((mu >= 0.5).astype(float) == y).mean()),
+        "log_likelihood": loglik,
+        "pseudo_r_squared": 1 - loglik / loglik_null if loglik_null != 0 else None,
+        "lr_statistic": lr_stat,
+        "lr_p_value": float(stats.chi2.sf(lr_stat, p - 1)) if p > 1 else None,
+        "aic": 2 * p - 2 * loglik,
+        "converged": converged,
+        "iterations": iterations,
+        "solver": "irls_qr",
+    }
@@ -0,0 +1,435 @@
+"""
+Resampling Engine - Opradox Visual Studio
+Vectorized bootstrap and permutation replicates for confidence intervals.
+
+Replicates are generated as NumPy index matrices in batches (one row per
+replicate) from a seeded Generator, so a statistic is evaluated for a whole
+batch with a single array expression instead of a Python loop. Batch size is
+chosen so one index matrix stays below BATCH_ELEMENTS entries, which bounds
+memory regardless of the number of replicates. Each resampled array draws
+from its own stream, so the replicates do not depend on the batch size.
+
+Variances and correlations come from row sums (two passes over a batch
+instead of np.var's temporaries); inputs are centered first so the sums do
+not lose precision. A bootstrap median needs no index matrix at all: it
+is an order statistic of n uniform draws, sampled directly (see
+_bootstrap_medians).
+
+Statistics are referenced by name so work can be split across a process
+pool (workers > 1) with independent child seeds.
+"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Sequence
+
+import numpy as np
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+DEFAULT_RESAMPLES = 2000
+MAX_RESAMPLES = 100_000
+DEFAULT_SEED = 42
+DEFAULT_CONFIDENCE = 0.95
+
+# Upper bound on entries of one (batch x n) index matrix (~8 MB as int64;
+# larger batches fall out of cache and are slower, not faster)
+BATCH_ELEMENTS = 1_000_000
+
+# Process pool size for resampling; 1 = in-process
+DEFAULT_WORKERS = int(os.getenv("RESAMPLING_WORKERS", "1"))
+
+# Below this many replicate-rows a process pool is not worth its startup cost
+MIN_PARALLEL_ELEMENTS = 50_000_000
+
+
+# ============================================================
+# VECTORIZED STATISTICS (rows = replicates)
+# ============================================================
+
+def _mean(x: np.ndarray) -> np.ndarray:
+    return x.mean(axis=1)
+
+
+def _median(x: np.ndarray) -> np.ndarray:
+    return np.median(x, axis=1)
+
+
+def _std(x: np.ndarray) -> np.ndarray:
+    return x.std(axis=1, ddof=1)
+
+
+def _moments(x: np.ndarray):
+    """Row means and sample variances from two reductions (x roughly centered)."""
+    n = x.shape[1]
+    mean = x.sum(axis=1) / n
+    var = np.maximum(np.einsum("ij,ij->i", x, x) - n * mean * mean, 0.0) / max(n - 1, 1)
+    return mean, var
+
+
+def _one_sample_d(x: np.ndarray) -> np.ndarray:
+    sd = x.std(axis=1, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.abs(x.mean(axis=1) / sd)
+
+
+def _mean_diff(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a.mean(axis=1) - b.mean(axis=1)
+
+
+def _median_diff(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.median(a, axis=1) - np.median(b, axis=1)
+
+
+def _cohens_d(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    n1, n2 = a.shape[1], b.shape[1]
+    mean_a, var_a = _moments(a)
+    mean_b, var_b = _moments(b)
+    pooled = np.sqrt(((n1 - 1) * var_a + (n2 - 1) * var_b) / (n1 + n2 - 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (mean_a - mean_b) / pooled
+
+
+def _pearson_r(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    n = a.shape[1]
+    sum_a, sum_b = a.sum(axis=1), b.sum(axis=1)
+    cov = np.einsum("ij,ij->i", a, b) - sum_a * sum_b / n
+    var_a = np.maximum(np.einsum("ij,ij->i", a, a) - sum_a * sum_a / n, 0.0)
+    var_b = np.maximum(np.einsum("ij,ij->i", b, b) - sum_b * sum_b / n, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.clip(cov / np.sqrt(var_a * var_b), -1.0, 1.0)
+
+
+def _r_squared(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return _pearson_r(a, b) ** 2
+
+
+ONE_SAMPLE_STATS = {
+    "mean": _mean,
+    "median": _median,
+    "std": _std,
+    "one_sample_d": _one_sample_d,
+}
+
+TWO_SAMPLE_STATS = {
+    "mean_diff": _mean_diff,
+    "median_diff": _median_diff,
+    "cohens_d": _cohens_d,
+}
+
+PAIRED_STATS = {
+    "pearson_r": _pearson_r,
+    "r_squared": _r_squared,
+}
+
+
+def eta_squared(groups: Sequence[np.ndarray]) -> float:
+    """Point estimate of eta² for a list of 1-D group arrays."""
+    all_data = np.concatenate(groups)
+    grand = all_data.mean()
+    ss_total = float(((all_data - grand) ** 2).sum())
+    ss_between = float(sum(len(g) * (g.mean() - grand) ** 2 for g in groups))
+    return ss_between / ss_total if ss_total > 0 else 0.0
+
+
+# ============================================================
+# INDEX GENERATION
+# ============================================================
+
+def _batch_size(n: int) -> int:
+    return max(1, BATCH_ELEMENTS // max(n, 1))
+
+
+def bootstrap_index_batches(n: int, n_resamples: int, rng: np.random.Generator):
+    """Yield (batch, n) matrices of bootstrap row indices until n_resamples rows."""
+    step = _batch_size(n)
+    done = 0
+    while done < n_resamples:
+        b = min(step, n_resamples - done)
+        yield rng.integers(0, n, size=(b, n))
+        done += b
+
+
+def permutation_index_batches(n: int, n_resamples: int, rng: np.random.Generator):
+    """Yield (batch, n) matrices whose rows are independent permutations of range(n)."""
+    step = _batch_size(n)
+    done = 0
+    while done < n_resamples:
+        b = min(step, n_resamples - done)
+        yield rng.permuted(np.broadcast_to(np.arange(n), (b, n)), axis=1)
+        done += b
+
+
+# ============================================================
+# REPLICATE KERNELS (module-level so they can run in a process pool)
+# ============================================================
+
+def _bootstrap_medians(data: np.ndarray, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Medians of n_resamples bootstrap samples without drawing them. The k-th
+    smallest of n uniform indices is floor(n * U(k)) with U(k) ~ Beta(k,
+    n - k + 1); for even n the next one is U(k) + (1 - U(k)) * Beta(1, n - k).
+    """
+    ordered = np.sort(data)
+    n = len(ordered)
+    k = (n + 1) // 2
+    u = rng.beta(k, n - k + 1, size=n_resamples)
+    lower = ordered[np.minimum((u * n).astype(np.int64), n - 1)]
+    if n % 2:
+        return lower
+    u = u + (1 - u) * rng.beta(1, n - k, size=n_resamples)
+    return (lower + ordered[np.minimum((u * n).astype(np.int64), n - 1)]) / 2
+
+
+def _bootstrap_one(data: np.ndarray, statistic: str, n_resamples: int, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    if statistic == "median":
+        return _bootstrap_medians(data, n_resamples, rng)
+    func = ONE_SAMPLE_STATS[statistic]
+    out = [func(np.take(data, idx)) for idx in bootstrap_index_batches(len(data), n_resamples, rng)]
+    return np.concatenate(out)
+
+
+def _bootstrap_two(a: np.ndarray, b: np.ndarray, statistic: str, n_resamples: int, seed) -> np.ndarray:
+    # One stream per sample: replicates do not depend on the batch size
+    rng_a, rng_b = np.random.default_rng(seed).spawn(2)
+    if statistic == "median_diff":
+        return _bootstrap_medians(a, n_resamples, rng_a) - _bootstrap_medians(b, n_resamples, rng_b)
+    func = TWO_SAMPLE_STATS[statistic]
+    step = _batch_size(max(len(a), len(b)))
+    out, done = [], 0
+    while done < n_resamples:
+        k = min(step, n_resamples - done)
+        out.append(func(np.take(a, rng_a.integers(0, len(a), size=(k, len(a)))),
+                        np.take(b, rng_b.integers(0, len(b), size=(k, len(b))))))
+        done += k
+    return np.concatenate(out)
+
+
+def _bootstrap_paired(a: np.ndarray, b: np.ndarray, statistic: str, n_resamples: int, seed) -> np.ndarray:
+    func = PAIRED_STATS[statistic]
+    rng = np.random.default_rng(seed)
+    out = [func(np.take(a, idx), np.take(b, idx)) for idx in bootstrap_index_batches(len(a), n_resamples, rng)]
+    return np.concatenate(out)
+
+
+def _bootstrap_eta(groups: List[np.ndarray], statistic: str, n_resamples: int, seed) -> np.ndarray:
+    """Stratified bootstrap of eta² (each group resampled within itself)."""
+    rngs = np.random.default_rng(seed).spawn(len(groups))
+    sizes = np.array([len(g) for g in groups], dtype=float)
+    total_n = sizes.sum()
+    step = _batch_size(int(total_n))
+    out, done = [], 0
+    while done < n_resamples:
+        k = min(step, n_resamples - done)
+        sums = np.empty((k, len(groups)))
+        sumsq = np.empty((k, len(groups)))
+        for j, g in enumerate(groups):
+            sample = g[rngs[j].integers(0, len(g), size=(k, len(g)))]
+            sums[:, j] = sample.sum(axis=1)
+            sumsq[:, j] = (sample * sample).sum(axis=1)
+        grand = sums.sum(axis=1) / total_n
+        ss_between = ((sums / sizes - grand[:, None]) ** 2 * sizes).sum(axis=1)
+        ss_total = sumsq.sum(axis=1) - total_n * grand ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out.append(np.where(ss_total > 0, ss_between / ss_total, 0.0))
+        done += k
+    return np.concatenate(out)
+
+
+def _permutation_two(a: np.ndarray, b: np.ndarray, statistic: str, n_resamples: int, seed) -> np.ndarray:
+    func = TWO_SAMPLE_STATS[statistic]
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate([a, b])
+    n1 = len(a)
+    out = []
+    for idx in permutation_index_batches(len(pooled), n_resamples, rng):
+        shuffled = pooled[idx]
+        out.append(func(shuffled[:, :n1], shuffled[:, n1:]))
+    return np.concatenate(out)
+
+
+def _run(kernel, args: tuple, n_resamples: int, seed: int, workers: int, n_elements: int) -> np.ndarray:
+    """Run a kernel in-process or split over a process pool with child seeds."""
+    if workers <= 1 or n_resamples * n_elements < MIN_PARALLEL_ELEMENTS:
+        return kernel(*args, n_resamples, seed)
+
+    children = np.random.SeedSequence(seed).spawn(workers)
+    shares = [n_resamples // workers + (1 if i < n_resamples % workers else 0) for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(kernel, *args, share, child) for share, child in zip(shares, children) if share]
+        return np.concatenate([f.result() for f in futures])
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def _clamp_resamples(n_resamples: int) -> int:
+    return int(min(max(n_resamples, 1), MAX_RESAMPLES))
+
+
+def _as_array(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=np.float64)
+    return arr[~np.isnan(arr)]
+
+
+def _centered_pair(values1, values2):
+    """Both samples shifted by their pooled mean (two-sample statistics are shift-free)."""
+    a, b = _as_array(values1), _as_array(values2)
+    shift = np.concatenate([a, b]).mean() if len(a) + len(b) else 0.0
+    return a - shift, b - shift
+
+
+def _paired_arrays(values1, values2):
+    """Complete pairs, each side centered (correlation is shift-free)."""
+    a = np.asarray(values1, dtype=np.float64)
+    b = np.asarray(values2, dtype=np.float64)
+    mask = ~(np.isnan(a) | np.isnan(b))
+    a, b = a[mask], b[mask]
+    return (a - a.mean(), b - b.mean()) if len(a) else (a, b)
+
+
+def percentile_ci(replicates: np.ndarray, confidence: float = DEFAULT_CONFIDENCE) -> List[Optional[float]]:
+    """Percentile interval over finite replicates."""
+    finite = replicates[np.isfinite(replicates)]
+    if len(finite) == 0:
+        return [None, None]
+    alpha = (1 - confidence) / 2
+    lo, hi = np.quantile(finite, [alpha, 1 - alpha])
+    return [round(float(lo), 4), round(float(hi), 4)]
+
+
+def _summary(estimate: float, replicates: np.ndarray, confidence: float, n_resamples: int, seed: int) -> Dict[str, Any]:
+    finite = replicates[np.isfinite(replicates)]
+    return {
+        "estimate": round(float(estimate), 4) if np.isfinite(estimate) else None,
+        "ci": percentile_ci(replicates, confidence),
+        "confidence": confidence,
+        "std_error": round(float(finite.std(ddof=1)), 4) if len(finite) > 1 else None,
+        "method": "percentile bootstrap",
+        "n_resamples": n_resamples,
+        "seed": seed,
+    }
+
+
+def bootstrap_ci(
+    values,
+    statistic: str = "mean",
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = DEFAULT_SEED,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """Bootstrap CI for a one-sample statistic (mean, median, std, one_sample_d)."""
+    if statistic not in ONE_SAMPLE_STATS:
+        raise ValueError(f"Bilinmeyen istatistik: {statistic}")
+    data = _as_array(values)
+    n_resamples = _clamp_resamples(n_resamples)
+    estimate = float(ONE_SAMPLE_STATS[statistic](data[None, :])[0])
+    reps = _run(_bootstrap_one, (data, statistic), n_resamples, seed, workers, len(data))
+    return _summary(estimate, reps, confidence, n_resamples, seed)
+
+
+def bootstrap_ci_two_sample(
+    values1,
+    values2,
+    statistic: str = "mean_diff",
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = DEFAULT_SEED,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """Bootstrap CI for independent two-sample statistics (mean_diff, median_diff, cohens_d)."""
+    if statistic not in TWO_SAMPLE_STATS:
+        raise ValueError(f"Bilinmeyen istatistik: {statistic}")
+    a, b = _centered_pair(values1, values2)
+    n_resamples = _clamp_resamples(n_resamples)
+    estimate = float(TWO_SAMPLE_STATS[statistic](a[None, :], b[None, :])[0])
+    reps = _run(_bootstrap_two, (a, b, statistic), n_resamples, seed, workers, len(a) + len(b))
+    return _summary(estimate, reps, confidence, n_resamples, seed)
+
+
+def bootstrap_ci_paired(
+    values1,
+    values2,
+    statistic: str = "pearson_r",
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = DEFAULT_SEED,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """Bootstrap CI for paired statistics (pearson_r, r_squared); rows resampled together."""
+    if statistic not in PAIRED_STATS:
+        raise ValueError(f"Bilinmeyen istatistik: {statistic}")
+    a, b = _paired_arrays(values1, values2)
+    n_resamples = _clamp_resamples(n_resamples)
+    estimate = float(PAIRED_STATS[statistic](a[None, :], b[None, :])[0])
+    reps = _run(_bootstrap_paired, (a, b, statistic), n_resamples, seed, workers, len(a))
+    return _summary(estimate, reps, confidence, n_resamples, seed)
+
+
+def bootstrap_ci_correlation(
+    values1,
+    values2,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = DEFAULT_SEED,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Dict[str, Any]]:
+    """Bootstrap CIs for pearson_r and r_squared from one set of replicates."""
+    a, b = _paired_arrays(values1, values2)
+    n_resamples = _clamp_resamples(n_resamples)
+    r = float(_pearson_r(a[None, :], b[None, :])[0])
+    reps = _run(_bootstrap_paired, (a, b, "pearson_r"), n_resamples, seed, workers, len(a))
+    return {
+        "pearson_r": _summary(r, reps, confidence, n_resamples, seed),
+        "r_squared": _summary(r * r, reps * reps, confidence, n_resamples, seed),
+    }
+
+
+def bootstrap_ci_eta_squared(
+    groups: Sequence,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = DEFAULT_SEED,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """Stratified bootstrap CI for eta² over k groups."""
+    arrays = [_as_array(g) for g in groups]
+    arrays = [g for g in arrays if len(g)]
+    n_resamples = _clamp_resamples(n_resamples)
+    reps = _run(_bootstrap_eta, (arrays, "eta_squared"), n_resamples, seed, workers,
+                sum(len(g) for g in arrays))
+    return _summary(eta_squared(arrays), reps, confidence, n_resamples, seed)
+
+
+def permutation_test(
+    values1,
+    values2,
+    statistic: str = "mean_diff",
+    n_resamples: int = DEFAULT_RESAMPLES,
+    seed: int = DEFAULT_SEED,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Two-sided permutation test for a two-sample statistic.
+    p = (1 + #{|T*| >= |T|}) / (1 + n_resamples)
+    """
+    if statistic not in TWO_SAMPLE_STATS:
+        raise ValueError(f"Bilinmeyen istatistik: {statistic}")
+    a, b = _centered_pair(values1, values2)
+    n_resamples = _clamp_resamples(n_resamples)
+    observed = float(TWO_SAMPLE_STATS[statistic](a[None, :], b[None, :])[0])
+    reps = _run(_permutation_two, (a, b, statistic), n_resamples, seed, workers, len(a) + len(b))
+    exceed = int(np.count_nonzero(np.abs(reps) >= abs(observed) - 1e-12))
+    return {
+        "statistic": statistic,
+        "observed": round(observed, 4),
+        "p_value": round((exceed + 1) / (n_resamples + 1), 4),
+        "method": "permutation",
+        "n_resamples": n_resamples,
+        "seed": seed,
+    }
@@ -158,7 +158,7 @@ async def _run_report_engine(
     import numpy as np
     import time
     
-    from .excel_utils import read_table_from_upload
+    from .workbook_session import open_workbook
     from .scenarios.custom_report_builder_pro import run as report_runner
     from .scenario_registry import LAST_EXCEL_STORE
     
@@ -168,7 +168,7 @@ async def _run_report_engine(
     header_row = data_source.get("header_row", 0)
     
     try:
-        df = read_table_from_upload(file, sheet_name=sheet_name, header_row=header_row)
+        df = open_workbook(file).sheet(sheet_name, header_row=header_row)
     except Exception as e:
         logger.error(f"File read error: {e}")
         raise HTTPException(status_code=400, detail=f"Dosya okuma hatası: {str(e)}")
@@ -183,7 +183,8 @@ async def _run_report_engine(
     # Read secondary file if provided
     if file2:
         try:
-            df2 = read_table_from_upload(file2)
+            # Aynı dosya ikinci kez gönderildiyse (crosssheet) oturumdaki sayfalar kullanılır
+            df2 = open_workbook(file2).sheet()
             params_dict["df2"] = df2
         except Exception as e:
             logger.warning(f"Second file read warning: {e}")
@@ -249,6 +250,15 @@ async def _run_report_engine(
                 LAST_EXCEL_STORE[scenario_id] = store_data
                 response["excel_available"] = True
                 response["download_url"] = f"/download/{scenario_id}?format=xlsx"
+
+            if "dataframe" in store_data:
+                from .dataset_api import result_dataset_id
+                from .dataset_store import register_dataset
+
+                response["dataset_id"] = register_dataset(
+                    store_data["dataframe"], source="result", dataset_id=result_dataset_id(scenario_id)
+                )
+                response["page_url"] = f"/data/{response['dataset_id']}/page"
     
     return response
 
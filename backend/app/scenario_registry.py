@@ -53,12 +53,21 @@ def _build_scenarios() -> Dict[str, Dict[str, Any]]:
         status = impl.get("status", item.get("status", "todo"))
 
         runner: Callable[..., Any] | None = None
+        partial: Callable[..., Any] | None = None
+        input_columns: Callable[..., Any] | None = None
+        parse_dates = False
         final_status = status or "todo"
 
         if module_name:
             try:
                 module = importlib.import_module(module_name)
                 runner = getattr(module, func_name)
+                # Parça parça (out-of-core) çalıştırma desteği (bkz. chunked_exec.py)
+                partial = getattr(module, "partial_aggregator", None)
+                # Okunan sütunlar (Parquet/Feather/Arrow projeksiyonu, bkz. columnar_io.py)
+                input_columns = getattr(module, "input_columns", None)
+                # Tarih metinleri okuma sırasında datetime64'e çevrilsin mi (bkz. dtype_optimizer.py)
+                parse_dates = bool(getattr(module, "PARSE_DATES", False))
                 # Eğer modül başarıyla import edildiyse, en azından "implemented" / "generated" sayalım
                 if final_status in (None, "", "todo"):
                     final_status = "implemented"
@@ -92,6 +101,12 @@ def _build_scenarios() -> Dict[str, Dict[str, Any]]:
 
         if runner is not None:
             scenario["runner"] = runner
+        if partial is not None:
+            scenario["partial"] = partial
+        if input_columns is not None:
+            scenario["input_columns"] = input_columns
+        if parse_dates:
+            scenario["parse_dates"] = True
 
         scenarios[sid] = scenario
 
@@ -144,6 +159,7 @@ def list_scenarios() -> List[Dict[str, Any]]:
                 "short_en": s.get("short_en"),
                 "tags": s.get("tags", []),
                 "status": s.get("status"),
+                "supports_chunked": "partial" in s,
                 # Yeni: mini kullanım kılavuzu
                 "help_tr": s.get("help_tr") or {},
             }
@@ -1,10 +1,12 @@
-
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 import pandas as pd
 from fastapi import HTTPException
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+from app.chunked_exec import PartialAggregator, RowSample
+
+
+def _resolve_params(params: Dict[str, Any], columns) -> Tuple[str, Any, str, str]:
     condition_column = params.get("condition_column")
     condition_value = params.get("condition_value")
     target_column = params.get("target_column")
@@ -14,9 +16,12 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     if not condition_column or not target_column:
         raise HTTPException(status_code=400, detail="Koşul sütunu ve Hedef sütun zorunludur.")
         
-    if condition_column not in df.columns or target_column not in df.columns:
-        raise HTTPException(status_code=400, detail=f"Sütun bulunamadı. Mevcut: {list(df.columns)}")
-        
+    if condition_column not in columns or target_column not in columns:
+        raise HTTPException(status_code=400, detail=f"Sütun bulunamadı. Mevcut: {list(columns)}")
+    return condition_column, condition_value, target_column, return_mode
+
+
+def _condition_mask(df: pd.DataFrame, condition_column: str, condition_value: Any) -> pd.Series:
     # Filtreleme
     # Condition value boşsa 'boş olanları' mı kast ediyor? 
     # Varsayım: kesin eşleşme arıyoruz. Value str gelebilir, df numerik olabilir.
@@ -24,29 +29,27 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     # Basit eşleşme filter
     if condition_value is None:
         # Belki boş olanları arıyordur? Şimdilik pass.
-        mask = df[condition_column].isna()
-    else:
-        # Tip dönüşümü denemeden direkt string karşılaştırma daha güvenli olabilir genel kullanım için
-        # Ama numerik eşleşme de lazım. 
-        # Pandas query gibi davranmak zor, basit == yapalım.
-        # Stringe çevirip karşılaştırmak en güvenlisi opradox basitliği için.
-        mask = df[condition_column].astype(str) == str(condition_value)
-        
-    filtered = df[mask].copy()
-    
-    # Ortalama Hesapla
-    # Hedef sütun numerik olmalı
-    numeric_series = pd.to_numeric(filtered[target_column], errors='coerce')
-    
-    if len(numeric_series) == 0:
-        avg_val = 0.0
-    else:
-        avg_val = float(numeric_series.mean())
-        
+        return df[condition_column].isna()
+    # Tip dönüşümü denemeden direkt string karşılaştırma daha güvenli olabilir genel kullanım için
+    # Ama numerik eşleşme de lazım. 
+    # Pandas query gibi davranmak zor, basit == yapalım.
+    # Stringe çevirip karşılaştırmak en güvenlisi opradox basitliği için.
+    return df[condition_column].astype(str) == str(condition_value)
+
+
+def _build_result(
+    condition_column: str,
+    condition_value: Any,
+    target_column: str,
+    return_mode: str,
+    filtered: pd.DataFrame,
+    matched_rows: int,
+    avg_val: float,
+) -> Dict[str, Any]:
     summary = {
         "condition_column": condition_column,
         "condition_value": condition_value,
-        "matched_rows": len(filtered),
+        "matched_rows": matched_rows,
         "average": avg_val
     }
     
@@ -59,7 +62,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
             "target_column": target_column
         },
         "stats": {
-            "matched_rows": len(filtered),
+            "matched_rows": matched_rows,
             "average": avg_val
         },
         "python_code": f"""```python
@@ -72,7 +75,7 @@ mask = df['{condition_column}'].astype(str) == {repr(str(condition_value))}
 filtered = df[mask]
 average = filtered['{target_column}'].mean()
 
-# Sonuç: {avg_val:.2f} ({len(filtered)} satır)
+# Sonuç: {avg_val:.2f} ({matched_rows} satır)
 print(f"Ortalama: {{average}}")
 ```"""
     }
@@ -100,3 +103,72 @@ print(f"Ortalama: {{average}}")
         "excel_bytes": output,
         "excel_filename": "average_if_result.xlsx"
     }
+
+
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    condition_column, condition_value, target_column, return_mode = _resolve_params(params, df.columns)
+
+    filtered = df[_condition_mask(df, condition_column, condition_value)].copy()
+    
+    # Ortalama Hesapla
+    # Hedef sütun numerik olmalı
+    numeric_series = pd.to_numeric(filtered[target_column], errors='coerce')
+    
+    if len(numeric_series) == 0:
+        avg_val = 0.0
+    else:
+        avg_val = float(numeric_series.mean())
+
+    return _build_result(
+        condition_column, condition_value, target_column, return_mode,
+        filtered, len(filtered), avg_val,
+    )
+
+
+class AverageIfPartial(PartialAggregator):
+    """Parça parça AVERAGEIF: ortalama yerine toplam ve sayı birleştirilir."""
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        self.columns = list(sample.columns)
+        (self.condition_column, self.condition_value,
+         self.target_column, self.return_mode) = _resolve_params(params, sample.columns)
+        self.text_columns = [self.condition_column]
+        self.reset()
+
+    def reset(self) -> None:
+        self.matched_rows = 0
+        self.value_sum = 0.0
+        self.value_count = 0
+        self.sample = RowSample()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        filtered = chunk[_condition_mask(chunk, self.condition_column, self.condition_value)]
+        numeric_series = pd.to_numeric(filtered[self.target_column], errors='coerce')
+        self.matched_rows += len(filtered)
+        self.value_sum += float(numeric_series.sum())
+        self.value_count += int(numeric_series.count())
+        self.sample.add(filtered)
+
+    def merge(self, other: "AverageIfPartial") -> "AverageIfPartial":
+        self.matched_rows += other.matched_rows
+        self.value_sum += other.value_sum
+        self.value_count += other.value_count
+        self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        if self.matched_rows == 0:
+            avg_val = 0.0
+        elif self.value_count == 0:
+            avg_val = float("nan")
+        else:
+            avg_val = self.value_sum / self.value_count
+        return _build_result(
+            self.condition_column, self.condition_value, self.target_column, self.return_mode,
+            self.sample.frame(self.columns), self.matched_rows, avg_val,
+        )
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> AverageIfPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return AverageIfPartial(params, sample)
@@ -2,8 +2,10 @@
 import pandas as pd
 from fastapi import HTTPException
 
-def run(df: pd.DataFrame, params: dict) -> dict:
+from app.chunked_exec import PartialAggregator, RowSample
+
 
+def _resolve_params(params: dict, columns) -> tuple:
     avg_col = params.get("average_column")
     crit_cols = params.get("criteria_columns", [])
     crit_vals = params.get("criteria_values", [])
@@ -11,8 +13,8 @@ def run(df: pd.DataFrame, params: dict) -> dict:
     # average_column zorunlu
     if not avg_col:
         raise HTTPException(status_code=400, detail="Ortalama alınacak sütun (average_column) zorunludur.")
-    if avg_col not in df.columns:
-        raise HTTPException(status_code=400, detail=f"Ortalama sütunu '{avg_col}' bulunamadı. Mevcut sütunlar: {list(df.columns)[:10]}")
+    if avg_col not in columns:
+        raise HTTPException(status_code=400, detail=f"Ortalama sütunu '{avg_col}' bulunamadı. Mevcut sütunlar: {list(columns)[:10]}")
     
     # Ensure lists
     if isinstance(crit_cols, str): 
@@ -26,14 +28,18 @@ def run(df: pd.DataFrame, params: dict) -> dict:
     if not no_criteria and len(crit_cols) != len(crit_vals):
         raise HTTPException(status_code=400, detail="Koşul sütun sayısı ile değer sayısı eşit olmalı.")
 
+    for col in crit_cols:
+        if col not in columns:
+            raise HTTPException(status_code=400, detail=f"Koşul sütunu '{col}' bulunamadı. Mevcut sütunlar: {list(columns)[:10]}")
+    return avg_col, crit_cols, crit_vals
+
+
+def _apply_criteria(df: pd.DataFrame, crit_cols: list, crit_vals: list) -> tuple:
     # Filter
     filtered_df = df.copy()
     applied_filters = []
     
     for col, val in zip(crit_cols, crit_vals):
-        if col not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Koşul sütunu '{col}' bulunamadı. Mevcut sütunlar: {list(df.columns)[:10]}")
-        
         # Try to match type (numeric vs string)
         if pd.api.types.is_numeric_dtype(df[col]):
             try:
@@ -43,18 +49,10 @@ def run(df: pd.DataFrame, params: dict) -> dict:
         
         filtered_df = filtered_df[filtered_df[col] == val]
         applied_filters.append(f"{col}={val}")
+    return filtered_df, applied_filters
 
-    # Koşul yoksa bilgilendirme mesajı
-    filter_info = " | ".join(applied_filters) if applied_filters else "Koşul uygulanmadı → tüm satırlar"
-
-    if filtered_df.empty:
-        raise HTTPException(status_code=400, detail=f"Belirtilen kriterlere ({', '.join(applied_filters)}) uygun veri bulunamadı.")
-
-    try:
-        result = filtered_df[avg_col].mean()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Hesaplama hatası (Sayısal sütun seçtiğinize emin olun): {e}")
 
+def _build_result(avg_col: str, crit_cols: list, crit_vals: list, filtered_df: pd.DataFrame, matched_rows: int, result) -> dict:
     # Python kod özeti
     conditions_str = " & ".join([f"(df['{c}'] == {repr(v)})" for c, v in zip(crit_cols, crit_vals)])
     technical_details = {
@@ -65,7 +63,7 @@ def run(df: pd.DataFrame, params: dict) -> dict:
             "criteria_values": crit_vals
         },
         "stats": {
-            "matched_rows": len(filtered_df),
+            "matched_rows": matched_rows,
             "result": result
         },
         "python_code": f"""```python
@@ -78,7 +76,7 @@ mask = {conditions_str}
 filtered = df[mask]
 average = filtered['{avg_col}'].mean()
 
-# Sonuç: {result:.2f} ({len(filtered_df)} satır)
+# Sonuç: {result:.2f} ({matched_rows} satır)
 print(f"Ortalama: {{average}}")
 ```"""
     }
@@ -89,3 +87,71 @@ print(f"Ortalama: {{average}}")
         "technical_details": technical_details,
         "df_out": filtered_df 
     }
+
+
+def _no_match_error(applied_filters: list) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Belirtilen kriterlere ({', '.join(applied_filters)}) uygun veri bulunamadı.")
+
+
+def run(df: pd.DataFrame, params: dict) -> dict:
+    avg_col, crit_cols, crit_vals = _resolve_params(params, df.columns)
+    filtered_df, applied_filters = _apply_criteria(df, crit_cols, crit_vals)
+
+    if filtered_df.empty:
+        raise _no_match_error(applied_filters)
+
+    try:
+        result = filtered_df[avg_col].mean()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Hesaplama hatası (Sayısal sütun seçtiğinize emin olun): {e}")
+
+    return _build_result(avg_col, crit_cols, crit_vals, filtered_df, len(filtered_df), result)
+
+
+class AverageIfsPartial(PartialAggregator):
+    """Parça parça AVERAGEIFS: filtrelenen değerlerin toplamı ve sayısı birleştirilir."""
+
+    def __init__(self, params: dict, sample: pd.DataFrame):
+        self.columns = list(sample.columns)
+        self.avg_col, self.crit_cols, self.crit_vals = _resolve_params(params, sample.columns)
+        _, self.applied_filters = _apply_criteria(sample.head(0), self.crit_cols, self.crit_vals)
+        self.reset()
+
+    def reset(self) -> None:
+        self.matched_rows = 0
+        self.value_sum = 0.0
+        self.value_count = 0
+        self.sample = RowSample()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        filtered_df, _ = _apply_criteria(chunk, self.crit_cols, self.crit_vals)
+        series = filtered_df[self.avg_col]
+        try:
+            values = series if pd.api.types.is_numeric_dtype(series) else pd.to_numeric(series)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Hesaplama hatası (Sayısal sütun seçtiğinize emin olun): {e}")
+        self.matched_rows += len(filtered_df)
+        self.value_sum += float(values.sum())
+        self.value_count += int(values.count())
+        self.sample.add(filtered_df)
+
+    def merge(self, other: "AverageIfsPartial") -> "AverageIfsPartial":
+        self.matched_rows += other.matched_rows
+        self.value_sum += other.value_sum
+        self.value_count += other.value_count
+        self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> dict:
+        if self.matched_rows == 0:
+            raise _no_match_error(self.applied_filters)
+        result = self.value_sum / self.value_count if self.value_count else float("nan")
+        return _build_result(
+            self.avg_col, self.crit_cols, self.crit_vals,
+            self.sample.frame(self.columns), self.matched_rows, result,
+        )
+
+
+def partial_aggregator(params: dict, sample: pd.DataFrame) -> AverageIfsPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return AverageIfsPartial(params, sample)
@@ -17,7 +17,7 @@ def run(df: pd.DataFrame, params: dict) -> dict:
         else:
             # Object sütunlardan tarih parse etmeyi dene
             for col in df.columns:
-                if df[col].dtype == 'object':
+                if pd.api.types.is_string_dtype(df[col].dtype):
                     try:
                         pd.to_datetime(df[col].dropna().head(10), dayfirst=True)
                         date_col = col
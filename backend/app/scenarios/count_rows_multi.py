@@ -1,11 +1,12 @@
 from io import BytesIO
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import pandas as pd
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from app.excel_utils import read_table_from_upload, build_condition_mask
+from app.chunked_exec import PartialAggregator, RowSample
 
 router = APIRouter(tags=["scenario - count rows multi"])
 
@@ -36,16 +37,7 @@ def _normalize_params_for_multi(params: Dict[str, Any]) -> Dict[str, List[str]]:
     }
 
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Senaryo motoru için core fonksiyon.
-
-    Beklenen params:
-    - column / columns (tekrar eden)
-    - op / operators
-    - value / values
-    - return_mode
-    """
+def _resolve_conditions(params: Dict[str, Any]) -> Tuple[List[str], List[str], List[str], str]:
     normalized = _normalize_params_for_multi(params)
     columns = normalized["columns"]
     operators = normalized["operators"]
@@ -68,25 +60,42 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
             status_code=400,
             detail="En az bir koşul tanımlamalısınız.",
         )
+    return columns, operators, values, return_mode
+
 
-    mask = pd.Series([True] * len(df))
-    conditions_detail = []
+def _conditions_mask(
+    df: pd.DataFrame, columns: List[str], operators: List[str], values: List[str]
+) -> Tuple[pd.Series, List[int]]:
+    """Tüm koşulların birleşik maskesi ve her koşulun kendi eşleşme sayısı."""
+    mask = pd.Series(True, index=df.index)
+    condition_counts = []
 
     for col, op, val in zip(columns, operators, values):
         cond_mask = build_condition_mask(df, col, op, val)
         mask &= cond_mask
-
-        conditions_detail.append(
-            {
-                "column": col,
-                "operator": op,
-                "value": val,
-                "match_count_for_this_condition": int(cond_mask.sum()),
-            }
-        )
-
-    match_count = int(mask.sum())
-    total_rows = int(len(df))
+        condition_counts.append(int(cond_mask.sum()))
+    return mask, condition_counts
+
+
+def _build_result(
+    columns: List[str],
+    operators: List[str],
+    values: List[str],
+    return_mode: str,
+    condition_counts: List[int],
+    match_count: int,
+    total_rows: int,
+    filtered_df: pd.DataFrame = None,
+) -> Dict[str, Any]:
+    conditions_detail = [
+        {
+            "column": col,
+            "operator": op,
+            "value": val,
+            "match_count_for_this_condition": count,
+        }
+        for col, op, val, count in zip(columns, operators, values, condition_counts)
+    ]
 
     summary = {
         "scenario": "count_rows_multi_conditions",
@@ -123,8 +132,6 @@ print(f"Eşleşen: {{count}}")
             "excel_filename": None,
         }
 
-    filtered_df = df[mask].copy()
-
     output = BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
         filtered_df.to_excel(writer, index=False, sheet_name="Matches")
@@ -141,6 +148,72 @@ print(f"Eşleşen: {{count}}")
     }
 
 
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Senaryo motoru için core fonksiyon.
+
+    Beklenen params:
+    - column / columns (tekrar eden)
+    - op / operators
+    - value / values
+    - return_mode
+    """
+    columns, operators, values, return_mode = _resolve_conditions(params)
+    mask, condition_counts = _conditions_mask(df, columns, operators, values)
+
+    filtered_df = df[mask].copy() if return_mode != "summary" else None
+    return _build_result(
+        columns, operators, values, return_mode,
+        condition_counts, int(mask.sum()), int(len(df)), filtered_df,
+    )
+
+
+class CountRowsMultiPartial(PartialAggregator):
+    """Parça parça çoklu koşul sayımı: koşul bazlı ve toplam sayımlar toplanır."""
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        self.frame_columns = list(sample.columns)
+        self.columns, self.operators, self.values, self.return_mode = _resolve_conditions(params)
+        # Sütun / operatör hataları ilk parçada yakalanır
+        _conditions_mask(sample.head(0), self.columns, self.operators, self.values)
+        self.text_columns = list(dict.fromkeys(self.columns))
+        self.reset()
+
+    def reset(self) -> None:
+        self.condition_counts = [0] * len(self.columns)
+        self.match_count = 0
+        self.total_rows = 0
+        self.sample = RowSample() if self.return_mode != "summary" else None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        mask, counts = _conditions_mask(chunk, self.columns, self.operators, self.values)
+        self.condition_counts = [a + b for a, b in zip(self.condition_counts, counts)]
+        self.match_count += int(mask.sum())
+        self.total_rows += len(chunk)
+        if self.sample is not None:
+            self.sample.add(chunk[mask])
+
+    def merge(self, other: "CountRowsMultiPartial") -> "CountRowsMultiPartial":
+        self.condition_counts = [a + b for a, b in zip(self.condition_counts, other.condition_counts)]
+        self.match_count += other.match_count
+        self.total_rows += other.total_rows
+        if self.sample is not None:
+            self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        filtered_df = self.sample.frame(self.frame_columns) if self.sample is not None else None
+        return _build_result(
+            self.columns, self.operators, self.values, self.return_mode,
+            self.condition_counts, self.match_count, self.total_rows, filtered_df,
+        )
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> CountRowsMultiPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return CountRowsMultiPartial(params, sample)
+
+
 @router.post("/count-rows-multi")
 async def count_rows_multi_conditions(
     file: UploadFile = File(
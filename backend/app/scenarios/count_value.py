@@ -1,59 +1,60 @@
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import pandas as pd
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from app.excel_utils import read_table_from_upload
+from app.chunked_exec import PartialAggregator, RowSample
 
 router = APIRouter(tags=["scenario - count value"])
 
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Senaryo motoru için core fonksiyon.
-
-    Beklenen params:
-    - column (veya column_name)
-    - value (veya search_value)
-    - return_mode: 'summary' veya 'summary_and_rows'
-    """
+def _resolve_params(params: Dict[str, Any], columns) -> Tuple[str, Any, str]:
+    """Parametreleri okur ve sütunlara göre doğrular."""
     column_name = params.get("column") or params.get("column_name")
     search_value = params.get("value") or params.get("search_value")
     return_mode = params.get("return_mode", "summary")
 
     # column_name boşsa ilk sütunu kullan
     if not column_name:
-        if len(df.columns) > 0:
-            column_name = df.columns[0]
+        if len(columns) > 0:
+            column_name = columns[0]
         else:
             raise HTTPException(
                 status_code=400,
                 detail="Veri seti boş. Lütfen column parametresi belirtin.",
             )
     
-    if column_name not in df.columns:
+    if column_name not in columns:
         raise HTTPException(
             status_code=400,
             detail=(
                 f"'{column_name}' adlı sütun bulunamadı. "
-                f"Mevcut sütunlar: {list(df.columns)[:10]}"
+                f"Mevcut sütunlar: {list(columns)[:10]}"
             ),
         )
-    
+    return column_name, search_value, return_mode
+
+
+def _match_mask(df: pd.DataFrame, column_name: str, search_value: Any) -> pd.Series:
     # search_value boşsa NaN/boş değerleri say
     if search_value is None or search_value == "":
-        mask = df[column_name].isna() | (df[column_name].astype(str).str.strip() == "")
-        search_desc = "boş/NaN değerler"
-    else:
-        # Case-insensitive ve whitespace-insensitive eşleştirme
-        clean_search_val = str(search_value).strip().lower()
-        mask = df[column_name].astype(str).str.strip().str.lower() == clean_search_val
-        search_desc = f"'{clean_search_val}' (büyük/küçük harf duyarsız)"
-    match_count = int(mask.sum())
-    total_rows = int(len(df))
-
+        return df[column_name].isna() | (df[column_name].astype(str).str.strip() == "")
+    # Case-insensitive ve whitespace-insensitive eşleştirme
+    clean_search_val = str(search_value).strip().lower()
+    return df[column_name].astype(str).str.strip().str.lower() == clean_search_val
+
+
+def _build_result(
+    column_name: str,
+    search_value: Any,
+    return_mode: str,
+    filtered_df: pd.DataFrame,
+    match_count: int,
+    total_rows: int,
+) -> Dict[str, Any]:
     summary = {
         "scenario": "count_value_in_column",
         "column_name": column_name,
@@ -94,8 +95,6 @@ print(f"Sayım: {{count}}")
             "excel_filename": None,
         }
 
-    filtered_df = df[mask].copy()
-
     output = BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
         filtered_df.to_excel(writer, index=False, sheet_name="Matches")
@@ -112,6 +111,66 @@ print(f"Sayım: {{count}}")
     }
 
 
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Senaryo motoru için core fonksiyon.
+
+    Beklenen params:
+    - column (veya column_name)
+    - value (veya search_value)
+    - return_mode: 'summary' veya 'summary_and_rows'
+    """
+    column_name, search_value, return_mode = _resolve_params(params, df.columns)
+
+    mask = _match_mask(df, column_name, search_value)
+    match_count = int(mask.sum())
+    total_rows = int(len(df))
+
+    filtered_df = df[mask].copy() if return_mode != "summary" else None
+    return _build_result(column_name, search_value, return_mode, filtered_df, match_count, total_rows)
+
+
+class CountValuePartial(PartialAggregator):
+    """Parça parça COUNTIF: eşleşme ve satır sayıları toplanır."""
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        self.columns = list(sample.columns)
+        self.column_name, self.search_value, self.return_mode = _resolve_params(params, sample.columns)
+        self.text_columns = [self.column_name]
+        self.reset()
+
+    def reset(self) -> None:
+        self.match_count = 0
+        self.total_rows = 0
+        self.sample = RowSample() if self.return_mode != "summary" else None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        mask = _match_mask(chunk, self.column_name, self.search_value)
+        self.match_count += int(mask.sum())
+        self.total_rows += len(chunk)
+        if self.sample is not None:
+            self.sample.add(chunk[mask])
+
+    def merge(self, other: "CountValuePartial") -> "CountValuePartial":
+        self.match_count += other.match_count
+        self.total_rows += other.total_rows
+        if self.sample is not None:
+            self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        filtered_df = self.sample.frame(self.columns) if self.sample is not None else None
+        return _build_result(
+            self.column_name, self.search_value, self.return_mode,
+            filtered_df, self.match_count, self.total_rows,
+        )
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> CountValuePartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return CountValuePartial(params, sample)
+
+
 @router.post("/count-value")
 async def count_value_in_column(
     file: UploadFile = File(
@@ -29,6 +29,10 @@ from typing import Any, Dict, List, Optional, Union
 from fastapi import HTTPException
 import time
 
+from app import time_series as ts_engine
+from app.job_control import checkpoint
+from app.step_profiler import StepProfiler
+
 def log_step(step_name):
     print(f"[{time.strftime('%H:%M:%S')}] STEP: {step_name}")
 
@@ -623,16 +627,12 @@ def _compute_ytd_sum(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFrame:
     if not value_col or value_col not in df.columns:
         raise ValueError(f"Değer sütunu bulunamadı: {cc.get('value_column')}")
     
-    df = df.copy()
-    df['_date_temp'] = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
-    df['_year_temp'] = df['_date_temp'].dt.year
-    
-    # Yıl bazında kümülatif toplam
-    df = df.sort_values('_date_temp')
-    df[name] = df.groupby('_year_temp')[value_col].cumsum()
+    dates = ts_engine.parse_dates(df[date_col])
     
-    # Temp sütunları temizle
-    df = df.drop(['_date_temp', '_year_temp'], axis=1)
+    # Tarihe göre sırala, yıl bazında kümülatif toplam
+    order = ts_engine.date_order(dates)
+    df = df.iloc[order].copy()
+    df[name] = ts_engine.cumulative_to_date(dates.iloc[order], df[value_col], "Y")
     
     return df
 
@@ -647,14 +647,11 @@ def _compute_mtd_sum(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFrame:
     if not value_col or value_col not in df.columns:
         raise ValueError(f"Değer sütunu bulunamadı: {cc.get('value_column')}")
     
-    df = df.copy()
-    df['_date_temp'] = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
-    df['_year_month_temp'] = df['_date_temp'].dt.to_period('M')
-    
-    df = df.sort_values('_date_temp')
-    df[name] = df.groupby('_year_month_temp')[value_col].cumsum()
+    dates = ts_engine.parse_dates(df[date_col])
     
-    df = df.drop(['_date_temp', '_year_month_temp'], axis=1)
+    order = ts_engine.date_order(dates)
+    df = df.iloc[order].copy()
+    df[name] = ts_engine.cumulative_to_date(dates.iloc[order], df[value_col], "M")
     
     return df
 
@@ -669,29 +666,7 @@ def _compute_yoy_change(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFrame:
     if not value_col or value_col not in df.columns:
         raise ValueError(f"Değer sütunu bulunamadı: {cc.get('value_column')}")
     
-    df = df.copy()
-    df['_date_temp'] = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
-    df['_year_temp'] = df['_date_temp'].dt.year
-    df['_month_temp'] = df['_date_temp'].dt.month
-    
-    # Yıl-Ay bazında toplam
-    grouped = df.groupby(['_year_temp', '_month_temp'])[value_col].sum().reset_index()
-    grouped = grouped.sort_values(['_month_temp', '_year_temp'])
-    
-    # Geçen yılın değeri
-    grouped['_prev_year_value'] = grouped.groupby('_month_temp')[value_col].shift(1)
-    grouped[name] = ((grouped[value_col] - grouped['_prev_year_value']) / grouped['_prev_year_value'] * 100).round(2)
-    
-    # Ana df'e merge et
-    df = df.merge(
-        grouped[['_year_temp', '_month_temp', name]], 
-        on=['_year_temp', '_month_temp'], 
-        how='left'
-    )
-    
-    df = df.drop(['_date_temp', '_year_temp', '_month_temp'], axis=1)
-    
-    return df
+    return _period_change_column(df, date_col, value_col, name, "M", lag="year")
 
 
 def _compute_qoq_change(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFrame:
@@ -704,27 +679,21 @@ def _compute_qoq_change(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFrame:
     if not value_col or value_col not in df.columns:
         raise ValueError(f"Değer sütunu bulunamadı: {cc.get('value_column')}")
     
+    return _period_change_column(df, date_col, value_col, name, "Q", lag="period")
+
+
+def _period_change_column(df: pd.DataFrame, date_col: str, value_col: str, name: str, freq: str, lag: str) -> pd.DataFrame:
+    """Dönem toplamları üzerinden % değişim (YoY/QoQ) hesaplayıp her satıra yazar"""
     df = df.copy()
-    df['_date_temp'] = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
-    df['_year_temp'] = df['_date_temp'].dt.year
-    df['_quarter_temp'] = df['_date_temp'].dt.quarter
-    
-    # Yıl-Çeyrek bazında toplam
-    grouped = df.groupby(['_year_temp', '_quarter_temp'])[value_col].sum().reset_index()
-    grouped = grouped.sort_values(['_year_temp', '_quarter_temp'])
-    
-    # Önceki çeyreğin değeri
-    grouped['_prev_quarter_value'] = grouped[value_col].shift(1)
-    grouped[name] = ((grouped[value_col] - grouped['_prev_quarter_value']) / grouped['_prev_quarter_value'] * 100).round(2)
-    
-    # Ana df'e merge et
-    df = df.merge(
-        grouped[['_year_temp', '_quarter_temp', name]], 
-        on=['_year_temp', '_quarter_temp'], 
-        how='left'
-    )
+    dates = ts_engine.parse_dates(df[date_col])
+    series = ts_engine.to_series(pd.DataFrame({"d": dates, "v": df[value_col]}), "d", "v")
+    
+    # Dönem bazında toplam → önceki yıl / önceki dönem ile % değişim
+    totals = ts_engine.resample(series, freq, "sum", fill_missing=False)
+    change = ts_engine.period_change(totals, freq, lag=lag).round(2)
+    change.index = change.index.to_period(freq)
     
-    df = df.drop(['_date_temp', '_year_temp', '_quarter_temp'], axis=1)
+    df[name] = ts_engine.period_key(dates, freq).map(change).astype(float).values
     
     return df
 
@@ -737,7 +706,7 @@ def _compute_date_hierarchy(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFra
         raise ValueError(f"Tarih sütunu bulunamadı: {cc.get('date_column')}")
     
     df = df.copy()
-    dt = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
+    dt = ts_engine.parse_dates(df[date_col])
     
     # Hiyerarşi sütunları oluştur
     df[f"{name}_Yıl"] = dt.dt.year
@@ -773,15 +742,35 @@ def _compute_running_total(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFram
 
 
 def _compute_moving_avg(df: pd.DataFrame, cc: Dict, name: str) -> pd.DataFrame:
-    """Hareketli Ortalama / Moving Average"""
+    """Hareketli Ortalama / Moving Average (date_column verilirse tarih sırasında, '30D' gibi pencere ile)"""
     value_col = resolve_column(df, cc.get("value_column") or cc.get("columns", [None])[0])
-    window_size = int(cc.get("window_size", 3))
+    date_col = resolve_column(df, cc.get("date_column")) if cc.get("date_column") else None
+    window_size = cc.get("window_size", 3)
+    window_size = int(window_size) if str(window_size).strip().isdigit() else str(window_size).strip()
     
     if not value_col or value_col not in df.columns:
         raise ValueError(f"Değer sütunu bulunamadı: {cc.get('value_column')}")
+    if isinstance(window_size, str) and not (date_col and date_col in df.columns):
+        raise ValueError(f"Zaman tabanlı pencere ('{window_size}') için date_column gerekli")
     
     df = df.copy()
-    df[name] = df[value_col].rolling(window=window_size, min_periods=1).mean().round(2)
+    if date_col and date_col in df.columns:
+        dates = ts_engine.parse_dates(df[date_col])
+        order = ts_engine.date_order(dates)
+        values = pd.to_numeric(df[value_col], errors='coerce').to_numpy()[order]
+        ordered = pd.Series(values, index=pd.DatetimeIndex(dates.to_numpy()[order]))
+        if isinstance(window_size, str):
+            # Zaman tabanlı pencere NaT içeremez
+            valid = ordered.index.notna()
+            result = np.full(len(ordered), np.nan)
+            result[valid] = ts_engine.rolling(ordered[valid], window_size, "mean").to_numpy()
+        else:
+            result = ts_engine.rolling(ordered, window_size, "mean").to_numpy()
+        out = np.empty(len(df))
+        out[order] = result
+        df[name] = np.round(out, 2)
+    else:
+        df[name] = ts_engine.rolling(df[value_col], window_size, "mean").round(2)
     
     return df
 
@@ -2587,11 +2576,17 @@ def run(df: pd.DataFrame, params: dict) -> dict:
             var_value = action.get("value", 0)
             what_if_variables[var_name] = var_value
     
-        print(f"DEBUG: What-If Değişkenleri: {what_if_variables}")
+    # Adım bazlı süre / satır / bellek ölçümü (technical_details.profile)
+    profiler = StepProfiler()
     
-    for action in actions:
+    for step_no, action in enumerate(actions):
         atype = action.get("type")
         
+        # Kuyruk işinde ilerleme + iptal/süre aşımı kontrolü (adımlar arası); normal istekte etkisiz
+        checkpoint(step_no / max(len(actions), 1), f"Adım {step_no + 1}/{len(actions)}: {atype}")
+        step = profiler.start(step_no + 1, atype, df)
+        step_error = None
+        
         try:
             if atype == "filter":
                 # Tek bir filtre objesi veya filtre grubu
@@ -2681,16 +2676,21 @@ def run(df: pd.DataFrame, params: dict) -> dict:
                 var_name = action.get("name", "var")
                 var_value = action.get("value", 0)
                 output_config["variables"][var_name] = var_value
+            
+            applied_steps += 1
                     
         except Exception as e:
             # FAZ 1.3: Hata warnings listesine ekleniyor (sessiz hata yok)
             skipped_steps += 1
+            step_error = e
             warnings.append({
-                "step": actions.index(action) + 1,
+                "step": step_no + 1,
                 "type": atype,
                 "message": str(e)
             })
             print(f"Hata ({atype}): {e}")
+        
+        profiler.end(step, df, error=step_error)
 
     # 3. Kod Özeti Oluştur
     generated_code = generate_python_script(actions)
@@ -2714,13 +2714,19 @@ def run(df: pd.DataFrame, params: dict) -> dict:
             },
             "warnings": warnings,
             "applied_steps": applied_steps,
-            "skipped_steps": skipped_steps
+            "skipped_steps": skipped_steps,
+            "technical_details": {
+                "profile": profiler.to_dict()
+            }
         }
     
-    # 4. Normal Mod: Çıktı Oluştur
+    # 4. Normal Mod: Çıktı Oluştur (Excel yazımı da ayrı bir adım olarak ölçülür)
+    checkpoint(1.0, "Excel çıktısı oluşturuluyor")
     cf_configs = output_config.pop("cf_configs", None)
     chart_configs = output_config.pop("chart_configs", None)
+    step = profiler.start(len(actions) + 1, "excel_output", df)
     excel_buffer = generate_output(df, output_config, original_df, cf_configs, chart_configs)
+    profiler.end(step, df)
     
     return {
         "summary": {
@@ -2738,7 +2744,8 @@ def run(df: pd.DataFrame, params: dict) -> dict:
         "skipped_steps": skipped_steps,
         "technical_details": {
             "actions": actions,
-            "generated_python_code": f"```python\n{generated_code}\n```"
+            "generated_python_code": f"```python\n{generated_code}\n```",
+            "profile": profiler.to_dict()
         }
     }
 
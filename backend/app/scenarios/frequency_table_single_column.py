@@ -1,10 +1,12 @@
-
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 import pandas as pd
 from fastapi import HTTPException
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+from app.chunked_exec import PartialAggregator
+
+
+def _resolve_column(params: Dict[str, Any], df: pd.DataFrame) -> str:
     column = params.get("column")
 
     # column boşsa ilk kategorik/object sütunu auto-seç
@@ -20,10 +22,12 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
 
     if column not in df.columns:
         raise HTTPException(status_code=400, detail=f"'{column}' sütunu bulunamadı. Mevcut sütunlar: {list(df.columns)[:10]}")
+    return column
+
 
+def _build_result(column: str, counts: pd.Series, unique_count: int, total_rows: int) -> Dict[str, Any]:
     # Frekans tablosu oluştur
-    # value_counts() her değerden kaç tane olduğunu sayar
-    freq = df[column].value_counts().reset_index()
+    freq = counts.reset_index()
     freq.columns = [column, 'Count'] # Kolon isimlerini düzenle
     
     # Yüzdelik ekleyelim (Opsiyonel ama şık olur)
@@ -31,14 +35,13 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     freq['Percentage'] = freq['Percentage'].round(2).astype(str) + '%'
 
     # İstatistikler
-    unique_count = df[column].nunique()
     most_frequent = freq.iloc[0][column] if not freq.empty else None
     
     summary = {
         "analyzed_column": column,
         "unique_values": unique_count,
         "most_frequent_value": str(most_frequent),
-        "total_rows": len(df)
+        "total_rows": total_rows
     }
     
     # Python kod özeti
@@ -76,3 +79,50 @@ freq_df.to_excel('frekans.xlsx', index=False)
         "excel_bytes": output,
         "excel_filename": f"frequency_table_{column}.xlsx"
     }
+
+
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    column = _resolve_column(params, df)
+
+    # value_counts() her değerden kaç tane olduğunu sayar
+    counts = df[column].value_counts()
+    return _build_result(column, counts, df[column].nunique(), len(df))
+
+
+class FrequencyPartial(PartialAggregator):
+    """Parça parça frekans tablosu: parça value_counts sonuçları toplanır."""
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        # column boşsa ilk parçanın tiplerine göre seçilir
+        self.column = _resolve_column(params, sample)
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = pd.Series(dtype="int64")
+        self.total_rows = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.counts = self.counts.add(chunk[self.column].value_counts(), fill_value=0)
+        self.total_rows += len(chunk)
+
+    def merge(self, other: "FrequencyPartial") -> "FrequencyPartial":
+        self.counts = self.counts.add(other.counts, fill_value=0)
+        self.total_rows += other.total_rows
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        counts = self.counts.astype("int64").sort_values(ascending=False, kind="stable")
+        counts.name = "count"
+        counts.index.name = self.column
+        return _build_result(self.column, counts, len(counts), self.total_rows)
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> FrequencyPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return FrequencyPartial(params, sample)
+
+
+def input_columns(params: Dict[str, Any]) -> Optional[List[str]]:
+    """Senaryonun okuduğu sütunlar (sütunlu dosyalarda projeksiyon); otomatik seçimde None."""
+    column = params.get("column")
+    return [column] if column else None
@@ -3,6 +3,11 @@ from typing import Any, Dict
 import pandas as pd
 from fastapi import HTTPException
 
+from app.time_series import detect_date_column, parse_dates
+
+# Tarih sütunu okuma sırasında datetime64 olarak gelsin (bkz. dtype_optimizer.py)
+PARSE_DATES = True
+
 def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     # Gerekli parametreler
     date_col = params.get("date_column")
@@ -15,18 +20,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
 
     # date_column auto-detect
     if not date_col:
-        datetime_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
-        if datetime_cols:
-            date_col = datetime_cols[0]
-        else:
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    try:
-                        pd.to_datetime(df[col].dropna().head(10), dayfirst=True)
-                        date_col = col
-                        break
-                    except:
-                        continue
+        date_col = detect_date_column(df)
         if not date_col:
             raise HTTPException(status_code=400, detail="Tarih sütunu otomatik algılanamadı. Lütfen date_column belirtin.")
     
@@ -49,7 +43,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail=f"Sütunlar eksik: {missing_cols}. Mevcut sütunlar: {list(df.columns)[:10]}")
 
     # Tarih sütununu datetime yap
-    df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, errors="coerce")
+    df[date_col] = parse_dates(df[date_col])
     if df[date_col].isna().all():
         raise HTTPException(status_code=400, detail=f"{date_col} sütunundaki tüm değerler geçersiz tarih")
 
@@ -1,9 +1,12 @@
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 import pandas as pd
 from fastapi import HTTPException
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+from app.chunked_exec import PartialAggregator, RowSample
+
+
+def _resolve_params(params: Dict[str, Any], columns) -> Dict[str, Any]:
     # Gerekli parametreler
     condition_column = params.get("condition_column")
     condition_value = params.get("condition_value")
@@ -22,52 +25,71 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail="aggfunc parametresi 'max' veya 'min' olmalı")
 
     # Sütun kontrolü
-    missing_cols = [col for col in [condition_column, value_column] if col not in df.columns]
+    missing_cols = [col for col in [condition_column, value_column] if col not in columns]
     if date_column:
-        missing_cols += [date_column] if date_column not in df.columns else []
+        missing_cols += [date_column] if date_column not in columns else []
     if missing_cols:
-        raise HTTPException(status_code=400, detail=f"Sütunlar eksik: {missing_cols}. Mevcut: {list(df.columns)[:10]}")
+        raise HTTPException(status_code=400, detail=f"Sütunlar eksik: {missing_cols}. Mevcut: {list(columns)[:10]}")
 
-    # Tarih filtresi
+    # Tarih filtresi sınırları
+    start_dt = end_dt = None
     if date_column:
-        df[date_column] = pd.to_datetime(df[date_column], dayfirst=True, errors="coerce")
         if start_date:
             try:
                 start_dt = pd.to_datetime(start_date, dayfirst=True, errors="raise")
-                df = df[df[date_column] >= start_dt]
             except Exception:
                 raise HTTPException(status_code=400, detail="start_date geçerli tarih değil")
         if end_date:
             try:
                 end_dt = pd.to_datetime(end_date, dayfirst=True, errors="raise")
-                df = df[df[date_column] <= end_dt]
             except Exception:
                 raise HTTPException(status_code=400, detail="end_date geçerli tarih değil")
 
+    return {
+        "condition_column": condition_column,
+        "condition_value": condition_value,
+        "value_column": value_column,
+        "aggfunc": aggfunc,
+        "date_column": date_column,
+        "start_dt": start_dt,
+        "end_dt": end_dt,
+    }
+
+
+def _filtered_values(df: pd.DataFrame, p: Dict[str, Any]) -> pd.Series:
+    """Tarih ve koşul filtresinden geçen geçerli sayısal değerler."""
+    # Tarih filtresi
+    if p["date_column"]:
+        dates = pd.to_datetime(df[p["date_column"]], dayfirst=True, errors="coerce")
+        in_range = pd.Series(True, index=df.index)
+        if p["start_dt"] is not None:
+            in_range &= dates >= p["start_dt"]
+        if p["end_dt"] is not None:
+            in_range &= dates <= p["end_dt"]
+        df = df[in_range]
+
     # Koşula göre filtreleme
-    cond_mask = df[condition_column] == condition_value
-    filtered = df.loc[cond_mask, value_column]
+    cond_mask = df[p["condition_column"]] == p["condition_value"]
+    filtered = df.loc[cond_mask, p["value_column"]]
 
     # Sayısal dönüşüm
-    filtered_numeric = pd.to_numeric(filtered, errors="coerce").dropna()
-    if filtered_numeric.empty:
-        raise HTTPException(status_code=400, detail="Koşulu sağlayan satırda geçerli sayısal değer yok")
+    return pd.to_numeric(filtered, errors="coerce").dropna()
 
-    # Hesaplama
-    if aggfunc == "max":
-        result_value = filtered_numeric.max()
-    else:
-        result_value = filtered_numeric.min()
+
+def _build_result(p: Dict[str, Any], filtered_numeric: pd.Series, filtered_count: int, result_val) -> Dict[str, Any]:
+    condition_column = p["condition_column"]
+    condition_value = p["condition_value"]
+    value_column = p["value_column"]
+    aggfunc = p["aggfunc"]
 
     # Özet
-    result_val = result_value.item() if hasattr(result_value, "item") else result_value
     summary = {
         "condition_column": condition_column,
         "condition_value": condition_value,
         "value_column": value_column,
         "aggfunc": aggfunc,
         "result": result_val,
-        "filtered_rows_count": filtered_numeric.shape[0],
+        "filtered_rows_count": filtered_count,
     }
     
     # Python kod özeti
@@ -79,7 +101,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
             "value_column": value_column,
             "aggfunc": aggfunc
         },
-        "stats": {"result": result_val, "filtered_rows_count": filtered_numeric.shape[0]},
+        "stats": {"result": result_val, "filtered_rows_count": filtered_count},
         "python_code": f"""```python
 import pandas as pd
 
@@ -107,4 +129,81 @@ print(f"{{'{aggfunc.upper()}'}} değeri: {{result}}")
         "df_out": filtered_numeric.to_frame(name=value_column),
         "excel_bytes": output,
         "excel_filename": f"{aggfunc}_{value_column}_by_{condition_column}.xlsx"
-    }
\ No newline at end of file
+    }
+
+
+def _no_values_error() -> HTTPException:
+    return HTTPException(status_code=400, detail="Koşulu sağlayan satırda geçerli sayısal değer yok")
+
+
+def _scalar(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    p = _resolve_params(params, df.columns)
+    filtered_numeric = _filtered_values(df, p)
+    if filtered_numeric.empty:
+        raise _no_values_error()
+
+    # Hesaplama
+    if p["aggfunc"] == "max":
+        result_value = filtered_numeric.max()
+    else:
+        result_value = filtered_numeric.min()
+
+    return _build_result(p, filtered_numeric, filtered_numeric.shape[0], _scalar(result_value))
+
+
+class MaxMinIfPartial(PartialAggregator):
+    """Parça parça MAXIF/MINIF: parça sonuçlarının en büyüğü/en küçüğü alınır."""
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        self.p = _resolve_params(params, sample.columns)
+        self.reset()
+
+    def reset(self) -> None:
+        self.result = None
+        self.count = 0
+        self.sample = RowSample()
+
+    def _combine(self, value) -> None:
+        if value is None:
+            return
+        if self.result is None:
+            self.result = value
+        elif self.p["aggfunc"] == "max":
+            self.result = max(self.result, value)
+        else:
+            self.result = min(self.result, value)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        values = _filtered_values(chunk, self.p)
+        if values.empty:
+            return
+        self._combine(_scalar(values.max() if self.p["aggfunc"] == "max" else values.min()))
+        self.count += values.shape[0]
+        self.sample.add(values.to_frame())
+
+    def merge(self, other: "MaxMinIfPartial") -> "MaxMinIfPartial":
+        self._combine(other.result)
+        self.count += other.count
+        self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        if self.count == 0:
+            raise _no_values_error()
+        values = self.sample.frame([self.p["value_column"]]).iloc[:, 0]
+        return _build_result(self.p, values, self.count, self.result)
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> MaxMinIfPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return MaxMinIfPartial(params, sample)
+
+
+def input_columns(params: Dict[str, Any]) -> Optional[List[str]]:
+    """Senaryonun okuduğu sütunlar (sütunlu dosyalarda projeksiyon)."""
+    names = [params.get(key) for key in ("condition_column", "value_column", "date_column")]
+    return [name for name in names if name] or None
@@ -1,9 +1,15 @@
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 import pandas as pd
 from fastapi import HTTPException
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+from app.chunked_exec import PartialAggregator, NotChunkable
+
+# Parça sonuçlarından birleştirilebilen toplama fonksiyonları (median birleştirilemez)
+MERGEABLE_AGGFUNCS = ("sum", "mean", "count", "min", "max")
+
+
+def _resolve_params(params: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any]:
     # Gerekli parametreler
     row_field = params.get("row_field")
     column_field = params.get("column_field")
@@ -42,33 +48,57 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     if missing_cols:
         raise HTTPException(status_code=400, detail=f"Veride eksik sütunlar: {missing_cols}. Mevcut: {list(df.columns)[:10]}")
 
-    # Tarih filtresi varsa uygula
+    # Tarih filtresi sınırları
+    start_dt = end_dt = None
     if date_column:
-        df[date_column] = pd.to_datetime(df[date_column], dayfirst=True, errors="coerce")
         if start_date:
             try:
                 start_dt = pd.to_datetime(start_date, dayfirst=True)
-                df = df[df[date_column] >= start_dt]
             except Exception:
                 raise HTTPException(status_code=400, detail="start_date parametresi geçersiz tarih formatında")
         if end_date:
             try:
                 end_dt = pd.to_datetime(end_date, dayfirst=True)
-                df = df[df[date_column] <= end_dt]
             except Exception:
                 raise HTTPException(status_code=400, detail="end_date parametresi geçersiz tarih formatında")
 
+    return {
+        "row_field": row_field,
+        "column_field": column_field,
+        "value_column": value_column,
+        "aggfunc": aggfunc,
+        "date_column": date_column,
+        "start_dt": start_dt,
+        "end_dt": end_dt,
+        "date_filter_applied": bool(date_column and (start_date or end_date)),
+    }
+
+
+def _prepare(df: pd.DataFrame, p: Dict[str, Any]) -> pd.DataFrame:
+    """Tarih filtresi ve sayısal değer temizliği uygulanmış satırlar."""
+    df = df.copy()
+
+    # Tarih filtresi varsa uygula
+    if p["date_column"]:
+        df[p["date_column"]] = pd.to_datetime(df[p["date_column"]], dayfirst=True, errors="coerce")
+        if p["start_dt"] is not None:
+            df = df[df[p["date_column"]] >= p["start_dt"]]
+        if p["end_dt"] is not None:
+            df = df[df[p["date_column"]] <= p["end_dt"]]
+
     # value_column sayısal olmalı
-    df[value_column] = pd.to_numeric(df[value_column], errors="coerce")
-    df = df.dropna(subset=[value_column])
+    df[p["value_column"]] = pd.to_numeric(df[p["value_column"]], errors="coerce")
+    return df.dropna(subset=[p["value_column"]])
+
 
+def _pivot(df: pd.DataFrame, p: Dict[str, Any], values: str, aggfunc: str) -> pd.DataFrame:
     # Pivot tablosu oluştur
     try:
-        pivot = pd.pivot_table(
+        return pd.pivot_table(
             df,
-            index=row_field,
-            columns=column_field if column_field else None,
-            values=value_column,
+            index=p["row_field"],
+            columns=p["column_field"] if p["column_field"] else None,
+            values=values,
             aggfunc=aggfunc,
             fill_value=0,
             dropna=False,
@@ -78,6 +108,13 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Pivot tablo oluşturulamadı: {str(e)}")
 
+
+def _build_result(pivot: pd.DataFrame, p: Dict[str, Any]) -> Dict[str, Any]:
+    row_field = p["row_field"]
+    column_field = p["column_field"]
+    value_column = p["value_column"]
+    aggfunc = p["aggfunc"]
+
     # Özet bilgi
     summary = {
         "rows": pivot.shape[0],
@@ -86,7 +123,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         "row_field": row_field,
         "column_field": column_field if column_field else None,
         "value_column": value_column,
-        "date_filter_applied": bool(date_column and (start_date or end_date)),
+        "date_filter_applied": p["date_filter_applied"],
     }
     
     # Python kod özeti
@@ -124,4 +161,76 @@ pivot.to_excel('pivot_ozet.xlsx')
         "df_out": pivot.reset_index(),
         "excel_bytes": output,
         "excel_filename": "pivot_summary.xlsx"
-    }
\ No newline at end of file
+    }
+
+
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    p = _resolve_params(params, df)
+    df = _prepare(df, p)
+    pivot = _pivot(df, p, p["value_column"], p["aggfunc"])
+    return _build_result(pivot, p)
+
+
+class PivotPartial(PartialAggregator):
+    """
+    Parça parça pivot: her (satır, sütun) grubu için toplam/sayı/min/max tutulur.
+    Sonuç pivotu bu küçük grup tablosundan kurulur; ortalama = toplam / sayı.
+    """
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        # row_field / value_column boşsa ilk parçanın tiplerine göre seçilir
+        self.p = _resolve_params(params, sample)
+        if self.p["aggfunc"] not in MERGEABLE_AGGFUNCS:
+            raise NotChunkable(f"aggfunc '{self.p['aggfunc']}' parça sonuçlarından birleştirilemez")
+        self.keys = [self.p["row_field"]] + ([self.p["column_field"]] if self.p["column_field"] else [])
+        self.reset()
+
+    def reset(self) -> None:
+        self.groups = None
+
+    def _regroup(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return frame.groupby(self.keys, dropna=False, sort=False).agg(
+            sum=("sum", "sum"), count=("count", "sum"), min=("min", "min"), max=("max", "max"),
+        ).reset_index()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        df = _prepare(chunk, self.p)
+        groups = df.groupby(self.keys, dropna=False, sort=False)[self.p["value_column"]].agg(
+            ["sum", "count", "min", "max"]
+        ).reset_index()
+        self.groups = groups if self.groups is None else self._regroup(pd.concat([self.groups, groups]))
+
+    def merge(self, other: "PivotPartial") -> "PivotPartial":
+        if other.groups is not None:
+            frames = [g for g in (self.groups, other.groups) if g is not None]
+            self.groups = self._regroup(pd.concat(frames, ignore_index=True))
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        value_column = self.p["value_column"]
+        groups = self.groups if self.groups is not None else pd.DataFrame(
+            columns=self.keys + ["sum", "count", "min", "max"]
+        )
+        aggfunc = self.p["aggfunc"]
+        if aggfunc == "mean":
+            sums = _pivot(groups.rename(columns={"sum": value_column}), self.p, value_column, "sum")
+            counts = _pivot(groups.rename(columns={"count": value_column}), self.p, value_column, "sum")
+            pivot = (sums / counts.where(counts != 0)).fillna(0)
+        else:
+            # count → sayıların toplamı, sum → toplamların toplamı, min/max → kendileri
+            combine = "sum" if aggfunc == "count" else aggfunc
+            pivot = _pivot(groups.rename(columns={aggfunc: value_column}), self.p, value_column, combine)
+        return _build_result(pivot, self.p)
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> PivotPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return PivotPartial(params, sample)
+
+
+def input_columns(params: Dict[str, Any]) -> Optional[List[str]]:
+    """Senaryonun okuduğu sütunlar (sütunlu dosyalarda projeksiyon); otomatik seçimde None."""
+    if not params.get("row_field") or not params.get("value_column"):
+        return None
+    names = [params.get(key) for key in ("row_field", "column_field", "value_column", "date_column")]
+    return [name for name in names if name]
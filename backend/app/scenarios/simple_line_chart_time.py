@@ -3,6 +3,11 @@ from typing import Any, Dict
 import pandas as pd
 from fastapi import HTTPException
 
+from app.time_series import detect_date_column, parse_dates, period_key, normalize_freq
+
+# Tarih sütunu okuma sırasında datetime64 olarak gelsin (bkz. dtype_optimizer.py)
+PARSE_DATES = True
+
 def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     date_col = params.get("date_column")
     value_col = params.get("value_column")
@@ -10,22 +15,11 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     start_date = params.get("start_date", None)
     end_date = params.get("end_date", None)
     aggfunc = params.get("aggfunc", "sum")
+    freq = params.get("freq", None)  # D/W/M/Q/Y: tarihleri döneme topla
 
     # date_col boşsa auto-detect
     if not date_col:
-        datetime_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
-        if datetime_cols:
-            date_col = datetime_cols[0]
-        else:
-             # object columnlardan parse dene
-             for col in df.columns:
-                 if df[col].dtype == 'object':
-                     try:
-                         pd.to_datetime(df[col].dropna().head(10), dayfirst=True)
-                         date_col = col
-                         break
-                     except:
-                         continue
+        date_col = detect_date_column(df)
         if not date_col:
              raise HTTPException(status_code=400, detail="Tarih sütunu bulunamadı. Lütfen date_column belirtin.")
 
@@ -45,7 +39,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail=f"'{group_col}' sütunu bulunamadı, mevcut sütunlar: {list(df.columns)}")
 
     df = df.copy()
-    df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, errors="coerce")
+    df[date_col] = parse_dates(df[date_col])
     if df[date_col].isna().all():
         raise HTTPException(status_code=400, detail=f"'{date_col}' sütunundaki tüm değerler geçerli tarih değil")
 
@@ -78,6 +72,14 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     if aggfunc not in aggfuncs:
         raise HTTPException(status_code=400, detail=f"aggfunc parametresi geçersiz, desteklenenler: {list(aggfuncs.keys())}")
 
+    # İstenirse tarihleri dönem başına indir (gün/hafta/ay/çeyrek/yıl)
+    if freq:
+        try:
+            df[date_col] = period_key(df[date_col], freq).dt.to_timestamp()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        freq = normalize_freq(freq)
+
     if group_col:
         grouped = df.groupby([date_col, group_col])[value_col].agg(aggfuncs[aggfunc]).reset_index()
         pivot = grouped.pivot(index=date_col, columns=group_col, values=value_col).fillna(0)
@@ -92,6 +94,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         },
         "total_records": len(df),
         "aggregation": aggfunc,
+        "freq": freq,
         "groups": list(pivot.columns) if group_col else None,
         "data_points": len(pivot)
     }
@@ -1,25 +1,18 @@
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import pandas as pd
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from app.excel_utils import read_table_from_upload
+from app.chunked_exec import PartialAggregator, RowSample
 
 router = APIRouter(tags=["scenario - sum if"])
 
 
-def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Senaryo motoru için core fonksiyon.
-
-    Beklenen params:
-    - condition_column
-    - condition_value
-    - target_column
-    - return_mode
-    """
+def _resolve_params(params: Dict[str, Any], columns) -> Tuple[str, Any, str, str]:
+    """Parametreleri okur ve sütunlara göre doğrular."""
     condition_column = params.get("condition_column")
     condition_value = params.get("condition_value")
     target_column = params.get("target_column")
@@ -38,32 +31,36 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         )
 
     missing_cols = [
-        col for col in [condition_column, target_column] if col not in df.columns
+        col for col in [condition_column, target_column] if col not in columns
     ]
     if missing_cols:
         raise HTTPException(
             status_code=400,
             detail=(
                 f"Aşağıdaki sütun(lar) bulunamadı: {missing_cols}. "
-                f"Mevcut sütunlar: {list(df.columns)[:10]}"
+                f"Mevcut sütunlar: {list(columns)[:10]}"
             ),
         )
+    return condition_column, condition_value, target_column, return_mode
+
 
+def _condition_mask(df: pd.DataFrame, condition_column: str, condition_value: Any) -> pd.Series:
     # condition_value boşsa boş/NaN değerleri filtrele
     if condition_value is None or condition_value == "":
-        mask = df[condition_column].isna() | (df[condition_column].astype(str).str.strip() == "")
-        filter_desc = "boş/NaN değerler"
-    else:
-        mask = df[condition_column].astype(str) == str(condition_value)
-        filter_desc = str(condition_value)
-    
-    filtered_df = df[mask].copy()
-    match_count = int(mask.sum())
-    total_rows = int(len(df))
-
-    numeric_series = pd.to_numeric(filtered_df[target_column], errors="coerce")
-    sum_value = float(numeric_series.sum()) if match_count > 0 else 0.0
-
+        return df[condition_column].isna() | (df[condition_column].astype(str).str.strip() == "")
+    return df[condition_column].astype(str) == str(condition_value)
+
+
+def _build_result(
+    condition_column: str,
+    condition_value: Any,
+    target_column: str,
+    return_mode: str,
+    filtered_df: pd.DataFrame,
+    match_count: int,
+    total_rows: int,
+    sum_value: float,
+) -> Dict[str, Any]:
     summary = {
         "scenario": "sum_by_condition",
         "condition_column": condition_column,
@@ -122,6 +119,76 @@ print(f"Toplam: {{total}}")
     }
 
 
+def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Senaryo motoru için core fonksiyon.
+
+    Beklenen params:
+    - condition_column
+    - condition_value
+    - target_column
+    - return_mode
+    """
+    condition_column, condition_value, target_column, return_mode = _resolve_params(params, df.columns)
+
+    mask = _condition_mask(df, condition_column, condition_value)
+    filtered_df = df[mask].copy()
+    match_count = int(mask.sum())
+    total_rows = int(len(df))
+
+    numeric_series = pd.to_numeric(filtered_df[target_column], errors="coerce")
+    sum_value = float(numeric_series.sum()) if match_count > 0 else 0.0
+
+    return _build_result(
+        condition_column, condition_value, target_column, return_mode,
+        filtered_df, match_count, total_rows, sum_value,
+    )
+
+
+class SumIfPartial(PartialAggregator):
+    """Parça parça SUMIF: eşleşen satır sayısı ve toplam birleştirilebilir."""
+
+    def __init__(self, params: Dict[str, Any], sample: pd.DataFrame):
+        self.columns = list(sample.columns)
+        (self.condition_column, self.condition_value,
+         self.target_column, self.return_mode) = _resolve_params(params, sample.columns)
+        self.text_columns = [self.condition_column]
+        self.reset()
+
+    def reset(self) -> None:
+        self.match_count = 0
+        self.total_rows = 0
+        self.sum_value = 0.0
+        self.sample = RowSample()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        mask = _condition_mask(chunk, self.condition_column, self.condition_value)
+        matched = chunk[mask]
+        self.match_count += int(mask.sum())
+        self.total_rows += len(chunk)
+        self.sum_value += float(pd.to_numeric(matched[self.target_column], errors="coerce").sum())
+        self.sample.add(matched)
+
+    def merge(self, other: "SumIfPartial") -> "SumIfPartial":
+        self.match_count += other.match_count
+        self.total_rows += other.total_rows
+        self.sum_value += other.sum_value
+        self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> Dict[str, Any]:
+        return _build_result(
+            self.condition_column, self.condition_value, self.target_column, self.return_mode,
+            self.sample.frame(self.columns), self.match_count, self.total_rows,
+            self.sum_value if self.match_count > 0 else 0.0,
+        )
+
+
+def partial_aggregator(params: Dict[str, Any], sample: pd.DataFrame) -> SumIfPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return SumIfPartial(params, sample)
+
+
 @router.post("/sum-by-condition")
 async def sum_by_condition(
     file: UploadFile = File(
@@ -2,8 +2,10 @@
 import pandas as pd
 from fastapi import HTTPException
 
-def run(df: pd.DataFrame, params: dict) -> dict:
+from app.chunked_exec import PartialAggregator, RowSample
+
 
+def _resolve_params(params: dict, df: pd.DataFrame) -> tuple:
     sum_col = params.get("sum_column")
     crit_cols = params.get("criteria_columns", [])
     crit_vals = params.get("criteria_values", [])
@@ -26,11 +28,15 @@ def run(df: pd.DataFrame, params: dict) -> dict:
     if len(crit_cols) != len(crit_vals):
          raise HTTPException(status_code=400, detail="Koşul sütun sayısı ile değer sayısı eşit olmalı.")
 
-    filtered_df = df.copy()
-    for col, val in zip(crit_cols, crit_vals):
+    for col in crit_cols:
         if col not in df.columns:
             raise HTTPException(status_code=400, detail=f"Koşul sütunu '{col}' bulunamadı.")
-        
+    return sum_col, crit_cols, crit_vals
+
+
+def _apply_criteria(df: pd.DataFrame, crit_cols: list, crit_vals: list) -> pd.DataFrame:
+    filtered_df = df.copy()
+    for col, val in zip(crit_cols, crit_vals):
         # Simple equality check with type awareness try
         if pd.api.types.is_numeric_dtype(df[col]):
             try:
@@ -39,21 +45,23 @@ def run(df: pd.DataFrame, params: dict) -> dict:
                 pass
         
         filtered_df = filtered_df[filtered_df[col] == val]
+    return filtered_df
 
-    if filtered_df.empty:
-         raise HTTPException(status_code=400, detail="Kriterlere uygun veri yok.")
 
+def _column_sum(filtered_df: pd.DataFrame, sum_col: str):
     try:
-        result = filtered_df[sum_col].sum()
+        return filtered_df[sum_col].sum()
     except:
-        result = 0
-    
+        return 0
+
+
+def _build_result(sum_col: str, crit_cols: list, crit_vals: list, filtered_df: pd.DataFrame, matched_rows: int, result) -> dict:
     # Python kod özeti
     crit_str = ' & '.join([f"(df['{c}'] == '{v}')" for c, v in zip(crit_cols, crit_vals)])
     technical_details = {
         "scenario": "sum_ifs_multi",
         "parameters": {"sum_column": sum_col, "criteria_columns": crit_cols, "criteria_values": crit_vals},
-        "stats": {"result": float(result), "matched_rows": len(filtered_df)},
+        "stats": {"result": float(result), "matched_rows": matched_rows},
         "python_code": f"""```python
 import pandas as pd
 
@@ -74,3 +82,56 @@ print(f"Toplam: {{result}}")
         "technical_details": technical_details,
         "df_out": filtered_df
     }
+
+
+def run(df: pd.DataFrame, params: dict) -> dict:
+    sum_col, crit_cols, crit_vals = _resolve_params(params, df)
+    filtered_df = _apply_criteria(df, crit_cols, crit_vals)
+
+    if filtered_df.empty:
+         raise HTTPException(status_code=400, detail="Kriterlere uygun veri yok.")
+
+    result = _column_sum(filtered_df, sum_col)
+    return _build_result(sum_col, crit_cols, crit_vals, filtered_df, len(filtered_df), result)
+
+
+class SumIfsMultiPartial(PartialAggregator):
+    """Parça parça SUMIFS: parça toplamları ve eşleşen satır sayıları toplanır."""
+
+    def __init__(self, params: dict, sample: pd.DataFrame):
+        self.columns = list(sample.columns)
+        # sum_column boşsa ilk parçanın tiplerine göre seçilir
+        self.sum_col, self.crit_cols, self.crit_vals = _resolve_params(params, sample)
+        self.reset()
+
+    def reset(self) -> None:
+        self.matched_rows = 0
+        self.result = 0
+        self.sample = RowSample()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        filtered_df = _apply_criteria(chunk, self.crit_cols, self.crit_vals)
+        if filtered_df.empty:
+            return
+        self.matched_rows += len(filtered_df)
+        self.result += _column_sum(filtered_df, self.sum_col)
+        self.sample.add(filtered_df)
+
+    def merge(self, other: "SumIfsMultiPartial") -> "SumIfsMultiPartial":
+        self.matched_rows += other.matched_rows
+        self.result += other.result
+        self.sample.merge(other.sample)
+        return self
+
+    def finalize(self) -> dict:
+        if self.matched_rows == 0:
+            raise HTTPException(status_code=400, detail="Kriterlere uygun veri yok.")
+        return _build_result(
+            self.sum_col, self.crit_cols, self.crit_vals,
+            self.sample.frame(self.columns), self.matched_rows, self.result,
+        )
+
+
+def partial_aggregator(params: dict, sample: pd.DataFrame) -> SumIfsMultiPartial:
+    """Parça parça (out-of-core) çalıştırma için birleştirilebilir kısmi toplayıcı."""
+    return SumIfsMultiPartial(params, sample)
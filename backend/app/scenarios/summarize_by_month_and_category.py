@@ -3,6 +3,11 @@ from typing import Any, Dict
 import pandas as pd
 from fastapi import HTTPException
 
+from app.time_series import detect_date_column, parse_dates, period_key
+
+# Tarih sütunu okuma sırasında datetime64 olarak gelsin (bkz. dtype_optimizer.py)
+PARSE_DATES = True
+
 def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     # Parametreleri al (get ile, böylece eksikse None gelir)
     date_col = params.get("date_column")
@@ -14,19 +19,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
 
     # date_col auto-detect
     if not date_col:
-        datetime_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
-        if datetime_cols:
-            date_col = datetime_cols[0]
-        else:
-             # object columnlardan parse dene
-             for col in df.columns:
-                 if df[col].dtype == 'object':
-                     try:
-                         pd.to_datetime(df[col].dropna().head(10), dayfirst=True)
-                         date_col = col
-                         break
-                     except:
-                         continue
+        date_col = detect_date_column(df)
         if not date_col:
              raise HTTPException(status_code=400, detail="Tarih sütunu bulunamadı. Lütfen date_column belirtin.")
 
@@ -55,7 +48,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail=f"Veride eksik sütunlar: {missing_cols}")
 
     # Tarih kolonunu datetime yap
-    df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, errors="coerce")
+    df[date_col] = parse_dates(df[date_col])
     if df[date_col].isna().all():
         raise HTTPException(status_code=400, detail=f"'{date_col}' sütununda geçerli tarih yok")
 
@@ -74,7 +67,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     df[val_col] = pd.to_numeric(df[val_col], errors="coerce")
 
     # Ay bazında grupla (yıl-ay)
-    df["year_month"] = df[date_col].dt.to_period("M").dt.to_timestamp()
+    df["year_month"] = period_key(df[date_col], "M").dt.to_timestamp()
 
     # aggfunc kontrolü
     if aggfunc not in ["sum", "count"]:
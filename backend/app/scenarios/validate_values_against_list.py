@@ -64,7 +64,7 @@ def run(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         df_check = df_values.str.strip().str.lower()
 
     # Normalize for robust comparison
-    if df_check.dtype == 'object':
+    if pd.api.types.is_string_dtype(df_check.dtype):
         df_check = df_check.astype(str).str.strip().str.lower()
         
     ref_set_normalized = set()
@@ -0,0 +1,342 @@
+"""
+SQL Result Cache - Opradox Visual Studio
+Cache of /viz/sql/execute results keyed by (normalized connection string,
+normalized query, row limit).
+
+- Within SQL_CACHE_TTL_SECONDS a repeated query is answered from the cache
+  without touching the database; the registered dataset is reused as well.
+- Results are stored as Arrow tables (compact, columnar text) when pyarrow
+  is installed, otherwise as DataFrames. Least recently used entries are
+  evicted beyond SQL_CACHE_MAX_BYTES / SQL_CACHE_MAX_ENTRIES, and entries
+  unused for SQL_CACHE_IDLE_SECONDS are dropped by the cleanup job.
+- Incremental refresh: with a monotonic column (id, updated_at) the cache
+  keeps its maximum as a watermark; an expired entry then fetches only
+  rows above the watermark and appends them. Rows changed in place below
+  the watermark are not re-read; use refresh without a column for that.
+- Concurrent requests for the same key wait for one database round trip.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from .columnar_io import arrow_to_frame, columnar_available, to_arrow_table
+from .dataset_store import get_dataset, get_dataset_frame, keyed_dataset_id, register_dataset
+from .sql_engine import read_query, redacted_url
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Results younger than this are served without querying the database
+SQL_CACHE_TTL_SECONDS = int(os.getenv("SQL_CACHE_TTL_SECONDS", "300"))
+
+# Entries not requested for this long are dropped (watermarks included)
+SQL_CACHE_IDLE_SECONDS = int(os.getenv("SQL_CACHE_IDLE_SECONDS", "3600"))
+
+SQL_CACHE_MAX_BYTES = int(os.getenv("SQL_CACHE_MAX_MB", "256")) * 1024 * 1024
+SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "64"))
+
+
+# ============================================================
+# DATA MODEL
+# ============================================================
+
+@dataclass
+class CacheEntry:
+    """A cached query result (Arrow table or DataFrame) and its watermark."""
+    key: str
+    connection: str
+    query: str
+    max_rows: int
+    data: Any
+    rows: int
+    nbytes: int
+    truncated: bool
+    watermark_column: Optional[str] = None
+    watermark: Any = None
+    refreshed_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+    hits: int = 0
+    incremental_refreshes: int = 0
+
+    @property
+    def dataset_id(self) -> str:
+        return keyed_dataset_id("sql", self.key)
+
+    def age_seconds(self) -> float:
+        return time.time() - self.refreshed_at
+
+    def is_fresh(self) -> bool:
+        return self.age_seconds() <= SQL_CACHE_TTL_SECONDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "connection": self.connection,
+            "query": self.query,
+            "max_rows": self.max_rows,
+            "rows": self.rows,
+            "nbytes": self.nbytes,
+            "truncated": self.truncated,
+            "watermark_column": self.watermark_column,
+            "watermark": _json_value(self.watermark),
+            "age_seconds": round(self.age_seconds(), 1),
+            "fresh": self.is_fresh(),
+            "hits": self.hits,
+            "incremental_refreshes": self.incremental_refreshes,
+        }
+
+
+_entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+_lock = threading.Lock()
+_key_locks: Dict[str, threading.Lock] = {}
+
+_stats = {"hits": 0, "misses": 0, "incremental": 0, "evictions": 0}
+
+
+# ============================================================
+# KEYS
+# ============================================================
+
+# Single-quoted SQL literals ('' escapes a quote); their whitespace is kept
+_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+def normalize_connection(connection_string: str) -> str:
+    """Connection string with a lower-case driver name and host."""
+    from sqlalchemy.engine import make_url
+
+    try:
+        url = make_url(connection_string)
+    except Exception:
+        return connection_string.strip()
+    url = url.set(drivername=url.drivername.lower(), host=url.host.lower() if url.host else url.host)
+    return url.render_as_string(hide_password=False)
+
+
+def normalize_query(query: str) -> str:
+    """Whitespace collapsed outside string literals, trailing semicolons removed."""
+    parts = _LITERAL.split(query.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else " ".join(part.split()) for i, part in enumerate(parts))
+
+
+def cache_key(connection_string: str, query: str, max_rows: int) -> str:
+    raw = "\x00".join([normalize_connection(connection_string), normalize_query(query), str(int(max_rows))])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# STORAGE
+# ============================================================
+
+def _store(df: pd.DataFrame):
+    """Columnar copy of a result: (data, nbytes)."""
+    if columnar_available():
+        table = to_arrow_table(df)
+        return table, int(table.nbytes)
+    return df, int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _frame(data) -> pd.DataFrame:
+    return data.copy(deep=False) if isinstance(data, pd.DataFrame) else arrow_to_frame(data)
+
+
+def _append(data, df: pd.DataFrame):
+    """Cached result with new rows appended: (data, nbytes)."""
+    if isinstance(data, pd.DataFrame):
+        return _store(pd.concat([data, df], ignore_index=True))
+    import pyarrow as pa
+    try:
+        # Chunks are appended without copying the cached columns
+        table = pa.concat_tables([data, to_arrow_table(df)], promote_options="permissive")
+        return table, int(table.nbytes)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        return _store(pd.concat([arrow_to_frame(data), df], ignore_index=True))
+
+
+def _python_value(value):
+    """Watermark as a plain Python value (bound as a query parameter)."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+
+def _json_value(value):
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _watermark(df: pd.DataFrame, column: str, current=None):
+    if column not in df.columns:
+        raise HTTPException(status_code=400, detail=f"Artımlı yenileme sütunu sonuçta bulunamadı: {column}")
+    values = df[column].dropna()
+    if values.empty:
+        return current
+    latest = _python_value(values.max())
+    return latest if current is None or latest > current else current
+
+
+def _evict(keep: Optional[str] = None) -> None:
+    now = time.time()
+    for key in [k for k, e in _entries.items() if now - e.last_access > SQL_CACHE_IDLE_SECONDS and k != keep]:
+        _entries.pop(key)
+        _stats["evictions"] += 1
+    total = sum(e.nbytes for e in _entries.values())
+    for key in list(_entries):
+        if total <= SQL_CACHE_MAX_BYTES and len(_entries) <= SQL_CACHE_MAX_ENTRIES:
+            break
+        if key == keep:
+            continue
+        total -= _entries.pop(key).nbytes
+        _stats["evictions"] += 1
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def cached_query(
+    connection_string: str,
+    query: str,
+    max_rows: int,
+    refresh: bool = False,
+    incremental_column: Optional[str] = None,
+) -> Tuple[str, pd.DataFrame, bool, Dict[str, Any]]:
+    """
+    Query result through the cache, registered as a dataset.
+
+    Returns (dataset_id, frame, truncated, info); info["status"] is one of
+    hit | miss | refresh | incremental. refresh=True skips the TTL; with
+    incremental_column the refresh appends only rows above the watermark.
+    """
+    key = cache_key(connection_string, query, max_rows)
+    with _key_lock(key):
+        with _lock:
+            entry = _entries.get(key)
+        started = time.perf_counter()
+        appended = 0
+
+        if entry is not None and not refresh and entry.is_fresh():
+            status = "hit"
+        elif (
+            entry is not None and incremental_column
+            and entry.watermark_column == incremental_column
+            and entry.watermark is not None and not entry.truncated
+        ):
+            status = "incremental"
+            remaining = max(1, max_rows - entry.rows)
+            new_rows, more = read_query(connection_string, query, remaining, after=(incremental_column, entry.watermark))
+            appended = len(new_rows)
+            if appended:
+                entry.data, entry.nbytes = _append(entry.data, new_rows)
+                entry.rows += appended
+                entry.watermark = _watermark(new_rows, incremental_column, entry.watermark)
+            entry.truncated = more or entry.rows > max_rows
+            if entry.rows > max_rows:
+                entry.data = entry.data.iloc[:max_rows] if isinstance(entry.data, pd.DataFrame) else entry.data.slice(0, max_rows)
+                entry.rows = max_rows
+            entry.refreshed_at = time.time()
+            entry.incremental_refreshes += 1
+        else:
+            status = "refresh" if entry is not None else "miss"
+            df, truncated = read_query(connection_string, query, max_rows)
+            data, nbytes = _store(df)
+            entry = CacheEntry(
+                key=key,
+                connection=redacted_url(connection_string),
+                query=query,
+                max_rows=max_rows,
+                data=data,
+                rows=len(df),
+                nbytes=nbytes,
+                truncated=truncated,
+                watermark_column=incremental_column,
+                watermark=_watermark(df, incremental_column) if incremental_column else None,
+            )
+
+        entry.last_access = time.time()
+        with _lock:
+            _entries[key] = entry
+            _entries.move_to_end(key)
+            if status == "hit":
+                entry.hits += 1
+                _stats["hits"] += 1
+            else:
+                _stats["incremental" if status == "incremental" else "misses"] += 1
+            _evict(keep=key)
+
+        # The dataset is replaced only when the cached rows changed
+        frame = None
+        dataset = get_dataset(entry.dataset_id)
+        if dataset is not None and dataset.meta.get("refreshed_at") == entry.refreshed_at:
+            frame = get_dataset_frame(entry.dataset_id)
+        if frame is None:
+            frame = _frame(entry.data)
+            register_dataset(frame, source="sql", dataset_id=entry.dataset_id, meta={
+                "connection": entry.connection,
+                "query": query,
+                "truncated": entry.truncated,
+                "refreshed_at": entry.refreshed_at,
+                "cache_key": key,
+            })
+
+    info = {
+        "status": status,
+        "age_seconds": round(entry.age_seconds(), 1),
+        "ttl_seconds": SQL_CACHE_TTL_SECONDS,
+        "watermark_column": entry.watermark_column,
+        "watermark": _json_value(entry.watermark),
+        "appended_rows": appended,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    return entry.dataset_id, frame, entry.truncated, info
+
+
+def invalidate(connection_string: Optional[str] = None) -> int:
+    """Drop cached results (all, or those of one connection)."""
+    with _lock:
+        if connection_string is None:
+            keys = list(_entries)
+        else:
+            connection = redacted_url(connection_string)
+            keys = [k for k, e in _entries.items() if e.connection == connection]
+        for key in keys:
+            _entries.pop(key)
+    return len(keys)
+
+
+def cleanup_sql_cache() -> int:
+    """Drop entries unused for SQL_CACHE_IDLE_SECONDS."""
+    with _lock:
+        before = len(_entries)
+        _evict()
+        for key in [k for k, lock in _key_locks.items() if k not in _entries and not lock.locked()]:
+            del _key_locks[key]
+        return before - len(_entries)
+
+
+def sql_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        entries = [e.to_dict() for e in _entries.values()]
+        return {
+            **_stats,
+            "entries": entries,
+            "total_bytes": sum(e["nbytes"] for e in entries),
+            "max_bytes": SQL_CACHE_MAX_BYTES,
+            "ttl_seconds": SQL_CACHE_TTL_SECONDS,
+        }
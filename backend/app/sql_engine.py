@@ -0,0 +1,308 @@
+"""
+SQL Engine Registry - Opradox Visual Studio
+Pooled SQLAlchemy engines shared across requests, plus streaming query
+execution into registered datasets.
+
+- One engine per connection string: connections are pooled (pool_size +
+  max_overflow, pre-ping) instead of being opened per request; engines
+  idle for SQL_ENGINE_IDLE_SECONDS are disposed, and at most
+  SQL_MAX_ENGINES are kept (least recently used disposed first).
+- Queries run on server-side cursors (stream_results) and are fetched with
+  fetchmany(SQL_FETCH_SIZE); the row limit is pushed into the SQL
+  (SELECT * FROM (<query>) opradox_q LIMIT n+1), so the database never
+  sends rows that would be thrown away. Queries with their own ORDER BY
+  are run as written and limited by fetching, so their order is kept.
+- Each fetched batch becomes a small DataFrame chunk; the chunks are
+  concatenated once and registered in the dataset store.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Connections kept open per engine, and extra ones allowed under load
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", "5"))
+SQL_MAX_OVERFLOW = int(os.getenv("SQL_MAX_OVERFLOW", "5"))
+
+# Seconds to wait for a free pooled connection before giving up
+SQL_POOL_TIMEOUT = float(os.getenv("SQL_POOL_TIMEOUT", "10"))
+
+# Pooled connections older than this are replaced (server-side idle timeouts)
+SQL_POOL_RECYCLE = int(os.getenv("SQL_POOL_RECYCLE", "1800"))
+
+# Engines unused for this long are disposed (their connections closed)
+SQL_ENGINE_IDLE_SECONDS = int(os.getenv("SQL_ENGINE_IDLE_SECONDS", "600"))
+SQL_MAX_ENGINES = int(os.getenv("SQL_MAX_ENGINES", "16"))
+
+# Rows per fetchmany() batch / server-side cursor buffer
+SQL_FETCH_SIZE = int(os.getenv("SQL_FETCH_SIZE", "5000"))
+
+# Upper bound for a single query result
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "1000000"))
+
+
+# ============================================================
+# ENGINE REGISTRY
+# ============================================================
+
+@dataclass
+class EngineEntry:
+    """A pooled engine and its usage counters."""
+    engine: Any
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    queries: int = 0
+
+    def idle_seconds(self) -> float:
+        return time.time() - self.last_used
+
+    def to_dict(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "dialect": self.engine.dialect.name,
+            "pool": pool.status(),
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "queries": self.queries,
+            "idle_seconds": round(self.idle_seconds(), 1),
+            "created_at": self.created_at,
+        }
+
+
+_engines: "OrderedDict[str, EngineEntry]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _create_engine(connection_string: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.pool import QueuePool
+
+    try:
+        url = make_url(connection_string)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Geçersiz bağlantı adresi: {e}")
+
+    options: Dict[str, Any] = {"pool_pre_ping": True}
+    in_memory_sqlite = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+    if not in_memory_sqlite:
+        # In-memory SQLite keeps its single-connection pool (each new connection is an empty database)
+        options.update(
+            poolclass=QueuePool,
+            pool_size=SQL_POOL_SIZE,
+            max_overflow=SQL_MAX_OVERFLOW,
+            pool_timeout=SQL_POOL_TIMEOUT,
+            pool_recycle=SQL_POOL_RECYCLE,
+        )
+    if url.get_backend_name() == "sqlite":
+        # Pooled connections are handed to the request threads in turn
+        options["connect_args"] = {"check_same_thread": False}
+    return create_engine(url, **options)
+
+
+def redacted_url(connection_string: str) -> str:
+    """Connection string without the password (for logs, stats and dataset meta)."""
+    from sqlalchemy.engine import make_url
+    try:
+        return make_url(connection_string).render_as_string(hide_password=True)
+    except Exception:
+        return "<invalid>"
+
+
+def get_engine(connection_string: str):
+    """Pooled engine for a connection string (created on first use)."""
+    with _lock:
+        _evict(time.time())
+        entry = _engines.get(connection_string)
+        if entry is None:
+            entry = EngineEntry(engine=_create_engine(connection_string))
+            _engines[connection_string] = entry
+            print(f"[SQL] Engine created: {entry.engine.url.render_as_string(hide_password=True)}")
+            while len(_engines) > SQL_MAX_ENGINES:
+                _, oldest = _engines.popitem(last=False)
+                oldest.engine.dispose()
+        _engines.move_to_end(connection_string)
+        entry.last_used = time.time()
+        entry.queries += 1
+        return entry.engine
+
+
+def _evict(now: float) -> int:
+    idle = [k for k, e in _engines.items() if now - e.last_used > SQL_ENGINE_IDLE_SECONDS]
+    for key in idle:
+        _engines.pop(key).engine.dispose()
+    return len(idle)
+
+
+def evict_idle_engines() -> int:
+    """Dispose engines that have not been used within SQL_ENGINE_IDLE_SECONDS."""
+    with _lock:
+        return _evict(time.time())
+
+
+def release_engine(connection_string: str) -> bool:
+    """Dispose one engine (e.g. after a failed connection test)."""
+    with _lock:
+        entry = _engines.pop(connection_string, None)
+    if entry is None:
+        return False
+    entry.engine.dispose()
+    return True
+
+
+def dispose_all_engines() -> None:
+    with _lock:
+        entries = list(_engines.values())
+        _engines.clear()
+    for entry in entries:
+        entry.engine.dispose()
+
+
+def engine_stats() -> List[Dict[str, Any]]:
+    with _lock:
+        return [e.to_dict() for e in _engines.values()]
+
+
+# ============================================================
+# STREAMING QUERIES
+# ============================================================
+
+# String literals, quoted identifiers and comments (skipped when looking for ORDER BY)
+_SQL_NOISE = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|\[[^\]]*\]|--[^\n]*|/\*.*?\*/", re.S)
+_PARENS = re.compile(r"\([^()]*\)")
+
+
+def _has_top_level_order_by(query: str) -> bool:
+    """True when ORDER BY applies to the query itself (not a subquery or window)."""
+    stripped = _SQL_NOISE.sub(" ", query)
+    previous = None
+    while previous != stripped:
+        previous, stripped = stripped, _PARENS.sub(" ", stripped)
+    return re.search(r"(?i)\border\s+by\b", stripped) is not None
+
+
+def _statement(query: str, limit: Optional[int], dialect, after: Optional[Tuple[str, Any]] = None):
+    """
+    The query with the row limit pushed down. SQLAlchemy renders the limit
+    for the dialect (LIMIT, TOP, FETCH FIRST). SQL Server does not accept
+    a CTE inside a derived table, and an outer SELECT does not keep the
+    order of a derived table (SQL Server rejects the ORDER BY outright), so
+    CTEs and queries with a top-level ORDER BY are limited by fetching.
+
+    after=(column, value) keeps only rows whose column is greater than
+    value, in column order (incremental refresh, see sql_cache.py).
+
+    The closing parenthesis goes on its own line so a query ending in a
+    -- comment still parses. MySQL rejects derived tables with duplicate
+    column names: joins must alias clashing columns (SELECT a.id AS a_id).
+    """
+    from sqlalchemy import bindparam, literal_column, select, text
+
+    query = query.strip().rstrip(";").strip()
+    ordered = _has_top_level_order_by(query)
+    if after is None and (limit is None or ordered or (dialect.name == "mssql" and re.match(r"(?i)with\b", query))):
+        return text(query)
+    if ordered and dialect.name == "mssql" and not re.search(r"(?i)\b(offset|top)\b", _SQL_NOISE.sub(" ", query)):
+        # The watermark filter needs the derived table; OFFSET makes its ORDER BY legal
+        query = f"{query}\nOFFSET 0 ROWS"
+    statement = select(literal_column("*")).select_from(text(f"({query}\n) opradox_q"))
+    if after is not None:
+        column = literal_column(dialect.identifier_preparer.quote(after[0]))
+        statement = statement.where(column > bindparam("opradox_after", after[1])).order_by(column)
+    return statement.limit(limit) if limit is not None else statement
+
+
+def iter_query_chunks(
+    connection_string: str,
+    query: str,
+    max_rows: Optional[int] = None,
+    fetch_size: Optional[int] = None,
+    after: Optional[Tuple[str, Any]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Run a read-only query on a pooled connection and yield DataFrame chunks
+    of up to fetch_size rows; at most max_rows rows are fetched.
+    """
+    from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+    fetch_size = max(1, int(fetch_size or SQL_FETCH_SIZE))
+    engine = get_engine(connection_string)
+    statement = _statement(query, max_rows, engine.dialect, after)
+    try:
+        connection = engine.connect()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Veritabanı bağlantı havuzu dolu, lütfen tekrar deneyin.")
+
+    with connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=fetch_size).execute(statement)
+        try:
+            columns = list(result.keys())
+            fetched = 0
+            while max_rows is None or fetched < max_rows:
+                size = fetch_size if max_rows is None else min(fetch_size, max_rows - fetched)
+                rows = result.fetchmany(size)
+                if not rows:
+                    break
+                fetched += len(rows)
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            if fetched == 0:
+                yield pd.DataFrame(columns=columns)
+        finally:
+            result.close()
+
+
+def read_query(
+    connection_string: str,
+    query: str,
+    max_rows: int,
+    fetch_size: Optional[int] = None,
+    after: Optional[Tuple[str, Any]] = None,
+) -> Tuple[pd.DataFrame, bool]:
+    """
+    (DataFrame, truncated): up to max_rows rows of the query. One extra row
+    is requested so truncation is detected without counting.
+    """
+    max_rows = max(1, min(int(max_rows), SQL_MAX_ROWS))
+    chunks = list(iter_query_chunks(connection_string, query, max_rows + 1, fetch_size, after))
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    truncated = len(df) > max_rows
+    if truncated:
+        df = df.iloc[:max_rows]
+    return df, truncated
+
+
+def query_to_dataset(
+    connection_string: str,
+    query: str,
+    max_rows: int,
+    fetch_size: Optional[int] = None,
+    dataset_id: Optional[str] = None,
+) -> Tuple[str, pd.DataFrame, bool]:
+    """Stream a query into the dataset store. Returns (dataset_id, frame, truncated)."""
+    from .dataset_store import register_dataset
+
+    started = time.perf_counter()
+    df, truncated = read_query(connection_string, query, max_rows, fetch_size)
+    dataset_id = register_dataset(
+        df,
+        source="sql",
+        dataset_id=dataset_id,
+        meta={
+            "connection": redacted_url(connection_string),
+            "query": query,
+            "truncated": truncated,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        },
+    )
+    return dataset_id, df, truncated
@@ -5,8 +5,8 @@ Hem backend hesaplama hem frontend için JSON response sağlar.
 from __future__ import annotations
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+from fastapi.concurrency import run_in_threadpool
 import pandas as pd
-from io import BytesIO
 import json
 import math
 import logging
@@ -15,6 +15,22 @@ import numpy as np
 
 # Smart type coercion for mixed numeric/text columns
 from app.excel_utils import smart_type_coercion
+from .dataset_store import register_dataset
+from .dtype_optimizer import DTYPE_OPTIMIZE, optimize_dtypes, summarize_report
+from .ingest import ingest_upload
+from .workbook_session import open_workbook_upload, session_for
+from .type_inference import infer_column_types
+from .ml_engine import fit_kmeans, fit_pca
+from . import time_series as ts_engine
+from . import regression as regression_engine
+from .resampling import (
+    DEFAULT_RESAMPLES,
+    bootstrap_ci,
+    bootstrap_ci_two_sample,
+    bootstrap_ci_correlation,
+    bootstrap_ci_eta_squared,
+    permutation_test,
+)
 
 
 # Global imports for ML and Survival Analysis with fallback logging
@@ -37,6 +53,16 @@ except ImportError:
 
 router = APIRouter(prefix="/viz", tags=["visualization"])
 
+
+def _read_frame(content, filename: str, sheet_name: Optional[str], header_row: int) -> pd.DataFrame:
+    """
+    Yüklenen tablonun tamamını okur (tipleri daraltılmış, oturumda önbellekli).
+    Tarih metinleri grafik etiketleri değişmesin diye metin olarak kalır.
+    """
+    session = session_for(content)
+    return session.sheet(session.resolve(sheet_name), header_row, parse_dates=False)
+
+
 # -------------------------------------------------------
 # AGGREGATION FUNCTIONS
 # -------------------------------------------------------
@@ -176,18 +202,20 @@ async def get_sheet_names(file: UploadFile = File(...)):
     Çok sayfalı Excel dosyaları için sayfa seçici dropdown'ı destekler.
     """
     try:
-        content = await file.read()
-        filename = file.filename.lower()
+        # Sayfa adları workbook.xml'den okunur; hücreler ayrıştırılmaz
+        session = await open_workbook_upload(file)
         
-        if filename.endswith(".csv"):
+        if not session.sheet_names:
+            # CSV / Parquet / Feather / Arrow: tek tablo
             return {"sheets": ["Sheet1"], "is_csv": True}
         
-        xls = pd.ExcelFile(BytesIO(content))
         return {
-            "sheets": xls.sheet_names,
+            "sheets": session.sheet_names,
             "is_csv": False,
-            "sheet_count": len(xls.sheet_names)
+            "sheet_count": len(session.sheet_names)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -203,16 +231,10 @@ async def get_preview_rows(
     Frontend'de kullanıcı hangi satırın header olduğunu seçebilir.
     """
     try:
-        content = await file.read()
-        filename = file.filename.lower()
+        session = await open_workbook_upload(file)
         
-        if filename.endswith(".csv"):
-            # CSV için header=None ile oku (tüm satırlar data olarak gelsin)
-            df = pd.read_csv(BytesIO(content), header=None, nrows=max_rows)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name and sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=None, nrows=max_rows)
+        # header=None ile oku (tüm satırlar data olarak gelsin)
+        df = session.head(sheet_name, nrows=max_rows, header=None)
         
         # Her satırı {cells: [...]} formatında döndür
         rows = []
@@ -225,6 +247,8 @@ async def get_preview_rows(
             "total_preview": len(rows),
             "columns_count": len(df.columns) if len(df) > 0 else 0
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -241,18 +265,13 @@ async def get_viz_data(
     Frontend'de aggregation yapılabilmesi için tüm veriyi çeker.
     """
     try:
-        content = await file.read()
-        filename = file.filename.lower()
+        # Aynı dosya için açık oturum varsa sayfalar yeniden ayrıştırılmaz
+        session = await open_workbook_upload(file)
         
         # Ham satırları oku (header row seçici için - header=None ile tüm satırları data olarak al)
         raw_preview_rows = []
         try:
-            if filename.endswith(".csv"):
-                raw_df = pd.read_csv(BytesIO(content), header=None, nrows=15)
-            else:
-                xls = pd.ExcelFile(BytesIO(content))
-                active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-                raw_df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=None, nrows=15)
+            raw_df = session.head(sheet_name, nrows=15, header=None)
             
             # Her satırı liste olarak ekle
             for idx, row in raw_df.iterrows():
@@ -261,69 +280,52 @@ async def get_viz_data(
             logging.warning(f"Raw preview rows okunamadı: {e}")
         
         # Gerçek veriyi oku (seçilen header_row ile)
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row, nrows=limit)
+        active_sheet = session.resolve(sheet_name)
+        if limit is None:
+            df = session.sheet(active_sheet, header_row, parse_dates=False)
         else:
-            xls = pd.ExcelFile(BytesIO(content))
-            # Debug: Log sheet selection
-            print(f"[DEBUG /viz/data] sheet_name param: '{sheet_name}'")
-            print(f"[DEBUG /viz/data] available sheets: {xls.sheet_names}")
-            print(f"[DEBUG /viz/data] sheet_name in sheets: {sheet_name in xls.sheet_names}")
-            
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            print(f"[DEBUG /viz/data] active_sheet selected: '{active_sheet}'")
-            
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row, nrows=limit)
-            print(f"[DEBUG /viz/data] loaded {len(df)} rows, {len(df.columns)} columns from '{active_sheet}'")
+            df = session.head(active_sheet, nrows=limit, header=header_row)
+        print(f"[DEBUG /viz/data] loaded {len(df)} rows, {len(df.columns)} columns from '{active_sheet}'")
         
+        # Sütun tipleri tek seferde çıkarılır (örneklem + benzersiz değerler);
+        # aynı dosya tekrar yüklenirse içerik özetiyle önbellekten gelir
+        column_types = infer_column_types(
+            df, threshold=0.8, cache_key=(session.sha256, active_sheet, header_row, limit)
+        )
+
         # ✅ SMART TYPE COERCION: Convert 80%+ numeric columns, report failed values
         try:
-            df, conversion_report = smart_type_coercion(df, threshold=0.8)
+            df, conversion_report = smart_type_coercion(df, threshold=0.8, column_types=column_types)
             if conversion_report:
                 print(f"[DEBUG /viz/data] Smart type coercion applied: {list(conversion_report.keys())}")
         except Exception as e:
             logging.warning(f"Smart type coercion failed: {e}")
             conversion_report = {}
+
+        # Tip daraltma (kaydedilen dataset ve JSON dönüşümü daha az bellek kullanır)
+        memory_report = None
+        if DTYPE_OPTIMIZE:
+            df, dtype_report = optimize_dtypes(df, parse_dates=False)
+            # Tam okumada daraltma yüklemede yapılmıştır; rapor oradan gelir
+            memory_report = df.attrs.get("dtype_report") or summarize_report(dtype_report)
         
-        # Column info - fillna'dan ÖNCE tip tespiti yap
+        # Column info - fillna'dan ÖNCE (tipler yukarıda belirlendi)
         columns_info = []
         for col in df.columns:
-            col_type = "text"
-            
-            # 1. Pandas dtype kontrolü
-            if pd.api.types.is_numeric_dtype(df[col]):
-                col_type = "numeric"
-            elif pd.api.types.is_datetime64_any_dtype(df[col]):
-                col_type = "date"
-            else:
-                # 2. İçerik analizi - string olarak kaydedilmiş numeric/date kontrolü
-                non_null = df[col].dropna()
-                if len(non_null) > 0:
-                    # Sayısal kontrol
-                    try:
-                        numeric_vals = pd.to_numeric(non_null, errors='coerce')
-                        valid_ratio = numeric_vals.notna().sum() / len(non_null)
-                        if valid_ratio >= 0.8:  # %80'den fazlası sayısal
-                            col_type = "numeric"
-                    except:
-                        pass
-                    
-                    # Tarih kontrol (sadece text ise)
-                    if col_type == "text":
-                        try:
-                            date_vals = pd.to_datetime(non_null, errors='coerce', infer_datetime_format=True)
-                            valid_ratio = date_vals.notna().sum() / len(non_null)
-                            if valid_ratio >= 0.8:  # %80'den fazlası tarih
-                                col_type = "date"
-                        except:
-                            pass
-            
+            verdict = column_types[str(col)]
             columns_info.append({
                 "name": str(col),
-                "type": col_type,
+                "type": verdict.kind if verdict.kind in ("numeric", "date") else "text",
                 "sample": str(df[col].iloc[0]) if len(df) > 0 else ""
             })
         
+        # Sunucu tarafı sayfalama için kaydet (/data/{dataset_id}/page)
+        dataset_id = register_dataset(df, source="viz_data", meta={
+            "filename": file.filename,
+            "sheet_name": sheet_name,
+            "column_types": {col: verdict.to_dict() for col, verdict in column_types.items()},
+        })
+
         # NaN değerleri boş string'e çevir (JSON uyumlu) - TİP TESPİTİNDEN SONRA
         df = df.fillna("")
         
@@ -334,9 +336,13 @@ async def get_viz_data(
             "row_count": len(df),
             "truncated": limit is not None and len(df) >= limit,
             "raw_preview_rows": raw_preview_rows,  # Önizleme için ham satırlar
-            "conversion_report": conversion_report  # ✅ NEW: Dönüştürme raporu
+            "conversion_report": conversion_report,  # ✅ NEW: Dönüştürme raporu
+            "memory_report": memory_report,
+            "dataset_id": dataset_id
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -354,20 +360,17 @@ async def aggregate_endpoint(
     Sunucu tarafında aggregation yapar (büyük veri setleri için).
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         data = df.to_dict(orient="records")
         result = aggregate_data(data, x_column, y_column, aggregation)
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -383,15 +386,10 @@ async def calculate_stats_endpoint(
     Belirtilen sütun için istatistik hesaplar.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         if column not in df.columns:
             raise HTTPException(status_code=400, detail=f"Sütun bulunamadı: {column}")
@@ -408,6 +406,8 @@ async def calculate_stats_endpoint(
             "column": column,
             "stats": stats
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -424,16 +424,11 @@ async def calculate_multi_stats(
     Korelasyon matrisi için kullanılır.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         column_list = json.loads(columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         results = {}
         for col in column_list:
@@ -453,6 +448,8 @@ async def calculate_multi_stats(
             "stats": results,
             "correlation": correlation
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -474,11 +471,15 @@ async def run_ttest(
     test_type: str = Form("independent"),       # independent, paired, one-sample
     mu: float = Form(0),                        # One-sample için popülasyon ortalaması
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    n_resamples: int = Form(DEFAULT_RESAMPLES), # Bootstrap/permütasyon tekrar sayısı (0 = kapalı)
+    ci_level: float = Form(0.95),
+    seed: int = Form(42)
 ):
     """
     T-test uygular: bağımsız örneklem, eşleştirilmiş örneklem veya tek örneklem.
     Independent: group1 ve group2 seçilen grupları kullanır
+    confidence_interval: ortalama (farkı) için bootstrap güven aralığı
     """
     # DEBUG: Gelen parametreleri logla (emoji kaldırıldı - Windows uyumluluğu)
     logging.debug(f"T-TEST DEBUG value_column={value_column}, group_column={group_column}")
@@ -486,15 +487,10 @@ async def run_ttest(
 
 
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         if test_type == "one-sample":
             data1 = pd.to_numeric(df[value_column], errors='coerce').dropna().tolist()
@@ -507,13 +503,17 @@ async def run_ttest(
                 "mean": round(sum(data1) / len(data1), 4),
                 "population_mean": mu,
                 "degrees_of_freedom": len(data1) - 1,
-                "confidence_interval": null,
+                "confidence_interval": None,
                 "significant": bool(p_value < 0.05),
                 "interpretation": {
                     "tr": "İstatistiksel olarak anlamlı fark var" if p_value < 0.05 else "Anlamlı fark yok",
                     "en": "Statistically significant difference" if p_value < 0.05 else "No significant difference"
                 }
             }
+            if n_resamples > 0:
+                boot = await run_in_threadpool(bootstrap_ci, data1, "mean", n_resamples, ci_level, seed)
+                result["confidence_interval"] = boot["ci"]
+                result["bootstrap"] = boot
             
         elif test_type == "independent":
             # group_column'a göre value_column'u grupla
@@ -573,6 +573,12 @@ async def run_ttest(
             
             if warning:
                 result["warning"] = warning
+            
+            if n_resamples > 0:
+                boot = await run_in_threadpool(bootstrap_ci_two_sample, data1, data2, "mean_diff", n_resamples, ci_level, seed)
+                result["confidence_interval"] = boot["ci"]
+                result["bootstrap"] = boot
+                result["permutation"] = await run_in_threadpool(permutation_test, data1, data2, "mean_diff", n_resamples, seed)
 
             
         else:  # paired
@@ -602,6 +608,12 @@ async def run_ttest(
                     "en": "Significant difference between measurements" if p_value < 0.05 else "No significant difference"
                 }
             }
+            
+            if n_resamples > 0:
+                diffs = data1[:min_len].to_numpy() - data2[:min_len].to_numpy()
+                boot = await run_in_threadpool(bootstrap_ci, diffs, "mean", n_resamples, ci_level, seed)
+                result["confidence_interval"] = boot["ci"]
+                result["bootstrap"] = boot
         
         return result
     except HTTPException:
@@ -623,15 +635,10 @@ async def run_anova(
     Tek Yönlü ANOVA uygular.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Grupları oluştur ve istatistikleri topla
         groups = []
@@ -670,6 +677,8 @@ async def run_anova(
             "significant": bool(p_value < 0.05),
             "interpretation": "Gruplar arasında anlamlı fark var" if p_value < 0.05 else "Gruplar arasında fark yok"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Genel hata: {str(e)}"}
 
@@ -688,15 +697,10 @@ async def run_chi_square(
     try:
         # Global import used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Çapraz tablo oluştur
         contingency = pd.crosstab(df[column1], df[column2])
@@ -715,6 +719,8 @@ async def run_chi_square(
             "significant": bool(p_value < 0.05),
             "interpretation": "Değişkenler arasında anlamlı bir ilişki var" if p_value < 0.05 else "Değişkenler istatistiksel olarak bağımsız"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Genel hata: {str(e)}"}
 
@@ -733,15 +739,10 @@ async def run_normality_test(
     try:
         # Global import used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         data = pd.to_numeric(df[column], errors='coerce').dropna().tolist()
         
@@ -770,6 +771,8 @@ async def run_normality_test(
             "is_normal": bool(p_value > 0.05),
             "interpretation": "Veriler normal dağılıma uyuyor (p > 0.05)" if p_value > 0.05 else "Veriler normal dağılıma uymuyor (p < 0.05)"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Genel hata: {str(e)}"}
 
@@ -785,16 +788,11 @@ async def run_descriptive_stats(
     Detaylı betimsel istatistik hesaplar.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         column_list = json.loads(columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         results = {}
         
@@ -835,6 +833,8 @@ async def run_descriptive_stats(
             }
         
         return {"descriptive": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -851,16 +851,11 @@ async def calculate_correlation_matrix(
     Korelasyon matrisi hesaplar.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         column_list = json.loads(columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Sadece sayısal sütunları al
         numeric_cols = [c for c in column_list if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
@@ -901,6 +896,8 @@ async def calculate_correlation_matrix(
             "p_values": p_values,
             "interpretation": interpretation_text
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Genel hata: {str(e)}"}
 
@@ -917,24 +914,23 @@ async def run_mann_whitney(
     group1: str = Form(None),                   # İlk grup değeri (seçilen)
     group2: str = Form(None),                   # İkinci grup değeri (seçilen)
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    n_resamples: int = Form(DEFAULT_RESAMPLES), # Bootstrap/permütasyon tekrar sayısı (0 = kapalı)
+    ci_level: float = Form(0.95),
+    seed: int = Form(42)
 ):
     """
     Mann-Whitney U testi - Bağımsız örneklem non-parametrik test.
     group1 ve group2 seçilen grupları kullanır.
+    Medyan farkı için bootstrap güven aralığı ve permütasyon p-değeri ekler.
     """
     try:
         # Global import used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Kullanıcı seçtiği grupları kullan
         if group1 and group2:
@@ -986,8 +982,16 @@ async def run_mann_whitney(
         if warning:
             result["warning"] = warning
         
+        if n_resamples > 0:
+            boot = await run_in_threadpool(bootstrap_ci_two_sample, data1, data2, "median_diff", n_resamples, ci_level, seed)
+            result["median_difference_ci"] = boot["ci"]
+            result["bootstrap"] = boot
+            result["permutation"] = await run_in_threadpool(permutation_test, data1, data2, "median_diff", n_resamples, seed)
+        
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Genel hata: {str(e)}"}
 
@@ -1007,15 +1011,10 @@ async def run_wilcoxon(
     try:
         # Global import used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         data1 = pd.to_numeric(df[column1], errors='coerce').dropna()
         data2 = pd.to_numeric(df[column2], errors='coerce').dropna()
@@ -1037,6 +1036,8 @@ async def run_wilcoxon(
             "significant": bool(p_value < 0.05),
             "interpretation": "Ölçümler arasında anlamlı fark var" if p_value < 0.05 else "Fark yok"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1056,15 +1057,10 @@ async def run_kruskal_wallis(
         # Global import used
         # Global math used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Grupları oluştur ve istatistikleri topla
         groups = []
@@ -1103,6 +1099,8 @@ async def run_kruskal_wallis(
             "significant": bool(p_value < 0.05),
             "interpretation": "Gruplar arasında anlamlı fark var" if p_value < 0.05 else "Gruplar arasında fark yok"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Genel hata: {str(e)}"}
 
@@ -1122,15 +1120,10 @@ async def run_levene_test(
         # Global import used
         # Global math used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Grupları oluştur ve istatistikleri topla
         groups = []
@@ -1170,6 +1163,8 @@ async def run_levene_test(
             "variances_equal": bool(p_value > 0.05),
             "interpretation": "Varyanslar eşit (homojen)" if p_value > 0.05 else "Varyanslar eşit değil"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1185,21 +1180,20 @@ async def calculate_effect_size(
     group1: str = Form(None),  # Yeni: grup seçimi
     group2: str = Form(None),
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    n_resamples: int = Form(DEFAULT_RESAMPLES),  # Bootstrap tekrar sayısı (0 = kapalı)
+    ci_level: float = Form(0.95),
+    seed: int = Form(42)
 ):
     """
     Etki büyüklüğü hesaplar: Cohen's d, Eta squared, R squared.
+    n_resamples > 0 ise değere bootstrap güven aralığı (ci) eklenir.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         if effect_type == "cohens_d":
             # Yeni yöntem: group_column + group1/group2 kullanarak t-Test gibi çalış
@@ -1228,12 +1222,17 @@ async def calculate_effect_size(
             
             magnitude = "küçük" if abs(cohens_d) < 0.5 else "orta" if abs(cohens_d) < 0.8 else "büyük"
             
-            return {
+            result = {
                 "effect_type": "Cohen's d",
                 "value": round(float(cohens_d), 4),
                 "magnitude": magnitude,
                 "interpretation": f"Etki büyüklüğü: {magnitude} ({abs(cohens_d):.2f})"
             }
+            if n_resamples > 0:
+                boot = await run_in_threadpool(bootstrap_ci_two_sample, data1, data2, "cohens_d", n_resamples, ci_level, seed)
+                result["ci"] = boot["ci"]
+                result["bootstrap"] = boot
+            return result
             
         elif effect_type == "eta_squared":
             if not group_column or not value_column:
@@ -1257,12 +1256,17 @@ async def calculate_effect_size(
             eta_squared = ss_between / ss_total if ss_total > 0 else 0
             magnitude = "küçük" if eta_squared < 0.06 else "orta" if eta_squared < 0.14 else "büyük"
             
-            return {
+            result = {
                 "effect_type": "Eta Squared (η²)",
                 "value": round(float(eta_squared), 4),
                 "magnitude": magnitude,
                 "interpretation": f"Etki büyüklüğü: {magnitude} ({eta_squared:.2%})"
             }
+            if n_resamples > 0:
+                boot = await run_in_threadpool(bootstrap_ci_eta_squared, groups, n_resamples, ci_level, seed)
+                result["ci"] = boot["ci"]
+                result["bootstrap"] = boot
+            return result
             
         else:  # r_squared
             data1 = pd.to_numeric(df[column1], errors='coerce').dropna()
@@ -1274,14 +1278,24 @@ async def calculate_effect_size(
             
             magnitude = "küçük" if r_squared < 0.09 else "orta" if r_squared < 0.25 else "büyük"
             
-            return {
+            result = {
                 "effect_type": "R Squared (R²)",
                 "value": round(float(r_squared), 4),
                 "r": round(float(r), 4),
                 "magnitude": magnitude,
                 "interpretation": f"Açıklanan varyans: {r_squared:.2%}"
             }
+            if n_resamples > 0:
+                x, y = data1[:min_len].to_numpy(), data2[:min_len].to_numpy()
+                boots = await run_in_threadpool(bootstrap_ci_correlation, x, y, n_resamples, ci_level, seed)
+                boot = boots["r_squared"]
+                result["ci"] = boot["ci"]
+                result["r_ci"] = boots["pearson_r"]["ci"]
+                result["bootstrap"] = boot
+            return result
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1297,15 +1311,10 @@ async def calculate_frequency(
     Frekans tablosu hesaplar.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         freq = df[column].value_counts()
         total = len(df[column])
@@ -1333,6 +1342,8 @@ async def calculate_frequency(
             "unique_values": len(freq),
             "table": table[:50]  # İlk 50 değer
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1363,27 +1374,16 @@ async def join_datasets(
         join_type: left, right, inner, outer
     """
     try:
-        # Sol dosyayı oku
-        left_content = await left_file.read()
-        left_filename = left_file.filename.lower()
-        
-        if left_filename.endswith(".csv"):
-            left_df = pd.read_csv(BytesIO(left_content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(left_content))
-            sheet = left_sheet if left_sheet in xls.sheet_names else xls.sheet_names[0]
-            left_df = pd.read_excel(BytesIO(left_content), sheet_name=sheet, header=header_row)
-        
-        # Sağ dosyayı oku
-        right_content = await right_file.read()
-        right_filename = right_file.filename.lower()
-        
-        if right_filename.endswith(".csv"):
-            right_df = pd.read_csv(BytesIO(right_content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(right_content))
-            sheet = right_sheet if right_sheet in xls.sheet_names else xls.sheet_names[0]
-            right_df = pd.read_excel(BytesIO(right_content), sheet_name=sheet, header=header_row)
+        # İki taraf aynı dosyanın farklı sayfaları olabilir: tek oturum, paralel okuma
+        left_session = await open_workbook_upload(left_file)
+        right_session = await open_workbook_upload(right_file)
+        if left_session is right_session:
+            left_session.prefetch(
+                [(left_session.resolve(left_sheet), header_row), (right_session.resolve(right_sheet), header_row)],
+                parse_dates=False,
+            )
+        left_df = left_session.sheet(left_session.resolve(left_sheet), header_row, parse_dates=False)
+        right_df = right_session.sheet(right_session.resolve(right_sheet), header_row, parse_dates=False)
         
         # Anahtar sütun kontrolü
         if left_key not in left_df.columns:
@@ -1409,16 +1409,22 @@ async def join_datasets(
                 col_type = "date"
             columns_info.append({"name": col, "type": col_type})
         
+        # İlk 1000 satırdan fazlası /data/{dataset_id}/page ile sayfalanabilir
+        dataset_id = register_dataset(result_df, source="viz_join")
+        
         return {
             "success": True,
             "columns": result_df.columns.tolist(),
             "columns_info": columns_info,
             "data": result_df.head(1000).to_dict(orient="records"),
+            "dataset_id": dataset_id,
             "row_count": len(result_df),
             "left_rows": len(left_df),
             "right_rows": len(right_df),
             "join_type": join_type
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1427,6 +1433,59 @@ async def join_datasets(
 # ÇOKLU REGRESYON ANALİZİ
 # =====================================================
 
+def _fit_regression(
+    df: pd.DataFrame,
+    fingerprint: str,
+    target_column: str,
+    predictors: List[str],
+    regression_type: str,
+    weight_column: Optional[str],
+    interactions: bool,
+) -> Dict[str, Any]:
+    """
+    Regresyon motoru (regression.py) ile tek QR üzerinden model + çıkarım istatistikleri.
+    Aynı dosya/predictor seti için tasarım matrisi ve QR önbellekten gelir; sadece hedef değişir.
+    """
+    degree = 2 if regression_type == "polynomial" else 1
+    weights_all = pd.to_numeric(df[weight_column], errors='coerce').to_numpy(dtype=float) if weight_column else None
+    y_all = pd.to_numeric(df[target_column], errors='coerce').to_numpy(dtype=float)
+    
+    # Çok büyük tasarım matrisi → parça parça X'X biriktir (Cholesky)
+    if regression_type != "logistic" and \
+            regression_engine.design_cells(len(df), len(predictors), degree, interactions) > regression_engine.MAX_DESIGN_CELLS:
+        chunks = regression_engine.iter_design_chunks(df, predictors, target_column, weight_column,
+                                                      degree=degree, interactions=interactions)
+        names = regression_engine.build_design(df.head(1), predictors, degree=degree, interactions=interactions).names
+        return regression_engine.fit_ols_chunked(chunks, names)
+    
+    key = regression_engine.design_cache_key(fingerprint, predictors, degree=degree, interactions=interactions)
+    design = regression_engine.get_cached_design(key)
+    cached = design is not None
+    if design is None:
+        design = regression_engine.build_design(df, predictors, degree=degree, interactions=interactions)
+        regression_engine.put_cached_design(key, design)
+    
+    y = y_all[design.row_mask]
+    weights = weights_all[design.row_mask] if weights_all is not None else None
+    keep = ~np.isnan(y) if weights is None else ~(np.isnan(y) | np.isnan(weights))
+    if not keep.all():
+        # Hedefte eksik değer var → bu hedefe özel alt tasarım (önbellekteki QR kullanılamaz)
+        design = regression_engine.DesignMatrix(X=design.X[keep], names=design.names, row_mask=keep)
+        y = y[keep]
+        weights = weights[keep] if weights is not None else None
+    
+    if regression_type == "logistic":
+        classes = np.unique(y)
+        if len(classes) != 2:
+            return {"classes": classes, "multiclass": True, "design": design, "y": y}
+        fit = regression_engine.fit_logistic(design, (y == classes[1]).astype(float), weights)
+        fit["classes"] = classes
+    else:
+        fit = regression_engine.fit_ols(design, y, weights)
+    fit["cached_design"] = cached
+    return fit
+
+
 @router.post("/regression")
 async def run_regression(
     file: UploadFile = File(...),
@@ -1434,100 +1493,112 @@ async def run_regression(
     predictor_columns: str = Form(...),  # JSON array
     regression_type: str = Form("linear"),  # linear, polynomial, logistic
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    weight_column: str = Form(None),  # Ağırlıklı en küçük kareler (WLS)
+    interactions: bool = Form(True)  # Polinomda çapraz terimler (False = sadece kareler)
 ):
     """
     Çoklu regresyon analizi yapar.
+    Katsayılar için standart hata, t/p, güven aralığı; model için düzeltilmiş R², F, VIF
+    ve artık tanıları tek bir QR ayrıştırmasından hesaplanır.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         predictors = json.loads(predictor_columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
-        
-        # Sayısal dönüşüm
-        X = df[predictors].apply(pd.to_numeric, errors='coerce').fillna(0)
-        y = pd.to_numeric(df[target_column], errors='coerce').fillna(0)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
-        # Eksik değerleri temizle
-        mask = ~(X.isna().any(axis=1) | y.isna())
-        X = X[mask]
-        y = y[mask]
+        fingerprint = f"{content.sha256}:{sheet_name}:{header_row}"
         
-        if len(X) < 5:
+        # Eksik değerli satırlar tasarım matrisinden çıkarılır
+        n_valid = int((~(df[predictors].apply(pd.to_numeric, errors='coerce').isna().any(axis=1)
+                         | pd.to_numeric(df[target_column], errors='coerce').isna())).sum())
+        if n_valid < 5:
             return {"error": "Yeterli veri yok (en az 5 satır gerekli)"}
         
-        if regression_type == "linear":
-            model = LinearRegression()
-            model.fit(X, y)
-            y_pred = model.predict(X)
-            
-            coefficients = dict(zip(predictors, model.coef_.round(4).tolist()))
-            coefficients["intercept"] = round(model.intercept_, 4)
+        try:
+            fit = await run_in_threadpool(
+                _fit_regression, df, fingerprint, target_column, predictors,
+                regression_type, weight_column, interactions
+            )
+        except ValueError as e:
+            return {"error": f"Regresyon Hatası: {str(e)}"}
+        
+        if regression_type in ("linear", "polynomial"):
+            table = fit["coefficient_table"]
+            coefficients = {row["name"]: row["coef"] for row in table if row["name"] != "intercept"}
+            coefficients["intercept"] = next((row["coef"] for row in table if row["name"] == "intercept"), 0.0)
+            r2 = fit["r_squared"]
             
-            return {
-                "test": "Çoklu Doğrusal Regresyon",
-                "r_squared": round(r2_score(y, y_pred), 4),
-                "rmse": round(np.sqrt(mean_squared_error(y, y_pred)), 4),
+            result = {
+                "test": "Çoklu Doğrusal Regresyon" if regression_type == "linear" else "Polinom Regresyon (2. derece)",
+                "r_squared": round(r2, 4),
+                "adj_r_squared": round(fit["adj_r_squared"], 4),
+                "rmse": round(fit["rmse"], 4),
+                "f_statistic": round(fit["f_statistic"], 4) if fit["f_statistic"] is not None else None,
+                "f_p_value": round(fit["f_p_value"], 6) if fit["f_p_value"] is not None else None,
                 "coefficients": coefficients,
-                "n": len(X),
+                "coefficient_table": table,
+                "vif": fit.get("vif"),
+                "diagnostics": fit.get("diagnostics"),
+                "n": fit["n"],
                 "predictors": predictors,
                 "target": target_column,
-                "interpretation": f"R² = {round(r2_score(y, y_pred), 4)} - Model varyansın %{round(r2_score(y, y_pred)*100, 1)}'ini açıklıyor"
-            }
-            
-        elif regression_type == "polynomial":
-            poly = PolynomialFeatures(degree=2)
-            X_poly = poly.fit_transform(X)
-            model = LinearRegression()
-            model.fit(X_poly, y)
-            y_pred = model.predict(X_poly)
-            
-            return {
-                "test": "Polinom Regresyon (2. derece)",
-                "r_squared": round(r2_score(y, y_pred), 4),
-                "rmse": round(np.sqrt(mean_squared_error(y, y_pred)), 4),
-                "n": len(X),
-                "predictors": predictors,
-                "target": target_column
+                "weighted": bool(weight_column),
+                "solver": fit["solver"],
+                "cached_design": fit.get("cached_design", False),
+                "interpretation": f"R² = {round(r2, 4)} (düzeltilmiş {round(fit['adj_r_squared'], 4)}) - Model varyansın %{round(r2*100, 1)}'ini açıklıyor"
             }
+            return result
             
         elif regression_type == "logistic":
-            # Binary hedef kontrolü
-            unique_vals = y.unique()
-            if len(unique_vals) < 2:
-                 return {"error": f"Lojistik regresyon için hedef sütunda en az 2 farklı sınıf olmalı. Bulunan sınıflar: {unique_vals}"}
-            
-            if len(unique_vals) > 2:
-                 # Belki multinomial destekleyebiliriz ama şimdilik hata veya warning
-                 pass # sklearn otomatik halleder (multinomial)
-            
-            model = LogisticRegression(max_iter=1000)
-            model.fit(X, y)
-            y_pred = model.predict(X)
-            accuracy = (y_pred == y).mean()
-            
-            coefficients = dict(zip(predictors, model.coef_[0].round(4).tolist()))
+            classes = fit["classes"]
+            if len(classes) < 2:
+                 return {"error": f"Lojistik regresyon için hedef sütunda en az 2 farklı sınıf olmalı. Bulunan sınıflar: {classes}"}
+            
+            if fit.get("multiclass"):
+                # 2'den fazla sınıf: sklearn multinomial
+                design, y = fit["design"], fit["y"]
+                X = design.X[:, 1:]
+                model = LogisticRegression(max_iter=1000)
+                model.fit(X, y)
+                y_pred = model.predict(X)
+                return {
+                    "test": "Logistic Regresyon",
+                    "accuracy": round(float((y_pred == y).mean()), 4),
+                    "coefficients": dict(zip(predictors, model.coef_[0].round(4).tolist())),
+                    "intercept": round(float(model.intercept_[0]), 4),
+                    "n": len(y),
+                    "predictors": predictors,
+                    "target": target_column,
+                    "classes": classes.tolist()
+                }
             
+            table = fit["coefficient_table"]
             return {
                 "test": "Logistic Regresyon",
-                "accuracy": round(accuracy, 4),
-                "coefficients": coefficients,
-                "intercept": round(float(model.intercept_[0]), 4),
-                "n": len(X),
+                "accuracy": round(fit["accuracy"], 4),
+                "coefficients": {row["name"]: row["coef"] for row in table if row["name"] != "intercept"},
+                "intercept": table[0]["coef"],
+                "coefficient_table": table,
+                "pseudo_r_squared": round(fit["pseudo_r_squared"], 4) if fit["pseudo_r_squared"] is not None else None,
+                "lr_statistic": round(fit["lr_statistic"], 4),
+                "lr_p_value": round(fit["lr_p_value"], 6) if fit["lr_p_value"] is not None else None,
+                "aic": round(fit["aic"], 4),
+                "converged": fit["converged"],
+                "iterations": fit["iterations"],
+                "n": fit["n"],
                 "predictors": predictors,
                 "target": target_column,
-                "classes": unique_vals.tolist()
+                "classes": classes.tolist(),
+                "weighted": bool(weight_column)
             }
             
     except ImportError:
          return {"error": "Gerekli kütüphane eksik (scikit-learn)"}
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Regresyon Hatası: {str(e)}"}
 
@@ -1547,15 +1618,10 @@ async def generate_smart_insights(
     Veri hakkında akıllı içgörüler üretir.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Analiz edilecek sütunlar
         if columns:
@@ -1652,6 +1718,8 @@ async def generate_smart_insights(
             "total_rows": len(df),
             "total_columns": len(df.columns)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1666,46 +1734,43 @@ async def run_pca(
     columns: str = Form(...),  # JSON array
     n_components: int = Form(2),
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    mode: str = Form("auto")  # auto | exact | large
 ):
     try:
-        from sklearn.decomposition import PCA
-        from sklearn.preprocessing import StandardScaler
-        
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         column_list = json.loads(columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
             
         # Sayısal dönüşüm (Güvenli)
         df_pca = df[column_list].apply(pd.to_numeric, errors='coerce').dropna()
         
         if len(df_pca) < n_components + 1:
             return {"error": "Analiz için yeterli veri satırı yok"}
-            
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(df_pca)
         
-        pca = PCA(n_components=n_components)
-        components = pca.fit_transform(X_scaled)
+        # Büyük veride randomized / incremental PCA; hesaplama event loop dışında
+        fit = await run_in_threadpool(fit_pca, df_pca.to_numpy(), n_components, mode)
         
-        explained_variance = pca.explained_variance_ratio_.tolist()
+        explained_variance = fit["explained_variance"]
         total_var = sum(explained_variance)
         
         return {
             "test": "PCA Analizi",
             "explained_variance": [round(v, 4) for v in explained_variance],
             "total_variance": round(total_var, 4),
-            "components": components.tolist()[:100], # Frontend performans için max 100
+            "components": fit["projected"][:100].tolist(), # Frontend performans için max 100
+            "points": fit["points"],
+            "loadings": [[round(v, 4) for v in row] for row in fit["loadings"]],
+            "mode": fit["mode"],
+            "solver": fit["solver"],
+            "n_rows": len(df_pca),
             "feature_names": column_list,
             "interpretation": f"İlk {n_components} bileşen toplam varyansın %{total_var*100:.1f}'ini açıklıyor."
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"PCA Hatası: {str(e)}"}
 
@@ -1715,43 +1780,52 @@ async def run_kmeans(
     columns: str = Form(...),
     n_clusters: int = Form(3),
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    mode: str = Form("auto"),  # auto | exact | large
+    k_sweep: str = Form(None)  # JSON array veya "2-10" (elbow/silhouette taraması)
 ):
     try:
-        from sklearn.cluster import KMeans
-        from sklearn.preprocessing import StandardScaler
-        
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         column_list = json.loads(columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
             
         df_km = df[column_list].apply(pd.to_numeric, errors='coerce').dropna()
         
         if len(df_km) < n_clusters:
             return {"error": "Veri sayısı küme sayısından az"}
-            
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(df_km)
         
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        clusters = kmeans.fit_predict(X_scaled)
-        centers = kmeans.cluster_centers_.tolist()
+        k_values = None
+        if k_sweep:
+            if "-" in k_sweep and not k_sweep.strip().startswith("["):
+                k_lo, k_hi = (int(v) for v in k_sweep.split("-", 1))
+                k_values = list(range(k_lo, k_hi + 1))
+            else:
+                k_values = [int(v) for v in json.loads(k_sweep)]
         
-        return {
+        # Büyük veride MiniBatchKMeans; hesaplama event loop dışında
+        fit = await run_in_threadpool(fit_kmeans, df_km.to_numpy(), n_clusters, mode, k_values)
+        inertia = fit["inertia"]
+        
+        result = {
             "test": "K-Means Kümeleme",
-            "clusters": clusters.tolist()[:500],
-            "centers": centers,
-            "inertia": round(float(kmeans.inertia_), 4),
+            "clusters": fit["labels"][:500].tolist(),
+            "centers": fit["centers"],
+            "inertia": round(inertia, 4),
             "n_clusters": n_clusters,
-            "interpretation": f"Veri {n_clusters} kümeye ayrıldı. Toplam hata (inertia): {kmeans.inertia_:.2f}"
+            "cluster_sizes": fit["cluster_sizes"],
+            "points": fit["points"],
+            "mode": fit["mode"],
+            "n_rows": len(df_km),
+            "interpretation": f"Veri {n_clusters} kümeye ayrıldı. Toplam hata (inertia): {inertia:.2f}"
         }
+        if "sweep" in fit:
+            result["sweep"] = fit["sweep"]
+            result["suggested_k"] = fit["suggested_k"]
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"K-Means Hatası: {str(e)}"}
 
@@ -1763,16 +1837,11 @@ async def run_cronbach(
     header_row: int = Form(0)
 ):
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         column_list = json.loads(columns)
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
             
         df_rel = df[column_list].apply(pd.to_numeric, errors='coerce').dropna()
         
@@ -1794,6 +1863,8 @@ async def run_cronbach(
             "consistency": consistency,
             "interpretation": f"Güvenilirlik düzeyi: {consistency} (α={cronbach:.3f})"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Cronbach Alpha Hatası: {str(e)}"}
 
@@ -1806,15 +1877,10 @@ async def run_friedman(
 ):
     try:
         # Global import used
-        content = await file.read()
+        content = await ingest_upload(file)
         column_list = json.loads(columns)
         
-        if file.filename.lower().endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, file.filename.lower(), sheet_name, header_row)
             
         df_f = df[column_list].apply(pd.to_numeric, errors='coerce').dropna()
         
@@ -1831,6 +1897,8 @@ async def run_friedman(
             "significant": bool(p < 0.05),
             "interpretation": "Gruplar arasında anlamlı fark var" if p < 0.05 else "Anlamlı fark yok"
         }
+    except HTTPException:
+        raise
     except Exception as e:
          return {"error": f"Friedman Hatası: {str(e)}"}
 
@@ -1844,15 +1912,10 @@ async def run_lda(
 ):
     try:
         # Global import used
-        content = await file.read()
+        content = await ingest_upload(file)
         column_list = json.loads(columns)
         
-        if file.filename.lower().endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, file.filename.lower(), sheet_name, header_row)
             
         X = df[column_list].apply(pd.to_numeric, errors='coerce').fillna(0)
         y = df[target].astype(str)
@@ -1871,6 +1934,8 @@ async def run_lda(
             "explained_variance": clf.explained_variance_ratio_.tolist(),
              "interpretation": f"Model {len(clf.classes_)} sınıfı ayırabilir."
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"LDA Hatası: {str(e)}"}
 
@@ -1888,15 +1953,10 @@ async def run_survival(
         from lifelines.statistics import logrank_test
         # Global math used
         
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
             
         T = pd.to_numeric(df[duration_column], errors='coerce').fillna(0)
         E = pd.to_numeric(df[event_column], errors='coerce').fillna(0)
@@ -1961,6 +2021,8 @@ async def run_survival(
             "logrank_error": logrank_error if 'logrank_error' in locals() else None,
             "interpretation": f"Medyan sağkalım süresi: {median_display}"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Survival Analizi Hatası: {str(e)}"}
 
@@ -1971,38 +2033,45 @@ async def run_time_series(
     date_column: str = Form(...),
     value_column: str = Form(...),
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    freq: str = Form(None),          # D, W, M, Q, Y (boş = ham seri)
+    agg: str = Form("sum"),          # Yeniden örnekleme aggregation'ı
+    window: int = Form(None),        # Hareketli pencere (boş = otomatik)
+    nlags: int = Form(24),           # ACF gecikme sayısı
+    decompose: bool = Form(False),   # Trend/mevsimsellik ayrıştırması
+    period: int = Form(None)         # Mevsim uzunluğu (boş = frekanstan)
 ):
     """
     Zaman Serisi Analizi - Trend, mevsimsellik ve istatistikler.
+    Hesaplamalar ortak zaman serisi motorunda (time_series.py) yapılır.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
-        # Tarih sütununu parse et
+        # Tarih sütunu tek sefer parse edilir → DatetimeIndex'li seri
         try:
-            df['_date'] = pd.to_datetime(df[date_column], errors='coerce')
-        except:
+            series = ts_engine.to_series(df, date_column, value_column)
+        except KeyError as e:
+            return {"error": f"Sütun bulunamadı: {str(e)}"}
+        except Exception:
             return {"error": f"Tarih sütunu '{date_column}' geçerli tarih formatına çevrilemiyor."}
         
-        # Değer sütununu sayısala çevir
-        df['_value'] = pd.to_numeric(df[value_column], errors='coerce')
+        if len(series) < 5:
+            return {"error": "Zaman serisi analizi için en az 5 geçerli veri noktası gerekli."}
         
-        # Geçersiz değerleri temizle
-        df_clean = df.dropna(subset=['_date', '_value']).sort_values('_date')
+        date_start, date_end = series.index.min(), series.index.max()
         
-        if len(df_clean) < 5:
-            return {"error": "Zaman serisi analizi için en az 5 geçerli veri noktası gerekli."}
+        # İstenirse D/W/M/Q/Y'ye yeniden örnekle
+        if freq:
+            freq = ts_engine.normalize_freq(freq)
+            series = ts_engine.resample(series, freq, agg).fillna(0 if agg in ("sum", "count") else series.mean())
+            if len(series) < 5:
+                return {"error": f"'{freq}' frekansında en az 5 dönem gerekli (mevcut: {len(series)})."}
         
-        values = df_clean['_value'].values
+        values = series.values
         n = len(values)
         
         # Temel istatistikler
@@ -2015,26 +2084,29 @@ async def run_time_series(
         trend_direction = "Yukarı" if slope > 0.01 * std_val else ("Aşağı" if slope < -0.01 * std_val else "Stabil")
         
         # Hareketli ortalama
-        window_size = min(7, n // 3) if n >= 9 else 3
-        rolling_mean = pd.Series(values).rolling(window=window_size, min_periods=1).mean().tolist()
-        
-        # Mevsimsellik tespiti (basit otokorelasyon)
-        if n >= 14:
-            autocorr_7 = float(pd.Series(values).autocorr(lag=7)) if n > 7 else 0
-            seasonality = "Haftalık döngü tespit edildi" if abs(autocorr_7) > 0.3 else "Belirgin mevsimsellik yok"
+        window_size = window or (min(7, n // 3) if n >= 9 else 3)
+        rolling_mean = ts_engine.rolling(series, window_size, "mean").tolist()
+        
+        # Otokorelasyon (FFT) ve mevsimsellik tespiti
+        acf_values = ts_engine.acf(values, nlags)
+        season_lag = ts_engine.SEASON_LENGTH.get(freq, 7) if freq else 7
+        if n >= 2 * season_lag and season_lag < len(acf_values):
+            autocorr_season = float(acf_values[season_lag])
+            cycle_name = {7: "Haftalık", 12: "Yıllık", 4: "Yıllık", 52: "Yıllık"}.get(season_lag, "Periyodik")
+            seasonality = f"{cycle_name} döngü tespit edildi" if abs(autocorr_season) > 0.3 else "Belirgin mevsimsellik yok"
         else:
-            autocorr_7 = None
+            autocorr_season = None
             seasonality = "Mevsimsellik için yetersiz veri"
         
         # Volatilite
         volatility = float(std_val / mean_val * 100) if mean_val != 0 else 0
         
-        return {
+        result = {
             "test": "Zaman Serisi Analizi",
             "n": n,
             "date_range": {
-                "start": str(df_clean['_date'].min()),
-                "end": str(df_clean['_date'].max())
+                "start": str(date_start),
+                "end": str(date_end)
             },
             "statistics": {
                 "mean": round(mean_val, 4),
@@ -2050,8 +2122,41 @@ async def run_time_series(
             "seasonality": seasonality,
             "volatility_percent": round(volatility, 2),
             "rolling_mean": [round(v, 4) for v in rolling_mean[-20:]],  # Son 20 değer
+            "acf": [round(v, 4) for v in acf_values],
             "interpretation": f"Trend: {trend_direction}. {seasonality}. Volatilite: %{round(volatility, 1)}"
         }
+        
+        if freq:
+            result["freq"] = freq
+            result["resampled"] = {
+                "dates": [d.strftime("%Y-%m-%d") for d in series.index],
+                "values": [round(float(v), 4) for v in values],
+                "aggregation": agg
+            }
+            if freq in ("M", "Q", "W", "D"):
+                yoy = ts_engine.period_change(series, freq, lag="year")
+                pop = ts_engine.period_change(series, freq, lag="period")
+                result["yoy_change"] = [None if pd.isna(v) else round(float(v), 2) for v in yoy]
+                result["period_change"] = [None if pd.isna(v) else round(float(v), 2) for v in pop]
+        
+        if decompose:
+            try:
+                parts = ts_engine.decompose(series, period=period, freq=freq)
+                result["decomposition"] = {
+                    "method": parts["method"],
+                    "period": parts["period"],
+                    "trend": [round(float(v), 4) for v in parts["trend"]],
+                    "seasonal": [round(float(v), 4) for v in parts["seasonal"]],
+                    "resid": [round(float(v), 4) for v in parts["resid"]],
+                    "seasonal_strength": parts["seasonal_strength"],
+                    "trend_strength": parts["trend_strength"]
+                }
+            except ValueError as e:
+                result["decomposition"] = {"error": str(e)}
+        
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Zaman Serisi Hatası: {str(e)}"}
 
@@ -2067,15 +2172,10 @@ async def run_apa_report(
     APA Formatında İstatistik Raporu.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Sayısal sütunları bul
         if columns:
@@ -2158,6 +2258,8 @@ async def run_apa_report(
             "correlation_note": correlation_text if correlation_text else None,
             "interpretation": f"{len(descriptive_table)} değişken için APA formatında betimsel istatistikler hazırlandı."
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"APA Raporu Hatası: {str(e)}"}
 
@@ -2170,27 +2272,27 @@ async def run_power_analysis(
     alpha: float = Form(0.05),
     power: float = Form(0.8),
     sheet_name: str = Form(None),
-    header_row: int = Form(0)
+    header_row: int = Form(0),
+    n_resamples: int = Form(DEFAULT_RESAMPLES),  # Veriden d için bootstrap tekrar sayısı (0 = kapalı)
+    ci_level: float = Form(0.95),
+    seed: int = Form(42)
 ):
     """
     İstatistiksel Güç Analizi - Örneklem büyüklüğü hesaplama.
+    Etki büyüklüğü veriden hesaplanırsa d ve ulaşılan güç için bootstrap aralığı eklenir.
     """
     try:
-        content = await file.read()
+        content = await ingest_upload(file)
         filename = file.filename.lower()
         
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content), header=header_row)
-        else:
-            xls = pd.ExcelFile(BytesIO(content))
-            active_sheet = sheet_name if sheet_name in xls.sheet_names else xls.sheet_names[0]
-            df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=header_row)
+        df = _read_frame(content, filename, sheet_name, header_row)
         
         # Mevcut örneklem büyüklüğü
         current_n = len(df)
         
         # Eğer sütun belirtilmişse, o sütundan etki büyüklüğü hesapla
         calculated_d = None
+        d_bootstrap = None
         if column and column in df.columns:
             data = pd.to_numeric(df[column], errors='coerce').dropna()
             if len(data) > 1:
@@ -2199,6 +2301,8 @@ async def run_power_analysis(
                 std = float(data.std())
                 if std > 0:
                     calculated_d = abs(mean / std)
+                    if n_resamples > 0:
+                        d_bootstrap = await run_in_threadpool(bootstrap_ci, data.to_numpy(), "one_sample_d", n_resamples, ci_level, seed)
         
         # Kullanılacak etki büyüklüğü
         d = calculated_d if calculated_d else effect_size
@@ -2231,6 +2335,25 @@ async def run_power_analysis(
         # Yeterlilik durumu
         is_adequate = current_n >= total_required
         
+        # d'nin güven aralığı → ulaşılan güç ve gerekli örneklem aralığı
+        uncertainty = None
+        if d_bootstrap and None not in d_bootstrap["ci"]:
+            d_lo, d_hi = d_bootstrap["ci"]
+            power_range = [
+                round(float(stats.norm.cdf(dv * np.sqrt(current_n / 2) - z_alpha)), 3) if dv > 0 else 0
+                for dv in (d_lo, d_hi)
+            ]
+            n_range = [
+                int(np.ceil(2 * ((z_alpha + z_beta) / dv) ** 2)) * 2 if dv > 0 else None
+                for dv in (d_hi, d_lo)
+            ]
+            uncertainty = {
+                "effect_size_ci": d_bootstrap["ci"],
+                "achieved_power_ci": power_range,
+                "total_required_range": n_range,
+                "bootstrap": d_bootstrap
+            }
+        
         return {
             "test": "İstatistiksel Güç Analizi",
             "parameters": {
@@ -2247,8 +2370,11 @@ async def run_power_analysis(
             "achieved_power": round(achieved_power, 3),
             "effect_interpretation": effect_interpretation,
             "calculated_from_data": calculated_d is not None,
+            "uncertainty": uncertainty,
             "interpretation": f"Mevcut örneklem ({current_n}) ile ulaşılan güç: {achieved_power:.1%}. " +
                             (f"Yeterli örneklem." if is_adequate else f"Hedef güç için en az {total_required} gözlem gerekli.")
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"Güç Analizi Hatası: {str(e)}"}
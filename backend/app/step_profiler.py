@@ -0,0 +1,101 @@
+"""
+Step Profiler - Opradox Excel Studio
+Per-step timing and memory instrumentation for multi-step runs.
+
+Used by the report builder's action loop: every action records wall time,
+rows/columns in and out, the change in DataFrame memory (sampled, see
+admission.frame_memory_bytes) and the change in process RSS. The summary
+goes to technical_details.profile so a slow step of a 30-step report can be
+found from the response alone.
+"""
+from __future__ import annotations
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from .admission import frame_memory_bytes
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (ValueError, OSError, AttributeError):
+    _PAGE_SIZE = 4096
+
+# Number of slowest steps listed in the summary
+SLOWEST_STEPS = 3
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _shape(df: Any) -> tuple:
+    return df.shape if isinstance(df, pd.DataFrame) else (0, 0)
+
+
+@dataclass
+class StepRecord:
+    """Measurements of one step."""
+    step: int
+    type: str
+    status: str = "ok"  # ok | error
+    duration_ms: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    cols_in: int = 0
+    cols_out: int = 0
+    mem_delta_bytes: int = 0
+    rss_delta_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+class StepProfiler:
+    """Collects StepRecords; start() before a step, end() after it."""
+
+    def __init__(self):
+        self.steps: List[StepRecord] = []
+        self._started = time.perf_counter()
+        self._rss_start = current_rss_bytes()
+        self._rss_peak = self._rss_start
+        self._open: Dict[int, tuple] = {}
+
+    def start(self, step: int, step_type: str, df: Any) -> StepRecord:
+        rows, cols = _shape(df)
+        record = StepRecord(step=step, type=step_type or "?", rows_in=rows, cols_in=cols)
+        mem = frame_memory_bytes(df) if isinstance(df, pd.DataFrame) else 0
+        self._open[id(record)] = (time.perf_counter(), mem, current_rss_bytes())
+        return record
+
+    def end(self, record: StepRecord, df: Any, error: Optional[BaseException] = None) -> StepRecord:
+        t0, mem0, rss0 = self._open.pop(id(record))
+        record.duration_ms = round((time.perf_counter() - t0) * 1000, 2)
+        record.rows_out, record.cols_out = _shape(df)
+        if isinstance(df, pd.DataFrame):
+            record.mem_delta_bytes = frame_memory_bytes(df) - mem0
+        rss = current_rss_bytes()
+        if rss is not None and rss0 is not None:
+            record.rss_delta_bytes = rss - rss0
+            self._rss_peak = max(self._rss_peak or 0, rss)
+        if error is not None:
+            record.status = "error"
+            record.error = str(error)[:200]
+        self.steps.append(record)
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        slowest = sorted(self.steps, key=lambda r: r.duration_ms, reverse=True)[:SLOWEST_STEPS]
+        return {
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 2),
+            "steps_ms": round(sum(r.duration_ms for r in self.steps), 2),
+            "slowest": [{"step": r.step, "type": r.type, "duration_ms": r.duration_ms} for r in slowest],
+            "rss_start_bytes": self._rss_start,
+            "rss_peak_bytes": self._rss_peak,
+            "steps": [asdict(r) for r in self.steps],
+        }
@@ -11,12 +11,10 @@ from pathlib import Path
 from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
 import threading
+import queue
 
 from .storage_models import RunResult, ShareLink, ScheduledJob
 
-# Thread-local storage for connections
-_local = threading.local()
-
 # Database path
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DB_PATH = DATA_DIR / "excelstudio.db"
@@ -26,6 +24,20 @@ SHARED_FILES_DIR = Path(__file__).resolve().parent.parent / "shared_files"
 RESULTS_DIR = SHARED_FILES_DIR / "results"
 SHARES_DIR = SHARED_FILES_DIR / "shares"
 
+# ============================================================
+# CONNECTION POOL CONFIGURATION
+# ============================================================
+
+# Max open connections per database file (readers run concurrently under WAL)
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+# Seconds to wait for a free connection before giving up
+SQLITE_POOL_TIMEOUT_S = float(os.getenv("SQLITE_POOL_TIMEOUT_S", "10"))
+# Page cache per connection (KiB) and memory-mapped I/O window (bytes)
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(128 * 1024 * 1024)))
+# How long a writer waits on a locked database instead of failing immediately
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
 
 def _ensure_dirs():
     """Ensure all required directories exist."""
@@ -34,28 +46,193 @@ def _ensure_dirs():
     SHARES_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def get_connection() -> sqlite3.Connection:
-    """Get thread-local database connection."""
-    if not hasattr(_local, 'connection') or _local.connection is None:
-        _ensure_dirs()
-        _local.connection = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-        _local.connection.row_factory = sqlite3.Row
-    return _local.connection
+def _open_connection(db_path: Path) -> sqlite3.Connection:
+    """
+    Open a tuned connection: WAL journal (readers never block the writer),
+    synchronous=NORMAL (durable at checkpoints, no fsync per commit),
+    larger page cache, mmap reads and in-memory temp tables.
+    """
+    conn = sqlite3.connect(
+        str(db_path),
+        check_same_thread=False,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000.0,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class SQLitePool:
+    """
+    Bounded pool of connections to one database file.
+
+    Idle connections are reused LIFO (warm page cache). A thread that
+    already holds a connection from this pool gets the same one back on
+    nested acquire, so code that calls get_cursor() inside another
+    get_cursor() cannot deadlock on an exhausted pool.
+    """
+
+    def __init__(self, db_path: Path, max_size: int = SQLITE_POOL_SIZE):
+        self.db_path = Path(db_path)
+        self.max_size = max(1, int(max_size))
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created = 0
+        # close_all() starts a new generation; older connections close on release
+        self._generation = 0
+        self._generation_of: Dict[int, int] = {}
+        self._acquired = 0
+        self._reused = 0
+        self._waits = 0
+
+    def acquire(self, timeout: float = SQLITE_POOL_TIMEOUT_S) -> sqlite3.Connection:
+        """Borrow a connection (re-entrant per thread)."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._reused += 1
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = _open_connection(self.db_path)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                with self._lock:
+                    self._generation_of[id(conn)] = self._generation
+            else:
+                with self._lock:
+                    self._waits += 1
+                try:
+                    conn = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError(
+                        f"Veritabanı bağlantı havuzu dolu ({self.max_size} bağlantı, {timeout:.0f}s beklendi)"
+                    )
+
+        with self._lock:
+            self._acquired += 1
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection; an unfinished transaction is rolled back first."""
+        if getattr(self._local, "conn", None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            stale = self._generation_of.get(id(conn)) != self._generation
+        if stale:
+            self._close(conn)
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager around acquire()/release()."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _close(self, conn: sqlite3.Connection) -> None:
+        conn.close()
+        with self._lock:
+            self._generation_of.pop(id(conn), None)
+            self._created -= 1
+
+    def close_all(self) -> None:
+        """Close idle connections; borrowed ones are closed when returned later."""
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "db_path": str(self.db_path),
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "acquired_total": self._acquired,
+                "reused_total": self._reused,
+                "waits_total": self._waits,
+            }
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Optional[Path] = None) -> SQLitePool:
+    """Shared pool for a database file (excelstudio.db by default)."""
+    path = Path(db_path or DB_PATH)
+    key = str(path.resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            pool = SQLitePool(path)
+            _pools[key] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(db_path: Optional[Path] = None):
+    """Borrow a pooled connection for db_path (excelstudio.db by default)."""
+    with get_pool(db_path).connection() as conn:
+        yield conn
+
+
+def close_all_pools() -> None:
+    """Close idle connections of every pool (shutdown / tests)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
 
 
 @contextmanager
 def get_cursor():
     """Context manager for database cursor with auto-commit."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        yield cursor
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
 
 
 def init_db():
@@ -410,7 +587,8 @@ def get_storage_status() -> Dict[str, Any]:
                 "run_results": count_run_results(),
                 "share_links": count_share_links(),
                 "scheduled_jobs": count_scheduled_jobs()
-            }
+            },
+            "pool": get_pool().stats()
         }
     except Exception as e:
         return {
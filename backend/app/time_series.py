@@ -0,0 +1,258 @@
+"""
+Time Series Engine - Opradox Excel Studio
+Shared date handling for /viz/time-series, the time-based scenarios and the
+report builder's YTD / MTD / YoY / QoQ / moving-average columns.
+
+The date column is parsed once (on its unique values) into datetime64 and
+everything else works on that: calendar buckets (D/W/M/Q/Y) via periods,
+resampling with any aggregation, rolling / expanding windows, period-over-
+period change, FFT autocorrelation and STL-style decomposition.
+"""
+from __future__ import annotations
+import logging
+from typing import Optional, List, Dict, Any, Union
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Period codes accepted by resample()/period_key(); keys are user-facing
+FREQ_ALIASES = {
+    "D": "D", "DAY": "D", "GÜN": "D",
+    "W": "W", "WEEK": "W", "HAFTA": "W",
+    "M": "M", "MONTH": "M", "AY": "M",
+    "Q": "Q", "QUARTER": "Q", "ÇEYREK": "Q",
+    "Y": "Y", "A": "Y", "YEAR": "Y", "YIL": "Y",
+}
+
+# Natural season length per frequency (used when decompose() gets no period)
+SEASON_LENGTH = {"D": 7, "W": 52, "M": 12, "Q": 4, "Y": 1}
+
+AGG_FUNCS = ("sum", "mean", "count", "min", "max", "median", "std", "first", "last")
+
+
+def normalize_freq(freq: str) -> str:
+    """Map a user-supplied frequency (D/W/M/Q/Y, 'month', 'ay', ...) to a period code."""
+    code = FREQ_ALIASES.get(str(freq).strip().upper())
+    if code is None:
+        raise ValueError(f"Geçersiz frekans: {freq}. Geçerli: D, W, M, Q, Y")
+    return code
+
+
+# ============================================================
+# PARSING
+# ============================================================
+
+def parse_dates(values: pd.Series, dayfirst: bool = True) -> pd.Series:
+    """
+    Convert a column to datetime64 once.
+
+    Already-datetime columns are returned unchanged. Otherwise only the
+    unique values are parsed and mapped back, which is much cheaper for
+    typical business data where dates repeat across many rows.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    uniques = pd.Series(values.dropna().unique())
+    if uniques.empty:
+        return pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    parsed = pd.to_datetime(uniques, errors="coerce", dayfirst=dayfirst)
+    lookup = pd.Series(parsed.values, index=uniques.values)
+    lookup = lookup[~lookup.index.duplicated()]
+    return pd.Series(values.map(lookup).values, index=values.index, dtype="datetime64[ns]")
+
+
+def detect_date_column(df: pd.DataFrame) -> Optional[str]:
+    """First datetime column, else first object column whose head parses as dates."""
+    datetime_cols = df.select_dtypes(include=["datetime64"]).columns.tolist()
+    if datetime_cols:
+        return datetime_cols[0]
+    for col in df.columns:
+        if pd.api.types.is_string_dtype(df[col].dtype):
+            sample = df[col].dropna().head(10)
+            if sample.empty:
+                continue
+            try:
+                pd.to_datetime(sample, dayfirst=True)
+                return col
+            except (ValueError, TypeError):
+                continue
+    return None
+
+
+def to_series(
+    df: pd.DataFrame,
+    date_column: str,
+    value_column: str,
+    dayfirst: bool = True,
+) -> pd.Series:
+    """Numeric value column indexed by its parsed, sorted DatetimeIndex (invalid rows dropped)."""
+    dates = parse_dates(df[date_column], dayfirst=dayfirst)
+    values = pd.to_numeric(df[value_column], errors="coerce")
+    series = pd.Series(values.values, index=pd.DatetimeIndex(dates.values), name=value_column)
+    series = series[series.index.notna() & series.notna()]
+    return series.sort_index(kind="mergesort")
+
+
+# ============================================================
+# CALENDAR BUCKETS & RESAMPLING
+# ============================================================
+
+def period_key(dates: pd.Series, freq: str) -> pd.Series:
+    """Period label (D/W/M/Q/Y) for each date; NaT stays NaT."""
+    return dates.dt.to_period(normalize_freq(freq))
+
+
+def resample(
+    data: Union[pd.Series, pd.DataFrame],
+    freq: str,
+    agg: str = "sum",
+    fill_missing: bool = True,
+) -> Union[pd.Series, pd.DataFrame]:
+    """
+    Aggregate a DatetimeIndex-ed Series/DataFrame into calendar periods.
+
+    The result is indexed by period start timestamps. With fill_missing,
+    empty periods between first and last are present (0 for sum/count,
+    NaN otherwise) so that charts and lags see a regular grid.
+    """
+    if agg not in AGG_FUNCS:
+        raise ValueError(f"Geçersiz aggregation: {agg}. Geçerli: {', '.join(AGG_FUNCS)}")
+    code = normalize_freq(freq)
+    periods = data.index.to_period(code)
+    result = data.groupby(periods).agg(agg)
+    if fill_missing and len(result):
+        full = pd.period_range(result.index.min(), result.index.max(), freq=code)
+        result = result.reindex(full, fill_value=0 if agg in ("sum", "count") else np.nan)
+    result.index = result.index.to_timestamp()
+    return result
+
+
+def rolling(series: pd.Series, window: Union[int, str], agg: str = "mean", min_periods: int = 1) -> pd.Series:
+    """Rolling window aggregation; window may be a row count or an offset like '30D'."""
+    return getattr(series.rolling(window=window, min_periods=min_periods), agg)()
+
+
+def expanding(series: pd.Series, agg: str = "sum", min_periods: int = 1) -> pd.Series:
+    """Expanding (cumulative) aggregation."""
+    return getattr(series.expanding(min_periods=min_periods), agg)()
+
+
+def cumulative_to_date(dates: pd.Series, values: pd.Series, freq: str = "Y") -> pd.Series:
+    """
+    Running total that restarts every period (YTD for 'Y', MTD for 'M', ...),
+    accumulated in date order and returned aligned to the input rows.
+    Rows without a valid date get NaN.
+    """
+    positions = date_order(dates)
+    keys = period_key(dates, freq).to_numpy()[positions]
+    ordered = pd.Series(pd.to_numeric(values, errors="coerce").to_numpy()[positions])
+    running = ordered.groupby(keys).cumsum().to_numpy()
+    out = np.empty(len(values))
+    out[positions] = running
+    return pd.Series(out, index=values.index, name=values.name)
+
+
+def date_order(dates: pd.Series) -> np.ndarray:
+    """Row positions in stable date order, NaT last (safe with duplicate index labels)."""
+    return dates.reset_index(drop=True).sort_values(kind="mergesort").index.to_numpy()
+
+
+def period_change(
+    resampled: pd.Series,
+    freq: str,
+    lag: str = "year",
+) -> pd.Series:
+    """
+    Percent change of a resampled series against an earlier period.
+
+    lag='year'   → same period one year earlier (YoY)
+    lag='period' → immediately preceding period (MoM, QoQ, ...)
+    Periods without a comparable earlier value are NaN.
+    """
+    code = normalize_freq(freq)
+    current = resampled.copy()
+    current.index = current.index.to_period(code)
+    if lag == "year":
+        prev_index = (current.index.to_timestamp() - pd.DateOffset(years=1)).to_period(code)
+    elif lag == "period":
+        prev_index = current.index - 1
+    else:
+        raise ValueError(f"Geçersiz lag: {lag}")
+    previous = current.reindex(prev_index).values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (current.values - previous) / previous * 100
+    change = np.where(np.isfinite(change), change, np.nan)
+    return pd.Series(change, index=resampled.index, name=resampled.name)
+
+
+# ============================================================
+# AUTOCORRELATION & DECOMPOSITION
+# ============================================================
+
+def acf(values, nlags: int = 24) -> List[float]:
+    """Sample autocorrelation for lags 0..nlags via FFT (O(n log n))."""
+    x = np.asarray(values, dtype=np.float64)
+    x = x[~np.isnan(x)]
+    n = len(x)
+    if n < 2:
+        return []
+    nlags = int(min(nlags, n - 1))
+    x = x - x.mean()
+    size = 1 << int(np.ceil(np.log2(2 * n - 1)))
+    spectrum = np.fft.rfft(x, size)
+    corr = np.fft.irfft(spectrum * np.conj(spectrum), size)[: nlags + 1]
+    if corr[0] == 0:
+        return [1.0] + [0.0] * nlags
+    return (corr / corr[0]).tolist()
+
+
+def decompose(series: pd.Series, period: Optional[int] = None, freq: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Trend / seasonal / residual decomposition of a regularly spaced series.
+
+    Uses statsmodels STL when installed; otherwise a classical additive
+    decomposition (centered moving-average trend, mean seasonal profile).
+    """
+    if period is None:
+        period = SEASON_LENGTH.get(normalize_freq(freq), 7) if freq else 7
+    values = series.astype(float).interpolate(limit_direction="both")
+    n = len(values)
+    if period < 2 or n < 2 * period:
+        raise ValueError(f"Ayrıştırma için en az {2 * max(period, 2)} dönem gerekli (mevcut: {n})")
+
+    method = "classical"
+    try:
+        from statsmodels.tsa.seasonal import STL
+        fit = STL(values.values, period=period, robust=True).fit()
+        trend, seasonal, resid = fit.trend, fit.seasonal, fit.resid
+        method = "stl"
+    except ImportError:
+        logging.warning("statsmodels not found. Using classical decomposition.")
+        trend = values.rolling(window=period, center=True, min_periods=1).mean()
+        if period % 2 == 0:
+            trend = trend.rolling(window=2, min_periods=1).mean().shift(-1).fillna(trend)
+        trend = trend.values
+        detrended = values.values - trend
+        phase = np.arange(n) % period
+        profile = np.array([detrended[phase == p].mean() for p in range(period)])
+        profile -= profile.mean()
+        seasonal = profile[phase]
+        resid = values.values - trend - seasonal
+
+    var_resid = float(np.var(resid))
+    strength_seasonal = max(0.0, 1 - var_resid / float(np.var(seasonal + resid))) if np.var(seasonal + resid) > 0 else 0.0
+    strength_trend = max(0.0, 1 - var_resid / float(np.var(trend + resid))) if np.var(trend + resid) > 0 else 0.0
+
+    return {
+        "method": method,
+        "period": int(period),
+        "trend": np.asarray(trend, dtype=float),
+        "seasonal": np.asarray(seasonal, dtype=float),
+        "resid": np.asarray(resid, dtype=float),
+        "seasonal_strength": round(strength_seasonal, 4),
+        "trend_strength": round(strength_trend, 4),
+    }
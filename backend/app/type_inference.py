@@ -0,0 +1,271 @@
+"""
+Type Inference - Opradox Excel Studio
+Column type detection shared by /viz/data, smart_type_coercion and /ui/inspect.
+
+Every column gets one verdict (numeric | date | text | empty):
+
+- typed columns are decided from the dtype alone;
+- text columns are first judged on an evenly spaced sample (names and
+  codes are rejected here without touching the rest of the column);
+- candidates are confirmed on the unique values of a larger evenly
+  spaced sample (TYPE_CONFIRM_ROWS rows; the whole column when shorter),
+  weighted by how often each value occurs. On longer columns valid_ratio
+  and invalid_values are estimates; coerce_column converts every row
+  through the column's own unique-value mapping (pd.factorize).
+
+Numbers are read in plain ("1234.56") or Turkish ("1.234,56", "12,5")
+notation, chosen per column. Dates are tried against explicit day-first
+formats before falling back to dayfirst parsing of the remaining strings.
+Verdicts are cached by content hash so repeated requests for the same
+upload (and the dataset registered from it) skip the work.
+"""
+from __future__ import annotations
+import datetime as dt
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Values looked at before a column is confirmed on all its unique values
+TYPE_SAMPLE_ROWS = int(os.getenv("TYPE_SAMPLE_ROWS", "2000"))
+
+# Rows a candidate is confirmed on (longer columns use an evenly spaced sample)
+TYPE_CONFIRM_ROWS = int(os.getenv("TYPE_CONFIRM_ROWS", "20000"))
+
+# Share of non-empty values that must convert for a numeric/date verdict
+TYPE_THRESHOLD = 0.8
+
+# Frames whose verdicts are kept (keyed by content hash, sheet, header row)
+TYPE_CACHE_ENTRIES = int(os.getenv("TYPE_CACHE_ENTRIES", "128"))
+
+# Unconvertible values listed per column
+INVALID_EXAMPLES = 10
+
+# Explicit formats first: per-value dateutil guessing is slow and ambiguous
+DATE_FORMATS = (
+    "%d.%m.%Y", "%d.%m.%Y %H:%M", "%d.%m.%Y %H:%M:%S",
+    "%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S",
+)
+
+# Strings worth handing to the date parser at all
+DATE_LIKE = r"^\d{1,4}[./\- ]\d{1,2}[./\- ]\d{1,4}"
+
+# 1.234,56 | 1.234 | 12,5 (thousands dots, decimal comma)
+TR_NUMBER = r"^[+-]?(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?$"
+
+
+@dataclass
+class ColumnType:
+    """Verdict for one column."""
+    kind: str                      # numeric | date | text | empty
+    source: str                    # dtype (from the parsed dtype) | content (from the values)
+    valid_ratio: float = 0.0       # share of non-empty values that convert
+    number_format: Optional[str] = None   # plain | tr
+    date_format: Optional[str] = None     # strptime format or "dayfirst"
+    invalid_values: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ============================================================
+# VALUE PARSERS (vectorized, applied to unique values)
+# ============================================================
+
+def _strings(values: pd.Series) -> pd.Series:
+    """Stripped text values; NaN where the value is not a string (Excel numbers/dates)."""
+    if pd.api.types.is_string_dtype(values.dtype):
+        try:
+            return values.str.strip()
+        except AttributeError:
+            pass  # object column without any strings
+    return pd.Series(np.nan, index=values.index, dtype=object)
+
+
+def detect_number_format(values: pd.Series) -> str:
+    """'tr' when some strings only parse as Turkish notation, else 'plain'."""
+    text = _strings(values).dropna()
+    if text.empty:
+        return "plain"
+    tr_like = text.str.match(TR_NUMBER)
+    plain_ok = pd.to_numeric(text, errors="coerce").notna()
+    return "tr" if bool((tr_like & ~plain_ok).any()) else "plain"
+
+
+def parse_numbers(values: pd.Series, number_format: str = "plain") -> pd.Series:
+    """float64 (or int) values; NaN where a value is not a number."""
+    if number_format != "tr":
+        return pd.to_numeric(values, errors="coerce")
+    text = _strings(values)
+    normalized = text.where(~text.str.match(TR_NUMBER, na=False), text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    parsed = pd.to_numeric(normalized, errors="coerce")
+    others = text.isna() & values.notna()
+    if others.any():
+        parsed = parsed.astype(float)
+        parsed[others] = pd.to_numeric(values[others], errors="coerce")
+    return parsed
+
+
+def detect_date_format(text: pd.Series, min_ratio: float = TYPE_THRESHOLD) -> Optional[str]:
+    """First of DATE_FORMATS that parses at least min_ratio of the (stripped) strings."""
+    text = text.dropna()
+    if text.empty:
+        return None
+    for fmt in DATE_FORMATS:
+        if pd.to_datetime(text, format=fmt, errors="coerce").notna().mean() >= min_ratio:
+            return fmt
+    return None
+
+
+def parse_dates(values: pd.Series, date_format: Optional[str] = None) -> pd.Series:
+    """datetime64 values; NaT where a value is not a date. date_format=None means dayfirst."""
+    text = _strings(values)
+    is_text = text.notna()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    if is_text.any():
+        if date_format and date_format != "dayfirst":
+            parsed[is_text] = pd.to_datetime(text[is_text], format=date_format, errors="coerce")
+        else:
+            candidates = is_text & text.str.match(DATE_LIKE, na=False)
+            if candidates.any():
+                parsed[candidates] = pd.to_datetime(text[candidates], dayfirst=True, format="mixed", errors="coerce")
+    # Excel cells already holding dates (numbers are not dates)
+    others = values[~is_text & values.notna()]
+    if not others.empty:
+        is_date = others.map(lambda v: isinstance(v, (dt.date, dt.datetime, pd.Timestamp)))
+        if is_date.any():
+            parsed[is_date[is_date].index] = pd.to_datetime(others[is_date], errors="coerce")
+    return parsed
+
+
+def _factorize(series: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _by_uniques(series: pd.Series, parse) -> pd.Series:
+    """Apply parse() to the unique values only and broadcast the result back."""
+    codes, uniques = _factorize(series)
+    parsed = parse(uniques).reset_index(drop=True)
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+def _sample(series: pd.Series, size: Optional[int] = None) -> pd.Series:
+    size = size or TYPE_SAMPLE_ROWS
+    n = len(series)
+    picked = series if n <= size else series.iloc[np.linspace(0, n - 1, size).astype(int)]
+    picked = picked.dropna()
+    if picked.empty and n > size:
+        # Sparse column: sample its non-empty values instead
+        picked = series.dropna().iloc[:size]
+    return picked
+
+
+# ============================================================
+# INFERENCE
+# ============================================================
+
+def _confirm(series: pd.Series, kind: str, fmt: str, parse) -> ColumnType:
+    """Verdict from the confirm sample's unique values, weighted by their frequency."""
+    codes, uniques = _factorize(_sample(series, TYPE_CONFIRM_ROWS))
+    ok = parse(uniques).notna().to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    total = int(counts.sum())
+    return ColumnType(
+        kind=kind,
+        source="content",
+        valid_ratio=round(float(counts[ok].sum() / total), 4) if total else 0.0,
+        number_format=fmt if kind == "numeric" else None,
+        date_format=fmt if kind == "date" else None,
+        invalid_values=[str(v) for v in uniques[~ok].iloc[:INVALID_EXAMPLES]],
+    )
+
+
+def infer_column(series: pd.Series, threshold: float = TYPE_THRESHOLD) -> ColumnType:
+    """Verdict for one column (see module docstring)."""
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return ColumnType("numeric", "dtype", 1.0)
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return ColumnType("date", "dtype", 1.0)
+
+    sample = _sample(series)
+    if sample.empty:
+        return ColumnType("empty", "content")
+    sample_uniques = pd.Series(sample.unique(), dtype=object)
+
+    # Numbers before dates: "2024" or "20240101" are numbers
+    number_format = detect_number_format(sample_uniques)
+    if parse_numbers(sample, number_format).notna().mean() >= threshold:
+        verdict = _confirm(series, "numeric", number_format, lambda u: parse_numbers(u, number_format))
+        if verdict.valid_ratio >= threshold:
+            return verdict
+
+    text = _strings(sample)
+    if text.str.match(DATE_LIKE, na=False).mean() >= threshold or not text.notna().any():
+        date_format = detect_date_format(_strings(sample_uniques), threshold) or "dayfirst"
+        if parse_dates(sample, date_format).notna().mean() >= threshold:
+            verdict = _confirm(series, "date", date_format, lambda u: parse_dates(u, date_format))
+            if verdict.valid_ratio >= threshold:
+                return verdict
+
+    return ColumnType("text", "content")
+
+
+def coerce_column(series: pd.Series, verdict: ColumnType) -> pd.Series:
+    """Convert a column according to its verdict (text/typed columns are returned as is)."""
+    if verdict.source != "content" or verdict.kind not in ("numeric", "date"):
+        return series
+    if verdict.kind == "numeric":
+        return _by_uniques(series, lambda u: parse_numbers(u, verdict.number_format))
+    return _by_uniques(series, lambda u: parse_dates(u, verdict.date_format))
+
+
+# ============================================================
+# FRAME-LEVEL CACHE
+# ============================================================
+
+_cache: "OrderedDict[Hashable, Dict[str, ColumnType]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def infer_column_types(
+    df: pd.DataFrame,
+    threshold: float = TYPE_THRESHOLD,
+    cache_key: Optional[Hashable] = None,
+) -> Dict[str, ColumnType]:
+    """
+    Verdicts for every column, keyed by str(column). With cache_key (e.g.
+    (content_sha256, sheet, header_row)) the result is reused for the same
+    upload as long as the column names match.
+    """
+    columns = [str(c) for c in df.columns]
+    key = (cache_key, threshold, tuple(columns)) if cache_key is not None else None
+    if key is not None:
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+                return cached
+
+    verdicts = {name: infer_column(df.iloc[:, i], threshold) for i, name in enumerate(columns)}
+
+    if key is not None:
+        with _cache_lock:
+            _cache[key] = verdicts
+            while len(_cache) > TYPE_CACHE_ENTRIES:
+                _cache.popitem(last=False)
+    return verdicts
+
+
+def clear_type_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
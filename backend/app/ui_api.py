@@ -5,9 +5,12 @@ from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 from typing import Dict, Any, List, Optional
 import json
 import pandas as pd
-from io import BytesIO
 from pathlib import Path
 
+from .ingest import ingest_upload
+from .type_inference import infer_column_types
+from .workbook_session import open_workbook_upload
+
 # Router tanımlaması
 router = APIRouter(tags=["ui"])
 
@@ -184,44 +187,29 @@ async def inspect_file(
     print(f"[DEBUG] /ui/inspect called - sheet_name: '{sheet_name}', header_row: {header_row_int}")
     
     try:
-        content = await file.read()
-        filename = file.filename.lower()
-        
-        # Sheet listesi ve aktif sheet
-        sheet_names = []
-        active_sheet = None
+        # Workbook oturumu: dosya bir kez açılır, sayfa /viz ve /run ile paylaşılır
+        session = await open_workbook_upload(file)
         
         # Header row için pandas parametresi (0-indexed)
         pandas_header = header_row_int if header_row_int >= 0 else 0
         
-        if filename.endswith(".csv"):
-            # CSV için header parametresi ve skiprows
-            df_preview = pd.read_csv(BytesIO(content), header=pandas_header, nrows=10)
-            df_full = pd.read_csv(BytesIO(content), header=pandas_header)
-            
-            # Ham satırları al (başlık seçimi UI için)
-            raw_df = pd.read_csv(BytesIO(content), header=None, nrows=10)
-        else:
-            # Excel dosyası - sheet listesini al
-            xls = pd.ExcelFile(BytesIO(content))
-            sheet_names = xls.sheet_names
-            
-            # Aktif sheet: parametre veya ilk sayfa
-            active_sheet = sheet_name if sheet_name in sheet_names else sheet_names[0]
-            print(f"[DEBUG] sheet_names: {sheet_names}, active_sheet: {active_sheet}")
-            
-            # Header parametresi ile oku
-            df_preview = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=pandas_header, nrows=10)
-            df_full = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=pandas_header)
-            
-            # Ham satırları al (başlık seçimi UI için)
-            raw_df = pd.read_excel(BytesIO(content), sheet_name=active_sheet, header=None, nrows=10)
-            
-            print(f"[DEBUG] Read from '{active_sheet}': {len(df_full)} rows, columns: {list(df_preview.columns)[:3]}...")
+        # Sheet listesi (CSV için boş) ve aktif sheet: parametre veya ilk sayfa
+        sheet_names = session.sheet_names
+        active_sheet = session.resolve(sheet_name)
+        print(f"[DEBUG] sheet_names: {sheet_names}, active_sheet: {active_sheet}")
+        
+        df_preview = session.head(active_sheet, nrows=10, header=pandas_header)
+        df_full = session.sheet(active_sheet, header_row=pandas_header, parse_dates=False, copy=False)
+        
+        # Ham satırları al (başlık seçimi UI için)
+        raw_df = session.head(active_sheet, nrows=10, header=None)
         
         columns = list(df_preview.columns)
         row_count = len(df_full)
         
+        # Sütun tipleri (/viz/data ile aynı motor ve önbellek)
+        column_types = infer_column_types(df_full, cache_key=(session.sha256, active_sheet, pandas_header, None))
+        
         # Excel harf kodu eşleştirmesi (A=0, B=1, ...)
         def index_to_letter(idx):
             result = ""
@@ -262,6 +250,7 @@ async def inspect_file(
             "sheet_names": sheet_names,       # YENİ
             "active_sheet": active_sheet,     # YENİ
             "header_row": header_row_int,         # YENİ: Seçili başlık satırı
+            "column_types": {col: verdict.to_dict() for col, verdict in column_types.items()},
         }
     except Exception as e:
         print(f"[HATA] Dosya analiz hatası: {e}")
@@ -276,14 +265,13 @@ async def get_unique_values(file: UploadFile = File(...), column: str = ""):
     Checkbox filtre UI için kullanılır.
     """
     try:
-        content = await file.read()
         filename = file.filename.lower()
-        
-        if filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(content))
-        else:
-            # Header satırını atla (YKS verileri için genelde 2. satır)
-            df = pd.read_excel(BytesIO(content))
+        with await ingest_upload(file) as content, content.open() as source:
+            if filename.endswith(".csv"):
+                df = pd.read_csv(source)
+            else:
+                # Header satırını atla (YKS verileri için genelde 2. satır)
+                df = pd.read_excel(source)
         
         if column not in df.columns:
             # Sütun bulunamadı - belki Excel harfi olarak geldi?
@@ -313,6 +301,8 @@ async def get_unique_values(file: UploadFile = File(...), column: str = ""):
             "values": unique_values,
             "total_count": len(unique_values)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[HATA] Benzersiz değer çekme hatası: {e}")
         return {"values": [], "error": str(e)}
@@ -1,14 +1,31 @@
 """
 WebSocket Collaboration API - Opradox Visual Studio
 Gerçek zamanlı işbirliği için WebSocket endpoint'leri
+
+Oda mesajları ve oda üyeliği pub/sub omurgası (pubsub.py) üzerinden
+diğer worker'lara da iletilir; farklı worker'a bağlanan kullanıcılar
+aynı odayı görür. Her worker oda üyeliğini PRESENCE_HEARTBEAT_S'de bir
+yeniden duyurur; PRESENCE_TTL_S boyunca duyurmayan (çökmüş) worker'ın
+kullanıcıları listeden düşer.
 """
 from __future__ import annotations
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import os
 import json
+import time
 import asyncio
 from datetime import datetime
 
+from .ws_fanout import FanoutHub
+from .pubsub import get_pubsub
+
+ROOM_CHANNEL_PREFIX = "room:"
+
+# Diğer worker'lardan gelen üyelik bilgisi bu süre yenilenmezse silinir
+PRESENCE_TTL_S = float(os.getenv("WS_PRESENCE_TTL_S", "30"))
+PRESENCE_HEARTBEAT_S = PRESENCE_TTL_S / 3
+
 router = APIRouter(prefix="/viz/ws", tags=["websocket"])
 
 
@@ -16,20 +33,33 @@ router = APIRouter(prefix="/viz/ws", tags=["websocket"])
 class ConnectionManager:
     """WebSocket bağlantı yöneticisi"""
     
-    def __init__(self):
+    def __init__(self, pubsub=None):
+        # Pub/sub omurgası (None = süreç genelindeki get_pubsub())
+        self._pubsub = pubsub
         # room_id -> Set[WebSocket] şeklinde odalar
         self.rooms: Dict[str, Set[WebSocket]] = {}
         # websocket -> {room_id, user_id, username}
         self.connections: Dict[WebSocket, dict] = {}
+        # Oda başına kuyruklu gönderim; yavaş istemci diğerlerini bekletmez
+        self.hub = FanoutHub("collaborate")
+        # room_id -> worker_id -> o worker'daki kullanıcılar
+        self.remote_users: Dict[str, Dict[str, List[dict]]] = {}
+        # room_id -> worker_id -> son üyelik duyurusunun zamanı (monotonic)
+        self.remote_seen: Dict[str, Dict[str, float]] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Diğer worker'lara gidecek son cursor mesajları (room_id, key) -> mesaj
+        self._remote_pending: Dict[tuple, dict] = {}
     
     async def connect(self, websocket: WebSocket, room_id: str, user_id: str, username: str):
         """Yeni bağlantı kabul et"""
         await websocket.accept()
         
-        if room_id not in self.rooms:
+        first_local = room_id not in self.rooms
+        if first_local:
             self.rooms[room_id] = set()
         
         self.rooms[room_id].add(websocket)
+        self.hub.register(room_id, websocket, on_drop=self._on_slow_drop)
         self.connections[websocket] = {
             "room_id": room_id,
             "user_id": user_id,
@@ -37,6 +67,12 @@ class ConnectionManager:
             "connected_at": datetime.now().isoformat()
         }
         
+        # Odaya bu worker'da ilk kez girildiyse diğer worker'lardan üyelik iste
+        if first_local:
+            await self._publish_remote(room_id, {"kind": "presence_request"})
+        await self.announce_presence(room_id)
+        self._ensure_heartbeat()
+        
         # Diğer kullanıcılara bildir
         await self.broadcast_to_room(room_id, {
             "type": "user_joined",
@@ -48,6 +84,7 @@ class ConnectionManager:
     
     def disconnect(self, websocket: WebSocket):
         """Bağlantıyı kapat"""
+        self.hub.unregister(websocket)
         if websocket in self.connections:
             info = self.connections[websocket]
             room_id = info["room_id"]
@@ -63,25 +100,132 @@ class ConnectionManager:
             return info
         return None
     
-    async def broadcast_to_room(self, room_id: str, message: dict, exclude: WebSocket = None):
-        """Odadaki tüm kullanıcılara mesaj gönder"""
-        if room_id not in self.rooms:
-            return
+    def _on_slow_drop(self, websocket: WebSocket):
+        """Yetişemeyen istemci düşürüldü: kaydını sil, odaya bildir"""
+        info = self.disconnect(websocket)
+        if info:
+            asyncio.get_running_loop().create_task(self.announce_left(info))
+    
+    async def announce_left(self, info: dict):
+        """Ayrılan kullanıcıyı tüm worker'lardaki oda üyelerine bildir"""
+        await self.announce_presence(info["room_id"])
+        await self.broadcast_to_room(info["room_id"], {
+            "type": "user_left",
+            "user_id": info["user_id"],
+            "username": info["username"],
+            "timestamp": datetime.now().isoformat(),
+            "active_users": self.get_room_users(info["room_id"])
+        })
+    
+    async def broadcast_to_room(self, room_id: str, message: dict, exclude: WebSocket = None,
+                                coalesce_key: str = None):
+        """
+        Odadaki tüm kullanıcılara mesaj gönder.
         
-        disconnected = []
-        for connection in self.rooms[room_id]:
-            if connection != exclude:
-                try:
-                    await connection.send_json(message)
-                except:
-                    disconnected.append(connection)
+        Mesaj bir kez serialize edilip her bağlantının kuyruğuna eklenir;
+        coalesce_key verilen mesajlarda (cursor) sadece en sonuncusu gider
+        ve oda başına saniyedeki kare sayısı sınırlanır.
+        """
+        if room_id in self.rooms:
+            self.hub.publish(room_id, message, coalesce_key=coalesce_key, exclude=exclude)
         
-        # Kopan bağlantıları temizle
-        for conn in disconnected:
-            self.disconnect(conn)
+        envelope = {"kind": "message", "message": message, "coalesce_key": coalesce_key}
+        if coalesce_key is None or self.hub.min_interval == 0:
+            await self._publish_remote(room_id, envelope)
+            return
+        # Cursor gibi mesajlar diğer worker'lara da oda FPS sınırıyla gider
+        pending_key = (room_id, coalesce_key)
+        if pending_key not in self._remote_pending:
+            asyncio.get_running_loop().call_later(
+                self.hub.min_interval,
+                lambda: asyncio.ensure_future(self._flush_remote(pending_key))
+            )
+        self._remote_pending[pending_key] = envelope
+    
+    async def _flush_remote(self, pending_key: tuple):
+        envelope = self._remote_pending.pop(pending_key, None)
+        if envelope:
+            await self._publish_remote(pending_key[0], envelope)
+    
+    # ---------------- pub/sub omurgası ----------------
+    
+    @property
+    def bus(self):
+        return self._pubsub or get_pubsub()
+    
+    async def _publish_remote(self, room_id: str, envelope: dict):
+        """Mesajı sadece diğer worker'lara gönder (yerel teslim zaten yapıldı)"""
+        envelope["worker"] = self.bus.worker_id
+        await self.bus.publish(f"{ROOM_CHANNEL_PREFIX}{room_id}", envelope, local=False)
+    
+    async def announce_presence(self, room_id: str):
+        """Bu worker'daki oda kullanıcılarını diğer worker'lara duyur"""
+        await self._publish_remote(room_id, {"kind": "presence", "users": self._local_users(room_id)})
+    
+    async def on_backbone_message(self, channel: str, envelope: dict, remote: bool):
+        """Başka worker'dan gelen oda mesajı / üyelik bilgisi"""
+        if not remote or envelope.get("worker") == self.bus.worker_id:
+            return
+        room_id = channel[len(ROOM_CHANNEL_PREFIX):]
+        kind = envelope.get("kind")
+        if kind == "message":
+            if room_id in self.rooms:
+                self.hub.publish(room_id, envelope["message"], coalesce_key=envelope.get("coalesce_key"))
+        elif kind == "presence":
+            workers = self.remote_users.setdefault(room_id, {})
+            seen = self.remote_seen.setdefault(room_id, {})
+            if envelope.get("users"):
+                workers[envelope["worker"]] = envelope["users"]
+                seen[envelope["worker"]] = time.monotonic()
+            else:
+                workers.pop(envelope["worker"], None)
+                seen.pop(envelope["worker"], None)
+                if not workers:
+                    del self.remote_users[room_id]
+                    del self.remote_seen[room_id]
+        elif kind == "presence_request":
+            if room_id in self.rooms:
+                await self.announce_presence(room_id)
+    
+    def _ensure_heartbeat(self):
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+    
+    async def _heartbeat_loop(self):
+        """Yerel odaların üyeliğini düzenli duyur (diğer worker'lardaki TTL'i yeniler)"""
+        while self.rooms:
+            await asyncio.sleep(PRESENCE_HEARTBEAT_S)
+            for room_id in list(self.rooms):
+                try:
+                    await self.announce_presence(room_id)
+                except Exception as e:
+                    print(f"[WS] Presence heartbeat error ({room_id}): {e}")
+    
+    def expire_remote(self, now: float = None) -> int:
+        """PRESENCE_TTL_S boyunca duyuru yapmayan worker'ların kullanıcılarını sil"""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        for room_id in list(self.remote_seen):
+            seen = self.remote_seen[room_id]
+            for worker in [w for w, at in seen.items() if now - at > PRESENCE_TTL_S]:
+                del seen[worker]
+                self.remote_users.get(room_id, {}).pop(worker, None)
+                expired += 1
+            if not seen:
+                del self.remote_seen[room_id]
+                self.remote_users.pop(room_id, None)
+        return expired
     
     def get_room_users(self, room_id: str) -> List[dict]:
-        """Odadaki kullanıcıları listele"""
+        """Odadaki kullanıcıları listele (tüm worker'lar)"""
+        self.expire_remote()
+        users = self._local_users(room_id)
+        for remote in self.remote_users.get(room_id, {}).values():
+            users.extend(remote)
+        return users
+    
+    def _local_users(self, room_id: str) -> List[dict]:
+        """Bu worker'a bağlı oda kullanıcıları"""
         if room_id not in self.rooms:
             return []
         
@@ -98,6 +242,7 @@ class ConnectionManager:
 
 # Global connection manager
 manager = ConnectionManager()
+get_pubsub().subscribe(ROOM_CHANNEL_PREFIX, manager.on_backbone_message)
 
 
 @router.websocket("/collaborate/{room_id}")
@@ -174,14 +319,14 @@ async def websocket_endpoint(
                 }, exclude=websocket)
                 
             elif action == "cursor_move":
-                # Cursor pozisyonunu broadcast et (performans için throttle edilmeli)
+                # Cursor pozisyonu: kullanıcı başına son konum, oda FPS sınırı ile
                 await manager.broadcast_to_room(room_id, {
                     "type": "cursor",
                     "user_id": user_id,
                     "username": username,
                     "x": payload.get("x"),
                     "y": payload.get("y")
-                }, exclude=websocket)
+                }, exclude=websocket, coalesce_key=f"cursor:{user_id}")
                 
             elif action == "chat":
                 await manager.broadcast_to_room(room_id, {
@@ -208,29 +353,26 @@ async def websocket_endpoint(
                     "payload": payload
                 })
                 
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: yavaş istemci sunucu tarafından kapatıldıktan sonra receive
         info = manager.disconnect(websocket)
         if info:
-            await manager.broadcast_to_room(info["room_id"], {
-                "type": "user_left",
-                "user_id": info["user_id"],
-                "username": info["username"],
-                "timestamp": datetime.now().isoformat(),
-                "active_users": manager.get_room_users(info["room_id"])
-            })
+            await manager.announce_left(info)
 
 
 @router.get("/rooms")
 async def list_active_rooms():
     """Aktif işbirliği odalarını listele (admin için)"""
     rooms = []
-    for room_id, connections in manager.rooms.items():
+    manager.expire_remote()
+    for room_id in set(manager.rooms) | set(manager.remote_users):
+        users = manager.get_room_users(room_id)
         rooms.append({
             "room_id": room_id,
-            "user_count": len(connections),
-            "users": manager.get_room_users(room_id)
+            "user_count": len(users),
+            "users": users
         })
-    return {"rooms": rooms, "total": len(rooms)}
+    return {"rooms": rooms, "total": len(rooms), "fanout": manager.hub.stats()}
 
 
 @router.get("/room/{room_id}/users")
@@ -0,0 +1,310 @@
+"""
+Workbook Session - Opradox Excel Studio
+An uploaded workbook opened once and shared by every read that needs it.
+
+A session wraps the spooled upload (ingest.py) and answers:
+- sheet_names: from xl/workbook.xml only (no cell is parsed);
+- sheet(name, header_row): the parsed table, read lazily through
+  read_table_from_ingested (admission + dtype pass) and cached;
+- head(name, nrows): small header-less/limited reads for previews;
+- prefetch(specs): several sheets parsed in parallel threads.
+
+Sessions are keyed by the upload's SHA-256, so the cross-sheet reads of a
+report (merge / union / diff against another sheet), a second upload of the
+same file and the /viz endpoints the frontend calls one after another all
+reuse the same parsed sheets. Cached frames are handed out as copies, so a
+scenario that edits its input cannot change what the next caller sees;
+single-sheet reads can skip the cache (sheet(cache=False)) to avoid
+holding the frame twice. Sessions expire after WORKBOOK_SESSION_TTL_S and
+the least recently used ones are dropped when the cached frames exceed
+WORKBOOK_CACHE_MB. Cached frames are reserved in the admission memory
+budget, which drops sessions when an upload needs the space.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fastapi import UploadFile, HTTPException
+
+from .admission import frame_memory_bytes, memory_budget, xlsx_sheets
+from .columnar_io import COLUMNAR_EXTENSIONS, read_columnar
+from .excel_utils import read_table_from_ingested
+from .ingest import IngestedFile, ingest_file, ingest_upload
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+WORKBOOK_SESSION_TTL_S = int(os.getenv("WORKBOOK_SESSION_TTL_S", "600"))
+WORKBOOK_MAX_SESSIONS = int(os.getenv("WORKBOOK_MAX_SESSIONS", "16"))
+
+# Parsed frames kept across requests (all sessions together)
+WORKBOOK_CACHE_MB = int(os.getenv("WORKBOOK_CACHE_MB", "512"))
+
+# Threads used when several sheets are needed at once
+WORKBOOK_PARSE_THREADS = int(os.getenv("WORKBOOK_PARSE_THREADS", "4"))
+
+SheetSpec = Tuple[Optional[str], int]
+
+# Formats with sheets; CSV and columnar files hold a single table
+WORKBOOK_EXTENSIONS = (".xlsx", ".xls")
+
+
+class WorkbookSession:
+    """One uploaded file; sheets are parsed on first use and cached."""
+
+    def __init__(self, ingested: IngestedFile):
+        self.ingested = ingested
+        self.filename = ingested.filename
+        self.ext = ingested.ext
+        self.sha256 = ingested.sha256
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.nbytes = 0
+        self.hits = 0
+        self.parses = 0
+        self._frames: Dict[tuple, pd.DataFrame] = {}
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._sheet_names: Optional[List[str]] = None
+
+    # ---------------- metadata ----------------
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Sheet names in workbook order ([] for CSV and columnar files)."""
+        if self._sheet_names is None:
+            if self.ext not in WORKBOOK_EXTENSIONS:
+                names = []
+            elif self.ext == ".xlsx":
+                try:
+                    with self.ingested.open() as source, zipfile.ZipFile(source) as zf:
+                        names = [name for name, _ in xlsx_sheets(zf)]
+                except zipfile.BadZipFile as e:
+                    raise HTTPException(status_code=400, detail=f"Dosya okunurken hata oluştu: {str(e)}")
+            else:
+                with self.ingested.open() as source, pd.ExcelFile(source) as xls:
+                    names = xls.sheet_names
+            self._sheet_names = names
+        return self._sheet_names
+
+    def resolve(self, sheet_name: Optional[str]) -> Optional[str]:
+        """Requested sheet if it exists, else the first one (None for single-table files)."""
+        names = self.sheet_names
+        if not names:
+            return None
+        return sheet_name if sheet_name in names else names[0]
+
+    def is_expired(self) -> bool:
+        return time.time() - self.last_access > WORKBOOK_SESSION_TTL_S
+
+    # ---------------- parsing ----------------
+
+    @property
+    def budget_key(self) -> str:
+        return f"workbook:{self.sha256}"
+
+    def _cached(self, key: tuple, load, copy: bool, store: bool = True) -> pd.DataFrame:
+        self.last_access = time.time()
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Two requests for the same sheet wait for one parse
+        with key_lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self.hits += 1
+            elif not store:
+                # Fresh frame owned by the caller: neither cached nor copied
+                self.parses += 1
+                return load()
+            else:
+                frame = load()
+                with self._lock:
+                    self._frames[key] = frame
+                    self.nbytes += frame_memory_bytes(frame)
+                    self.parses += 1
+                _enforce_budget()
+                _sync_reservation(self)
+        return frame.copy() if copy else frame
+
+    def _name(self, sheet_name: Optional[str]) -> Optional[str]:
+        if self.ext not in WORKBOOK_EXTENSIONS:
+            return None
+        return self.resolve(None) if sheet_name is None else sheet_name
+
+    def sheet(
+        self,
+        sheet_name: Optional[str] = None,
+        header_row: int = 0,
+        parse_dates: Optional[bool] = None,
+        copy: bool = True,
+        columns: Optional[Sequence[str]] = None,
+        cache: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Whole sheet as read_table_from_upload would return it (None = first
+        sheet; an unknown name raises 400 like read_table_from_upload, use
+        resolve() first for the lenient behaviour). columns projects
+        columnar files; other formats always read every column. cache=False
+        returns a newly parsed frame without keeping it (a cached one is
+        still reused).
+        """
+        name = self._name(sheet_name)
+        projection = tuple(columns) if columns and self.ext in COLUMNAR_EXTENSIONS else None
+        key = ("sheet", name, header_row, parse_dates, projection)
+        return self._cached(
+            key,
+            lambda: read_table_from_ingested(
+                self.ingested, sheet_name=name, header_row=header_row, parse_dates=parse_dates, columns=projection,
+            ),
+            copy,
+            store=cache,
+        )
+
+    def head(self, sheet_name: Optional[str] = None, nrows: Optional[int] = 15, header: Optional[int] = None) -> pd.DataFrame:
+        """
+        First nrows rows without admission or dtype pass (previews, header
+        pickers). Unknown sheet names fall back to the first sheet.
+        """
+        name = self.resolve(sheet_name)
+
+        def load() -> pd.DataFrame:
+            with self.ingested.open() as source:
+                if self.ext in COLUMNAR_EXTENSIONS:
+                    if header is None:
+                        # Raw preview: column names are the first row, as in a header-less CSV read
+                        frame = read_columnar(source, self.ext, nrows=None if nrows is None else max(nrows - 1, 0)).astype(object)
+                        return pd.DataFrame([list(frame.columns)] + frame.values.tolist())
+                    return read_columnar(source, self.ext, nrows=nrows)
+                if self.ext == ".csv":
+                    return pd.read_csv(source, header=header, nrows=nrows)
+                return pd.read_excel(source, sheet_name=name, header=header, nrows=nrows)
+
+        return self._cached(("head", name, header, nrows), load, copy=True)
+
+    def prefetch(self, specs: Sequence[SheetSpec], parse_dates: Optional[bool] = None) -> None:
+        """
+        Parse several (sheet, header_row) pairs in parallel threads. Errors are
+        left for the later sheet() call to raise, where the caller handles them.
+        """
+        keys = {(self._name(name), header_row) for name, header_row in specs}
+        missing = [k for k in keys if ("sheet", k[0], k[1], parse_dates, None) not in self._frames]
+        if len(missing) < 2:
+            return
+
+        def load(spec: SheetSpec) -> None:
+            try:
+                self.sheet(spec[0], spec[1], parse_dates=parse_dates, copy=False)
+            except Exception as e:
+                print(f"[WORKBOOK] {self.filename} / {spec[0]}: {e}")
+
+        with ThreadPoolExecutor(max_workers=min(WORKBOOK_PARSE_THREADS, len(missing))) as pool:
+            list(pool.map(load, missing))
+
+    def release(self) -> None:
+        """Drop the cached frames. The spooled upload is freed once no request holds the session."""
+        with self._lock:
+            self._frames.clear()
+            self.nbytes = 0
+        memory_budget.release(self.budget_key)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "filename": self.filename,
+            "sha256": self.sha256,
+            "sheets": len(self._sheet_names or []),
+            "cached_frames": len(self._frames),
+            "nbytes": self.nbytes,
+            "hits": self.hits,
+            "parses": self.parses,
+        }
+
+
+# ============================================================
+# SESSION REGISTRY
+# ============================================================
+
+_sessions: "OrderedDict[str, WorkbookSession]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def _enforce_budget() -> None:
+    """Drop expired sessions, then least recently used ones over the limits."""
+    with _registry_lock:
+        for sha in [k for k, s in _sessions.items() if s.is_expired()]:
+            _sessions.pop(sha).release()
+        budget = WORKBOOK_CACHE_MB * 1024 ** 2
+        while len(_sessions) > 1 and (
+            len(_sessions) > WORKBOOK_MAX_SESSIONS
+            or sum(s.nbytes for s in _sessions.values()) > budget
+        ):
+            _, oldest = _sessions.popitem(last=False)
+            oldest.release()
+
+
+def _sync_reservation(session: WorkbookSession) -> None:
+    """Reserve a registered session's cached bytes in the memory budget."""
+    with _registry_lock:
+        if _sessions.get(session.sha256) is session and session.nbytes:
+            memory_budget.reserve(session.budget_key, session.nbytes, label=f"workbook {session.filename}")
+        else:
+            memory_budget.release(session.budget_key)
+
+
+def _reclaim(needed_bytes: int) -> None:
+    """Drop least recently used sessions until needed_bytes are freed."""
+    with _registry_lock:
+        freed = 0
+        while _sessions and freed < needed_bytes:
+            _, oldest = _sessions.popitem(last=False)
+            freed += oldest.nbytes
+            oldest.release()
+
+
+memory_budget.add_reclaimer(_reclaim)
+
+
+def session_for(ingested: IngestedFile) -> WorkbookSession:
+    """Session of an ingested upload; an existing one with the same content is reused."""
+    with _registry_lock:
+        session = _sessions.get(ingested.sha256)
+        if session is not None and session.is_expired():
+            _sessions.pop(ingested.sha256).release()
+            session = None
+        if session is None:
+            session = WorkbookSession(ingested)
+            _sessions[ingested.sha256] = session
+        elif session.ingested is not ingested:
+            # Same bytes already open: keep the parsed sheets, drop the new copy
+            ingested.close()
+        session.last_access = time.time()
+        _sessions.move_to_end(ingested.sha256)
+    _enforce_budget()
+    return session
+
+
+def open_workbook(upload: UploadFile) -> WorkbookSession:
+    """Session for an UploadFile (synchronous ingest)."""
+    return session_for(ingest_file(upload.file, upload.filename))
+
+
+async def open_workbook_upload(upload: UploadFile) -> WorkbookSession:
+    """Session for an UploadFile without blocking the event loop on large reads."""
+    return session_for(await ingest_upload(upload))
+
+
+def workbook_stats() -> List[Dict[str, object]]:
+    with _registry_lock:
+        return [s.to_dict() for s in _sessions.values()]
+
+
+def clear_sessions() -> None:
+    with _registry_lock:
+        while _sessions:
+            _sessions.popitem()[1].release()
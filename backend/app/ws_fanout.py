@@ -0,0 +1,297 @@
+"""
+WebSocket Fan-out - Opradox Excel Studio
+Backpressure-aware broadcasting for the queue and collaboration sockets.
+
+Every connection gets a bounded send queue drained by its own writer task,
+so a slow client only delays itself. Events are serialized once per
+publish, events with a coalesce key (cursor moves, job progress) are
+latest-wins both per connection and per group, and coalescable traffic is
+capped at WS_GROUP_MAX_FPS flushes per second per group. A client whose
+queue is full of frames that cannot be dropped is disconnected instead of
+blocking the broadcaster.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from fastapi import WebSocket
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Frames buffered per connection before degrading / dropping the client
+WS_SEND_QUEUE_MAX = int(os.getenv("WS_SEND_QUEUE_MAX", "256"))
+# A single send slower than this marks the client as dead
+WS_SEND_TIMEOUT_S = float(os.getenv("WS_SEND_TIMEOUT_S", "5"))
+# Max flushes per second of coalescable events per group (room / user)
+WS_GROUP_MAX_FPS = float(os.getenv("WS_GROUP_MAX_FPS", "20"))
+
+# Close code sent to clients that could not keep up ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def serialize_event(event: Dict[str, Any]) -> str:
+    """JSON text frame for an event (done once per publish, not per socket)."""
+    return json.dumps(event, ensure_ascii=False, default=str)
+
+
+# ============================================================
+# PER-CONNECTION SENDER
+# ============================================================
+
+class ConnectionSender:
+    """
+    Bounded send queue + writer task for one WebSocket.
+
+    Queue keys are ("k", coalesce_key) for latest-wins frames and
+    ("#", seq) for frames that must all be delivered. Replacing a
+    coalesced frame keeps its place in line.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        group: str,
+        hub: "FanoutHub",
+        on_drop: Optional[Callable[[WebSocket], Any]] = None,
+    ):
+        self.websocket = websocket
+        self.group = group
+        self.hub = hub
+        self.on_drop = on_drop
+        self.closed = False
+        self._frames: "OrderedDict[Tuple[str, Any], str]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._seq = 0
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, text: str, coalesce_key: Any = None) -> bool:
+        """Queue a frame without waiting. Returns False if it was dropped."""
+        if self.closed:
+            return False
+        if coalesce_key is not None:
+            key = ("k", coalesce_key)
+            if key in self._frames:
+                self._frames[key] = text
+                self.coalesced += 1
+                return True
+        else:
+            self._seq += 1
+            key = ("#", self._seq)
+
+        if len(self._frames) >= self.hub.max_queue:
+            # Degrade first: the oldest coalescable frame is stale anyway
+            victim = next((k for k in self._frames if k[0] == "k"), None)
+            if victim is not None:
+                del self._frames[victim]
+                self.dropped += 1
+            elif coalesce_key is not None:
+                self.dropped += 1
+                return False
+            else:
+                self.hub.drop(self, "slow_consumer")
+                return False
+
+        self._frames[key] = text
+        self._wakeup.set()
+        return True
+
+    def pending(self) -> int:
+        return len(self._frames)
+
+    async def _run(self) -> None:
+        while not self.closed:
+            if not self._frames:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            _, text = self._frames.popitem(last=False)
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), WS_SEND_TIMEOUT_S)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.hub.drop(self, "send_failed")
+                return
+
+    def stop(self) -> None:
+        self.closed = True
+        self._frames.clear()
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+# ============================================================
+# FAN-OUT HUB
+# ============================================================
+
+class FanoutHub:
+    """Groups of connections (rooms or user keys) with non-blocking publish."""
+
+    def __init__(
+        self,
+        name: str,
+        max_queue: int = WS_SEND_QUEUE_MAX,
+        max_fps: float = WS_GROUP_MAX_FPS,
+    ):
+        self.name = name
+        self.max_queue = max_queue
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.groups: Dict[str, Dict[WebSocket, ConnectionSender]] = {}
+        self._senders: Dict[WebSocket, ConnectionSender] = {}
+        # group -> coalesce_key -> (text, exclude) waiting for the next flush
+        self._pending: Dict[str, "OrderedDict[Any, Tuple[str, Optional[WebSocket]]]"] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.published = 0
+        self.throttled = 0
+        self.slow_disconnects = 0
+
+    # ---------------- membership ----------------
+
+    def register(
+        self,
+        group: str,
+        websocket: WebSocket,
+        on_drop: Optional[Callable[[WebSocket], Any]] = None,
+    ) -> ConnectionSender:
+        """Attach an accepted WebSocket to a group and start its writer."""
+        sender = ConnectionSender(websocket, group, self, on_drop)
+        self.groups.setdefault(group, {})[websocket] = sender
+        self._senders[websocket] = sender
+        sender.start()
+        return sender
+
+    def unregister(self, websocket: WebSocket) -> Optional[str]:
+        """Detach a WebSocket; returns its group (None if unknown)."""
+        sender = self._senders.pop(websocket, None)
+        if sender is None:
+            return None
+        sender.stop()
+        members = self.groups.get(sender.group)
+        if members is not None:
+            members.pop(websocket, None)
+            if not members:
+                del self.groups[sender.group]
+                self._pending.pop(sender.group, None)
+                self._last_flush.pop(sender.group, None)
+                timer = self._timers.pop(sender.group, None)
+                if timer:
+                    timer.cancel()
+        return sender.group
+
+    def drop(self, sender: ConnectionSender, reason: str) -> None:
+        """Disconnect a client that cannot keep up."""
+        if sender.closed:
+            return
+        self.unregister(sender.websocket)
+        if reason == "slow_consumer":
+            self.slow_disconnects += 1
+        print(f"[WS-FANOUT] {self.name}: dropped connection in {sender.group} ({reason})")
+        if sender.on_drop:
+            sender.on_drop(sender.websocket)
+        asyncio.get_running_loop().create_task(self._close_quietly(sender.websocket))
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    # ---------------- publishing ----------------
+
+    def publish(
+        self,
+        group: str,
+        event: Dict[str, Any],
+        coalesce_key: Any = None,
+        exclude: Optional[WebSocket] = None,
+    ) -> int:
+        """
+        Broadcast an event to a group without awaiting any socket.
+
+        Events with a coalesce_key are latest-wins and rate-capped per
+        group; others are queued immediately. Returns the number of
+        connections the frame was queued for (0 if it was deferred).
+        """
+        members = self.groups.get(group)
+        if not members:
+            return 0
+        text = serialize_event(event)
+        self.published += 1
+
+        if coalesce_key is None or self.min_interval == 0:
+            return self._deliver(group, text, coalesce_key, exclude)
+
+        now = time.monotonic()
+        pending = self._pending.setdefault(group, OrderedDict())
+        if not pending and now - self._last_flush.get(group, 0.0) >= self.min_interval:
+            self._last_flush[group] = now
+            return self._deliver(group, text, coalesce_key, exclude)
+
+        if coalesce_key in pending:
+            self.throttled += 1
+        pending[coalesce_key] = (text, exclude)
+        if group not in self._timers:
+            delay = max(0.0, self.min_interval - (now - self._last_flush.get(group, 0.0)))
+            self._timers[group] = asyncio.get_running_loop().call_later(delay, self._flush_group, group)
+        return 0
+
+    def send_to(self, websocket: WebSocket, event: Dict[str, Any]) -> bool:
+        """Queue a frame for a single connection (pings, direct replies)."""
+        sender = self._senders.get(websocket)
+        return sender.enqueue(serialize_event(event)) if sender else False
+
+    def _deliver(self, group: str, text: str, coalesce_key: Any, exclude: Optional[WebSocket]) -> int:
+        count = 0
+        for websocket, sender in list(self.groups.get(group, {}).items()):
+            if websocket is exclude:
+                continue
+            if sender.enqueue(text, coalesce_key):
+                count += 1
+        return count
+
+    def _flush_group(self, group: str) -> None:
+        self._timers.pop(group, None)
+        pending = self._pending.pop(group, None)
+        if not pending:
+            return
+        self._last_flush[group] = time.monotonic()
+        for key, (text, exclude) in pending.items():
+            self._deliver(group, text, key, exclude)
+
+    # ---------------- introspection ----------------
+
+    def group_size(self, group: str) -> int:
+        return len(self.groups.get(group, {}))
+
+    def connection_count(self) -> int:
+        return len(self._senders)
+
+    def stats(self) -> Dict[str, Any]:
+        senders = list(self._senders.values())
+        return {
+            "connections": len(senders),
+            "groups": len(self.groups),
+            "published": self.published,
+            "throttled": self.throttled,
+            "coalesced": sum(s.coalesced for s in senders),
+            "dropped_frames": sum(s.dropped for s in senders),
+            "queued_frames": sum(s.pending() for s in senders),
+            "slow_disconnects": self.slow_disconnects,
+            "max_queue": self.max_queue,
+            "max_fps": round(1.0 / self.min_interval, 2) if self.min_interval else None,
+        }
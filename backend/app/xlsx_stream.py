@@ -0,0 +1,202 @@
+"""
+XLSX Streaming Reader - Opradox Excel Studio
+Reads a worksheet as a sequence of typed DataFrame chunks.
+
+pd.read_excel collects every row of the sheet as Python objects before the
+DataFrame is built, so wide sheets cost 10-20x the file size at peak. This
+reader opens the workbook with openpyxl read_only=True (rows are parsed
+from the sheet XML as they are iterated) and yields chunk_rows rows at a
+time, so peak memory is one chunk plus the shared-strings table.
+
+Header handling matches the regular path where it can: header_row skips
+leading rows (titles), empty names become "Unnamed: i" and duplicates get
+".1", ".2" suffixes. With header_rows > 1 (e.g. a merged "Genel Kontenjan"
+group over "Kontenjan | Yerleşen"), merged header cells are spread over
+their range and the rows are joined into one name per column.
+"""
+from __future__ import annotations
+import os
+import re
+import zipfile
+from typing import Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from .admission import _col_index, _xlsx_sheet_path
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+XLSX_CHUNK_ROWS = int(os.getenv("XLSX_CHUNK_ROWS", "50000"))
+
+# Separator between the parts of a multi-row header
+HEADER_JOIN = " - "
+
+# Block size when scanning the sheet XML for <mergeCell> ranges
+_MERGE_SCAN_BYTES = 1024 * 1024
+
+_MERGE_RE = re.compile(rb'<(?:\w+:)?mergeCell ref="([A-Z]+)(\d+):([A-Z]+)(\d+)"')
+
+
+def merged_ranges(source: BinaryIO, sheet_name: Optional[str] = None) -> List[Tuple[int, int, int, int]]:
+    """
+    Merged ranges of a sheet as 0-based (first_row, first_col, last_row, last_col).
+    openpyxl read-only sheets do not expose them, so the sheet XML is scanned
+    block by block (memory stays at one block).
+    """
+    start = source.tell()
+    ranges = []
+    try:
+        with zipfile.ZipFile(source) as zf:
+            path = _xlsx_sheet_path(zf, sheet_name)
+            if path is None or path not in zf.namelist():
+                return []
+            tail = b""
+            with zf.open(path) as sheet:
+                while True:
+                    block = sheet.read(_MERGE_SCAN_BYTES)
+                    if not block:
+                        break
+                    data = tail + block
+                    last_end = 0
+                    for match in _MERGE_RE.finditer(data):
+                        c1, r1, c2, r2 = (g.decode() for g in match.groups())
+                        ranges.append((int(r1) - 1, _col_index(c1) - 1, int(r2) - 1, _col_index(c2) - 1))
+                        last_end = match.end()
+                    # A tag may be cut at the block boundary
+                    tail = data[max(last_end, len(data) - 128):]
+    except zipfile.BadZipFile:
+        return []
+    finally:
+        source.seek(start)
+    return ranges
+
+
+def _mangle(names: Sequence[Any]) -> List[str]:
+    """pandas-style column names: Unnamed: i for blanks, .1/.2 for duplicates."""
+    result, seen = [], {}
+    for i, name in enumerate(names):
+        name = f"Unnamed: {i}" if name is None or str(name).strip() == "" else str(name).strip()
+        base, count = name, seen.get(name, 0)
+        while name in seen:
+            count += 1
+            name = f"{base}.{count}"
+        seen[base] = count
+        seen[name] = 0
+        result.append(name)
+    return result
+
+
+def build_header(rows: List[Sequence[Any]], first_row: int, merges: List[Tuple[int, int, int, int]]) -> List[str]:
+    """
+    Column names from one or more header rows (first_row = sheet row index
+    of rows[0]). Merged cells are spread over their range before joining.
+    """
+    width = max((len(r) for r in rows), default=0)
+    grid = [list(r) + [None] * (width - len(r)) for r in rows]
+    last_row = first_row + len(rows) - 1
+    for r1, c1, r2, c2 in merges:
+        if r2 < first_row or r1 > last_row or c1 >= width:
+            continue
+        value = grid[r1 - first_row][c1] if r1 >= first_row else None
+        if value is None:
+            continue
+        for r in range(max(r1, first_row), min(r2, last_row) + 1):
+            for c in range(c1, min(c2, width - 1) + 1):
+                grid[r - first_row][c] = value
+
+    names = []
+    for c in range(width):
+        parts = []
+        for row in grid:
+            value = row[c]
+            if value is None or str(value).strip() == "":
+                continue
+            text = str(value).strip()
+            if not parts or parts[-1] != text:  # vertical merges repeat the same text
+                parts.append(text)
+        names.append(HEADER_JOIN.join(parts) if parts else None)
+
+    # Trailing columns without a name or data are formatting leftovers
+    while names and names[-1] is None:
+        names.pop()
+    return _mangle(names)
+
+
+def _frame(rows: List[tuple], columns: List[str], start: int, text_columns: Sequence[str] = ()) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    df.index = pd.RangeIndex(start, start + len(df))
+    df = df.infer_objects()
+    for name in text_columns:
+        if name in columns:
+            # Cell values as written (5 stays "5" even when a blank makes the column float)
+            i = columns.index(name)
+            df[name] = pd.Series([None if r[i] is None else str(r[i]) for r in rows], index=df.index, dtype=object)
+    return df
+
+
+def iter_xlsx_chunks(
+    source: BinaryIO,
+    sheet_name: Optional[str] = None,
+    header_row: int = 0,
+    header_rows: int = 1,
+    chunk_rows: Optional[int] = None,
+    text_columns: Sequence[str] = (),
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the sheet as DataFrames of at most chunk_rows rows. Blank rows are
+    skipped; the index continues across chunks like read_csv(chunksize=...).
+    text_columns are returned as str in every chunk.
+    """
+    from openpyxl import load_workbook
+
+    chunk_rows = chunk_rows or XLSX_CHUNK_ROWS
+    # Single header rows keep pd.read_excel's names (a merged cell's tail is "Unnamed: i")
+    merges = merged_ranges(source, sheet_name) if header_rows > 1 else []
+
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Dosya okunurken hata oluştu: {str(e)}")
+    try:
+        if sheet_name is None:
+            sheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+        else:
+            raise HTTPException(status_code=400, detail=f"'{sheet_name}' sayfası bulunamadı. Mevcut sayfalar: {workbook.sheetnames}")
+        # Some writers store a wrong <dimension>; read what is actually there
+        sheet.reset_dimensions()
+
+        rows_iter = sheet.iter_rows(values_only=True)
+        header_lines: List[tuple] = []
+        for index, row in enumerate(rows_iter):
+            if index < header_row:
+                continue
+            header_lines.append(row)
+            if len(header_lines) == max(header_rows, 1):
+                break
+        if not header_lines:
+            return
+
+        columns = build_header(header_lines, header_row, merges)
+        width = len(columns)
+        pad = (None,) * width
+        batch: List[tuple] = []
+        emitted = 0
+        for row in rows_iter:
+            row = tuple(row[:width]) + pad[len(row):] if len(row) < width else tuple(row[:width])
+            if all(v is None for v in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield _frame(batch, columns, emitted, text_columns)
+                emitted += len(batch)
+                batch = []
+        if batch:
+            yield _frame(batch, columns, emitted, text_columns)
+    finally:
+        workbook.close()
+
@@ -0,0 +1,114 @@
+"""
+Admission Tests - yükleme/iş için bellek tahmini, bütçe kararı ve 413/503 yanıtları
+"""
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app import admission
+from app.admission import (
+    MemoryBudget,
+    BytesPerCellModel,
+    estimate_footprint,
+    estimate_from_limits,
+    admit_upload,
+)
+
+
+def _xlsx_bytes(rows=200, cols=5) -> BytesIO:
+    df = pd.DataFrame({f"c{i}": range(rows) for i in range(cols)})
+    buf = BytesIO()
+    df.to_excel(buf, index=False)
+    buf.seek(0)
+    return buf
+
+
+def test_xlsx_dimension_estimate_without_parsing():
+    """XLSX boyutu <dimension> etiketinden okunmalı, dosya konumu korunmalı"""
+    buf = _xlsx_bytes(rows=200, cols=5)
+    buf.seek(3)
+    est = estimate_footprint(buf, "veri.xlsx")
+    assert est.source == "dimension"
+    assert (est.rows, est.cols) == (201, 5)  # başlık satırı dahil
+    assert est.peak_bytes > est.parsed_bytes > 0
+    assert buf.tell() == 3
+
+
+def test_csv_sample_estimate():
+    """CSV satır/sütun sayısı örnekten tahmin edilmeli"""
+    text = "a;b;c\n" + "".join(f"{i};{i};{i}\n" for i in range(1000))
+    est = estimate_footprint(BytesIO(text.encode()), "veri.csv")
+    assert est.source == "sample" and est.cols == 3
+    assert 900 <= est.rows <= 1100
+
+
+def test_budget_decides_run_queue_reject():
+    """Boş bütçede çalışmalı, dolu bütçede beklemeli, bütçeden büyükse reddedilmeli"""
+    budget = MemoryBudget(budget_bytes=100 * 1024 ** 2)
+    est = estimate_from_limits({"input_bytes": 1024, "rows": 10000, "cols": 10, "ext": ".csv"})
+    assert budget.decide(est)[0] == "run"
+
+    budget.reserve("job:a", budget.budget_bytes - est.peak_bytes // 2)
+    assert budget.decide(est)[0] == "queue"
+    budget.release("job:a")
+    assert budget.decide(est)[0] == "run"
+
+    huge = estimate_from_limits({"rows": 900000, "cols": 200, "ext": ".xlsx"})
+    action, reason = budget.decide(huge)
+    assert action == "reject" and "MB" in reason
+    assert budget.stats()["decisions"] == {"run": 2, "queue": 1, "reject": 1}
+
+
+def test_oversized_upload_rejected_with_413(monkeypatch):
+    """Bütçeyi aşan yükleme okunmadan 413 ile reddedilmeli; anlık doluluk 503 dönmeli"""
+    monkeypatch.setattr(admission, "memory_budget", MemoryBudget(budget_bytes=1024))
+    with pytest.raises(HTTPException) as exc:
+        admit_upload(_xlsx_bytes(), "veri.xlsx")
+    assert exc.value.status_code == 413
+
+    busy = MemoryBudget(budget_bytes=512 * 1024 ** 2)
+    busy.reserve("upload:x", busy.budget_bytes)
+    monkeypatch.setattr(admission, "memory_budget", busy)
+    with pytest.raises(HTTPException) as exc:
+        admit_upload(_xlsx_bytes(), "veri.xlsx")
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"]
+
+
+def test_run_returns_admission_status_unchanged(monkeypatch, tmp_path):
+    """/run yükleme kabulünün 413 ve 503 (Retry-After) yanıtlarını 500'e çevirmemeli"""
+    from app.main import app
+    monkeypatch.chdir(tmp_path)  # server_debug.log
+    client = TestClient(app)
+    files = {"file": ("veri.xlsx", _xlsx_bytes().getvalue(), "application/octet-stream")}
+    data = {"params": '{"column": "c0"}'}
+
+    monkeypatch.setattr(admission, "memory_budget", MemoryBudget(budget_bytes=1024))
+    response = client.post("/run/group-by-month-year", files=files, data=data)
+    assert response.status_code == 413, response.text
+
+    busy = MemoryBudget(budget_bytes=512 * 1024 ** 2)
+    busy.reserve("upload:x", busy.budget_bytes)
+    monkeypatch.setattr(admission, "memory_budget", busy)
+    response = client.post("/run/group-by-month-year", files=files, data=data)
+    assert response.status_code == 503 and response.headers["Retry-After"]
+
+
+def test_bytes_per_cell_learns_from_actual():
+    """Gerçek bellek ölçümleri hücre başına bayt oranını güncellemeli"""
+    model = BytesPerCellModel()
+    start = model.get(".csv")
+    for _ in range(20):
+        model.learn(".csv", cells=1000, actual_bytes=8000)
+    assert model.get(".csv") < start
+    assert abs(model.get(".csv") - 8.0) < 1.0
+    assert model.to_dict()[".csv"]["samples"] == 20
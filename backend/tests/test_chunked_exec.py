@@ -0,0 +1,149 @@
+"""
+Chunked Execution Tests - büyük CSV'lerde toplama senaryolarının parça parça çalıştırılması
+"""
+import sys
+import json
+import asyncio
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import chunked_exec
+from app.chunked_exec import run_chunked, RowSample, NotChunkable
+from app.main import app
+from app.scenarios import (
+    sum_if, count_value, average_if, average_ifs, max_min_if, sum_ifs_multi,
+    count_rows_multi, frequency_table_single_column, pivot_sum_by_category,
+)
+
+client = TestClient(app)
+
+
+def _csv_bytes(rows=3000) -> bytes:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "bolge": rng.choice(["Ege", "Marmara", "Akdeniz"], rows),
+        "durum": rng.choice(["Aktif", "Pasif"], rows),
+        "tutar": rng.integers(1, 1000, rows),
+        "tarih": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%d.%m.%Y"),
+    })
+    return df.to_csv(index=False).encode()
+
+
+CASES = [
+    (sum_if, {"condition_column": "bolge", "condition_value": "Ege", "target_column": "tutar"}),
+    (count_value, {"column": "durum", "value": "aktif"}),
+    (average_if, {"condition_column": "bolge", "condition_value": "Ege", "target_column": "tutar"}),
+    (average_ifs, {"average_column": "tutar", "criteria_columns": ["bolge", "durum"], "criteria_values": ["Ege", "Aktif"]}),
+    (max_min_if, {"condition_column": "bolge", "condition_value": "Ege", "value_column": "tutar",
+                  "aggfunc": "min", "date_column": "tarih", "start_date": "01.02.2024"}),
+    (sum_ifs_multi, {"sum_column": "tutar", "criteria_columns": ["bolge"], "criteria_values": ["Marmara"]}),
+    (count_rows_multi, {"column": ["tutar", "bolge"], "op": ["gt", "eq"], "value": ["500", "Ege"]}),
+    (frequency_table_single_column, {"column": "bolge"}),
+    (pivot_sum_by_category, {"row_field": "bolge", "column_field": "durum", "value_column": "tutar", "aggfunc": "mean"}),
+    (pivot_sum_by_category, {"row_field": "bolge", "value_column": "tutar", "aggfunc": "count"}),
+]
+
+
+@pytest.mark.parametrize("module,params", CASES, ids=[f"{m.__name__.split('.')[-1]}-{i}" for i, (m, _) in enumerate(CASES)])
+def test_chunked_result_matches_in_memory_run(module, params):
+    """Parça parça sonuç, tüm dosyayla çalışan run() ile aynı olmalı"""
+    raw = _csv_bytes()
+    expected = module.run(pd.read_csv(BytesIO(raw)), dict(params))
+    result = run_chunked(module.partial_aggregator, BytesIO(raw), dict(params), chunk_rows=400)
+
+    execution = result["technical_details"]["execution"]
+    assert execution["chunks"] == 8 and execution["rows"] == 3000
+    if isinstance(expected["summary"], dict):
+        assert result["summary"] == pytest.approx(expected["summary"])
+    else:
+        assert result["markdown_result"] == expected["markdown_result"]
+    if module in (frequency_table_single_column, pivot_sum_by_category):
+        pd.testing.assert_frame_equal(result["df_out"], expected["df_out"], check_dtype=False)
+
+
+@pytest.mark.parametrize("module,params,key", [
+    (sum_if, {"condition_column": "kod", "condition_value": "5", "target_column": "tutar"}, "match_count"),
+    (count_value, {"column": "kod", "value": "5"}, "match_count"),
+    (count_rows_multi, {"column": ["kod"], "op": ["eq"], "value": ["5"]}, "match_count_all_conditions"),
+], ids=["sum_if", "count_value", "count_rows_multi"])
+def test_blank_cell_in_one_chunk_does_not_change_criteria_text(module, params, key):
+    """Tek parçadaki boş hücre o parçanın 5'ini "5.0" yapmamalı; koşul sütunu her parçada metin okunmalı"""
+    kod = [str(i % 10) for i in range(6000)]
+    kod[2500] = ""  # yalnızca 3. parçada boş hücre (0 değerinin yerine)
+    raw = pd.DataFrame({"kod": kod, "tutar": 1}).to_csv(index=False).encode()
+    result = run_chunked(module.partial_aggregator, BytesIO(raw), dict(params), chunk_rows=1000)
+
+    assert result["technical_details"]["execution"]["chunks"] == 6
+    assert result["summary"][key] == 600
+
+
+def test_row_output_is_bounded_sample(monkeypatch):
+    """Satır döndüren senaryolarda yalnızca sınırlı bir örnek bellekte tutulmalı"""
+    monkeypatch.setattr(chunked_exec, "CHUNKED_SAMPLE_ROWS", 50)
+    params = {"condition_column": "bolge", "condition_value": "Ege", "target_column": "tutar",
+              "return_mode": "summary_and_rows"}
+    result = run_chunked(sum_if.partial_aggregator, BytesIO(_csv_bytes()), params, chunk_rows=400)
+
+    assert len(result["df_out"]) == 50
+    sample = result["technical_details"]["execution"]["output_sample"]
+    assert sample == {"rows_total": result["summary"]["match_count"], "rows_kept": 50, "truncated": True}
+    assert result["excel_bytes"] is not None
+
+    merged = RowSample(limit=3)
+    merged.add(pd.DataFrame({"a": [1, 2]}))
+    other = RowSample(limit=3)
+    other.add(pd.DataFrame({"a": [3, 4]}))
+    assert merged.merge(other).frame()["a"].tolist() == [1, 2, 3] and merged.total == 4
+
+
+def test_validation_errors_and_non_mergeable_aggfunc():
+    """Parametre hataları ilk parçada 400 vermeli; median parça modunda desteklenmemeli"""
+    with pytest.raises(Exception) as exc:
+        run_chunked(sum_if.partial_aggregator, BytesIO(_csv_bytes()), {"condition_column": "yok", "target_column": "tutar"})
+    assert exc.value.status_code == 400
+
+    with pytest.raises(NotChunkable):
+        run_chunked(pivot_sum_by_category.partial_aggregator, BytesIO(_csv_bytes()),
+                    {"row_field": "bolge", "value_column": "tutar", "aggfunc": "median"})
+
+
+def test_run_endpoint_streams_large_csv(monkeypatch, tmp_path):
+    """/run büyük CSV'yi parça parça çalıştırmalı; median için normal okumaya düşmeli"""
+    monkeypatch.chdir(tmp_path)  # server_debug.log
+    monkeypatch.setattr(chunked_exec, "CHUNK_MAX_ROWS", 500)
+    monkeypatch.setattr(chunked_exec, "CHUNK_MIN_ROWS", 100)
+    monkeypatch.setattr(chunked_exec, "MAX_UPLOAD_MB", 0)  # auto: dosya "büyük" sayılır
+    files = {"file": ("erp.csv", _csv_bytes(), "text/csv")}
+
+    # Parça okuma event loop dışında (thread pool'da) çalışmalı
+    loops = []
+    original = chunked_exec.run_chunked
+
+    def run_off_loop(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(chunked_exec, "run_chunked", run_off_loop)
+
+    params = {"condition_column": "bolge", "condition_value": "Ege", "target_column": "tutar"}
+    body = client.post("/run/sum-if", files=files, data={"params": json.dumps(params)}).json()
+    details = body["technical_details"]
+    assert details["execution"]["mode"] == "chunked" and details["execution"]["chunks"] == 6
+    assert loops == [None]
+    assert details["input_rows"] == 3000 and details["input_cols"] == 4
+
+    params = {"row_field": "bolge", "value_column": "tutar", "aggfunc": "median"}
+    body = client.post("/run/pivot-sum-by-category", files=files, data={"params": json.dumps(params)}).json()
+    assert "execution" not in body["technical_details"]
+    assert body["technical_details"]["input_rows"] == 3000
@@ -0,0 +1,115 @@
+"""
+Columnar IO Tests - Parquet/Feather/Arrow yükleme, sütun projeksiyonu ve indirme
+"""
+import sys
+import json
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+pa = pytest.importorskip("pyarrow")
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.admission import estimate_footprint
+from app.columnar_io import read_columnar, write_columnar
+from app.ingest import ingest_file
+from app.workbook_session import clear_sessions, session_for
+from app.main import app
+
+client = TestClient(app)
+
+
+def _frame(rows: int = 6) -> pd.DataFrame:
+    return pd.DataFrame({
+        "il": (["Ankara", "Van", "İzmir"] * rows)[:rows],
+        "tutar": np.arange(rows, dtype="int64") * 10,
+        "oran": np.linspace(0.5, 1.5, rows),
+        "not": [f"satır {i}" for i in range(rows)],
+    })
+
+
+def _encode(df: pd.DataFrame, fmt: str, tmp_path: Path) -> bytes:
+    path = tmp_path / f"veri.{fmt}"
+    write_columnar(df, str(path), fmt)
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "arrow"])
+def test_projection_reads_only_referenced_columns(fmt, tmp_path):
+    """Yalnızca istenen sütunlar okunmalı; admission tahmini metadata'dan gelmeli"""
+    data = _encode(_frame(), fmt, tmp_path)
+    ext = f".{fmt}"
+
+    df = read_columnar(BytesIO(data), ext, columns=["tutar", "il"])
+    assert list(df.columns) == ["il", "tutar"]  # dosyadaki sıra
+    assert df["tutar"].tolist() == [0, 10, 20, 30, 40, 50]
+
+    # Dosyada olmayan bir ad projeksiyonu kapatır (senaryo hatası tüm sütunları listeler)
+    assert list(read_columnar(BytesIO(data), ext, columns=["il", "yok"]).columns) == ["il", "tutar", "oran", "not"]
+
+    estimate = estimate_footprint(BytesIO(data), f"veri{ext}", columns=["il"])
+    assert (estimate.rows, estimate.cols, estimate.source) == (6, 1, "metadata")
+
+    # Ham önizleme: başlık ilk satırda, başlıksız CSV okuması gibi
+    clear_sessions()
+    session = session_for(ingest_file(BytesIO(data), f"veri{ext}"))
+    raw = session.head(None, nrows=3, header=None)
+    assert raw.iloc[0].tolist() == ["il", "tutar", "oran", "not"] and len(raw) == 3
+    assert session.sheet_names == []
+
+
+def test_memory_mapped_upload_outlives_reader(monkeypatch):
+    """Diske taşan .arrow yüklemesi kopyasız okunmalı; okuyucu kapanınca veri geçerli kalmalı"""
+    monkeypatch.setattr("app.ingest.SPOOL_MAX_MEMORY_BYTES", 1024)
+    df = pd.DataFrame({"deger": np.random.default_rng(0).random(50_000)})
+    sink = BytesIO()
+    import pyarrow.ipc as ipc
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    ingested = ingest_file(BytesIO(sink.getvalue()), "buyuk.arrow")
+    assert ingested.on_disk
+    reader = ingested.open()
+    result = read_columnar(reader, ".arrow")
+    reader.close()
+    ingested.close()
+    assert result["deger"].sum() == pytest.approx(df["deger"].sum())
+
+
+def test_run_projects_and_downloads_columnar(monkeypatch, tmp_path):
+    """/run Parquet girdisini projeksiyonla okumalı; sonuç parquet/feather/arrow indirilebilmeli"""
+    monkeypatch.chdir(tmp_path)
+    clear_sessions()
+    data = _encode(_frame(), "parquet", tmp_path)
+    params = {"row_field": "il", "value_column": "tutar", "aggfunc": "sum"}
+    response = client.post(
+        "/run/pivot-sum-by-category",
+        files={"file": ("veri.parquet", data, "application/octet-stream")},
+        data={"params": json.dumps(params)},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["technical_details"]["input_columns"] == ["il", "tutar"]
+    assert body["parquet_url"].endswith("format=parquet")
+
+    for fmt in ("parquet", "feather", "arrow"):
+        download = client.get(f"/download/pivot-sum-by-category?format={fmt}")
+        assert download.status_code == 200
+        result = read_columnar(BytesIO(download.content), f".{fmt}")
+        assert dict(zip(result["il"], result["tutar"]))["Ankara"] == 0 + 30
+
+
+def test_mixed_object_columns_are_written_as_text(tmp_path):
+    """Karışık tipli sonuç sütunu (sayı + metin) metin olarak yazılmalı"""
+    df = pd.DataFrame({"etiket": [1, "iki", None], "deger": [1.0, 2.0, 3.0]})
+    path = tmp_path / "karisik.parquet"
+    write_columnar(df, str(path), "parquet")
+    back = read_columnar(BytesIO(path.read_bytes()), ".parquet")
+    assert back["etiket"].tolist()[:2] == ["1", "iki"] and pd.isna(back["etiket"][2])
@@ -0,0 +1,122 @@
+"""
+Dataset Paging Tests - /data/* cursor sayfalama sözleşme testleri
+"""
+import sys
+import json
+from pathlib import Path
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app import dataset_store
+from app.dataset_store import register_dataset, get_page, delete_dataset
+
+client = TestClient(app)
+
+
+def _sample_df(n=250):
+    return pd.DataFrame({
+        "id": range(n),
+        "city": ["Ankara", "İzmir", "Bursa", "İstanbul", "Adana"] * (n // 5),
+        "amount": [float(i % 17) for i in range(n)],
+    })
+
+
+def test_cursor_walks_all_rows_once():
+    """next_cursor zinciri tüm satırları tekrarsız dolaşmalı"""
+    ds = register_dataset(_sample_df(), source="test")
+    seen, cursor = [], None
+    while True:
+        page = get_page(ds, cursor=cursor, limit=100)
+        seen.extend(r["id"] for r in page["rows"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == list(range(250))
+    delete_dataset(ds)
+
+
+def test_page_endpoint_sort_filter_columns():
+    """Sıralama, filtre ve sütun alt kümesi birlikte uygulanmalı"""
+    ds = register_dataset(_sample_df(), source="test")
+    response = client.get(
+        f"/data/{ds}/page",
+        params={
+            "limit": 10,
+            "sort": "amount:desc,id",
+            "filters": json.dumps([{"column": "city", "operator": "eq", "value": "Ankara"}]),
+            "columns": "id,amount",
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["columns"] == ["id", "amount"]
+    assert body["total_rows"] == 50
+    assert len(body["rows"]) == 10
+    amounts = [r["amount"] for r in body["rows"]]
+    assert amounts == sorted(amounts, reverse=True)
+    assert set(body["rows"][0].keys()) == {"id", "amount"}
+
+    second = client.get(f"/data/{ds}/page", params={
+        "cursor": body["next_cursor"],
+        "sort": "amount:desc,id",
+        "filters": json.dumps([{"column": "city", "operator": "eq", "value": "Ankara"}]),
+    }).json()
+    assert second["offset"] == 10
+    delete_dataset(ds)
+
+
+def test_sort_mixed_type_column_as_text():
+    """Sayı ve metin karışık sütun 500 yerine metin olarak sıralanmalı"""
+    ds = register_dataset(pd.DataFrame({"kod": [10, "B", 2, None, "A"], "id": range(5)}), source="test")
+    response = client.get(f"/data/{ds}/page", params={"sort": "kod:desc"})
+    assert response.status_code == 200, response.text
+    assert [r["id"] for r in response.json()["rows"]] == [1, 4, 2, 0, 3]
+    delete_dataset(ds)
+
+
+def test_stale_cursor_returns_410():
+    """Veri seti yeniden kaydedilince eski cursor 410 dönmeli"""
+    ds = register_dataset(_sample_df(), source="test")
+    cursor = client.get(f"/data/{ds}/page", params={"limit": 20}).json()["next_cursor"]
+
+    register_dataset(_sample_df(100), source="test", dataset_id=ds)
+    response = client.get(f"/data/{ds}/page", params={"cursor": cursor})
+    assert response.status_code == 410
+    delete_dataset(ds)
+
+
+def test_run_results_get_own_unguessable_ids(monkeypatch, tmp_path):
+    """Her /run sonucu kendi id'siyle kaydedilmeli; veri setleri listelenememeli"""
+    monkeypatch.chdir(tmp_path)  # server_debug.log
+    params = {"row_field": "city", "value_column": "amount", "execution": "memory"}
+    pages = []
+    for n in (250, 100):
+        files = {"file": ("satis.csv", _sample_df(n).to_csv(index=False).encode(), "text/csv")}
+        body = client.post("/run/pivot-sum-by-category", files=files, data={"params": json.dumps(params)}).json()
+        assert body["page_url"] == f"/data/{body['dataset_id']}/page"
+        pages.append(body["page_url"])
+    assert pages[0] != pages[1]
+    assert client.get(pages[0]).json()["rows"] != client.get(pages[1]).json()["rows"]
+
+    assert client.get("/data").status_code in (404, 405)
+    assert len(register_dataset(_sample_df(), source="test")) > 32
+
+
+def test_new_dataset_survives_its_own_budget_check(monkeypatch):
+    """Bütçeyi tek başına aşan veri seti kaydedildiği anda atılmamalı"""
+    monkeypatch.setattr(dataset_store, "MAX_IN_MEMORY_BYTES", 1)
+    monkeypatch.setattr(dataset_store, "_spill", lambda entry: False)  # pyarrow yokmuş gibi
+    ds = register_dataset(_sample_df(), source="test")
+    assert client.get(f"/data/{ds}/page").status_code == 200
+    delete_dataset(ds)
+
+
+def test_unknown_dataset_returns_404():
+    """Olmayan veri seti 404 dönmeli"""
+    response = client.get("/data/yok_boyle_bir_set/page")
+    assert response.status_code == 404
@@ -0,0 +1,113 @@
+"""
+Dtype Optimizer Tests - yüklemede tip daraltma ve bellek raporu
+"""
+import sys
+import json
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import dtype_optimizer
+from app.dtype_optimizer import optimize_dtypes
+from app.excel_utils import read_table_from_upload, build_condition_mask
+from app.main import app
+
+client = TestClient(app)
+
+
+def _frame(rows=5000) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "il": rng.choice(["İstanbul", "Ankara", "İzmir"], rows),
+        "yas": rng.integers(18, 65, rows),
+        "kontenjan": rng.integers(0, 500, rows).astype(float),
+        "puan": rng.random(rows) * 100,
+        "tarih": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%d.%m.%Y"),
+        "karisik": [1, "a"] * (rows // 2),
+    })
+
+
+def test_columns_are_narrowed_and_report_shows_savings():
+    """Tamsayılar küçülmeli, metin Arrow string, tarih datetime olmalı; rapor tasarrufu göstermeli"""
+    df, report = optimize_dtypes(_frame(), parse_dates=True)
+
+    assert df["yas"].dtype == np.int32 and df["kontenjan"].dtype == np.int32
+    assert df["puan"].dtype == np.float64  # toplamlar değişmesin
+    assert pd.api.types.is_datetime64_any_dtype(df["tarih"])
+    assert df.loc[0, "tarih"] == pd.Timestamp("2024-01-01")
+    assert df["karisik"].dtype == object  # sayı + metin karışık sütun olduğu gibi kalır
+
+    assert report["after_bytes"] < report["before_bytes"] / 2
+    assert report["columns"]["il"]["from"] == "object"
+    assert "karisik" not in report["columns"]
+
+    # Arrow string sütunları object gibi davranmalı
+    assert (df["il"] == "Ankara").dtype == bool
+    assert "il" in df.select_dtypes(include=["object"]).columns
+    assert set(df.groupby("il")["yas"].sum().index) == {"İstanbul", "Ankara", "İzmir"}
+
+
+def test_downcast_keeps_room_for_products_and_partial_dates_stay_text(monkeypatch):
+    """Karesi sığmayan tamsayılar int64 kalmalı; ayrıştırılamayan tarih metni metin kalmalı"""
+    df = pd.DataFrame({
+        "maas": [60_000, 75_000, 90_000],
+        "tarih": ["01.02.2024", "15.03.2024", "belirsiz"],
+    })
+    df, report = optimize_dtypes(df, parse_dates=True)
+    assert df["maas"].dtype == np.int64
+    assert pd.api.types.is_string_dtype(df["tarih"].dtype) and df["tarih"].dtype != object
+
+    monkeypatch.setattr(dtype_optimizer, "DTYPE_TEXT_MODE", "category")
+    df, _ = optimize_dtypes(pd.DataFrame({"bolum": ["A", "B", "A", "A"], "ad": ["x", "y", "z", "w"]}))
+    assert df["bolum"].dtype == "category" and df["ad"].dtype == object
+
+
+def test_upload_carries_optimized_frame_and_date_conditions_still_match():
+    """Yüklenen tablo daraltılmış gelmeli; CSV tarih koşulu gün.ay.yıl ile eşleşmeye devam etmeli"""
+    raw = _frame(200).to_csv(index=False).encode()
+    df = read_table_from_upload(UploadFile(file=BytesIO(raw), filename="kayit.csv"))
+    assert not df.attrs["dtype_report"]["converted"]["tarih"].endswith("datetime64[ns]")
+    assert df.loc[0, "tarih"] == "01.01.2024"  # tarih metni varsayılan olarak olduğu gibi kalır
+    assert build_condition_mask(df, "tarih", "eq", "02.01.2024").sum() == 24
+    assert build_condition_mask(df, "tarih", "ne", "02.01.2024").sum() == 176
+
+
+def test_run_and_viz_endpoints_report_memory(monkeypatch, tmp_path):
+    """/run ve /viz/data daraltılmış tabloyla çalışmalı ve bellek raporu dönmeli"""
+    monkeypatch.chdir(tmp_path)  # server_debug.log
+    files = {"file": ("kayit.csv", _frame(300).to_csv(index=False).encode(), "text/csv")}
+
+    params = {"condition_column": "il", "condition_value": "Ankara", "target_column": "yas"}
+    body = client.post("/run/sum-if", files=files, data={"params": json.dumps(params)}).json()
+    expected = _frame(300).query("il == 'Ankara'")["yas"].sum()
+    assert body["technical_details"]["stats"]["sum_value"] == pytest.approx(expected)
+    assert body["technical_details"]["input_memory"]["converted"]["yas"] == "int64 -> int32"
+
+    body = client.post("/viz/data", files=files).json()
+    assert body["memory_report"]["converted"]["il"].startswith("object -> ")
+    assert body["data"][0]["tarih"] == "01.01.2024"  # grafik etiketleri metin kalır
+
+
+def test_run_compares_date_text_as_typed(monkeypatch, tmp_path):
+    """/run: gün.ay.yıl metni datetime'a çevrilmemeli; metin karşılaştıran senaryolar eşleşmeyi bulmalı"""
+    monkeypatch.chdir(tmp_path)  # server_debug.log
+    frame = pd.DataFrame({"tarih": ["01.02.2024", "02.02.2024", "01.02.2024"], "tutar": [10, 20, 5]})
+    files = {"file": ("kayit.csv", frame.to_csv(index=False).encode(), "text/csv")}
+    params = {"condition_column": "tarih", "condition_value": "01.02.2024", "target_column": "tutar"}
+    response = client.post("/run/sum-if", files=files, data={"params": json.dumps(params)})
+    assert response.status_code == 200, response.text
+    stats = response.json()["technical_details"]["stats"]
+    assert stats["sum_value"] == 15 and stats["match_count"] == 2
+
+    # Tarih senaryoları okuma sırasında ayrıştırmayı kendileri ister
+    from app.scenario_registry import get_scenario
+    assert get_scenario("group-by-month-year").get("parse_dates") is True
+    assert not get_scenario("sum-if").get("parse_dates")
@@ -0,0 +1,167 @@
+"""
+Google Sheets Connector Tests - yerel sahte Sheets/Drive API ile toplu batchGet,
+sütun seçimi, değer matrisinden DataFrame ve revizyon önbelleği
+"""
+import re
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+gspread = pytest.importorskip("gspread")
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import google_sheets_connector as connector
+from app.google_sheets_connector import clear_sheets_cache, column_letter, read_sheet
+from app.main import app
+
+client = TestClient(app)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+class FakeSheetsAPI:
+    """gspread HTTPClient yerine: Drive files.get, spreadsheets.get ve values.batchGet."""
+
+    def __init__(self, sheets, grid_rows=1000):
+        self.sheets = sheets  # {başlık: satır listesi}
+        self.grid_rows = grid_rows
+        self.version = 1
+        self.calls = []
+
+    def _missing(self, spreadsheet_id):
+        if spreadsheet_id != "ss1":
+            raise gspread.exceptions.APIError(FakeResponse({"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}}, 404))
+
+    def request(self, method, endpoint, params=None, **kwargs):
+        self.calls.append(("drive", endpoint))
+        self._missing(endpoint.rsplit("/", 1)[-1])
+        return FakeResponse({"version": str(self.version), "modifiedTime": "2026-01-01T00:00:00Z"})
+
+    def fetch_sheet_metadata(self, spreadsheet_id, params=None):
+        self.calls.append(("metadata", spreadsheet_id))
+        self._missing(spreadsheet_id)
+        return {"properties": {"title": "Rapor"}, "sheets": [
+            {"properties": {"title": title, "index": i, "gridProperties": {"rowCount": self.grid_rows, "columnCount": 26}}}
+            for i, title in enumerate(self.sheets)
+        ]}
+
+    def values_batch_get(self, spreadsheet_id, ranges, params=None):
+        self.calls.append(("batchGet", list(ranges), params["majorDimension"]))
+        return {"valueRanges": [self._values(r, params["majorDimension"]) for r in ranges]}
+
+    def _values(self, a1, dimension):
+        title, cells = a1.rsplit("!", 1)
+        rows = self.sheets[title.strip("'").replace("''", "'")]
+        m = re.fullmatch(r"([A-Z]*)(\d*):([A-Z]*)(\d*)", cells)
+        col = lambda s, d: sum((ord(ch) - 64) * 26 ** i for i, ch in enumerate(reversed(s))) - 1 if s else d
+        c0, c1 = col(m.group(1), 0), col(m.group(3), 25)
+        r0, r1 = int(m.group(2) or 1) - 1, int(m.group(4) or len(rows))
+        block = [[row[c] if c < len(row) else "" for c in range(c0, c1 + 1)] for row in rows[r0:r1]]
+        if dimension == "COLUMNS":
+            block = [list(column) for column in zip(*block)] if block else []
+        # API gibi: sondaki boş hücreler ve boş vektörler gönderilmez
+        trimmed = []
+        for vector in block:
+            while vector and vector[-1] == "":
+                vector = vector[:-1]
+            trimmed.append(vector)
+        while trimmed and not trimmed[-1]:
+            trimmed.pop()
+        return {"range": a1, "values": trimmed} if trimmed else {"range": a1}
+
+
+ROWS = [
+    ["il", "tutar", "tarih", "", "not"],
+    ["Ankara", 10, "01.02.2024", "", "a"],
+    ["Van", 2.5, "", "", ""],
+    ["", "", "", "", ""],
+    ["İzmir", 7, "03.02.2024", "", "c"],
+]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    api = FakeSheetsAPI({"Satışlar": [list(r) for r in ROWS], "O'Brien": [["x"], [1]]})
+    monkeypatch.setattr(connector, "get_client", lambda: SimpleNamespace(http_client=api))
+    clear_sheets_cache()
+    yield api
+    clear_sheets_cache()
+
+
+def test_column_letters():
+    assert [column_letter(i) for i in (0, 25, 26, 701, 702)] == ["A", "Z", "AA", "ZZ", "AAA"]
+
+
+def test_needed_columns_fetched_in_batches_and_frame_from_matrix(fake, monkeypatch):
+    """Yalnızca istenen sütunlar, satır bloklarına bölünmüş aralıklarla toplu çekilmeli"""
+    monkeypatch.setattr(connector, "GOOGLE_SHEETS_ROWS_PER_RANGE", 2)
+    monkeypatch.setattr(connector, "GOOGLE_SHEETS_RANGES_PER_REQUEST", 4)
+    df, info = read_sheet("ss1", columns=["not", "il"])
+    assert info["status"] == "miss" and info["sheet_name"] == "Satışlar"
+    assert list(df.columns) == ["il", "not"]
+    assert df["il"].tolist()[:2] == ["Ankara", "Van"] and df["il"].isna().tolist() == [False, False, True, False]
+
+    batches = [c for c in fake.calls if c[0] == "batchGet"]
+    assert batches[0][1] == ["'Satışlar'!1:1"]
+    # 2 sütun grubu (A, E) x 500 satır bloğu, 4'erli çağrılar; B, C, D hiç istenmez
+    column_ranges = [r for c in batches[1:] for r in c[1]]
+    assert len(column_ranges) == 2 * 500 and len(batches) - 1 == 250
+    assert column_ranges[0] == "'Satışlar'!A2:A3" and column_ranges[500] == "'Satışlar'!E2:E3"
+    assert all(c[2] == "COLUMNS" for c in batches[1:])
+
+    full, _ = read_sheet("ss1")
+    assert list(full.columns) == ["il", "tutar", "tarih", "Unnamed: 3", "not"]
+    assert full["tutar"].tolist()[:2] == [10.0, 2.5] and full["tarih"].tolist()[0] == "01.02.2024"
+    assert len(full) == 4
+
+    with pytest.raises(Exception) as exc:
+        read_sheet("ss1", columns=["yok"])
+    assert exc.value.status_code == 400
+
+
+def test_unchanged_revision_is_not_downloaded_again(fake):
+    """Revizyon değişmediyse yalnızca Drive meta çağrısı yapılmalı"""
+    read_sheet("ss1", sheet_name="O'Brien")
+    before = len(fake.calls)
+    df, info = read_sheet("ss1", sheet_name="O'Brien")
+    assert info["status"] == "hit" and fake.calls[before:] == [("drive", f"{connector.DRIVE_FILES_URL}/ss1")]
+
+    fake.sheets["O'Brien"].append([2])
+    fake.version += 1
+    df, info = read_sheet("ss1", sheet_name="O'Brien")
+    assert info["status"] == "miss" and df["x"].tolist() == [1, 2]
+
+
+def test_import_endpoint(fake):
+    """/viz/google/import-sheet: tipli sütunlar, veri seti kaydı, aralık ve hata eşlemesi"""
+    body = {"spreadsheet_id": "ss1", "sheet_name": "Satışlar"}
+    first = client.post("/viz/google/import-sheet", json=body)
+    assert first.status_code == 200, first.text
+    result = first.json()
+    assert result["row_count"] == 4 and result["cache"]["status"] == "miss"
+    assert {c["name"]: c["type"] for c in result["columns_info"]}["tutar"] == "numeric"
+    assert result["data"][2]["il"] is None
+    page = client.get(result["page_url"], params={"limit": 2}).json()
+    assert [row["il"] for row in page["rows"]] == ["Ankara", "Van"]
+
+    again = client.post("/viz/google/import-sheet", json=body).json()
+    assert again["cache"]["status"] == "hit" and again["dataset_id"] == result["dataset_id"]
+
+    ranged = client.post("/viz/google/import-sheet", json={**body, "range": "A1:B3"}).json()
+    assert ranged["columns"] == ["il", "tutar"] and ranged["row_count"] == 2
+
+    assert client.post("/viz/google/import-sheet", json={"spreadsheet_id": "yok"}).status_code == 404
+    assert client.post("/viz/google/import-sheet", json={**body, "sheet_name": "Yok"}).status_code == 404
+    assert client.get("/viz/google/cache").json()["hits"] >= 1
@@ -0,0 +1,104 @@
+"""
+Ingest Tests - yüklemenin parça parça geçici dosyaya akıtılması, özet ve boyut sınırı
+"""
+import sys
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import ingest
+from app.ingest import ingest_file
+from app.excel_utils import read_table_from_upload
+from app.main import app
+
+client = TestClient(app)
+
+
+class CountingReader:
+    """Kaç bayt okunduğunu sayan dosya nesnesi"""
+
+    def __init__(self, data: bytes):
+        self._buf = BytesIO(data)
+        self.bytes_read = 0
+
+    def seek(self, pos):
+        return self._buf.seek(pos)
+
+    def read(self, n=-1):
+        chunk = self._buf.read(n)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def _csv_bytes(rows=50_000) -> bytes:
+    return pd.DataFrame({"a": range(rows), "b": ["x"] * rows}).to_csv(index=False).encode()
+
+
+def test_large_upload_spools_to_disk_and_mmaps(monkeypatch):
+    """Büyük yükleme diske akıtılmalı, SHA-256 doğru olmalı, pandas mmap üzerinden okumalı"""
+    monkeypatch.setattr(ingest, "SPOOL_MAX_MEMORY_BYTES", 64 * 1024)
+    monkeypatch.setattr(ingest, "INGEST_CHUNK_BYTES", 16 * 1024)
+    data = _csv_bytes()
+
+    with ingest_file(BytesIO(data), "veri.csv") as ingested:
+        assert ingested.on_disk and ingested.size == len(data)
+        assert ingested.sha256 == hashlib.sha256(data).hexdigest()
+        with ingested.open() as a, ingested.open() as b:
+            assert a.read(5) == data[:5]
+            df = pd.read_csv(b)  # bağımsız okuyucular
+        assert len(df) == 50_000
+
+    small = ingest_file(BytesIO(b"a,b\n1,2\n"), "k.csv")
+    assert not small.on_disk and pd.read_csv(small.open()).shape == (1, 2)
+
+
+def test_size_limit_enforced_while_streaming(monkeypatch):
+    """Sınır aşılınca dosyanın geri kalanı okunmadan 413 dönmeli"""
+    monkeypatch.setattr(ingest, "INGEST_CHUNK_BYTES", 1024)
+    source = CountingReader(b"x" * 100_000)
+    with pytest.raises(HTTPException) as exc:
+        ingest_file(source, "buyuk.csv", max_bytes=10_000)
+    assert exc.value.status_code == 413
+    assert source.bytes_read <= 11 * 1024
+
+    with pytest.raises(HTTPException) as exc:
+        ingest_file(BytesIO(b""), "bos.csv")
+    assert exc.value.status_code == 400
+
+
+def test_read_table_from_upload_carries_content_hash():
+    """Okunan tablo içerik özetini attrs içinde taşımalı; xlsx mmap'ten okunmalı"""
+    buf = BytesIO()
+    pd.DataFrame({"ad": ["a", "b"], "sayi": [1, 2]}).to_excel(buf, index=False)
+    raw = buf.getvalue()
+    df = read_table_from_upload(UploadFile(file=BytesIO(raw), filename="t.xlsx"))
+    assert list(df.columns) == ["ad", "sayi"]
+    assert df.attrs["content_sha256"] == hashlib.sha256(raw).hexdigest()
+
+
+def test_stats_endpoint_reads_spooled_upload():
+    """İstatistik uçları yüklemeyi akıtılmış dosyadan okumalı"""
+    buf = BytesIO()
+    with pd.ExcelWriter(buf) as writer:
+        pd.DataFrame({"x": [1]}).to_excel(writer, sheet_name="Bir", index=False)
+        pd.DataFrame({"y": [2]}).to_excel(writer, sheet_name="Iki", index=False)
+    files = {"file": ("iki.xlsx", buf.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    body = client.post("/viz/sheets", files=files).json()
+    assert body["sheets"] == ["Bir", "Iki"]
+
+
+def test_viz_endpoints_keep_upload_limit_status(monkeypatch):
+    """/viz uçları boyut sınırının 413 yanıtını 400'e çevirmemeli"""
+    monkeypatch.setattr(ingest, "MAX_UPLOAD_MB", 0)
+    files = {"file": ("veri.csv", _csv_bytes(100), "text/csv")}
+    assert client.post("/viz/stats", files=files, data={"column": "a"}).status_code == 413
+    assert client.post("/viz/sheets", files=files).status_code == 413
+    assert client.post("/ui/unique-values", files=files, params={"column": "a"}).status_code == 413
@@ -0,0 +1,148 @@
+"""
+Job Control Tests - çalışan işlerin iptali, süre sınırı ve işçi sürecinin sonlandırılması
+"""
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import storage, queue_storage, queue_engine
+from app.job_control import (
+    CancellationToken,
+    JobCanceled,
+    checkpoint,
+    use_token,
+    run_in_worker,
+)
+from app.queue_config import JobStatus
+from app.queue_storage import QueueJob, insert_job, get_job
+from app.scenarios import custom_report_builder_pro
+
+
+def test_checkpoint_raises_through_broad_except():
+    """İptal edilen token checkpoint'te durmalı; 'except Exception' bunu yutmamalı"""
+    checkpoint(0.5)  # iş dışında etkisiz
+
+    token = CancellationToken("j1")
+    with use_token(token):
+        checkpoint(0.4, "yarısı")
+        token.cancel()
+        with pytest.raises(JobCanceled) as exc:
+            try:
+                checkpoint()
+            except Exception:
+                pytest.fail("JobCanceled yakalanmamalı")
+    assert exc.value.reason == "canceled" and exc.value.progress == 0.4
+
+    expired = CancellationToken("j2", wall_limit_s=0.01)
+    time.sleep(0.02)
+    assert expired.canceled and expired.reason == "timeout"
+
+
+def test_report_builder_stops_between_actions():
+    """Rapor oluşturucu iptal edilmiş işte bir sonraki adımda durmalı"""
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    params = {"config": [{"type": "sort", "column": "a", "direction": "desc"}]}
+    token = CancellationToken("rb")
+    token.cancel()
+    with use_token(token):
+        with pytest.raises(JobCanceled):
+            custom_report_builder_pro.run(df, params)
+
+
+def _isolated_queue(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "queue.db")
+    queue_storage.init_queue_table()
+
+    async def no_broadcast(user_key, event):
+        return None
+
+    queue_engine.set_ws_broadcast(no_broadcast)
+
+
+def _running_job(service="excel", action="slow_test") -> QueueJob:
+    job = QueueJob(
+        job_id=QueueJob.generate_id(), user_key="alice", service=service, action=action,
+        status=JobStatus.RUNNING, created_at=time.time(), started_at=time.time(),
+    )
+    insert_job(job)
+    return job
+
+
+def test_cancel_running_job_frees_slot_with_progress(monkeypatch, tmp_path):
+    """Çalışan iş iptal edilince slot hemen boşalmalı, kısmi ilerleme kaydedilmeli"""
+    _isolated_queue(monkeypatch, tmp_path)
+
+    async def slow(job):
+        for i in range(100):
+            checkpoint(i / 100)
+            await asyncio.sleep(0.02)
+        return {"success": True}
+
+    monkeypatch.setitem(queue_engine.EXECUTOR_REGISTRY, ("excel", "slow_test"), slow)
+
+    async def scenario():
+        job = _running_job()
+        task = asyncio.create_task(queue_engine.execute_job(job))
+        await asyncio.sleep(0.15)
+        assert await queue_engine.cancel_running_job(job.job_id)
+        started = time.monotonic()
+        await task
+        return job.job_id, time.monotonic() - started
+
+    try:
+        job_id, elapsed = asyncio.run(scenario())
+    finally:
+        queue_engine.set_ws_broadcast(None)
+    job = get_job(job_id)
+    assert job.status == JobStatus.CANCELED
+    assert 0 < job.progress < 1
+    assert elapsed < 0.5
+    assert queue_storage.count_by_status(JobStatus.RUNNING) == 0
+
+
+def test_wall_clock_limit_stops_stuck_job(monkeypatch, tmp_path):
+    """Checkpoint'e hiç uğramayan iş de süre sınırında durdurulmalı"""
+    _isolated_queue(monkeypatch, tmp_path)
+
+    async def stuck(job):
+        await asyncio.sleep(30)
+        return {"success": True}
+
+    monkeypatch.setitem(queue_engine.EXECUTOR_REGISTRY, ("excel", "slow_test"), stuck)
+    monkeypatch.setattr(queue_engine, "get_time_limits", lambda service: {"wall_s": 0.2})
+
+    try:
+        job = _running_job()
+        started = time.monotonic()
+        asyncio.run(queue_engine.execute_job(job))
+    finally:
+        queue_engine.set_ws_broadcast(None)
+    assert time.monotonic() - started < 2
+    job = get_job(job.job_id)
+    assert job.status == JobStatus.FAIL and "time limit" in job.error_short
+
+
+def test_worker_process_is_killed_on_cancel():
+    """İşçi süreçte çalışan iş iptalde sonlandırılmalı"""
+    async def scenario():
+        token = CancellationToken("w1")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.3, token.cancel)
+        started = time.monotonic()
+        with pytest.raises(JobCanceled):
+            await run_in_worker(time.sleep, 30, token=token)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 10
+
+    async def ok():
+        return await run_in_worker(divmod, 17, 5, token=CancellationToken("w2"))
+
+    assert asyncio.run(ok()) == (3, 2)
@@ -0,0 +1,155 @@
+"""
+Pub/Sub Backbone Tests - worker'lar arası kuyruk olayları ve işbirliği odaları
+"""
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.pubsub import InProcessPubSub, SQLitePubSub
+from app.websocket_api import ConnectionManager, ROOM_CHANNEL_PREFIX, PRESENCE_TTL_S
+
+
+class FakeSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+def test_inprocess_prefix_dispatch():
+    """Kanal öneki eşleşen handler'lar çağrılmalı; local=False yerelde teslim etmemeli"""
+    async def scenario():
+        bus, got = InProcessPubSub(), []
+
+        async def handler(channel, message, remote):
+            got.append((channel, message["n"], remote))
+
+        bus.subscribe("queue:", handler)
+        await bus.publish("queue:u1", {"n": 1})
+        await bus.publish("room:r1", {"n": 2})
+        await bus.publish("queue:u1", {"n": 3}, local=False)
+        assert got == [("queue:u1", 1, False)]
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_backend_crosses_workers(tmp_path):
+    """Bir worker'ın yayını diğerine ulaşmalı, kendi mesajını tekrar almamalı"""
+    async def scenario():
+        db = tmp_path / "bus.db"
+        worker_a = SQLitePubSub(db, worker_id="a")
+        worker_b = SQLitePubSub(db, worker_id="b")
+        seen_a, seen_b = [], []
+
+        async def on_a(channel, message, remote):
+            seen_a.append((message["n"], remote))
+
+        async def on_b(channel, message, remote):
+            seen_b.append((message["n"], remote))
+
+        worker_a.subscribe("queue:", on_a)
+        worker_b.subscribe("queue:", on_b)
+        await worker_a.stop()
+        await worker_b.stop()  # poll'ları elle çalıştır
+
+        # Okuma ve temizlik sorguları event loop dışında çalışmalı
+        on_loop = []
+        for name in ("_fetch", "_delete_before"):
+            original = getattr(worker_b, name)
+
+            def record(*args, _original=original):
+                try:
+                    on_loop.append(asyncio.get_running_loop() is not None)
+                except RuntimeError:
+                    on_loop.append(False)
+                return _original(*args)
+
+            setattr(worker_b, name, record)
+
+        await worker_a.publish("queue:u1", {"n": 7})
+        assert await worker_a.poll_once() == 0
+        assert await worker_b.poll_once() == 1
+        assert seen_a == [(7, False)]
+        assert seen_b == [(7, True)]
+        assert on_loop == [False, False]
+
+    asyncio.run(scenario())
+
+
+def test_rooms_span_workers(tmp_path):
+    """Farklı worker'lardaki kullanıcılar aynı odayı ve mesajları görmeli"""
+    async def scenario():
+        db = tmp_path / "rooms.db"
+        bus_a = SQLitePubSub(db, worker_id="a")
+        bus_b = SQLitePubSub(db, worker_id="b")
+        manager_a, manager_b = ConnectionManager(bus_a), ConnectionManager(bus_b)
+        bus_a.subscribe(ROOM_CHANNEL_PREFIX, manager_a.on_backbone_message)
+        bus_b.subscribe(ROOM_CHANNEL_PREFIX, manager_b.on_backbone_message)
+        await bus_a.stop()
+        await bus_b.stop()
+
+        alice, bob = FakeSocket(), FakeSocket()
+        await manager_a.connect(alice, "dash", "alice", "Alice")
+        await bus_b.poll_once()
+        await manager_b.connect(bob, "dash", "bob", "Bob")
+        await bus_a.poll_once()
+        await bus_b.poll_once()
+
+        names = lambda users: sorted(u["user_id"] for u in users)
+        assert names(manager_a.get_room_users("dash")) == ["alice", "bob"]
+        assert names(manager_b.get_room_users("dash")) == ["alice", "bob"]
+
+        await manager_b.broadcast_to_room("dash", {"type": "chat", "message": "selam"}, exclude=bob)
+        await bus_a.poll_once()
+        await asyncio.sleep(0.01)
+        assert any(f.get("message") == "selam" for f in alice.frames)
+
+        info = manager_b.disconnect(bob)
+        await manager_b.announce_left(info)
+        await bus_a.poll_once()
+        assert names(manager_a.get_room_users("dash")) == ["alice"]
+
+    asyncio.run(scenario())
+
+
+def test_presence_of_silent_worker_expires(tmp_path):
+    """Duyuru yapmayı bırakan (çökmüş) worker'ın kullanıcıları TTL sonunda listeden düşmeli"""
+    async def scenario():
+        db = tmp_path / "presence.db"
+        bus_a = SQLitePubSub(db, worker_id="a")
+        bus_b = SQLitePubSub(db, worker_id="b")
+        manager_a, manager_b = ConnectionManager(bus_a), ConnectionManager(bus_b)
+        bus_a.subscribe(ROOM_CHANNEL_PREFIX, manager_a.on_backbone_message)
+        bus_b.subscribe(ROOM_CHANNEL_PREFIX, manager_b.on_backbone_message)
+        await bus_a.stop()
+        await bus_b.stop()
+
+        alice, bob = FakeSocket(), FakeSocket()
+        await manager_a.connect(alice, "dash", "alice", "Alice")
+        await manager_b.connect(bob, "dash", "bob", "Bob")
+        await bus_a.poll_once()
+        names = lambda: sorted(u["user_id"] for u in manager_a.get_room_users("dash"))
+        assert names() == ["alice", "bob"]
+
+        # Heartbeat duyurusu süreyi yeniler (son duyuru TTL kadar eski gibi)
+        manager_a.remote_seen["dash"]["b"] -= PRESENCE_TTL_S
+        await manager_b.announce_presence("dash")
+        await bus_a.poll_once()
+        assert manager_a.expire_remote(now=time.monotonic() + PRESENCE_TTL_S * 0.5) == 0
+
+        # b sessizce kapanır: ayrılma mesajı gelmez, TTL sonunda düşer
+        assert manager_a.expire_remote(now=time.monotonic() + PRESENCE_TTL_S * 2) == 1
+        assert names() == ["alice"] and "dash" not in manager_a.remote_users
+        manager_a.disconnect(alice)
+        manager_b.disconnect(bob)
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+"""
+Queue Dedup Tests - aynı işlerin birleştirilmesi ve sonuç yeniden kullanımı
+"""
+import sys
+import json
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app import storage, queue_storage, queue_engine, queue_dedup
+from app.queue_dedup import job_fingerprint
+
+client = TestClient(app)
+
+
+def _isolated_queue(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "queue.db")
+    queue_storage.init_queue_table()
+    queue_dedup.dedup_stats.reset()
+
+    async def no_op(job):
+        return None
+
+    monkeypatch.setattr(queue_engine, "execute_job", no_op)
+
+
+def test_fingerprint_ignores_param_order():
+    """Parametre sırası parmak izini değiştirmemeli, girdi hash'i değiştirmeli"""
+    a = job_fingerprint("excel", "run_scenario", {"x": 1, "y": [1, 2]}, "h1")
+    b = job_fingerprint("excel", "run_scenario", {"y": [1, 2], "x": 1}, "h1")
+    c = job_fingerprint("excel", "run_scenario", {"x": 1, "y": [1, 2]}, "h2")
+    assert a == b != c
+
+
+def test_identical_submissions_attach_then_reuse_result(monkeypatch, tmp_path):
+    """Çalışan işe eklenmeli; bitince sonuç TTL içinde doğrudan dönmeli"""
+    _isolated_queue(monkeypatch, tmp_path)
+    monkeypatch.setattr(queue_dedup, "DEDUP_SCOPE", "global")
+    body = {"service": "excel", "action": "run_scenario", "params": {"scenario_id": "s1"},
+            "user_key": "alice", "input_hash": "abc"}
+
+    first = client.post("/queue/submit", json=body).json()
+    assert first["status"] == "running" and first["deduplicated"] is None
+
+    second = client.post("/queue/submit", json={**body, "user_key": "bob"}).json()
+    assert second["job_id"] == first["job_id"]
+    assert second["deduplicated"] == "inflight"
+    assert queue_dedup.get_followers(first["job_id"]) == ["bob"]
+
+    queue_storage.update_job_status(first["job_id"], "done", finished_at=time.time(),
+                                    result_ref_json=json.dumps({"scenario_id": "s1"}))
+    third = client.post("/queue/submit", json=body).json()
+    assert third["deduplicated"] == "result" and third["status"] == "done"
+    assert third["result_ref"] == {"scenario_id": "s1"}
+
+    other_input = client.post("/queue/submit", json={**body, "input_hash": "zzz"}).json()
+    assert other_input["deduplicated"] is None and other_input["job_id"] != first["job_id"]
+
+    stats = client.get("/queue/dedup/stats").json()
+    assert (stats["inflight_hits"], stats["result_hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_default_scope_is_per_user_and_hashless_jobs_are_not_merged(monkeypatch, tmp_path):
+    """Varsayılan kapsam kullanıcı bazlı olmalı; girdi hash'i olmayan işler birleştirilmemeli"""
+    _isolated_queue(monkeypatch, tmp_path)
+    body = {"service": "excel", "action": "run_scenario", "params": {"scenario_id": "s1"},
+            "user_key": "alice", "input_hash": "abc"}
+
+    first = client.post("/queue/submit", json=body).json()
+    other_user = client.post("/queue/submit", json={**body, "user_key": "bob"}).json()
+    assert other_user["deduplicated"] is None and other_user["job_id"] != first["job_id"]
+    assert client.post("/queue/submit", json=body).json()["job_id"] == first["job_id"]
+
+    no_hash = {**body, "input_hash": None}
+    a = client.post("/queue/submit", json=no_hash).json()
+    b = client.post("/queue/submit", json=no_hash).json()
+    assert a["job_id"] != b["job_id"] and b["deduplicated"] is None
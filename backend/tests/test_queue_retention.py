@@ -0,0 +1,95 @@
+"""
+Queue Retention Tests - saatlik özetler, eski işlerin silinmesi ve /queue/metrics
+"""
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app import storage, queue_storage, queue_retention
+from app.queue_config import JobStatus
+from app.queue_storage import QueueJob, insert_job, get_job
+from app.storage import get_cursor
+
+client = TestClient(app)
+
+NOW = 1_700_000_000.0  # saat başı değil; yuvarlama test edilir
+DAY = 86400
+
+
+def _isolated_queue(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "queue.db")
+    queue_storage.init_queue_table()
+
+
+def _finished(job_id, finished_at, status=JobStatus.DONE, wait_s=1.0, run_s=2.0, action="run_scenario"):
+    insert_job(QueueJob(
+        job_id=job_id, user_key="u", service="excel", action=action, status=status,
+        created_at=finished_at - run_s - wait_s, started_at=finished_at - run_s, finished_at=finished_at,
+    ))
+
+
+def test_rollup_and_purge_keep_hot_table_small(monkeypatch, tmp_path):
+    """Eski işler saatlik özete aktarılıp silinmeli; aktif ve yeni işler kalmalı"""
+    _isolated_queue(monkeypatch, tmp_path)
+    old_hour = NOW - 10 * DAY
+    for i in range(19):
+        _finished(f"old{i}", old_hour + i, run_s=1.0 + i)
+    _finished("old_fail", old_hour + 30, status=JobStatus.FAIL)
+    _finished("recent", NOW - 3600)
+    insert_job(QueueJob(job_id="waiting", user_key="u", service="excel", action="run_scenario",
+                        created_at=NOW - 20 * DAY))
+
+    result = queue_retention.run_retention(retention_days=7, now=NOW)
+    assert result["purged"] == 20
+    assert get_job("old3") is None
+    assert get_job("recent") is not None and get_job("waiting") is not None
+
+    with get_cursor() as cursor:
+        cursor.execute("SELECT * FROM queue_rollups_hourly WHERE hour_start <= ?", (old_hour,))
+        row = dict(cursor.fetchone())
+    assert (row["jobs"], row["done"], row["failed"]) == (20, 19, 1)
+    assert row["wait_p50_ms"] == 1000
+    assert row["run_p50_ms"] < row["run_p95_ms"] <= row["run_max_ms"] == 19000
+
+    # İkinci çalıştırma aynı saati tekrar saymamalı
+    again = queue_retention.run_retention(retention_days=7, now=NOW)
+    assert (again["rollup_rows"], again["purged"]) == (0, 0)
+
+
+def test_active_job_queries_use_partial_indexes(monkeypatch, tmp_path):
+    """Dağıtıcı sorguları geçmiş tablosunu taramamalı"""
+    _isolated_queue(monkeypatch, tmp_path)
+    with get_cursor() as cursor:
+        cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM queue_jobs WHERE status = 'queued' AND service = ? "
+            "ORDER BY priority DESC, created_at ASC", ("excel",)
+        )
+        plan = " ".join(str(tuple(r)) for r in cursor.fetchall())
+    assert "idx_queue_queued" in plan and "TEMP B-TREE" not in plan
+
+
+def test_metrics_endpoint_combines_rollups_and_live_hours(monkeypatch, tmp_path):
+    """/queue/metrics özetlenmiş ve henüz özetlenmemiş saatleri birlikte vermeli"""
+    _isolated_queue(monkeypatch, tmp_path)
+    import time
+    now = time.time()
+    _finished("a", now - 5 * 3600)
+    _finished("b", now - 5 * 3600 + 1, status=JobStatus.FAIL)
+    queue_retention.rollup_completed_hours(now - 3 * 3600)
+    _finished("c", now - 60, wait_s=3.0)
+
+    body = client.get("/queue/metrics", params={"hours": 24}).json()
+    total = body["totals"]["excel/run_scenario"]
+    assert total["jobs"] == 3 and total["failed"] == 1
+    assert total["failure_rate"] == round(1 / 3, 4)
+    assert len(body["series"]["excel/run_scenario"]) == 2
+    assert body["hot_table"]["rows"] == 3
+
+    daily = client.get("/queue/metrics", params={"granularity": "day"}).json()
+    assert sum(b["jobs"] for b in daily["series"]["excel/run_scenario"]) == 3
+    assert client.get("/queue/metrics", params={"granularity": "week"}).status_code == 400
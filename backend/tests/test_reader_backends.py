@@ -0,0 +1,114 @@
+"""
+Reader Backend Tests - ayrıştırıcı seçimi, backend'ler arası sonuç eşitliği ve benchmark
+"""
+import sys
+import json
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import excel_utils
+from app.excel_utils import (
+    READER_BACKENDS,
+    ReaderBackend,
+    benchmark_backends,
+    read_with_backend,
+    select_backend,
+)
+
+
+def _xlsx() -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Rapor başlığı"])
+    ws.append(["kod", "tutar", "tarih", "durum", None])
+    ws.append([1, 10.0, pd.Timestamp("2024-02-01").to_pydatetime(), "Onaylandı"])
+    ws.append([2, 12.5, None, "#N/A"])
+    ws.append([])
+    ws.append([3, None, pd.Timestamp("2024-03-01").to_pydatetime(), None, None])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("header_row", [0, 1])
+def test_openpyxl_values_matches_read_excel(header_row):
+    """values_only okuyucu pd.read_excel ile birebir aynı tabloyu vermeli"""
+    data = _xlsx()
+    expected = pd.read_excel(BytesIO(data), header=header_row)
+    actual = read_with_backend(BytesIO(data), ".xlsx", None, header_row, backend=READER_BACKENDS["openpyxl_values"])
+    pd.testing.assert_frame_equal(expected, actual)
+    assert actual.attrs["reader_backend"] == "openpyxl_values"
+
+
+def test_pyarrow_csv_matches_c_parser_and_falls_back(monkeypatch):
+    """pyarrow CSV sonucu C ayrıştırıcısıyla aynı olmalı; hata verirse varsayılana düşmeli"""
+    pytest.importorskip("pyarrow")
+    data = "id,tarih,il,tutar\n1,2024-01-05,Ankara,10.5\n2,2024-02-05,,\n3,05.03.2024,Van,7\n".encode()
+    expected = pd.read_csv(BytesIO(data))
+    actual = read_with_backend(BytesIO(data), ".csv", backend=READER_BACKENDS["pyarrow_csv"])
+    pd.testing.assert_frame_equal(expected, actual)
+
+    # Tekrarlanan ve boş başlıklar pandas gibi adlandırılmalı (a.2, Unnamed: 2)
+    duplicated = "a,a,,a.1,a\n1,2,3,4,5\n6,7,8,9,10\n".encode()
+    actual = read_with_backend(BytesIO(duplicated), ".csv", backend=READER_BACKENDS["pyarrow_csv"])
+    assert list(actual.columns) == ["a", "a.2", "Unnamed: 2", "a.1", "a.3"]
+    pd.testing.assert_frame_equal(pd.read_csv(BytesIO(duplicated)), actual)
+
+    # Tamamen boş sütun (dışa aktarımların sondaki sütunları) float64/NaN olmalı
+    empty = "a,b,c\n1,,\n2,,\n".encode()
+    actual = read_with_backend(BytesIO(empty), ".csv", backend=READER_BACKENDS["pyarrow_csv"])
+    assert actual["b"].dtype == "float64"
+    pd.testing.assert_frame_equal(pd.read_csv(BytesIO(empty)), actual)
+
+    def broken(buffer, sheet_name, header_row):
+        buffer.read()
+        raise ValueError("CSV conversion error")
+
+    broken_backend = ReaderBackend("pyarrow_csv", (".csv",), broken)
+    monkeypatch.setitem(READER_BACKENDS, "pyarrow_csv", broken_backend)
+    df = read_with_backend(BytesIO(data), ".csv", backend=broken_backend)
+    pd.testing.assert_frame_equal(expected, df)
+    assert df.attrs["reader_backend"] == "pandas_c"
+
+
+def test_selection_by_size_setting_and_benchmark(monkeypatch, tmp_path):
+    """Küçük dosya varsayılan, büyük dosya ölçülen en hızlı backend ile okunmalı"""
+    monkeypatch.setattr(excel_utils, "READER_AUTO_MIN_BYTES", 1000)
+    monkeypatch.setattr(excel_utils, "READER_BENCHMARK_PATH", tmp_path / "yok.json")
+    calamine = READER_BACKENDS["calamine"].available()
+    assert select_backend(".xlsx", 10).name == "openpyxl"
+    # Ölçüm yok: tercih sırası
+    assert select_backend(".xlsx", 10_000).name == ("calamine" if calamine else "openpyxl_values")
+
+    ranking = tmp_path / "bench.json"
+    ranking.write_text(json.dumps({"ranking": {".xlsx": ["calamine", "openpyxl"]}}), encoding="utf-8")
+    monkeypatch.setattr(excel_utils, "READER_BENCHMARK_PATH", ranking)
+    # Kurulu olmayan backend sıralamada atlanır
+    assert select_backend(".xlsx", 10_000).name == ("calamine" if calamine else "openpyxl")
+
+    monkeypatch.setattr(excel_utils, "READER_BACKEND", "xlsx=openpyxl_values,csv=pandas_c")
+    assert select_backend(".xlsx", 10).name == "openpyxl_values"
+    assert select_backend(".csv", 10_000).name == "pandas_c"
+
+
+def test_benchmark_ranks_only_matching_backends(monkeypatch, tmp_path):
+    """Benchmark varsayılandan farklı sonuç veren backend'i sıralamaya almamalı"""
+    path = tmp_path / "ornek.xlsx"
+    path.write_bytes(_xlsx())
+    report = benchmark_backends([path], repeat=1)
+    assert {r["backend"] for r in report["results"]} >= {"openpyxl", "openpyxl_values"}
+    assert all(r["matches_default"] for r in report["results"])
+    assert sorted(report["ranking"][".xlsx"]) == sorted(b.name for b in excel_utils.backends_for(".xlsx"))
+
+    wrong = ReaderBackend("openpyxl_values", (".xlsx",), lambda b, s, h: pd.DataFrame({"x": [1]}), requires="openpyxl")
+    monkeypatch.setitem(READER_BACKENDS, "openpyxl_values", wrong)
+    report = benchmark_backends([path], repeat=1)
+    assert "openpyxl_values" not in report["ranking"][".xlsx"]
+    assert next(r for r in report["results"] if r["backend"] == "openpyxl_values")["error"].startswith("sonuç farklı")
@@ -0,0 +1,93 @@
+"""
+Regression Engine Tests - QR tabanlı regresyon ve /viz/regression
+"""
+import sys
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app import regression
+
+client = TestClient(app)
+
+rng = np.random.default_rng(11)
+N = 300
+DF = pd.DataFrame({"a": rng.normal(size=N), "b": rng.normal(size=N)})
+DF["y"] = 3 + 1.5 * DF["a"] - 2 * DF["b"] + rng.normal(size=N)
+DF["y2"] = -DF["a"] + rng.normal(size=N)
+DF["w"] = rng.uniform(0.5, 2.0, size=N)
+
+
+def test_qr_matches_lstsq_and_chunked():
+    """QR, parçalı Cholesky ve numpy lstsq aynı katsayıları vermeli"""
+    design = regression.build_design(DF, ["a", "b"])
+    fit = regression.fit_ols(design, DF["y"].to_numpy())
+    expected = np.linalg.lstsq(design.X, DF["y"].to_numpy(), rcond=None)[0]
+    assert np.allclose(fit["beta"], expected)
+
+    chunked = regression.fit_ols_chunked(
+        regression.iter_design_chunks(DF, ["a", "b"], "y", chunk_rows=64), design.names
+    )
+    assert np.allclose(chunked["beta"], expected)
+    assert abs(chunked["r_squared"] - fit["r_squared"]) < 1e-9
+
+
+def test_weighted_fit_equals_scaled_ols():
+    """WLS, sqrt(w) ile ölçeklenmiş OLS'e eşit olmalı"""
+    design = regression.build_design(DF, ["a", "b"])
+    fit = regression.fit_ols(design, DF["y"].to_numpy(), DF["w"].to_numpy())
+    sw = np.sqrt(DF["w"].to_numpy())
+    expected = np.linalg.lstsq(design.X * sw[:, None], DF["y"].to_numpy() * sw, rcond=None)[0]
+    assert np.allclose(fit["beta"], expected)
+    assert fit["weighted"] is True
+
+
+def test_cooks_distance_matches_statsmodels():
+    """Cook's D, statsmodels get_influence() ile aynı olmalı"""
+    sm = pytest.importorskip("statsmodels.api")
+    df = DF.copy()
+    df.loc[0, ["a", "y"]] = [6.0, -20.0]  # etkili bir gözlem
+    design = regression.build_design(df, ["a", "b"])
+    diagnostics = regression.fit_ols(design, df["y"].to_numpy())["diagnostics"]
+
+    cooks = sm.OLS(df["y"].to_numpy(), design.X).fit().get_influence().cooks_distance[0]
+    assert diagnostics["max_cooks_distance"] == pytest.approx(cooks.max(), abs=1e-4)
+    assert diagnostics["influential"] == int((cooks > 4 / N).sum())
+
+
+def test_collinear_design_is_rejected():
+    """Tam çoklu doğrusal bağlantıda anlamlı hata dönmeli"""
+    df = DF.assign(c=DF["a"] * 2)
+    design = regression.build_design(df, ["a", "c"])
+    try:
+        regression.fit_ols(design, df["y"].to_numpy())
+        assert False, "ValueError bekleniyordu"
+    except ValueError as e:
+        assert "tekil" in str(e)
+
+
+def test_endpoint_reuses_design_for_new_target():
+    """Aynı dosya + predictor'lar ile hedef değişince tasarım önbellekten gelmeli"""
+    regression.clear_design_cache()
+    csv = DF.to_csv(index=False).encode()
+
+    def post(target):
+        return client.post("/viz/regression", files={"file": ("r.csv", csv, "text/csv")}, data={
+            "target_column": target, "predictor_columns": json.dumps(["a", "b"]),
+        }).json()
+
+    first, second = post("y"), post("y2")
+    assert first["cached_design"] is False and second["cached_design"] is True
+    names = [row["name"] for row in first["coefficient_table"]]
+    assert names == ["intercept", "a", "b"]
+    assert first["coefficient_table"][1]["p_value"] < 0.001
+    assert "durbin_watson" in first["diagnostics"]
+    assert set(first["vif"]) == {"a", "b"}
@@ -0,0 +1,80 @@
+"""
+Resampling Engine Tests - bootstrap / permütasyon motoru
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import resampling
+from app.resampling import (
+    bootstrap_ci,
+    bootstrap_ci_two_sample,
+    bootstrap_ci_paired,
+    bootstrap_ci_correlation,
+    bootstrap_ci_eta_squared,
+    permutation_test,
+)
+
+rng = np.random.default_rng(7)
+A = rng.normal(10, 2, 500)
+B = rng.normal(11, 2, 500)
+
+
+def test_bootstrap_is_reproducible_with_seed():
+    """Aynı seed aynı aralığı vermeli"""
+    first = bootstrap_ci(A, "mean", n_resamples=1000, seed=3)
+    second = bootstrap_ci(A, "mean", n_resamples=1000, seed=3)
+    assert first["ci"] == second["ci"]
+    lo, hi = first["ci"]
+    assert lo < A.mean() < hi
+
+
+def test_batches_do_not_change_result(monkeypatch):
+    """Küçük batch boyutu sonucu değiştirmemeli (sadece bellek sınırı)"""
+    runs = lambda: (
+        bootstrap_ci(A, "median", n_resamples=500),
+        bootstrap_ci_two_sample(A, B, "cohens_d", n_resamples=500),
+        bootstrap_ci_eta_squared([A, B, A + 0.5], n_resamples=500),
+        permutation_test(A, B, n_resamples=500),
+    )
+    full = runs()
+    monkeypatch.setattr(resampling, "BATCH_ELEMENTS", 5000)
+    batched = runs()
+    assert batched == full
+    assert batched[1]["n_resamples"] == 500 and batched[1]["ci"][1] < 0  # B belirgin şekilde büyük
+
+
+def test_median_replicates_match_resampled_medians():
+    """Sıra istatistiğinden çekilen medyanlar, örneklemlerin medyanlarıyla aynı dağılımda olmalı"""
+    for n in (7, 8):
+        data = rng.exponential(size=n)
+        fast = resampling._bootstrap_medians(data, 100_000, np.random.default_rng(1))
+        brute = np.median(data[np.random.default_rng(2).integers(0, n, size=(100_000, n))], axis=1)
+        assert np.abs(np.quantile(fast, [0.1, 0.5, 0.9]) - np.quantile(brute, [0.1, 0.5, 0.9])).max() < 1e-9
+        assert abs(fast.mean() - brute.mean()) < 0.01
+
+
+def test_correlation_shares_replicates():
+    """r ve r² aynı bootstrap örneklemlerinden gelmeli"""
+    y = A * 0.5 + rng.normal(size=len(A))
+    both = bootstrap_ci_correlation(A, y, n_resamples=500)
+    assert both["r_squared"] == bootstrap_ci_paired(A, y, "r_squared", n_resamples=500)
+    assert both["pearson_r"] == bootstrap_ci_paired(A, y, "pearson_r", n_resamples=500)
+    assert abs(both["pearson_r"]["estimate"] - np.corrcoef(A, y)[0, 1]) < 1e-4
+
+
+def test_eta_squared_ci_brackets_estimate():
+    """Eta² bootstrap aralığı nokta tahmini kapsamalı"""
+    boot = bootstrap_ci_eta_squared([A, B, A + 0.5], n_resamples=800)
+    lo, hi = boot["ci"]
+    assert 0 <= lo <= boot["estimate"] <= hi <= 1
+
+
+def test_permutation_p_value():
+    """Farklı dağılımlarda küçük, aynı örneklemde büyük p-değeri"""
+    assert permutation_test(A, B, n_resamples=999)["p_value"] <= 0.01
+    assert permutation_test(A[:250], A[250:], n_resamples=999)["p_value"] > 0.05
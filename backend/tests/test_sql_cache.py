@@ -0,0 +1,110 @@
+"""
+SQL Cache Tests - sorgu sonuç önbelleği (TTL, boyut sınırı) ve filigranla artımlı yenileme
+"""
+import sys
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("sqlalchemy")
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import sql_cache
+from app.sql_cache import cache_key, cached_query, invalidate, sql_cache_stats
+from app.sql_engine import dispose_all_engines, get_engine
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "rapor.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE olay (id INTEGER, tur TEXT, zaman TEXT)")
+        conn.executemany("INSERT INTO olay VALUES (?, ?, ?)",
+                         [(i, "giris" if i % 2 else "cikis", f"2024-01-{i:02d} 10:00:00") for i in range(1, 11)])
+    invalidate()
+    dispose_all_engines()
+    yield path, f"sqlite:///{path}"
+    invalidate()
+    dispose_all_engines()
+
+
+def _count_queries(url):
+    statements = []
+    from sqlalchemy import event
+    event.listen(get_engine(url), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_key_normalizes_whitespace_but_not_literals():
+    """Boşluk ve noktalı virgül farkı aynı anahtarı vermeli; metin sabitleri korunmalı"""
+    url = "SQLITE:///rapor.db"
+    assert cache_key(url, "SELECT *\n  FROM olay;", 100) == cache_key("sqlite:///rapor.db", "SELECT * FROM olay", 100)
+    assert cache_key(url, "SELECT * FROM olay WHERE tur = 'a  b'", 100) != cache_key(url, "SELECT * FROM olay WHERE tur = 'a b'", 100)
+    assert cache_key(url, "SELECT * FROM olay", 100) != cache_key(url, "SELECT * FROM olay", 50)
+
+
+def test_repeated_query_is_served_from_cache_within_ttl(db, monkeypatch):
+    """TTL içinde tekrar eden sorgu veritabanına gitmemeli; süre dolunca yeniden çalışmalı"""
+    _, url = db
+    statements = _count_queries(url)
+    first = cached_query(url, "SELECT * FROM olay", 100)
+    second = cached_query(url, "SELECT *   FROM olay;", 100)
+    assert (first[3]["status"], second[3]["status"]) == ("miss", "hit")
+    assert len(statements) == 1
+    assert second[0] == first[0] and second[1]["id"].tolist() == list(range(1, 11))
+
+    monkeypatch.setattr(sql_cache, "SQL_CACHE_TTL_SECONDS", -1)
+    assert cached_query(url, "SELECT * FROM olay", 100)[3]["status"] == "refresh"
+    assert len(statements) == 2
+
+
+def test_incremental_refresh_appends_rows_above_watermark(db, monkeypatch):
+    """Artımlı yenileme yalnızca filigrandan yeni satırları çekip eklemeli"""
+    path, url = db
+    query = "SELECT id, tur, zaman FROM olay"
+    _, df, _, info = cached_query(url, query, 100, incremental_column="zaman")
+    assert info["watermark"] == "2024-01-10 10:00:00" and len(df) == 10
+
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO olay VALUES (?, ?, ?)", [(11, "giris", "2024-01-11 09:00:00"), (12, "cikis", "2024-01-12 09:00:00")])
+    statements = _count_queries(url)
+    dataset_id, df, truncated, info = cached_query(url, query, 100, refresh=True, incremental_column="zaman")
+    assert info["status"] == "incremental" and info["appended_rows"] == 2
+    assert len(statements) == 1 and "WHERE zaman > ? ORDER BY zaman" in statements[0]
+    assert df["id"].tolist() == list(range(1, 13)) and not truncated
+    assert info["watermark"] == "2024-01-12 09:00:00"
+
+    # Limit aşılırsa sonuç kesilir ve sonraki yenilemeler tam sorguya döner
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO olay VALUES (13, 'giris', '2024-01-13 09:00:00')")
+    _, df, truncated, info = cached_query(url, query, 12, incremental_column="zaman")
+    assert info["status"] == "miss" and truncated and len(df) == 12
+    assert cached_query(url, query, 12, refresh=True, incremental_column="zaman")[3]["status"] == "refresh"
+
+
+def test_size_eviction_and_api(db, monkeypatch):
+    """Boyut sınırı aşılınca en eski kayıt düşmeli; API önbellek bilgisini dönmeli"""
+    _, url = db
+    monkeypatch.setattr(sql_cache, "SQL_CACHE_MAX_ENTRIES", 1)
+    cached_query(url, "SELECT id FROM olay", 100)
+    cached_query(url, "SELECT tur FROM olay", 100)
+    stats = sql_cache_stats()
+    assert [e["query"] for e in stats["entries"]] == ["SELECT tur FROM olay"] and stats["evictions"] >= 1
+    assert "dataset_id" not in stats["entries"][0]  # istatistikler veri setine erişim vermez
+
+    body = {"connection_string": url, "query": "SELECT tur FROM olay", "max_rows": 100}
+    response = client.post("/viz/sql/execute", json=body).json()
+    assert response["cache"]["status"] == "hit" and response["row_count"] == 10
+    assert client.post("/viz/sql/execute", json={**body, "cache": False}).json()["cache"] is None
+
+    missing = client.post("/viz/sql/execute", json={**body, "refresh": True, "incremental_column": "yok"})
+    assert missing.status_code == 400
+    assert client.delete("/viz/sql/cache").json()["removed"] == 1
@@ -0,0 +1,138 @@
+"""
+SQL Engine Tests - havuzlu bağlantılar, boşta engine temizliği, limitin sorguya eklenmesi
+ve sonuçların veri seti olarak kaydı (yerel SQLite dosyası)
+"""
+import sys
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+pytest.importorskip("sqlalchemy")
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import sql_engine
+from app.dataset_store import get_dataset, get_dataset_frame
+from app.sql_engine import dispose_all_engines, engine_stats, get_engine, iter_query_chunks, read_query
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    path = tmp_path / "satis.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE satis (id INTEGER, il TEXT, tutar REAL)")
+        conn.executemany(
+            "INSERT INTO satis VALUES (?, ?, ?)",
+            [(i, ["Ankara", "Van", "İzmir"][i % 3], None if i % 7 == 0 else i * 1.5) for i in range(1, 251)],
+        )
+    dispose_all_engines()
+    yield f"sqlite:///{path}"
+    dispose_all_engines()
+
+
+def test_engine_is_pooled_and_idle_engines_are_disposed(db_url, monkeypatch):
+    """Aynı bağlantı adresi aynı engine'i kullanmalı; boşta kalan engine kapatılmalı"""
+    engine = get_engine(db_url)
+    assert get_engine(db_url) is engine
+    read_query(db_url, "SELECT * FROM satis", 10)
+    stats = engine_stats()
+    assert len(stats) == 1 and stats[0]["dialect"] == "sqlite" and stats[0]["checked_out"] == 0
+
+    monkeypatch.setattr(sql_engine, "SQL_ENGINE_IDLE_SECONDS", -1)
+    assert sql_engine.evict_idle_engines() == 1
+    assert engine_stats() == []
+
+    monkeypatch.setattr(sql_engine, "SQL_ENGINE_IDLE_SECONDS", 600)
+    monkeypatch.setattr(sql_engine, "SQL_MAX_ENGINES", 1)
+    get_engine(db_url)
+    get_engine("sqlite://")
+    assert [s["url"] for s in engine_stats()] == ["sqlite://"]
+
+
+def test_limit_is_pushed_down_and_rows_are_fetched_in_batches(db_url, monkeypatch):
+    """LIMIT sorguya eklenmeli; satırlar fetchmany ile parça parça gelmeli"""
+    statements = []
+    from sqlalchemy import event
+    event.listen(get_engine(db_url), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    chunks = list(iter_query_chunks(db_url, "SELECT id, tutar FROM satis WHERE id > 0;", max_rows=101, fetch_size=40))
+    assert [len(c) for c in chunks] == [40, 40, 21]
+    assert "LIMIT" in statements[-1] and "opradox_q" in statements[-1]
+
+    # ORDER BY'lı sorgu sarılmadan çalışır, sıra korunur; limit okumada uygulanır
+    df, truncated = read_query(db_url, "SELECT id FROM satis ORDER BY id DESC", 3)
+    assert truncated and df["id"].tolist() == [250, 249, 248]
+    assert "opradox_q" not in statements[-1]
+
+    df, truncated = read_query(db_url, "WITH t AS (SELECT * FROM satis WHERE il = 'Van') SELECT * FROM t", 1000)
+    assert not truncated and len(df) == 84
+
+    # Sondaki satır yorumu alt sorguyu kapatan parantezi yutmamalı
+    df, truncated = read_query(db_url, "SELECT * FROM satis ORDER BY id -- ilk satırlar", 10)
+    assert truncated and df["id"].tolist() == list(range(1, 11))
+
+    df, truncated = read_query(db_url, "SELECT * FROM satis WHERE id < 0", 5)
+    assert list(df.columns) == ["id", "il", "tutar"] and len(df) == 0 and not truncated
+
+    # Havuz dolunca istek beklemeden 503 ile döner
+    dispose_all_engines()
+    monkeypatch.setattr(sql_engine, "SQL_POOL_SIZE", 1)
+    monkeypatch.setattr(sql_engine, "SQL_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(sql_engine, "SQL_POOL_TIMEOUT", 0.1)
+    with get_engine(db_url).connect():
+        with pytest.raises(HTTPException) as exc:
+            read_query(db_url, "SELECT * FROM satis", 5)
+    assert exc.value.status_code == 503
+    assert len(read_query(db_url, "SELECT * FROM satis", 5)[0]) == 5
+
+
+def test_mssql_order_by_is_not_wrapped_without_offset():
+    """SQL Server türetilmiş tabloda TOP/OFFSET'siz ORDER BY kabul etmez"""
+    from sqlalchemy.dialects import mssql
+
+    dialect = mssql.dialect()
+    render = lambda stmt: str(stmt.compile(dialect=dialect))
+
+    assert render(sql_engine._statement("SELECT * FROM t", 1001, dialect)).startswith("SELECT TOP __[POSTCOMPILE_param_1] *")
+    assert render(sql_engine._statement("SELECT * FROM t ORDER BY x", 1001, dialect)) == "SELECT * FROM t ORDER BY x"
+    # Alt sorgu ve pencere fonksiyonundaki ORDER BY sorgunun kendisine ait değil
+    windowed = "SELECT ROW_NUMBER() OVER (ORDER BY x) AS n, 'order by' AS s FROM t"
+    assert "opradox_q" in render(sql_engine._statement(windowed, 10, dialect))
+
+    incremental = render(sql_engine._statement("SELECT * FROM t ORDER BY x", 10, dialect, after=("id", 5)))
+    assert "ORDER BY x\nOFFSET 0 ROWS\n) opradox_q" in incremental and incremental.endswith("ORDER BY id")
+
+
+def test_execute_registers_dataset_and_redacts_password(db_url):
+    """/viz/sql/execute sonucu veri seti olarak kaydetmeli; NULL değerler None dönmeli"""
+    response = client.post("/viz/sql/execute", json={
+        "connection_string": db_url, "query": "SELECT * FROM satis ORDER BY id", "max_rows": 100,
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["row_count"] == 100 and body["truncated"] is True
+    assert body["data"][6] == {"id": 7, "il": "Van", "tutar": None}
+
+    entry = get_dataset(body["dataset_id"])
+    assert entry.source == "sql" and entry.row_count == 100 and entry.meta["truncated"]
+    assert get_dataset_frame(body["dataset_id"])["id"].tolist() == list(range(1, 101))
+    page = client.get(body["page_url"], params={"limit": 5}).json()
+    assert [row["id"] for row in page["rows"]] == [1, 2, 3, 4, 5]
+
+    preview = client.post("/viz/sql/table-preview", data={"connection_string": db_url, "table_name": "satis", "limit": 3})
+    assert preview.status_code == 200 and preview.json()["row_count"] == 3
+    tables = client.post("/viz/sql/list-tables", data={"connection_string": db_url}).json()
+    assert tables["tables"][0]["columns"] == ["id", "il", "tutar"]
+    assert client.get("/viz/sql/pool").json()["total"] == 1
+
+    assert sql_engine.redacted_url("postgresql://ali:gizli@db:5432/satis") == "postgresql://ali:***@db:5432/satis"
+    forbidden = client.post("/viz/sql/execute", json={"connection_string": db_url, "query": "DELETE FROM satis"})
+    assert forbidden.status_code == 400
@@ -56,4 +56,31 @@ def test_chi_square():
     assert "chi2_statistic" in result
     assert "p_value" in result
 
+def _cluster_csv(rows_per_group: int = 40) -> bytes:
+    lines = ["x,y"]
+    for cx, cy in ((0, 0), (10, 10), (20, 0)):
+        for i in range(rows_per_group):
+            lines.append(f"{cx + (i % 7) * 0.1},{cy + (i % 5) * 0.1}")
+    return create_csv("\n".join(lines))
+
+def test_kmeans_large_mode_with_sweep():
+    files = {"file": ("test.csv", _cluster_csv(), "text/csv")}
+    data = {"columns": json.dumps(["x", "y"]), "n_clusters": "3", "mode": "large", "k_sweep": "2-5"}
+    response = client.post("/viz/kmeans", files=files, data=data)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["mode"] == "large"
+    assert sorted(result["cluster_sizes"]) == [40, 40, 40]
+    assert result["suggested_k"] == 3
+    assert len(result["points"]["x"]) == 120
+
+def test_pca_modes_agree():
+    files = {"file": ("test.csv", _cluster_csv(), "text/csv")}
+    exact = client.post("/viz/pca", files=files, data={"columns": json.dumps(["x", "y"]), "mode": "exact"}).json()
+    files = {"file": ("test.csv", _cluster_csv(), "text/csv")}
+    large = client.post("/viz/pca", files=files, data={"columns": json.dumps(["x", "y"]), "mode": "large"}).json()
+    assert exact["mode"] == "exact" and large["solver"] == "randomized"
+    assert abs(exact["total_variance"] - large["total_variance"]) < 1e-3
+    assert len(exact["components"]) == 100
+
 # Additional tests can be added for other endpoints similarly
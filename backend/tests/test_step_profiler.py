@@ -0,0 +1,78 @@
+"""
+Step Profiler Tests - rapor oluşturucu adım süreleri, satır/bellek ölçümü ve kısıtlı ilerleme olayları
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+import pandas as pd
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import storage, queue_storage, queue_engine
+from app.job_control import CancellationToken, use_token
+from app.queue_storage import progress_batcher
+from app.scenarios import custom_report_builder_pro
+
+
+def _df():
+    return pd.DataFrame({
+        "bolge": ["A", "B", "A", "C"] * 50,
+        "tutar": range(200),
+    })
+
+
+ACTIONS = [
+    {"type": "filter", "column": "tutar", "operator": ">", "value": 49},
+    {"type": "sort", "column": "tutar", "direction": "desc"},
+    {"type": "filter", "column": "olmayan_sutun", "operator": "==", "value": "x"},
+]
+
+
+def test_profile_has_one_record_per_action():
+    """Her adım süre, satır giriş/çıkış ve bellek farkıyla raporlanmalı"""
+    result = custom_report_builder_pro.run(_df(), {"config": ACTIONS})
+    profile = result["technical_details"]["profile"]
+    steps = profile["steps"]
+
+    assert [s["type"] for s in steps] == ["filter", "sort", "filter", "excel_output"]
+    assert (steps[0]["rows_in"], steps[0]["rows_out"]) == (200, 150)
+    assert steps[0]["mem_delta_bytes"] < 0
+    assert all(s["duration_ms"] >= 0 for s in steps)
+    assert len(profile["slowest"]) == 3
+    assert result["applied_steps"] + result["skipped_steps"] == len(ACTIONS)
+
+
+def test_preview_profile_and_progress_reporting():
+    """Önizleme de profil döndürmeli; kuyruk işinde adım ilerlemesi bildirilmeli"""
+    seen = []
+    token = CancellationToken("p1", on_progress=lambda p, m: seen.append(p))
+    with use_token(token):
+        result = custom_report_builder_pro.run(_df(), {"config": ACTIONS[:2], "is_preview": True})
+    assert len(result["technical_details"]["profile"]["steps"]) == 2
+    assert seen == [0.0, 0.5]
+
+
+def test_progress_events_are_throttled(monkeypatch, tmp_path):
+    """Sık ilerleme güncellemeleri DB'ye yazılmalı ama WebSocket olayı kısıtlanmalı"""
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "queue.db")
+    queue_storage.init_queue_table()
+    monkeypatch.setattr(progress_batcher, "flush_interval_s", 3600.0)
+    sent = []
+
+    async def fake_broadcast(job_id):
+        sent.append(job_id)
+
+    monkeypatch.setattr(queue_engine, "_broadcast_progress", fake_broadcast)
+
+    async def scenario():
+        notifier = queue_engine.ProgressNotifier("job_throttle", asyncio.get_running_loop(), interval_ms=10_000)
+        for i in range(20):
+            notifier(i / 20, "adım")
+        await asyncio.sleep(0.01)
+        return notifier
+
+    notifier = asyncio.run(scenario())
+    assert notifier.events_sent == 1 and sent == ["job_throttle"]
+    assert progress_batcher.pop("job_throttle")["progress"] == 19 / 20
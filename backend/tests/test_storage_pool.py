@@ -0,0 +1,107 @@
+"""
+Storage Pool Tests - WAL, bağlantı havuzu ve toplu ilerleme yazımı
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import storage, queue_storage
+from app.queue_storage import QueueJob, ProgressBatcher
+
+
+def _use_temp_db(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "test.db")
+    queue_storage.init_queue_table()
+
+
+def test_pool_enables_wal_and_reuses_connections(tmp_path):
+    """Bağlantılar WAL modunda açılmalı ve tekrar kullanılmalı"""
+    pool = storage.SQLitePool(tmp_path / "pool.db", max_size=2)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        # İç içe kullanım aynı bağlantıyı döndürmeli (kilitlenme yok)
+        with pool.connection() as inner:
+            assert inner is conn
+    with pool.connection():
+        pass
+    stats = pool.stats()
+    assert stats["open"] == 1 and stats["reused_total"] == 1
+    pool.close_all()
+
+
+def test_pool_is_bounded(tmp_path):
+    """Havuz dolunca yeni bağlantı açılmamalı, zaman aşımında hata dönmeli"""
+    pool = storage.SQLitePool(tmp_path / "bounded.db", max_size=1)
+    held = pool.acquire()
+    errors = []
+
+    def worker():
+        try:
+            pool.acquire(timeout=0.05)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert errors and "havuzu dolu" in errors[0]
+    assert pool.stats()["open"] == 1
+    pool.release(held)
+    pool.close_all()
+
+
+def test_connection_borrowed_during_close_all_is_closed_on_release(tmp_path):
+    """close_all sırasında ödünç alınmış bağlantı geri verilince kapanmalı"""
+    pool = storage.SQLitePool(tmp_path / "close.db", max_size=2)
+    held = pool.acquire()
+    pool.close_all()
+    pool.release(held)
+    try:
+        held.execute("SELECT 1")
+        assert False, "bağlantı kapalı olmalıydı"
+    except storage.sqlite3.ProgrammingError:
+        pass
+    assert pool.stats()["open"] == 0 and pool.stats()["idle"] == 0
+
+    # Havuz kapatıldıktan sonra da yeni bağlantı verebilmeli
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    assert pool.stats()["idle"] == 1
+    pool.close_all()
+
+
+def test_progress_updates_coalesce_into_one_flush(monkeypatch, tmp_path):
+    """Aynı işe ait ardışık güncellemeler tek satır yazımına indirgenmeli"""
+    _use_temp_db(monkeypatch, tmp_path)
+    batcher = ProgressBatcher(flush_interval_ms=60_000, max_pending=100)
+    monkeypatch.setattr(queue_storage, "progress_batcher", batcher)
+    job = QueueJob(job_id=QueueJob.generate_id(), user_key="u", service="excel", action="run")
+    queue_storage.insert_job(job)
+
+    for i in range(1, 11):
+        queue_storage.queue_progress_update(job.job_id, progress=i / 10, message=f"step {i}")
+    # Henüz yazılmadı ama okuma bekleyen değeri görmeli
+    assert queue_storage.get_job(job.job_id).progress == 1.0
+    assert batcher.flush() == 1
+    assert batcher.stats()["flushes_total"] == 1
+    assert queue_storage.get_job(job.job_id).message == "step 10"
+
+
+def test_status_change_absorbs_pending_progress(monkeypatch, tmp_path):
+    """Durum geçişi bekleyen güncellemeyi içermeli; sonraki flush üzerine yazmamalı"""
+    _use_temp_db(monkeypatch, tmp_path)
+    batcher = ProgressBatcher(flush_interval_ms=60_000, max_pending=100)
+    monkeypatch.setattr(queue_storage, "progress_batcher", batcher)
+    job = QueueJob(job_id=QueueJob.generate_id(), user_key="u", service="excel", action="run")
+    queue_storage.insert_job(job)
+
+    queue_storage.queue_progress_update(job.job_id, progress=0.5, message="Processing...")
+    queue_storage.update_job_status(job.job_id, "done", progress=1.0)
+    assert batcher.flush() == 0
+    stored = queue_storage.get_job(job.job_id)
+    assert stored.status == "done" and stored.progress == 1.0
+    assert stored.message == "Processing..."
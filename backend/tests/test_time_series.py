@@ -0,0 +1,73 @@
+"""
+Time Series Engine Tests - ortak zaman serisi motoru ve /viz/time-series
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app import time_series as ts
+from app.scenarios.custom_report_builder_pro import _compute_ytd_sum, _compute_yoy_change
+
+client = TestClient(app)
+
+
+def test_parse_dates_dayfirst_on_uniques():
+    """Tekrarlayan tarihler gün-önce parse edilmeli"""
+    parsed = ts.parse_dates(pd.Series(["01.02.2024", "01.02.2024", "15.03.2024", None]))
+    assert parsed.iloc[0] == pd.Timestamp("2024-02-01")
+    assert parsed.iloc[2] == pd.Timestamp("2024-03-15")
+    assert pd.isna(parsed.iloc[3])
+
+
+def test_resample_fills_missing_periods():
+    """Boş aylar 0 ile doldurulmalı"""
+    s = pd.Series([1.0, 2.0, 4.0], index=pd.to_datetime(["2024-01-05", "2024-01-20", "2024-03-01"]))
+    monthly = ts.resample(s, "M", "sum")
+    assert monthly.tolist() == [3.0, 0.0, 4.0]
+    assert monthly.index[0] == pd.Timestamp("2024-01-01")
+
+
+def test_acf_matches_direct_formula():
+    """FFT ACF doğrudan hesapla aynı olmalı"""
+    x = np.random.default_rng(0).normal(size=200)
+    xc = x - x.mean()
+    direct = [float((xc[:len(x) - k] * xc[k:]).sum() / (xc * xc).sum()) for k in range(6)]
+    assert np.allclose(ts.acf(x, 5), direct)
+
+
+def test_report_builder_ytd_and_yoy():
+    """YTD yıl başında sıfırlanmalı, YoY aynı ayın geçen yılıyla karşılaştırmalı"""
+    df = pd.DataFrame({
+        "Tarih": ["15.01.2023", "10.02.2023", "20.01.2024", "05.02.2024"],
+        "Tutar": [10, 20, 15, 30],
+    })
+    ytd = _compute_ytd_sum(df, {"date_column": "Tarih", "value_column": "Tutar"}, "YTD")
+    assert ytd["YTD"].tolist() == [10, 30, 15, 45]
+    yoy = _compute_yoy_change(df, {"date_column": "Tarih", "value_column": "Tutar"}, "YoY")
+    assert yoy["YoY"].tolist()[2:] == [50.0, 50.0]
+
+
+def test_time_series_endpoint_monthly_decomposition():
+    """/viz/time-series aylık yeniden örnekleme + ayrıştırma döndürmeli"""
+    dates = pd.date_range("2020-01-01", periods=36 * 30, freq="D")
+    values = 100 + 10 * np.sin(2 * np.pi * dates.month / 12) + np.arange(len(dates)) * 0.01
+    csv = pd.DataFrame({"tarih": dates.strftime("%Y-%m-%d"), "deger": values}).to_csv(index=False)
+
+    response = client.post(
+        "/viz/time-series",
+        files={"file": ("ts.csv", csv.encode(), "text/csv")},
+        data={"date_column": "tarih", "value_column": "deger", "freq": "M", "agg": "mean", "decompose": "true"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["freq"] == "M"
+    assert len(result["resampled"]["values"]) == result["n"]
+    assert result["decomposition"]["period"] == 12
+    assert result["yoy_change"][12] is not None
@@ -0,0 +1,108 @@
+"""
+Type Inference Tests - örneklem + benzersiz değer üzerinden sütun tipi çıkarımı
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import type_inference
+from app.type_inference import infer_column, infer_column_types, coerce_column
+from app.excel_utils import smart_type_coercion
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_turkish_numbers_and_dayfirst_dates():
+    """1.234,56 Türkçe sayı, 01.02.2024 gün-önce tarih olarak tanınmalı"""
+    amounts = pd.Series(["1.234,56", "12,5", "1.000", None, "7"], dtype=object)
+    verdict = infer_column(amounts)
+    assert (verdict.kind, verdict.number_format, verdict.valid_ratio) == ("numeric", "tr", 1.0)
+    assert coerce_column(amounts, verdict).tolist()[:3] == [1234.56, 12.5, 1000.0]
+
+    # Virgül hiç yoksa nokta ondalık sayılır
+    assert infer_column(pd.Series(["1.5", "2.25", "3"], dtype=object)).number_format == "plain"
+
+    dates = pd.Series(["01.02.2024", "15.03.2024", "bilinmiyor", "28.02.2024", "01.03.2024"], dtype=object)
+    verdict = infer_column(dates)
+    assert (verdict.kind, verdict.date_format) == ("date", "%d.%m.%Y")
+    assert verdict.valid_ratio == 0.8 and verdict.invalid_values == ["bilinmiyor"]
+    assert coerce_column(dates, verdict)[0] == pd.Timestamp("2024-02-01")
+
+    assert infer_column(pd.Series(["Ankara", "İzmir", "2024"], dtype=object)).kind == "text"
+    assert infer_column(pd.Series([None, None], dtype=object)).kind == "empty"
+
+
+def test_sample_rejects_text_without_full_scan(monkeypatch):
+    """Metin sütunu örneklemde elenmeli; aday sütun tüm benzersiz değerlerle doğrulanmalı"""
+    monkeypatch.setattr(type_inference, "TYPE_SAMPLE_ROWS", 100)
+    calls = []
+    original = type_inference._factorize
+    monkeypatch.setattr(type_inference, "_factorize", lambda s: calls.append(s.name) or original(s))
+
+    rows = 10_000
+    df = pd.DataFrame({
+        "ad": np.array(["Ayşe", "Mehmet", "Zeynep"] * (rows // 3 + 1))[:rows],
+        "tutar": [str(i % 50) for i in range(rows)],
+    })
+    df.loc[rows - 1, "tutar"] = "hatalı"  # örneklemin göremeyebileceği son satır
+    verdicts = infer_column_types(df)
+
+    assert verdicts["ad"].kind == "text" and verdicts["tutar"].kind == "numeric"
+    assert calls == ["tutar"]
+    assert verdicts["tutar"].invalid_values == ["hatalı"]
+
+
+def test_long_column_is_confirmed_on_bounded_sample(monkeypatch):
+    """Uzun sütun sınırlı bir örneklemle doğrulanmalı; dönüşüm yine tüm satırları kapsamalı"""
+    monkeypatch.setattr(type_inference, "TYPE_CONFIRM_ROWS", 1000)
+    sizes = []
+    original = type_inference._factorize
+    monkeypatch.setattr(type_inference, "_factorize", lambda s: sizes.append(len(s)) or original(s))
+
+    rows = 50_000
+    amounts = pd.Series([f"{i % 997},5" for i in range(rows)], dtype=object)
+    amounts[::10] = "yok"
+    verdict = infer_column(amounts)
+
+    assert (verdict.kind, verdict.number_format) == ("numeric", "tr")
+    assert sizes == [1000] and abs(verdict.valid_ratio - 0.9) < 0.01
+    assert verdict.invalid_values == ["yok"]
+    converted = coerce_column(amounts, verdict)
+    assert sizes[-1] == rows and converted.notna().sum() == rows - rows // 10
+
+
+def test_verdicts_are_cached_and_feed_smart_coercion(monkeypatch):
+    """Aynı içerik özeti için sonuç önbellekten gelmeli; smart_type_coercion kararı kullanmalı"""
+    type_inference.clear_type_cache()
+    df = pd.DataFrame({"maas": ["12.500,00", "9.750,50", "yok"], "il": ["Ankara", "Bursa", "Van"]})
+    first = infer_column_types(df, threshold=0.6, cache_key=("sha", None, 0))
+
+    monkeypatch.setattr(type_inference, "infer_column", lambda *a, **k: (_ for _ in ()).throw(AssertionError))
+    assert infer_column_types(df, threshold=0.6, cache_key=("sha", None, 0)) is first
+
+    df, report = smart_type_coercion(df, threshold=0.6, column_types=first)
+    assert df["maas"].tolist()[:2] == [12500.0, 9750.5]
+    assert report["maas"]["failed_values"] == ["yok"] and report["maas"]["number_format"] == "tr"
+    assert df["il"].dtype == object
+
+
+def test_viz_data_and_inspect_share_column_types():
+    """/viz/data ve /ui/inspect aynı sütun tiplerini döndürmeli"""
+    # Virgüllü sayılar CSV ayracıyla çakışmasın diye tırnaklanır
+    csv = 'tarih,tutar,il\n01.02.2024,"1.234,50",Ankara\n02.02.2024,"99,90",Bursa\n'
+    files = {"file": ("veri.csv", csv.encode(), "text/csv")}
+
+    body = client.post("/viz/data", files=files).json()
+    types = {c["name"]: c["type"] for c in body["columns_info"]}
+    assert types == {"tarih": "date", "tutar": "numeric", "il": "text"}
+    assert body["data"][0]["tutar"] == 1234.5
+
+    body = client.post("/ui/inspect", files=files).json()
+    assert {c: t["kind"] for c, t in body["column_types"].items()} == types
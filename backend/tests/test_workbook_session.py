@@ -0,0 +1,144 @@
+"""
+Workbook Session Tests - dosyanın bir kez açılması, sayfaların tembel ayrıştırılıp önbelleklenmesi
+"""
+import sys
+import json
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import workbook_session
+from app.ingest import ingest_file
+from app.workbook_session import session_for, workbook_stats, clear_sessions
+from app.main import app
+
+client = TestClient(app)
+
+
+def _workbook() -> bytes:
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"kod": [1, 2, 3], "ad": ["Ayşe", "Ali", "Can"]}).to_excel(writer, sheet_name="Öğrenciler", index=False)
+        pd.DataFrame({"kod": [1, 3], "not": [85, 70]}).to_excel(writer, sheet_name="Notlar & Puanlar", index=False)
+        pd.DataFrame({"x": [0]}).to_excel(writer, sheet_name="Boş", index=False)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sessions():
+    clear_sessions()
+    yield
+    clear_sessions()
+
+
+def test_sheet_names_from_metadata_and_lazy_cached_sheets(monkeypatch):
+    """Sayfa adları hücre okunmadan gelmeli; sayfa ilk kullanımda bir kez ayrıştırılmalı"""
+    parsed = []
+    original = workbook_session.read_table_from_ingested
+    monkeypatch.setattr(workbook_session, "read_table_from_ingested", lambda ing, **kw: parsed.append(kw["sheet_name"]) or original(ing, **kw))
+
+    session = session_for(ingest_file(BytesIO(_workbook()), "okul.xlsx"))
+    assert session.sheet_names == ["Öğrenciler", "Notlar & Puanlar", "Boş"]
+    assert parsed == []
+
+    first = session.sheet("Notlar & Puanlar")
+    first["not"] = 0  # kopya: önbellekteki tablo değişmemeli
+    again = session.sheet("Notlar & Puanlar")
+    assert again["not"].tolist() == [85, 70]
+    assert parsed == ["Notlar & Puanlar"] and (session.parses, session.hits) == (1, 1)
+
+    # İlk sayfa: None ve ad ile aynı önbellek girdisi
+    session.sheet()
+    session.sheet("Öğrenciler")
+    assert parsed == ["Notlar & Puanlar", "Öğrenciler"]
+
+
+def test_same_content_reuses_session_and_prefetch_runs_in_parallel(monkeypatch):
+    """Aynı içerik aynı oturumu kullanmalı; birden fazla eksik sayfa paralel ayrıştırılmalı"""
+    data = _workbook()
+    session = session_for(ingest_file(BytesIO(data), "okul.xlsx"))
+    assert session_for(ingest_file(BytesIO(data), "kopya.xlsx")) is session
+
+    threads = set()
+    original = workbook_session.read_table_from_ingested
+    monkeypatch.setattr(
+        workbook_session, "read_table_from_ingested",
+        lambda ing, **kw: threads.add(threading.current_thread().name) or original(ing, **kw),
+    )
+    session.prefetch([("Öğrenciler", 0), ("Notlar & Puanlar", 0), ("Yok", 0)])
+    assert len(threads) >= 2 and threading.current_thread().name not in threads
+    assert session.parses == 2  # bilinmeyen sayfa yalnızca loglanır
+
+    session.sheet("Öğrenciler")
+    assert session.parses == 2 and workbook_stats()[0]["cached_frames"] == 2
+
+
+def test_sessions_over_budget_are_released(monkeypatch):
+    """Önbellek bütçesi aşılınca en eski oturumun tabloları bırakılmalı"""
+    monkeypatch.setattr(workbook_session, "WORKBOOK_MAX_SESSIONS", 1)
+    old = session_for(ingest_file(BytesIO(b"a,b\n1,2\n"), "eski.csv"))
+    old.sheet()
+    new = session_for(ingest_file(BytesIO(b"a,b\n3,4\n"), "yeni.csv"))
+    assert new is not old and old.nbytes == 0
+    assert [s["filename"] for s in workbook_stats()] == ["yeni.csv"]
+
+
+def test_cached_frames_are_reserved_and_reclaimed_for_uploads(monkeypatch):
+    """Önbellekteki tablolar bellek bütçesinde ayrılmalı; yeni yükleme için yer açılınca bırakılmalı"""
+    from app.admission import MemoryBudget, estimate_from_limits
+    budget = MemoryBudget(budget_bytes=64 * 1024 ** 2)
+    budget.add_reclaimer(workbook_session._reclaim)
+    monkeypatch.setattr(workbook_session, "memory_budget", budget)
+
+    session = session_for(ingest_file(BytesIO(_workbook()), "okul.xlsx"))
+    session.sheet("Öğrenciler")
+    assert budget.reserved_bytes() == session.nbytes > 0
+
+    # Tek seferlik okuma önbelleğe girmez
+    session.sheet("Notlar & Puanlar", cache=False)
+    assert workbook_stats()[0]["cached_frames"] == 1 and budget.reserved_bytes() == session.nbytes
+
+    # Yeni yükleme ancak önbellek boşaltılınca sığar
+    cached = session.nbytes
+    estimate = estimate_from_limits({"input_bytes": 1024, "rows": 10, "cols": 2, "ext": ".csv"})
+    budget.reserve("upload:x", budget.budget_bytes - estimate.peak_bytes - cached // 2)
+    assert budget.decide(estimate)[0] == "run"
+    assert workbook_stats() == [] and session.nbytes == 0
+    assert budget.reserved_bytes() == budget.budget_bytes - estimate.peak_bytes - cached // 2
+
+
+def test_run_crosssheet_merge_reads_workbook_once(monkeypatch, tmp_path):
+    """Crosssheet birleştirme: ana sayfa ve diğer sayfa aynı oturumdan gelmeli"""
+    monkeypatch.chdir(tmp_path)
+    config = {"actions": [{
+        "type": "merge", "use_crosssheet": True, "crosssheet_name": "Notlar & Puanlar",
+        "left_on": "kod", "right_on": "kod", "how": "left",
+    }]}
+    files = {"file": ("okul.xlsx", _workbook(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    response = client.post(
+        "/run/custom-report-builder-pro",
+        files=files,
+        data={"params": json.dumps({"config": json.dumps(config)}), "sheet_name": "Öğrenciler"},
+    )
+    assert response.status_code == 200, response.text
+    stats = workbook_stats()
+    assert len(stats) == 1 and stats[0]["parses"] == 2 and stats[0]["hits"] >= 1
+
+    # Tek sayfalık /run tabloyu önbelleğe almaz
+    clear_sessions()
+    params = {"condition_column": "ad", "condition_value": "Ali", "target_column": "kod"}
+    response = client.post("/run/sum-if", files=files, data={"params": json.dumps(params), "sheet_name": "Öğrenciler"})
+    assert response.status_code == 200, response.text
+    assert workbook_stats()[0]["cached_frames"] == 0 and workbook_stats()[0]["parses"] == 1
+
+    # Frontend'in sayfa listesi isteği aynı oturumu kullanır
+    sheets = client.post("/viz/sheets", files=files).json()
+    assert sheets["sheets"] == ["Öğrenciler", "Notlar & Puanlar", "Boş"]
+    assert len(workbook_stats()) == 1
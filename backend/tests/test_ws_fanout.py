@@ -0,0 +1,90 @@
+"""
+WebSocket Fan-out Tests - kuyruklu gönderim, birleştirme ve yavaş istemci
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ws_fanout import FanoutHub
+
+
+class RecordingSocket:
+    """send_text çağrılarını kaydeden basit istemci; gate kapalıyken bekler"""
+
+    def __init__(self, blocked: bool = False):
+        self.frames = []
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+        self.closed_with = None
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.frames.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_slow_client_does_not_block_others():
+    """Bloklu istemci varken diğer istemci tüm mesajları almalı"""
+    async def scenario():
+        hub = FanoutHub("t", max_queue=100, max_fps=0)
+        fast, slow = RecordingSocket(), RecordingSocket(blocked=True)
+        hub.register("room", fast)
+        hub.register("room", slow)
+        for i in range(20):
+            hub.publish("room", {"type": "chat", "i": i})
+        await asyncio.sleep(0.05)
+        assert [f["i"] for f in fast.frames] == list(range(20))
+        assert slow.frames == []
+        slow.gate.set()
+        await asyncio.sleep(0.05)
+        assert len(slow.frames) == 20
+
+    asyncio.run(scenario())
+
+
+def test_cursor_events_are_latest_wins_and_rate_capped():
+    """Aynı kullanıcının cursor olayları birleşmeli; son konum kaybolmamalı"""
+    async def scenario():
+        hub = FanoutHub("t", max_queue=100, max_fps=20)
+        ws = RecordingSocket()
+        hub.register("room", ws)
+        for x in range(200):
+            hub.publish("room", {"type": "cursor", "user_id": "u1", "x": x}, coalesce_key="cursor:u1")
+        await asyncio.sleep(0.15)
+        xs = [f["x"] for f in ws.frames]
+        assert xs[0] == 0 and xs[-1] == 199
+        assert len(xs) <= 3
+        assert hub.stats()["throttled"] > 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_degrades_then_drops_client():
+    """Kuyruk dolunca önce eski cursor kareleri atılmalı, sonra istemci düşürülmeli"""
+    async def scenario():
+        hub = FanoutHub("t", max_queue=3, max_fps=0)
+        stuck = RecordingSocket(blocked=True)
+        dropped = []
+        hub.register("room", stuck, on_drop=dropped.append)
+        hub.publish("room", {"n": 0})
+        await asyncio.sleep(0)  # writer ilk kareyi alıp bloklansın
+        hub.publish("room", {"type": "cursor"}, coalesce_key="c")
+        hub.publish("room", {"n": 1})
+        hub.publish("room", {"n": 2})
+        hub.publish("room", {"n": 3})  # cursor atılır, yer açılır
+        assert not dropped
+        hub.publish("room", {"n": 4})
+        await asyncio.sleep(0.01)
+        assert dropped == [stuck]
+        assert stuck.closed_with == 1013
+        assert hub.stats()["slow_disconnects"] == 1
+        assert hub.group_size("room") == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,105 @@
+"""
+XLSX Stream Tests - salt okunur akış okuyucu, birleştirilmiş başlıklar ve parça parça toplama
+"""
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+# Backend app modülünü import edebilmek için path ekle
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.xlsx_stream import iter_xlsx_chunks, merged_ranges
+from app.chunked_exec import run_chunked
+from app.scenarios import sum_if, pivot_sum_by_category
+
+
+def _plain_xlsx(rows=2500) -> bytes:
+    buf = BytesIO()
+    pd.DataFrame({
+        "bolge": ["Ege", "Marmara", "Akdeniz", "Ege"] * (rows // 4),
+        "tutar": range(rows // 4 * 4),
+        "oran": [0.5, 1.25, 2.0, 3.5] * (rows // 4),
+    }).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _grouped_xlsx() -> bytes:
+    """YKS tablosu gibi: başlık satırı, birleştirilmiş grup başlığı, alt başlıklar"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["TABLO-4 Lisans Programları"])
+    ws.merge_cells("A1:E1")
+    ws.append([None, None, "Genel Kontenjan", None, "Okul Birincisi"])
+    ws.merge_cells("C2:D2")
+    ws.append(["Program Kodu", "Program Adı", "Kontenjan", "Yerleşen", "Kontenjan"])
+    ws.merge_cells("A2:A3")
+    ws["A2"] = "Program Kodu"
+    ws.append(["101", "Psikoloji", 40, 40, 1])
+    ws.append([None, None, None, None, None])
+    ws.append(["102", "Hukuk", 100, 98, 2])
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_chunks_match_read_excel():
+    """Parçalar birleşince read_excel ile aynı tablo elde edilmeli; index parçalar arasında sürmeli"""
+    raw = _plain_xlsx()
+    chunks = list(iter_xlsx_chunks(BytesIO(raw), chunk_rows=1000))
+
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    assert chunks[1].index[0] == 1000
+    pd.testing.assert_frame_equal(pd.concat(chunks), pd.read_excel(BytesIO(raw)))
+
+
+def test_merged_multi_row_header_is_flattened():
+    """Birleştirilmiş grup başlıkları kapsadığı sütunlara yayılıp alt başlıkla birleşmeli"""
+    raw = _grouped_xlsx()
+    assert (1, 2, 1, 3) in merged_ranges(BytesIO(raw))
+
+    df = next(iter_xlsx_chunks(BytesIO(raw), header_row=1, header_rows=2))
+    assert list(df.columns) == [
+        "Program Kodu", "Program Adı", "Genel Kontenjan - Kontenjan",
+        "Genel Kontenjan - Yerleşen", "Okul Birincisi - Kontenjan",
+    ]
+    assert df["Program Adı"].tolist() == ["Psikoloji", "Hukuk"]  # boş satır atlanır
+    assert df["Genel Kontenjan - Kontenjan"].dtype == "int64"
+
+    single = next(iter_xlsx_chunks(BytesIO(raw), header_row=2))
+    assert list(single.columns)[2:] == ["Kontenjan", "Yerleşen", "Kontenjan.1"]
+
+
+def test_single_row_merged_header_matches_read_excel():
+    """Tek satırlık başlıkta birleştirilmiş hücre read_excel gibi 'Unnamed: i' bırakmalı"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Bolge", "Kontenjan", None, "Tutar"])
+    ws.merge_cells("B1:C1")
+    ws.append(["Ege", 10, 4, 100])
+    ws.append(["Marmara", 20, 6, 200])
+    buf = BytesIO()
+    wb.save(buf)
+
+    df = next(iter_xlsx_chunks(BytesIO(buf.getvalue())))
+    expected = pd.read_excel(BytesIO(buf.getvalue()))
+    assert list(df.columns) == list(expected.columns) == ["Bolge", "Kontenjan", "Unnamed: 2", "Tutar"]
+
+
+def test_chunked_aggregation_over_xlsx():
+    """XLSX de CSV ile aynı parça parça toplama yolundan geçmeli"""
+    raw = _plain_xlsx()
+    full = pd.read_excel(BytesIO(raw))
+
+    params = {"condition_column": "bolge", "condition_value": "Ege", "target_column": "tutar"}
+    result = run_chunked(sum_if.partial_aggregator, BytesIO(raw), params, chunk_rows=700, ext=".xlsx")
+    assert result["summary"] == sum_if.run(full, params)["summary"]
+    assert result["technical_details"]["execution"]["format"] == "xlsx"
+    assert result["technical_details"]["execution"]["chunks"] == 4
+
+    params = {"row_field": "bolge", "value_column": "oran", "aggfunc": "mean"}
+    result = run_chunked(pivot_sum_by_category.partial_aggregator, BytesIO(raw), params, chunk_rows=700, ext=".xlsx")
+    expected = pivot_sum_by_category.run(full, params)["df_out"]
+    pd.testing.assert_frame_equal(result["df_out"], expected)
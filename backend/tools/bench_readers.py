@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Reader Benchmark - Opradox Excel Studio
+Measure parse throughput of every installed reader backend on sample files.
+
+Each file is read with every backend that supports its extension (best of
+--repeat runs) and the result is compared with the default backend. The
+ranking (fastest first, matching backends only) is written to
+READER_BENCHMARK_PATH, where READER_BACKEND=auto picks it up.
+
+Usage:
+    python backend/tools/bench_readers.py                 # bundled samples
+    python backend/tools/bench_readers.py a.xlsx b.csv --repeat 5 --no-save
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Backend modüllerine erişim için path ekle
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.excel_utils import READER_BENCHMARK_PATH, benchmark_backends
+
+SAMPLE_FILES = [
+    BACKEND_DIR.parent / "test_output.xlsx",
+    BACKEND_DIR.parent / "yks_tablo4_2025.xlsx",
+    BACKEND_DIR / "test_data" / "tablo4.csv",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reader backend benchmark")
+    parser.add_argument("files", nargs="*", type=Path, help="Ölçülecek dosyalar (varsayılan: örnek dosyalar)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-save", action="store_true", help="Sıralamayı READER_BENCHMARK_PATH'e yazma")
+    args = parser.parse_args()
+
+    files = args.files or [p for p in SAMPLE_FILES if p.exists()]
+    if not files:
+        print("Ölçülecek dosya bulunamadı")
+        return 1
+
+    print("=" * 72)
+    print("READER BENCHMARK")
+    print("=" * 72)
+    report = benchmark_backends(files, repeat=args.repeat)
+
+    print(f"{'file':<28}{'backend':<18}{'seconds':>10}{'MB/s':>10}{'rows':>9}  match")
+    for row in report["results"]:
+        seconds = f"{row['seconds']:.4f}" if row["seconds"] is not None else "-"
+        mbps = f"{row['mb_per_s']:.2f}" if row["mb_per_s"] is not None else "-"
+        rows = row["rows"] if row["rows"] is not None else "-"
+        match = "yes" if row["matches_default"] else f"NO ({row['error']})"
+        print(f"{row['file'][:27]:<28}{row['backend']:<18}{seconds:>10}{mbps:>10}{rows:>9}  {match}")
+
+    print("\nRanking (fastest first):")
+    for ext, names in report["ranking"].items():
+        print(f"  {ext}: {', '.join(names)}")
+
+    mismatches = [r for r in report["results"] if not r["matches_default"]]
+    if not args.no_save:
+        payload = {"generated_at": datetime.now(timezone.utc).isoformat(), **report}
+        # Atomik yaz
+        READER_BENCHMARK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = READER_BENCHMARK_PATH.with_suffix(".json.tmp")
+        temp_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        temp_path.replace(READER_BENCHMARK_PATH)
+        print(f"\nSaved: {READER_BENCHMARK_PATH}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1005,7 +1005,7 @@ console.log("=== macroStudio.js LOADING ===");
                     file_name: MACRO_STATE.currentFileName,
                     sheet_name: MACRO_STATE.selectedSheet,
                     ...params
-                });
+                }, {}, MACRO_STATE.currentFile);
 
                 if (result.modal_required) {
                     window.QueueModal.openQueueModal(result);
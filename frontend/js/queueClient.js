@@ -122,16 +122,30 @@
     // API CALLS
     // ============================================================
 
+    /**
+     * SHA-256 of an uploaded file (hex). Part of the dedup fingerprint:
+     * without it the server never merges jobs.
+     * @param {Blob} file
+     * @returns {Promise<string|null>}
+     */
+    async function hashInput(file) {
+        if (!file || !window.crypto?.subtle) return null;
+        const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+
     /**
      * Submit a job to the queue
      * @param {string} service - "excel" | "pdf" | "ocr"
      * @param {string} action - "run_scenario" | "extract" | "run"
      * @param {object} params - Job parameters
      * @param {object} limits - Optional limits
+     * @param {Blob} inputFile - Optional uploaded file (hashed for dedup)
      * @returns {Promise<object>} Submit response
      */
-    async function submitJob(service, action, params, limits) {
+    async function submitJob(service, action, params, limits, inputFile) {
         const userKey = getUserKey();
+        const inputHash = await hashInput(inputFile);
 
         const response = await fetch('/queue/submit', {
             method: 'POST',
@@ -141,7 +155,8 @@
                 action: action,
                 params: params || {},
                 limits: limits || {},
-                user_key: userKey
+                user_key: userKey,
+                input_hash: inputHash
             })
         });
 
@@ -219,6 +234,7 @@
         onQueueEvent: onQueueEvent,
         offQueueEvent: offQueueEvent,
         submitJob: submitJob,
+        hashInput: hashInput,
         getJobStatus: getJobStatus,
         cancelJob: cancelJob,
         getQueueStatus: getQueueStatus,